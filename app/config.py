@@ -18,6 +18,30 @@ class Settings(BaseSettings):
     
     # Database
     database_url: str
+
+    # Connection pools (app/db_engines.py). Every API process and every cron run
+    # opens one async and/or one sync pool of this size against the Supabase pooler.
+    db_pool_size: int = 3
+    db_max_overflow: int = 2
+    db_pool_timeout: int = 30  # seconds to wait for a free connection before raising
+    db_pool_recycle: int = 3600
+    db_sync_pool_size: Optional[int] = None  # cron/sync override; defaults to db_pool_size
+    db_sync_max_overflow: Optional[int] = None
+    # PgBouncer transaction mode disables asyncpg statement caching.
+    # None = auto-detect (Supabase transaction pooler listens on :6543)
+    db_pgbouncer_transaction_mode: Optional[bool] = None
+
+    # Optional read replica for read-only market-data endpoints (GET leaderboard,
+    # box detail, time-series, market index). Writes and auth always use database_url.
+    # Reads fall back to the primary while the replica is behind the latest data version.
+    database_read_url: Optional[str] = None
+    db_replica_max_lag_seconds: int = 300
+    db_replica_check_interval: int = 30  # seconds between freshness checks
+
+    # Raw table retention (scripts/compact_raw_tables.py): rows older than this move
+    # from tcg_listings_raw / ebay_sales_raw to Parquet + daily aggregate tables
+    raw_retention_days: int = 90
+    raw_archive_dir: str = "data/archive"  # relative paths resolve from the project root
     
     # Environment
     environment: str = "development"
@@ -58,6 +82,18 @@ class Settings(BaseSettings):
     cache_ttl_leaderboard: int = 1800  # 30 minutes (repeat dashboard loads are instant)
     cache_ttl_box_detail: int = 600  # 10 minutes
     cache_ttl_time_series: int = 1800  # 30 minutes
+
+    # Per-process box history cache (app/services/history_cache.py)
+    history_cache_enabled: bool = True
+    history_cache_max_mb: int = 64  # LRU eviction above this estimated size
+    history_cache_version_check_interval: int = 15  # seconds between MAX(updated_at) checks
+    history_cache_redis: bool = False  # share loaded history between workers via Redis
+
+    # Request metrics / Prometheus /metrics (app/services/request_metrics.py)
+    metrics_enabled: bool = True
+    # If set, /metrics requires "Authorization: Bearer <token>". Required in production:
+    # without it the endpoint answers 404 there (metrics are still collected)
+    metrics_token: Optional[str] = None
     
     # Authentication & Security (Phase 8)
     # SECURITY: In production, JWT_SECRET_KEY MUST be set to a long random string
@@ -110,9 +146,32 @@ class Settings(BaseSettings):
 
     # Apify API (TCGplayer scraping)
     apify_api_token: Optional[str] = None
+    # Dataset items fetched per page when streaming actor output (app/services/apify_stream.py);
+    # CRON_LOW_MEMORY caps it at apify_low_memory_page_size
+    apify_dataset_page_size: int = 1000
+    apify_low_memory_page_size: int = 200
 
     # SerpApi (eBay scraping — replaces Apify caffein.dev + 130point)
     serpapi_api_key: Optional[str] = None
+    # Searches per calendar month (app/services/api_budget.py refuses calls beyond it)
+    serpapi_monthly_budget: int = 1000
+    serpapi_concurrency: int = 4  # concurrent in-flight SerpApi searches in Phase 1b
+
+    # On-disk cache of raw Apify/SerpApi responses (app/services/response_cache.py).
+    # Mode: replay (default) | refresh | offline | off
+    response_cache_mode: str = "replay"
+    response_cache_dir: str = "data/response_cache"  # relative paths resolve from the project root
+    response_cache_ttl_hours: int = 7 * 24
+    response_cache_max_mb: int = 256
+
+    # Cross-day memo of listing-title classifications (app/services/classification_memo.py)
+    classification_memo_enabled: bool = True
+    classification_memo_path: str = "data/classification_memo.sqlite3"  # relative to the project root
+    classification_memo_ttl_days: int = 30
+
+    # Local historical entries of the manual tools (app/services/history_store.py);
+    # replaces data/historical_entries.json, which is imported on first use
+    history_store_path: str = "data/historical_entries.sqlite3"  # relative to the project root
     
     class Config:
         env_file = ".env"
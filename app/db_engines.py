@@ -0,0 +1,389 @@
+"""
+Engine Registry
+Single place where SQLAlchemy engines are created for the API (async) and the
+cron pipeline (sync). Every engine is sized from settings, shares the same
+URL/SSL normalisation, and reports pool telemetry through pool_stats() and
+per-statement count/time to app/services/request_metrics.py.
+
+Roles: "primary" (settings.database_url) takes all writes and auth traffic;
+"replica" (settings.database_read_url, optional) serves read-only market-data
+endpoints via get_read_sync_engine()/get_read_async_engine() as long as it is
+not behind the primary's data version.
+
+Supabase's pooler runs PgBouncer; on the transaction-mode port (6543) a server
+connection is handed to a different client after every transaction, so
+asyncpg's prepared-statement cache must be disabled or queries fail with
+"prepared statement ... does not exist".
+"""
+
+from __future__ import annotations
+
+import logging
+import ssl
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+from uuid import uuid4
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# (kind, role) -> Engine / AsyncEngine
+_engines: Dict[Tuple[str, str], Any] = {}
+# (kind, role) -> telemetry counters
+_pool_metrics: Dict[Tuple[str, str], Dict[str, float]] = {}
+_lock = threading.Lock()
+
+# Replica freshness: result of the last data-version comparison (see replica_is_fresh)
+_replica_state: Dict[str, Any] = {"fresh": None, "checked_at": 0.0, "reason": None}
+_replica_lock = threading.Lock()
+_force_primary = False
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# URL / CONNECTION HELPERS
+# ═══════════════════════════════════════════════════════════════════════════
+
+def _url_for_role(role: str) -> str:
+    if role == "primary":
+        return settings.database_url
+    if role == "replica" and settings.database_read_url:
+        return settings.database_read_url
+    raise ValueError(f"Unknown database role: {role}")
+
+
+def is_pgbouncer_transaction_mode(url: str) -> bool:
+    """
+    True when connections go through PgBouncer in transaction mode.
+    DB_PGBOUNCER_TRANSACTION_MODE overrides; otherwise the Supabase
+    transaction pooler port (6543) is detected from the URL.
+    """
+    if settings.db_pgbouncer_transaction_mode is not None:
+        return settings.db_pgbouncer_transaction_mode
+    return ":6543/" in url or url.endswith(":6543")
+
+
+def _async_url_and_connect_args(url: str) -> Tuple[str, Dict[str, Any]]:
+    """
+    asyncpg does not accept 'sslmode' as a connect() kwarg; SQLAlchemy passes URL params through.
+    Strip sslmode from URL and pass a proper SSL context via connect_args so Supabase/Render work.
+    Supabase often requires CERT_NONE from server environments (Render) when default context fails.
+    """
+    connect_args: Dict[str, Any] = {}
+    if url.startswith("postgresql://"):
+        url = url.replace("postgresql://", "postgresql+asyncpg://", 1)
+    needs_ssl = "sslmode=require" in url or "supabase" in url.lower()
+    if needs_ssl:
+        ctx = ssl.create_default_context()
+        if "supabase" in url.lower():
+            # SECURITY NOTE: Supabase pooler from Render/GH Actions fails cert verification.
+            # This is a known tradeoff. The connection is still encrypted (TLS), just not
+            # verifying the server certificate. Acceptable for Supabase pooler connections.
+            ctx.check_hostname = False
+            ctx.verify_mode = ssl.CERT_NONE
+        connect_args["ssl"] = ctx
+    if "sslmode=require" in url:
+        url = url.replace("?sslmode=require&", "?").replace("&sslmode=require", "").replace("?sslmode=require", "?")
+        if url.endswith("?"):
+            url = url[:-1]
+    if is_pgbouncer_transaction_mode(url):
+        # Statement caches are per server connection; PgBouncer rotates those per transaction.
+        connect_args["statement_cache_size"] = 0
+        connect_args["prepared_statement_cache_size"] = 0
+        connect_args["prepared_statement_name_func"] = lambda: f"__asyncpg_{uuid4()}__"
+    return url, connect_args
+
+
+def _sync_url(url: str) -> str:
+    if "+asyncpg" in url:
+        url = url.replace("postgresql+asyncpg", "postgresql+psycopg2", 1)
+    elif "postgresql://" in url and "+" not in url:
+        url = url.replace("postgresql://", "postgresql+psycopg2://", 1)
+    return url
+
+
+def _pool_kwargs(kind: str) -> Dict[str, Any]:
+    """Pool sizing from settings; the cron process can be sized separately from the API."""
+    size = settings.db_pool_size
+    overflow = settings.db_max_overflow
+    if kind == "sync" and settings.db_sync_pool_size is not None:
+        size = settings.db_sync_pool_size
+    if kind == "sync" and settings.db_sync_max_overflow is not None:
+        overflow = settings.db_sync_max_overflow
+    return dict(
+        pool_pre_ping=True,
+        pool_recycle=settings.db_pool_recycle,
+        pool_size=size,
+        max_overflow=overflow,
+        pool_timeout=settings.db_pool_timeout,
+    )
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# POOL TELEMETRY
+# ═══════════════════════════════════════════════════════════════════════════
+
+def _new_metrics() -> Dict[str, float]:
+    return {
+        "checkouts": 0,
+        "checkout_wait_total_s": 0.0,
+        "checkout_wait_max_s": 0.0,
+        "checkout_timeouts": 0,
+    }
+
+
+def _timed_pool_class(base):
+    """
+    Subclass a QueuePool so the time spent waiting for a connection is recorded.
+    SQLAlchemy has no 'before checkout' event, so _do_get is the only hook that
+    sees the wait when the pool is exhausted.
+    """
+
+    class _TimedPool(base):
+        _metrics_key: Optional[Tuple[str, str]] = None
+
+        def _do_get(self):
+            start = time.perf_counter()
+            try:
+                conn = super()._do_get()
+            except Exception as e:
+                if type(e).__name__ == "TimeoutError":
+                    _record_checkout(self._metrics_key, time.perf_counter() - start, timed_out=True)
+                raise
+            _record_checkout(self._metrics_key, time.perf_counter() - start)
+            return conn
+
+        def recreate(self):
+            new_pool = super().recreate()
+            new_pool._metrics_key = self._metrics_key
+            return new_pool
+
+    _TimedPool.__name__ = f"Timed{base.__name__}"
+    return _TimedPool
+
+
+def _record_checkout(key: Optional[Tuple[str, str]], wait_s: float, timed_out: bool = False) -> None:
+    if key is None:
+        return
+    with _lock:
+        m = _pool_metrics.setdefault(key, _new_metrics())
+        if timed_out:
+            m["checkout_timeouts"] += 1
+            return
+        m["checkouts"] += 1
+        m["checkout_wait_total_s"] += wait_s
+        if wait_s > m["checkout_wait_max_s"]:
+            m["checkout_wait_max_s"] = wait_s
+
+
+def _attach_metrics(engine: Any, key: Tuple[str, str]) -> None:
+    pool = engine.pool
+    pool._metrics_key = key
+    with _lock:
+        _pool_metrics.setdefault(key, _new_metrics())
+
+
+def _instrument(engine: Any, key: Tuple[str, str]) -> None:
+    """Per-statement count/time for /metrics (app/services/request_metrics.py)."""
+    if not settings.metrics_enabled:
+        return
+    from app.services.request_metrics import instrument_engine
+    instrument_engine(engine, f"{key[0]}:{key[1]}")
+
+
+def pool_stats() -> Dict[str, Dict[str, Any]]:
+    """
+    Snapshot of every engine created in this process, keyed "<kind>:<role>".
+    in_use / overflow / idle come from the live pool; checkout wait is cumulative
+    since process start.
+    """
+    out: Dict[str, Dict[str, Any]] = {}
+    with _lock:
+        items = list(_engines.items())
+        metrics = {k: dict(v) for k, v in _pool_metrics.items()}
+    for key, engine in items:
+        pool = getattr(engine, "sync_engine", engine).pool
+        m = metrics.get(key, _new_metrics())
+        checkouts = m["checkouts"]
+        out[f"{key[0]}:{key[1]}"] = {
+            "pool_size": pool.size(),
+            "in_use": pool.checkedout(),
+            "idle": pool.checkedin(),
+            "overflow": max(pool.overflow(), 0),
+            "max_overflow": getattr(pool, "_max_overflow", None),
+            "checkouts": int(checkouts),
+            "checkout_timeouts": int(m["checkout_timeouts"]),
+            "checkout_wait_avg_ms": round(m["checkout_wait_total_s"] / checkouts * 1000, 3) if checkouts else 0.0,
+            "checkout_wait_max_ms": round(m["checkout_wait_max_s"] * 1000, 3),
+        }
+    return out
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# ENGINE FACTORIES
+# ═══════════════════════════════════════════════════════════════════════════
+
+def get_async_engine(role: str = "primary"):
+    """Process-wide AsyncEngine for the given role (created on first use)."""
+    key = ("async", role)
+    engine = _engines.get(key)
+    if engine is not None:
+        return engine
+    with _lock:
+        engine = _engines.get(key)
+        if engine is not None:
+            return engine
+        from sqlalchemy.ext.asyncio import create_async_engine
+        from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+        url, connect_args = _async_url_and_connect_args(_url_for_role(role))
+        kw = dict(echo=settings.debug, future=True, poolclass=_timed_pool_class(AsyncAdaptedQueuePool))
+        kw.update(_pool_kwargs("async"))
+        if connect_args:
+            kw["connect_args"] = connect_args
+        engine = create_async_engine(url, **kw)
+        _attach_metrics(engine.sync_engine, key)
+        _instrument(engine.sync_engine, key)
+        _engines[key] = engine
+    return engine
+
+
+def get_sync_engine(role: str = "primary"):
+    """Process-wide sync Engine (psycopg2) for the given role; used by the cron pipeline."""
+    key = ("sync", role)
+    engine = _engines.get(key)
+    if engine is not None:
+        return engine
+    with _lock:
+        engine = _engines.get(key)
+        if engine is not None:
+            return engine
+        from sqlalchemy import create_engine
+        from sqlalchemy.pool import QueuePool
+
+        # psycopg2 does not use server-side prepared statements, so no PgBouncer tweaks are needed here.
+        engine = create_engine(
+            _sync_url(_url_for_role(role)),
+            poolclass=_timed_pool_class(QueuePool),
+            **_pool_kwargs("sync"),
+        )
+        _attach_metrics(engine, key)
+        _instrument(engine, key)
+        _engines[key] = engine
+    return engine
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# READ REPLICA ROUTING
+# ═══════════════════════════════════════════════════════════════════════════
+
+def has_replica() -> bool:
+    return bool(settings.database_read_url) and not _force_primary
+
+
+def force_primary_reads(enabled: bool = True) -> None:
+    """
+    Pin every read in this process to the primary. The cron pipeline calls this:
+    it reads back what it has just written, which a replica may not have yet.
+    """
+    global _force_primary
+    _force_primary = enabled
+
+
+def invalidate_replica_check() -> None:
+    """Forget the last freshness result (called after the daily refresh publishes new data)."""
+    with _replica_lock:
+        _replica_state["fresh"] = None
+        _replica_state["checked_at"] = 0.0
+
+
+def _data_version(conn) -> Tuple[Any, Any]:
+    """
+    Latest data version = newest metric_date and newest write in box_metrics_unified.
+    Every pipeline run bumps at least one of them.
+    """
+    from sqlalchemy import text
+    row = conn.execute(text("SELECT MAX(metric_date), MAX(updated_at) FROM box_metrics_unified")).fetchone()
+    return (row[0], row[1]) if row else (None, None)
+
+
+def _check_replica() -> Tuple[bool, Optional[str]]:
+    from sqlalchemy import text
+    with get_sync_engine("primary").connect() as conn:
+        primary_version = _data_version(conn)
+    with get_sync_engine("replica").connect() as conn:
+        replica_version = _data_version(conn)
+        # NULL when the server is not a streaming standby (e.g. a logical copy); then only
+        # the data-version comparison applies.
+        lag = conn.execute(text(
+            "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+            "ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END"
+        )).scalar()
+    if lag is not None and float(lag) > settings.db_replica_max_lag_seconds:
+        return False, f"replay lag {float(lag):.0f}s"
+    if primary_version[0] is not None and (replica_version[0] is None or replica_version[0] < primary_version[0]):
+        return False, f"replica metric_date {replica_version[0]} < primary {primary_version[0]}"
+    if primary_version[1] is not None and (replica_version[1] is None or replica_version[1] < primary_version[1]):
+        return False, "replica behind latest box_metrics_unified write"
+    return True, None
+
+
+def replica_is_fresh() -> bool:
+    """
+    True when the replica has the primary's latest data version. Result is cached
+    for db_replica_check_interval seconds; any error counts as stale.
+    """
+    if not has_replica():
+        return False
+    now = time.monotonic()
+    with _replica_lock:
+        if _replica_state["fresh"] is not None and now - _replica_state["checked_at"] < settings.db_replica_check_interval:
+            return _replica_state["fresh"]
+    try:
+        fresh, reason = _check_replica()
+    except Exception as e:
+        fresh, reason = False, f"check failed: {e}"
+    with _replica_lock:
+        if _replica_state["fresh"] and not fresh:
+            logger.warning(f"Read replica stale, routing reads to primary ({reason})")
+        _replica_state.update(fresh=fresh, checked_at=now, reason=reason)
+    return fresh
+
+
+def cached_replica_fresh() -> Optional[bool]:
+    """Last freshness result if still within the check interval, else None (needs a recheck)."""
+    with _replica_lock:
+        if _replica_state["fresh"] is None:
+            return None
+        if time.monotonic() - _replica_state["checked_at"] >= settings.db_replica_check_interval:
+            return None
+        return _replica_state["fresh"]
+
+
+def replica_status() -> Dict[str, Any]:
+    with _replica_lock:
+        return {
+            "configured": bool(settings.database_read_url),
+            "forced_primary": _force_primary,
+            "fresh": _replica_state["fresh"],
+            "reason": _replica_state["reason"],
+        }
+
+
+def get_read_sync_engine():
+    """Sync engine for read-only queries: the replica when fresh, otherwise the primary."""
+    if has_replica() and replica_is_fresh():
+        return get_sync_engine("replica")
+    return get_sync_engine("primary")
+
+
+async def get_read_async_engine():
+    """Async counterpart of get_read_sync_engine; the (blocking) freshness check runs in a thread."""
+    if not has_replica():
+        return get_async_engine("primary")
+    fresh = cached_replica_fresh()
+    if fresh is None:
+        import asyncio
+        fresh = await asyncio.to_thread(replica_is_fresh)
+    return get_async_engine("replica" if fresh else "primary")
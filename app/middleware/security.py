@@ -100,8 +100,11 @@ class RequestLoggingMiddleware(BaseHTTPMiddleware):
         # Process request
         response = await call_next(request)
         
-        # Calculate duration
+        # Calculate duration (and DB share, when request metrics are on)
         duration_ms = (time.time() - start_time) * 1000
+        from app.services.request_metrics import current_stats
+        stats = current_stats()
+        db_part = f", db {stats.db_queries}q/{stats.db_seconds * 1000:.1f}ms" if stats is not None else ""
         
         # Log request completion
         log_level = logging.WARNING if response.status_code >= 400 else logging.INFO
@@ -112,13 +115,13 @@ class RequestLoggingMiddleware(BaseHTTPMiddleware):
             logging.log(
                 log_level,
                 f"[{request_id}] SECURITY: {request.method} {request.url.path} "
-                f"from {client_ip} - Status: {response.status_code} ({duration_ms:.1f}ms)"
+                f"from {client_ip} - Status: {response.status_code} ({duration_ms:.1f}ms{db_part})"
             )
         elif settings.environment == "development" or response.status_code >= 400:
             logging.log(
                 log_level,
                 f"[{request_id}] {request.method} {request.url.path} "
-                f"from {client_ip} - Status: {response.status_code} ({duration_ms:.1f}ms)"
+                f"from {client_ip} - Status: {response.status_code} ({duration_ms:.1f}ms{db_part})"
             )
         
         # Add correlation ID to response
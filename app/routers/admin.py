@@ -8,7 +8,7 @@ SECURITY:
 - All admin actions are logged
 """
 
-from fastapi import APIRouter, UploadFile, File, Depends, HTTPException, Header, status
+from fastapi import APIRouter, UploadFile, File, Depends, HTTPException, Header, Query, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from fastapi.responses import JSONResponse
 from typing import Optional
@@ -488,3 +488,38 @@ async def refresh_tcgplayer_sales_data(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=detail
         )
+
+
+@router.get("/pipeline-runs")
+async def list_pipeline_runs(
+    days: int = Query(14, ge=1, le=90, description="Window of run dates"),
+    pipeline: str = Query("daily_refresh"),
+    db: AsyncSession = Depends(get_db),
+    admin_user: User = Depends(verify_admin_access)
+):
+    """
+    Recent pipeline runs with per-phase telemetry (duration, units, retries,
+    provider calls and cost units, rows written, peak memory, per-box detail),
+    and per-phase trends: latest run vs the window's median, with slow and
+    memory-regression flags.
+
+    Requires admin access.
+    """
+    from app.services.pipeline_telemetry import phase_trends, recent_runs
+
+    try:
+        runs = await recent_runs(db, pipeline, days)
+    except Exception as e:
+        logger.error(f"Could not load pipeline runs: {str(e)}")
+        detail = f"Failed to load pipeline runs: {str(e)}" if settings.environment == "development" else "Failed to load pipeline runs"
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=detail
+        )
+
+    return {
+        "pipeline": pipeline,
+        "days": days,
+        "trends": phase_trends(runs),
+        "runs": runs,
+    }
@@ -7,8 +7,8 @@ Uses same source of truth as box detail: app.services.box_detail_service.build_b
 import os
 from fastapi import APIRouter, Query, HTTPException, Depends, Request
 from typing import Optional, List
-from sqlalchemy import select, desc
-from app.database import AsyncSessionLocal
+from sqlalchemy import select, desc, func, and_
+from app.database import get_read_session_factory
 from app.models.booster_box import BoosterBox
 from app.models.unified_box_metrics import UnifiedBoxMetrics
 from app.services.box_detail_service import build_box_detail_data
@@ -100,7 +100,8 @@ async def get_box_by_set_code(
     Get full box data by set code (e.g., OP-01, OP-13, EB-01).
     Returns the same metrics as the box detail page (single source of truth).
     """
-    async with AsyncSessionLocal() as db:
+    ReadSession = await get_read_session_factory()
+    async with ReadSession() as db:
         return await _get_extension_box_response(db, set_code, listing_price)
 
 
@@ -115,7 +116,8 @@ async def compare_boxes(
     """
     Compare two boxes side-by-side.
     """
-    async with AsyncSessionLocal() as db:
+    ReadSession = await get_read_session_factory()
+    async with ReadSession() as db:
         data1 = await _get_extension_box_response(db, box1)
         data2 = await _get_extension_box_response(db, box2)
 
@@ -166,7 +168,8 @@ async def search_boxes(
     """
     Quick search for boxes (for Compare dropdown).
     """
-    async with AsyncSessionLocal() as db:
+    ReadSession = await get_read_session_factory()
+    async with ReadSession() as db:
         safe_q = _escape_like(q)
         stmt = select(BoosterBox).where(
             BoosterBox.product_name.ilike(f"%{safe_q}%")
@@ -174,6 +177,25 @@ async def search_boxes(
         
         result = await db.execute(stmt)
         boxes = result.scalars().all()
+
+        # Latest metrics for all matched boxes in one query (not one per box)
+        metrics_by_box = {}
+        if boxes:
+            subq = (
+                select(UnifiedBoxMetrics.booster_box_id, func.max(UnifiedBoxMetrics.metric_date).label("md"))
+                .where(UnifiedBoxMetrics.booster_box_id.in_([box.id for box in boxes]))
+                .group_by(UnifiedBoxMetrics.booster_box_id)
+            ).subquery()
+            metrics_result = await db.execute(
+                select(UnifiedBoxMetrics).join(
+                    subq,
+                    and_(
+                        UnifiedBoxMetrics.booster_box_id == subq.c.booster_box_id,
+                        UnifiedBoxMetrics.metric_date == subq.c.md,
+                    ),
+                )
+            )
+            metrics_by_box = {m.booster_box_id: m for m in metrics_result.scalars().all()}
         
         # Get basic info for each
         results = []
@@ -183,13 +205,7 @@ async def search_boxes(
             match = re.search(r'(OP|EB|PRB)-\d+', box.product_name, re.IGNORECASE)
             set_code = match.group(0).upper() if match else None
             
-            # Get latest price
-            metrics_stmt = select(UnifiedBoxMetrics).where(
-                UnifiedBoxMetrics.booster_box_id == box.id
-            ).order_by(desc(UnifiedBoxMetrics.metric_date)).limit(1)
-            
-            metrics_result = await db.execute(metrics_stmt)
-            metrics = metrics_result.scalar_one_or_none()
+            metrics = metrics_by_box.get(box.id)
             
             results.append({
                 "set_code": set_code,
@@ -209,7 +225,8 @@ async def get_top_movers(
     """
     Get top gainers and losers for extension popup.
     """
-    async with AsyncSessionLocal() as db:
+    ReadSession = await get_read_session_factory()
+    async with ReadSession() as db:
         # Get all boxes with metrics
         stmt = select(BoosterBox, UnifiedBoxMetrics).join(
             UnifiedBoxMetrics,
@@ -0,0 +1,100 @@
+"""
+API Budget Ledger
+Monthly call budgets for paid data providers (SerpApi today), persisted in
+api_budget_ledger (migration 014) so every cron run, manual script and
+concurrent worker draws from the same cap.
+
+reserve_call() increments calls_used only while it is below the cap, in one
+UPDATE, so two workers can never both take the last call. A call that fails
+before the provider bills it is handed back with refund_call().
+The ledger fails closed: if it cannot be reached, the call is refused.
+"""
+
+import logging
+from datetime import date
+from typing import Any, Dict, Optional
+
+from sqlalchemy import text
+
+from app.services.db_historical_reader import _get_sync_engine
+
+logger = logging.getLogger(__name__)
+
+
+class BudgetExceededError(RuntimeError):
+    """Raised when a provider's monthly call budget is used up (or the ledger is unreachable)."""
+
+
+def _month_start(today: Optional[date] = None) -> date:
+    today = today or date.today()
+    return today.replace(day=1)
+
+
+def reserve_call(provider: str, monthly_cap: int) -> int:
+    """
+    Take one call from this month's budget. Returns calls_used after the
+    reservation; raises BudgetExceededError when the cap is reached.
+    """
+    params = {"provider": provider, "month": _month_start(), "cap": monthly_cap}
+    try:
+        engine = _get_sync_engine()
+        with engine.connect() as conn:
+            with conn.begin():
+                conn.execute(text("""
+                    INSERT INTO api_budget_ledger (provider, month, calls_used, monthly_cap)
+                    VALUES (:provider, :month, 0, :cap)
+                    ON CONFLICT (provider, month) DO UPDATE SET monthly_cap = EXCLUDED.monthly_cap
+                """), params)
+                row = conn.execute(text("""
+                    UPDATE api_budget_ledger
+                    SET calls_used = calls_used + 1, updated_at = NOW()
+                    WHERE provider = :provider AND month = :month AND calls_used < :cap
+                    RETURNING calls_used
+                """), params).fetchone()
+                if row is None:
+                    conn.execute(text("""
+                        UPDATE api_budget_ledger
+                        SET calls_refused = calls_refused + 1, updated_at = NOW()
+                        WHERE provider = :provider AND month = :month
+                    """), params)
+    except Exception as e:
+        raise BudgetExceededError(f"{provider} budget ledger unavailable, refusing call: {e}") from e
+    if row is None:
+        raise BudgetExceededError(f"{provider} monthly budget of {monthly_cap} calls is used up")
+    return int(row[0])
+
+
+def refund_call(provider: str) -> bool:
+    """Give back a reserved call that the provider did not bill (request never succeeded)."""
+    try:
+        engine = _get_sync_engine()
+        with engine.connect() as conn:
+            with conn.begin():
+                conn.execute(text("""
+                    UPDATE api_budget_ledger
+                    SET calls_used = GREATEST(calls_used - 1, 0), updated_at = NOW()
+                    WHERE provider = :provider AND month = :month
+                """), {"provider": provider, "month": _month_start()})
+        return True
+    except Exception as e:
+        logger.warning(f"Could not refund {provider} call: {e}")
+        return False
+
+
+def budget_status(provider: str) -> Dict[str, Any]:
+    """This month's usage for a provider (zeros if nothing recorded yet)."""
+    month = _month_start()
+    out = {"provider": provider, "month": month.isoformat(), "calls_used": 0, "calls_refused": 0, "monthly_cap": None}
+    try:
+        engine = _get_sync_engine()
+        with engine.connect() as conn:
+            row = conn.execute(text("""
+                SELECT calls_used, calls_refused, monthly_cap
+                FROM api_budget_ledger WHERE provider = :provider AND month = :month
+            """), {"provider": provider, "month": month}).fetchone()
+        if row is not None:
+            d = row._mapping
+            out.update(calls_used=int(d["calls_used"]), calls_refused=int(d["calls_refused"]), monthly_cap=int(d["monthly_cap"]))
+    except Exception as e:
+        logger.warning(f"Could not read {provider} budget: {e}")
+    return out
@@ -0,0 +1,94 @@
+"""
+Apify Dataset Streaming
+Actor output is read one dataset page at a time instead of
+list(dataset.iterate_items()), and pushed through generator transforms, so a
+consumer holds one page plus whatever bounded state it keeps (seen URLs,
+counters, the day's matches) rather than the whole dataset.
+
+  iter_dataset_items(client, dataset_id)   items, page by page
+  unique_by(items, key)                    drop repeats of key (keeps only the keys)
+  batched(items, size)                     lists of up to size items (batch lookups,
+                                           e.g. classify_titles, per page)
+  StreamCounts                             counters a pipeline updates as items pass
+
+Page size is settings.apify_dataset_page_size; with CRON_LOW_MEMORY (Render
+512Mi cron) it is capped at apify_low_memory_page_size.
+"""
+
+import logging
+import os
+from itertools import islice
+from typing import Any, Callable, Dict, Hashable, Iterable, Iterator, List, Optional
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def low_memory() -> bool:
+    return os.environ.get("CRON_LOW_MEMORY", "").lower() in ("1", "true", "yes")
+
+
+def page_size() -> int:
+    size = settings.apify_dataset_page_size
+    if low_memory():
+        size = min(size, settings.apify_low_memory_page_size)
+    return max(1, size)
+
+
+def iter_dataset_items(
+    client: Any,
+    dataset_id: str,
+    limit: Optional[int] = None,
+    size: Optional[int] = None,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Items of an Apify dataset, fetched size items per request (default
+    page_size()). Stops after limit items; only the current page is held.
+    """
+    dataset = client.dataset(dataset_id)
+    size = size or page_size()
+    offset = 0
+    while limit is None or offset < limit:
+        want = size if limit is None else min(size, limit - offset)
+        page = dataset.list_items(offset=offset, limit=want)
+        items = page.items or []
+        for item in items:
+            yield item
+        offset += len(items)
+        total = getattr(page, "total", None)
+        if len(items) < want or (total is not None and offset >= total):
+            return
+
+
+def unique_by(items: Iterable[Dict[str, Any]], key: Callable[[Dict[str, Any]], Hashable]) -> Iterator[Dict[str, Any]]:
+    """Items whose key was not seen before; items with an empty key are dropped."""
+    seen = set()
+    for item in items:
+        k = key(item)
+        if not k or k in seen:
+            continue
+        seen.add(k)
+        yield item
+
+
+def batched(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    it = iter(items)
+    while True:
+        chunk = list(islice(it, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+class StreamCounts(dict):
+    """Named counters for a streaming pipeline (a dict, so it logs and serializes as one)."""
+
+    def add(self, name: str, n: int = 1) -> None:
+        self[name] = self.get(name, 0) + n
+
+    def count(self, name: str, items: Iterable[Any]) -> Iterator[Any]:
+        """Pass items through, counting them under name."""
+        for item in items:
+            self.add(name)
+            yield item
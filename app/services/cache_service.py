@@ -16,6 +16,7 @@ except ImportError:
     redis = None
 
 from app.config import settings
+from app.services.request_metrics import record_cache
 
 
 class CacheService:
@@ -73,6 +74,7 @@ class CacheService:
         
         try:
             value = self.redis_client.get(key)
+            record_cache("redis", "miss" if value is None else "hit")
             if value is None:
                 return None
             return self._deserialize(value)
@@ -0,0 +1,187 @@
+"""
+Classification Memo (cross-day)
+Persistent memo of listing-title classifications so the daily filters only
+classify listings they have not seen before. The same eBay items and TCGplayer
+listings come back day after day; their flags, lot quantity and normalized title
+are read from the memo instead of being recomputed.
+
+Stored in a local SQLite file (settings.classification_memo_path):
+
+    classification_memo(namespace, text_hash, rules, flags, created_at)
+
+  namespace   the source's filter ("ebay_130point", "ebay_apify", ...)
+  text_hash   sha256 of the classified text (the title, or the listing's joined
+              text). Keyed by content rather than item id, so a seller editing a
+              title is a miss and gets re-classified.
+  rules       the source TitleClassifier's fingerprint_for(classify): keyword
+              lists, rules version and the source of the quantity extractor
+              and classify function. Editing any of them changes it; rows with
+              another fingerprint are misses and are purged on first use.
+  flags       JSON of what the source's classify function returned
+
+Rows older than classification_memo_ttl_days are re-classified. Lookups and
+inserts are batched per filter call (one SELECT per 500 texts, one executemany).
+Like the other caches, failures only log — the caller falls back to classifying.
+"""
+
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+_BATCH = 500
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS classification_memo (
+    namespace  TEXT NOT NULL,
+    text_hash  TEXT NOT NULL,
+    rules      TEXT NOT NULL,
+    flags      TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (namespace, text_hash)
+)
+"""
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:32]
+
+
+class ClassificationMemo:
+    """SQLite-backed memo of classify results per (namespace, text)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._ready = False
+        self._purged: set = set()  # (namespace, rules) already purged this process
+        self.stats = {"hits": 0, "misses": 0, "stores": 0, "purged": 0, "errors": 0}
+
+    @property
+    def enabled(self) -> bool:
+        return bool(settings.classification_memo_enabled)
+
+    @property
+    def path(self) -> Path:
+        path = Path(settings.classification_memo_path)
+        if not path.is_absolute():
+            path = Path(__file__).parent.parent.parent / path
+        return path
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(str(self.path), timeout=30)
+        if not self._ready:
+            with self._lock:
+                if not self._ready:
+                    self.path.parent.mkdir(parents=True, exist_ok=True)
+                    conn.execute("PRAGMA journal_mode=WAL")
+                    conn.execute(_SCHEMA)
+                    cutoff = time.time() - settings.classification_memo_ttl_days * 86400
+                    expired = conn.execute("DELETE FROM classification_memo WHERE created_at < ?", (cutoff,)).rowcount
+                    conn.commit()
+                    self.stats["purged"] += max(expired, 0)
+                    self._ready = True
+        return conn
+
+    def _purge_stale_rules(self, conn: sqlite3.Connection, namespace: str, rules: str) -> None:
+        if (namespace, rules) in self._purged:
+            return
+        with self._lock:
+            removed = conn.execute(
+                "DELETE FROM classification_memo WHERE namespace = ? AND rules != ?", (namespace, rules)
+            ).rowcount
+            conn.commit()
+            self._purged.add((namespace, rules))
+        if removed > 0:
+            self.stats["purged"] += removed
+            logger.info(f"Classification memo: dropped {removed} {namespace} entries from older rules")
+
+    def get_many(self, namespace: str, rules: str, hashes: List[str]) -> Dict[str, Dict[str, Any]]:
+        conn = self._connect()
+        try:
+            self._purge_stale_rules(conn, namespace, rules)
+            found: Dict[str, Dict[str, Any]] = {}
+            for i in range(0, len(hashes), _BATCH):
+                chunk = hashes[i:i + _BATCH]
+                rows = conn.execute(
+                    f"SELECT text_hash, flags FROM classification_memo "
+                    f"WHERE namespace = ? AND rules = ? AND text_hash IN ({','.join('?' * len(chunk))})",
+                    (namespace, rules, *chunk),
+                ).fetchall()
+                for h, flags in rows:
+                    found[h] = json.loads(flags)
+            return found
+        finally:
+            conn.close()
+
+    def put_many(self, namespace: str, rules: str, entries: Dict[str, Dict[str, Any]]) -> None:
+        if not entries:
+            return
+        now = time.time()
+        conn = self._connect()
+        try:
+            with self._lock:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO classification_memo (namespace, text_hash, rules, flags, created_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    [(namespace, h, rules, json.dumps(flags, separators=(",", ":")), now) for h, flags in entries.items()],
+                )
+                conn.commit()
+            self.stats["stores"] += len(entries)
+        finally:
+            conn.close()
+
+    def classify_many(
+        self,
+        namespace: str,
+        rules: str,
+        texts: Iterable[str],
+        classify: Callable[[str], Dict[str, Any]],
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        {text: flags} for every distinct text. Memo hits are returned as stored;
+        misses go through classify() and are stored. Any memo error degrades to
+        classifying everything.
+        """
+        unique = dict.fromkeys(texts)
+        if not self.enabled:
+            return {t: classify(t) for t in unique}
+
+        hashes = {t: text_hash(t or "") for t in unique}
+        try:
+            cached = self.get_many(namespace, rules, list(set(hashes.values())))
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.warning(f"Classification memo unavailable ({e}) — classifying {len(unique)} texts")
+            return {t: classify(t) for t in unique}
+
+        result: Dict[str, Dict[str, Any]] = {}
+        fresh: Dict[str, Dict[str, Any]] = {}
+        for t, h in hashes.items():
+            flags = cached.get(h) or fresh.get(h)
+            if flags is None:
+                flags = fresh[h] = classify(t)
+            result[t] = flags
+        self.stats["hits"] += len(cached)
+        self.stats["misses"] += len(fresh)
+
+        try:
+            self.put_many(namespace, rules, fresh)
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.warning(f"Could not store {len(fresh)} {namespace} classifications: {e}")
+        return result
+
+    def info(self) -> Dict[str, Any]:
+        return {"enabled": self.enabled, "path": str(self.path), **self.stats}
+
+
+# Global instance
+classification_memo = ClassificationMemo()
@@ -6,12 +6,16 @@ Applies filtering rules to listings and sales data extracted from screenshots
 from typing import Dict, Any, List, Optional
 from decimal import Decimal
 
+from app.services.title_classifier import TitleClassifier
+
 
 class DataFilteringService:
     """Service for filtering listings and sales data"""
     
     def __init__(self):
         self.jp_keywords = ["JP", "Japanese", "japanese", "JPN", "jpn"]
+        # Keywords are compared against upper-cased text, so only the all-caps ones can match
+        self._jp_rules = TitleClassifier({"jp": [k for k in self.jp_keywords if k.isupper()]})
         self.price_filter_threshold = 0.25  # 25% below floor price
     
     def filter_listings(
@@ -131,8 +135,7 @@ class DataFilteringService:
         """Check if text contains Japanese keywords"""
         if not text:
             return False
-        text_upper = text.upper()
-        return any(keyword in text_upper for keyword in self.jp_keywords)
+        return self._jp_rules.match(text).flags["jp"]
     
     def _matches_box_name(self, title: str, box_name: str) -> bool:
         """
@@ -9,31 +9,22 @@ derived metrics are pre-computed by rolling_metrics.py (Phase 3) and stored in D
 
 from __future__ import annotations
 
-from typing import Any, Dict, List
-
-# Lazy import to avoid loading SQLAlchemy sync at module level if not used
-_engine = None
+from typing import Any, Dict, List, Optional
 
 
 def _get_sync_engine():
-    global _engine
-    if _engine is not None:
-        return _engine
-    from sqlalchemy import create_engine
-    from app.config import settings
-    url = settings.database_url
-    if "+asyncpg" in url:
-        url = url.replace("postgresql+asyncpg", "postgresql+psycopg2", 1)
-    elif "postgresql://" in url and "+" not in url:
-        url = url.replace("postgresql://", "postgresql+psycopg2://", 1)
-    _engine = create_engine(
-        url,
-        pool_pre_ping=True,
-        pool_recycle=3600,
-        pool_size=3,
-        max_overflow=2,
-    )
-    return _engine
+    """Shared sync engine from the registry (app/db_engines.py); one pool per process."""
+    from app.db_engines import get_sync_engine
+    return get_sync_engine()
+
+
+def _get_read_engine():
+    """
+    Engine for the read-only queries below: the read replica when DATABASE_READ_URL
+    is set and caught up, otherwise the primary. Writers keep using _get_sync_engine.
+    """
+    from app.db_engines import get_read_sync_engine
+    return get_read_sync_engine()
 
 
 def _row_to_entry(row: Any) -> Dict[str, Any]:
@@ -97,7 +88,7 @@ def get_box_historical_entries_from_db(booster_box_id: str) -> List[Dict[str, An
     """
     try:
         from sqlalchemy import text
-        engine = _get_sync_engine()
+        engine = _get_read_engine()
         with engine.connect() as conn:
             # Select columns that map to the entry shape used by historical_data callers
             q = text("""
@@ -118,20 +109,33 @@ def get_box_historical_entries_from_db(booster_box_id: str) -> List[Dict[str, An
         return []
 
 
-def get_all_boxes_historical_entries_from_db(box_ids: List[str]) -> Dict[str, List[Dict[str, Any]]]:
+def get_history_data_version() -> Optional[str]:
     """
-    Load per-day history for many boxes in one query. Used by leaderboard batch path.
-    Returns {booster_box_id: [entries...]} with same entry shape as get_box_historical_entries_from_db.
+    Newest write in box_metrics_unified (every upsert sets updated_at = NOW()).
+    Used by history_cache to tell when cached history may be out of date.
     """
-    if not box_ids:
-        return {}
     try:
-        from sqlalchemy import text, bindparam
-        engine = _get_sync_engine()
+        from sqlalchemy import text
+        engine = _get_read_engine()
+        with engine.connect() as conn:
+            v = conn.execute(text("SELECT MAX(updated_at) FROM box_metrics_unified")).scalar()
+        return v.isoformat() if v is not None else None
+    except Exception:
+        return None
+
+
+def get_box_historical_entries_changed_since(booster_box_id: str, watermark: str) -> Optional[List[Dict[str, Any]]]:
+    """
+    Rows for one box written after `watermark` (an updated_at ISO timestamp), minus a
+    5-minute margin for transactions that committed after a later one was observed.
+    Same entry shape as get_box_historical_entries_from_db; None on error.
+    """
+    try:
+        from sqlalchemy import text
+        engine = _get_read_engine()
         with engine.connect() as conn:
-            # Expanding=True turns :ids into (id1, id2, ...) for IN
             q = text("""
-                SELECT booster_box_id, metric_date, floor_price_usd, floor_price_1d_change_pct,
+                SELECT metric_date, floor_price_usd, floor_price_1d_change_pct,
                        boxes_sold_per_day, active_listings_count, unified_volume_usd,
                        unified_volume_7d_ema, boxes_sold_30d_avg, boxes_added_today,
                        daily_volume_usd, tcg_daily_volume_usd, ebay_daily_volume_usd,
@@ -139,10 +143,76 @@ def get_all_boxes_historical_entries_from_db(box_ids: List[str]) -> Dict[str, Li
                        liquidity_score, days_to_20pct_increase,
                        expected_days_to_sell, avg_boxes_added_per_day
                 FROM box_metrics_unified
-                WHERE booster_box_id IN :ids
-                ORDER BY booster_box_id, metric_date ASC
-            """).bindparams(bindparam("ids", expanding=True))
-            rows = conn.execute(q, {"ids": box_ids}).fetchall()
+                WHERE booster_box_id = :bid
+                  AND updated_at > CAST(:wm AS timestamp) - INTERVAL '5 minutes'
+                ORDER BY metric_date ASC
+            """)
+            rows = conn.execute(q, {"bid": booster_box_id, "wm": watermark}).fetchall()
+        return [_row_to_entry(r) for r in rows]
+    except Exception:
+        return None
+
+
+_BATCH_COLUMNS = """
+    booster_box_id, metric_date, floor_price_usd, floor_price_1d_change_pct,
+    boxes_sold_per_day, active_listings_count, unified_volume_usd,
+    unified_volume_7d_ema, boxes_sold_30d_avg, boxes_added_today,
+    daily_volume_usd, tcg_daily_volume_usd, ebay_daily_volume_usd,
+    ebay_units_sold_count, ebay_active_listings_count,
+    liquidity_score, days_to_20pct_increase,
+    expected_days_to_sell, avg_boxes_added_per_day
+"""
+
+
+def get_all_boxes_historical_entries_from_db(
+    box_ids: List[str],
+    since: Optional[str] = None,
+) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Load per-day history for many boxes in one query. Used by leaderboard batch path.
+    Returns {booster_box_id: [entries...]} with same entry shape as get_box_historical_entries_from_db.
+
+    since (YYYY-MM-DD) limits the result to rows on/after that date, plus each box's
+    two most recent rows so "latest" and "previous" stay correct for boxes whose
+    data stopped before the window.
+    """
+    if not box_ids:
+        return {}
+    try:
+        from sqlalchemy import text, bindparam
+        engine = _get_read_engine()
+        with engine.connect() as conn:
+            # Expanding=True turns :ids into (id1, id2, ...) for IN
+            if since is None:
+                q = text(f"""
+                    SELECT {_BATCH_COLUMNS}
+                    FROM box_metrics_unified
+                    WHERE booster_box_id IN :ids
+                    ORDER BY booster_box_id, metric_date ASC
+                """).bindparams(bindparam("ids", expanding=True))
+                rows = conn.execute(q, {"ids": box_ids}).fetchall()
+            else:
+                # Window rows use idx (booster_box_id, metric_date); the LATERAL picks
+                # the newest two rows per box off the same index.
+                q = text(f"""
+                    SELECT * FROM (
+                        SELECT {_BATCH_COLUMNS}
+                        FROM box_metrics_unified
+                        WHERE booster_box_id IN :ids AND metric_date >= CAST(:since AS date)
+                        UNION
+                        SELECT l.* FROM booster_boxes bb
+                        CROSS JOIN LATERAL (
+                            SELECT {_BATCH_COLUMNS}
+                            FROM box_metrics_unified m
+                            WHERE m.booster_box_id = bb.id
+                            ORDER BY m.metric_date DESC
+                            LIMIT 2
+                        ) l
+                        WHERE bb.id IN :ids
+                    ) w
+                    ORDER BY booster_box_id, metric_date ASC
+                """).bindparams(bindparam("ids", expanding=True))
+                rows = conn.execute(q, {"ids": box_ids, "since": since}).fetchall()
         out: Dict[str, List[Dict[str, Any]]] = {}
         for r in rows:
             d = r._mapping if hasattr(r, "_mapping") else dict(r)
@@ -161,15 +161,20 @@ def get_box_historical_data(box_id: str, prefer_db: bool = True) -> List[Dict[st
     """
     Get historical data for a specific box from box_metrics_unified in the database.
     Queries by box_id and also by resolved_id (legacy UUID) to pick up backfill rows.
+    Rows come through history_cache, which only fetches rows written since its last load.
     """
-    from app.services.db_historical_reader import get_box_historical_entries_from_db
-    resolved_id = LEADERBOARD_TO_DB_UUID_MAP.get(box_id, box_id)
-    db_entries = get_box_historical_entries_from_db(box_id)
-    if resolved_id != box_id:
-        alt_entries = get_box_historical_entries_from_db(resolved_id)
-        db_entries = list(db_entries) + list(alt_entries)
-    entries = merge_same_date_entries(db_entries)
-    entries.sort(key=lambda x: x.get('date', ''))
+    from app.services.history_cache import history_cache
+    from app.services.request_metrics import timed
+    with timed("history_load"):
+        resolved_id = LEADERBOARD_TO_DB_UUID_MAP.get(box_id, box_id)
+        if resolved_id != box_id:
+            # Aliased box: both ids' rows in one load, not one query per id
+            by_id = history_cache.get_entries_many([box_id, resolved_id])
+            db_entries = by_id[box_id] + by_id[resolved_id]
+        else:
+            db_entries = history_cache.get_entries(box_id)
+        entries = merge_same_date_entries(db_entries)
+        entries.sort(key=lambda x: x.get('date', ''))
     return entries
 
 
@@ -949,16 +954,23 @@ def get_box_volume_change_pcts(box_id: str) -> Dict[str, Optional[float]]:
     }
 
 
+# Days of history the leaderboard batch needs: 30d windows, the 7-14d comparison
+# window, and the whole previous calendar month (starts at most 61 days ago).
+LEADERBOARD_HISTORY_DAYS = 62
+
+
 def get_all_boxes_latest_for_leaderboard(box_ids: List[str]) -> Dict[str, Dict[str, Any]]:
     """
     Batch load latest snapshot + derived metrics for many boxes in one DB hit.
     Used by /booster-boxes leaderboard to avoid N per-box historical calls.
+    Only the last LEADERBOARD_HISTORY_DAYS of rows (plus each box's latest two) are read.
     Returns {box_id: {floor_price_usd, daily_volume_usd, unified_volume_7d_ema, unified_volume_usd,
              volume_7d, volume_30d, boxes_sold_30d_avg, floor_price_30d_change_pct, ...}}.
     """
     try:
         from app.services.db_historical_reader import get_all_boxes_historical_entries_from_db
-        all_entries = get_all_boxes_historical_entries_from_db(box_ids)
+        since = (datetime.now() - timedelta(days=LEADERBOARD_HISTORY_DAYS)).strftime('%Y-%m-%d')
+        all_entries = get_all_boxes_historical_entries_from_db(box_ids, since=since)
     except Exception:
         all_entries = {}
     out: Dict[str, Dict[str, Any]] = {}
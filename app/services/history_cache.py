@@ -0,0 +1,223 @@
+"""
+History Cache
+Per-process cache of box_metrics_unified history (one entry list per box id),
+optionally shared between workers through Redis.
+
+Each cached box remembers the data version (MAX(updated_at) of box_metrics_unified)
+it was loaded at. When the version moves on, only rows written since then are
+fetched and merged in by date, so after warm-up a daily refresh costs a few rows
+per box instead of a lifetime reload. Boxes are evicted LRU once the estimated
+size passes settings.history_cache_max_mb.
+"""
+
+import logging
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from app.config import settings
+from app.services.request_metrics import record_cache
+
+logger = logging.getLogger(__name__)
+
+REDIS_KEY_PREFIX = "history:v1:"
+REDIS_TTL_SECONDS = 7 * 24 * 3600
+
+
+def _entries_size(entries: List[Dict[str, Any]]) -> int:
+    """Rough in-memory size of an entry list (dicts + values, keys are interned)."""
+    total = sys.getsizeof(entries)
+    for e in entries:
+        total += sys.getsizeof(e) + sum(sys.getsizeof(v) for v in e.values())
+    return total
+
+
+class HistoryCache:
+    """LRU cache of per-box history keyed by DB box id"""
+
+    def __init__(self):
+        self._boxes: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self._version: Optional[str] = None
+        self._version_checked_at = 0.0
+        self.stats = {"hits": 0, "misses": 0, "delta_fetches": 0, "delta_rows": 0, "evictions": 0}
+
+    @property
+    def enabled(self) -> bool:
+        return settings.history_cache_enabled
+
+    # ── data version ────────────────────────────────────────────────────────
+
+    def _current_version(self) -> Optional[str]:
+        """Data version, re-read from the DB at most every history_cache_version_check_interval seconds."""
+        now = time.monotonic()
+        if self._version is not None and now - self._version_checked_at < settings.history_cache_version_check_interval:
+            return self._version
+        from app.services.db_historical_reader import get_history_data_version
+        version = get_history_data_version()
+        self._version = version
+        self._version_checked_at = now
+        return version
+
+    def mark_version_stale(self) -> None:
+        """Force a data-version check on the next read (e.g. after /hooks/invalidate-cache)."""
+        self._version_checked_at = 0.0
+
+    # ── redis (optional) ────────────────────────────────────────────────────
+
+    def _redis(self):
+        if not settings.history_cache_redis:
+            return None
+        try:
+            from app.services.cache_service import cache_service
+            return cache_service if cache_service.enabled else None
+        except Exception:
+            return None
+
+    def _load_shared(self, box_id: str) -> Optional[Dict[str, Any]]:
+        shared = self._redis()
+        if shared is None:
+            return None
+        payload = shared.get(REDIS_KEY_PREFIX + box_id)
+        if not payload or "entries" not in payload:
+            return None
+        return {"entries": payload["entries"], "version": payload.get("version")}
+
+    def _store_shared(self, box_id: str, entries: List[Dict[str, Any]], version: Optional[str]) -> None:
+        shared = self._redis()
+        if shared is None or version is None:
+            return
+        shared.set(REDIS_KEY_PREFIX + box_id, {"entries": entries, "version": version}, ttl=REDIS_TTL_SECONDS)
+
+    # ── core ────────────────────────────────────────────────────────────────
+
+    def _put(self, box_id: str, entries: List[Dict[str, Any]], version: Optional[str]) -> None:
+        size = _entries_size(entries)
+        with self._lock:
+            old = self._boxes.pop(box_id, None)
+            if old is not None:
+                self._bytes -= old["bytes"]
+            self._boxes[box_id] = {"entries": entries, "version": version, "bytes": size}
+            self._bytes += size
+            cap = settings.history_cache_max_mb * 1024 * 1024
+            while self._bytes > cap and len(self._boxes) > 1:
+                _, evicted = self._boxes.popitem(last=False)
+                self._bytes -= evicted["bytes"]
+                self.stats["evictions"] += 1
+
+    @staticmethod
+    def _merge_delta(entries: List[Dict[str, Any]], delta: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Replace rows with the same date, append new dates, keep ascending date order."""
+        if not delta:
+            return entries
+        by_date = {e.get("date"): e for e in entries}
+        for e in delta:
+            by_date[e.get("date")] = e
+        return sorted(by_date.values(), key=lambda x: x.get("date") or "")
+
+    def _cached_entries(self, box_id: str, version: Optional[str]) -> Optional[List[Dict[str, Any]]]:
+        """Cached (or delta-refreshed) rows for box_id; None when a full load is needed."""
+        from app.services.db_historical_reader import get_box_historical_entries_changed_since
+
+        with self._lock:
+            cached = self._boxes.get(box_id)
+            if cached is not None:
+                self._boxes.move_to_end(box_id)
+
+        if cached is None:
+            cached = self._load_shared(box_id)
+            if cached is not None:
+                self._put(box_id, cached["entries"], cached["version"])
+
+        if cached is not None and version is not None and cached["version"] == version:
+            self.stats["hits"] += 1
+            record_cache("history", "hit")
+            return [dict(e) for e in cached["entries"]]
+
+        if cached is not None and cached["version"] is not None:
+            delta = get_box_historical_entries_changed_since(box_id, cached["version"])
+            if delta is not None:
+                entries = self._merge_delta(cached["entries"], delta)
+                self.stats["delta_fetches"] += 1
+                self.stats["delta_rows"] += len(delta)
+                record_cache("history", "delta")
+                self._put(box_id, entries, version)
+                self._store_shared(box_id, entries, version)
+                return [dict(e) for e in entries]
+        return None
+
+    def _loaded(self, box_id: str, entries: List[Dict[str, Any]], version: Optional[str]) -> List[Dict[str, Any]]:
+        self.stats["misses"] += 1
+        record_cache("history", "miss")
+        if entries:
+            self._put(box_id, entries, version)
+            self._store_shared(box_id, entries, version)
+        return [dict(e) for e in entries]
+
+    def get_entries(self, box_id: str) -> List[Dict[str, Any]]:
+        """
+        History rows for one DB box id (same shape as get_box_historical_entries_from_db).
+        Callers get shallow copies, so mutating an entry never touches the cache.
+        """
+        from app.services.db_historical_reader import get_box_historical_entries_from_db
+
+        if not self.enabled:
+            return get_box_historical_entries_from_db(box_id)
+
+        version = self._current_version()
+        entries = self._cached_entries(box_id, version)
+        if entries is not None:
+            return entries
+        # Cold (or delta failed): full load. Version was read before the load, so
+        # anything written meanwhile is picked up by the next delta.
+        return self._loaded(box_id, get_box_historical_entries_from_db(box_id), version)
+
+    def get_entries_many(self, box_ids: List[str]) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        get_entries() for several box ids; the ones that need a full load are
+        fetched together in one query instead of one query each.
+        """
+        from app.services.db_historical_reader import get_all_boxes_historical_entries_from_db
+
+        box_ids = list(dict.fromkeys(box_ids))
+        if not self.enabled:
+            loaded = get_all_boxes_historical_entries_from_db(box_ids)
+            return {bid: loaded.get(bid, []) for bid in box_ids}
+
+        version = self._current_version()
+        out: Dict[str, List[Dict[str, Any]]] = {}
+        cold: List[str] = []
+        for box_id in box_ids:
+            entries = self._cached_entries(box_id, version)
+            if entries is None:
+                cold.append(box_id)
+            else:
+                out[box_id] = entries
+        if cold:
+            loaded = get_all_boxes_historical_entries_from_db(cold)
+            for box_id in cold:
+                out[box_id] = self._loaded(box_id, loaded.get(box_id, []), version)
+        return out
+
+    def clear(self) -> None:
+        with self._lock:
+            self._boxes.clear()
+            self._bytes = 0
+
+    def info(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "boxes": len(self._boxes),
+                "approx_mb": round(self._bytes / (1024 * 1024), 2),
+                "max_mb": settings.history_cache_max_mb,
+                "data_version": self._version,
+                **self.stats,
+            }
+
+
+# Global instance
+history_cache = HistoryCache()
@@ -0,0 +1,277 @@
+"""
+History Store (local)
+Indexed, append-only store for the local historical entries kept by the manual
+tools (scripts/historical_data_manager.py, scripts/pull_all_tcgplayer_data.py,
+scripts/refresh_single_box.py, scripts/refresh_for_date.py,
+scripts/ebay_playwright.py). It replaces reading and rewriting the whole
+data/historical_entries.json on every lookup or insert.
+
+SQLite file at settings.history_store_path:
+
+    history_entries(id, box_id, date, data_type, data)
+
+  id         insertion order (AUTOINCREMENT), so a box's entries keep the
+             date-then-insertion order of the old JSON lists
+  data_type  "sales" / "listings" / "combined", or "" when the entry has none
+  data       the entry as JSON
+
+(box_id, date, data_type) is indexed rather than unique: the manager appends
+several entries per day (merge_entries() combines them). Lookups are index
+range scans; adding an entry is one INSERT.
+
+The SQLite file is the source of truth; every tool reads and writes through
+history_store. On first use an existing data/historical_entries.json is
+imported once, in either of the shapes the tools wrote ({box_id: [entries]} or
+a flat list with box_id); edits to the JSON after that are not picked up.
+export_json() writes the old dict shape for anything that still wants a file.
+"""
+
+import json
+import logging
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+LEGACY_JSON = PROJECT_ROOT / "data" / "historical_entries.json"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS history_entries (
+    id        INTEGER PRIMARY KEY AUTOINCREMENT,
+    box_id    TEXT NOT NULL,
+    date      TEXT NOT NULL,
+    data_type TEXT NOT NULL DEFAULT '',
+    data      TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_history_box_date_type ON history_entries (box_id, date, data_type);
+"""
+
+_SCHEMA_VERSION = 1
+
+
+def _row_values(box_id: str, entry: Dict[str, Any]) -> Tuple[str, str, str, str]:
+    return (box_id, entry.get("date") or "", entry.get("data_type") or "", json.dumps(entry, default=str))
+
+
+class HistoryStore:
+    """SQLite-backed historical entries per box"""
+
+    def __init__(self, path: Optional[Path] = None, legacy_json: Optional[Path] = LEGACY_JSON):
+        self._path = Path(path) if path else None
+        self._legacy_json = legacy_json
+        self._lock = threading.Lock()
+        self._ready = False
+        self._checked_out: Dict[int, Tuple[str, Dict[str, Any]]] = {}
+        self._pending_new: List[Tuple[str, Dict[str, Any]]] = []
+
+    @property
+    def path(self) -> Path:
+        if self._path is not None:
+            return self._path
+        path = Path(settings.history_store_path)
+        return path if path.is_absolute() else PROJECT_ROOT / path
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(str(self.path), timeout=30)
+        if not self._ready:
+            with self._lock:
+                if not self._ready:
+                    self.path.parent.mkdir(parents=True, exist_ok=True)
+                    conn.execute("PRAGMA journal_mode=WAL")
+                    conn.executescript(_SCHEMA)
+                    if conn.execute("PRAGMA user_version").fetchone()[0] < _SCHEMA_VERSION:
+                        self._import_legacy(conn)
+                        conn.execute(f"PRAGMA user_version = {_SCHEMA_VERSION}")
+                    conn.commit()
+                    self._ready = True
+        return conn
+
+    def _import_legacy(self, conn: sqlite3.Connection) -> None:
+        if not self._legacy_json or not self._legacy_json.exists():
+            return
+        try:
+            with open(self._legacy_json, "r") as f:
+                data = json.load(f)
+        except Exception as e:
+            logger.warning(f"Could not import {self._legacy_json}: {e}")
+            return
+        if isinstance(data, dict):
+            rows = [_row_values(box_id, e) for box_id, entries in data.items() for e in entries]
+        else:
+            rows = [_row_values(e.get("box_id", ""), e) for e in data if isinstance(e, dict)]
+        conn.executemany("INSERT INTO history_entries (box_id, date, data_type, data) VALUES (?, ?, ?, ?)", rows)
+        logger.info(f"Imported {len(rows)} historical entries from {self._legacy_json}")
+
+    def _select(self, where: str, params: Iterable[Any], order: str = "date, id", limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        sql = f"SELECT data FROM history_entries WHERE {where} ORDER BY {order}"
+        if limit is not None:
+            sql += f" LIMIT {int(limit)}"
+        conn = self._connect()
+        try:
+            return [json.loads(row[0]) for row in conn.execute(sql, tuple(params))]
+        finally:
+            conn.close()
+
+    # ── reads ───────────────────────────────────────────────────────────────
+
+    def entries(
+        self,
+        box_id: str,
+        entry_date: Optional[str] = None,
+        data_type: Optional[str] = None,
+        since: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """A box's entries, oldest first (optionally one date / data_type / date >= since)."""
+        where, params = "box_id = ?", [box_id]
+        if entry_date is not None:
+            where += " AND date = ?"
+            params.append(entry_date)
+        if since is not None:
+            where += " AND date >= ?"
+            params.append(since)
+        if data_type is not None:
+            where += " AND data_type = ?"
+            params.append(data_type)
+        return self._select(where, params)
+
+    def exists(self, box_id: str, entry_date: str, data_type: Optional[str] = None) -> bool:
+        where, params = "box_id = ? AND date = ?", [box_id, entry_date]
+        if data_type is not None:
+            where += " AND data_type = ?"
+            params.append(data_type)
+        conn = self._connect()
+        try:
+            return conn.execute(f"SELECT 1 FROM history_entries WHERE {where} LIMIT 1", params).fetchone() is not None
+        finally:
+            conn.close()
+
+    def latest(self, box_id: str, data_type: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Most recent entry (the first one written on the latest date)."""
+        where, params = "box_id = ?", [box_id]
+        if data_type:
+            where += " AND data_type = ?"
+            params.append(data_type)
+        rows = self._select(where, params, order="date DESC, id", limit=1)
+        return rows[0] if rows else None
+
+    def load_all(self) -> Dict[str, List[Dict[str, Any]]]:
+        out: Dict[str, List[Dict[str, Any]]] = {}
+        conn = self._connect()
+        try:
+            for box_id, data in conn.execute("SELECT box_id, data FROM history_entries ORDER BY box_id, date, id"):
+                out.setdefault(box_id, []).append(json.loads(data))
+        finally:
+            conn.close()
+        return out
+
+    def count(self) -> int:
+        conn = self._connect()
+        try:
+            return conn.execute("SELECT COUNT(*) FROM history_entries").fetchone()[0]
+        finally:
+            conn.close()
+
+    # ── writes ──────────────────────────────────────────────────────────────
+
+    def append(self, box_id: str, entry: Dict[str, Any]) -> None:
+        conn = self._connect()
+        try:
+            with self._lock:
+                conn.execute(
+                    "INSERT INTO history_entries (box_id, date, data_type, data) VALUES (?, ?, ?, ?)",
+                    _row_values(box_id, entry),
+                )
+                conn.commit()
+        finally:
+            conn.close()
+
+    def replace_date(self, box_id: str, entry_date: str, entry: Dict[str, Any]) -> None:
+        """Replace a box's entries for entry_date with entry."""
+        conn = self._connect()
+        try:
+            with self._lock:
+                conn.execute("DELETE FROM history_entries WHERE box_id = ? AND date = ?", (box_id, entry_date))
+                conn.execute(
+                    "INSERT INTO history_entries (box_id, date, data_type, data) VALUES (?, ?, ?, ?)",
+                    _row_values(box_id, entry),
+                )
+                conn.commit()
+        finally:
+            conn.close()
+
+    def replace_all(self, data: Dict[str, List[Dict[str, Any]]]) -> None:
+        """Replace every entry (bulk rewrite; the old save_historical_data)."""
+        conn = self._connect()
+        try:
+            with self._lock:
+                conn.execute("DELETE FROM history_entries")
+                conn.executemany(
+                    "INSERT INTO history_entries (box_id, date, data_type, data) VALUES (?, ?, ?, ?)",
+                    [_row_values(box_id, e) for box_id, entries in data.items() for e in entries],
+                )
+                conn.commit()
+        finally:
+            conn.close()
+
+    def checkout(self, box_id: str, entry_date: str) -> Tuple[Dict[str, Any], bool]:
+        """
+        The first entry for box + date (any data_type), or a new one. The returned
+        dict may be modified in place; flush() writes all checked-out entries.
+        """
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                "SELECT id, data FROM history_entries WHERE box_id = ? AND date = ? ORDER BY id LIMIT 1",
+                (box_id, entry_date),
+            ).fetchone()
+        finally:
+            conn.close()
+        if row is not None:
+            if row[0] not in self._checked_out:
+                self._checked_out[row[0]] = (box_id, json.loads(row[1]))
+            return self._checked_out[row[0]][1], False
+        for pending_box, entry in self._pending_new:
+            if pending_box == box_id and entry.get("date") == entry_date:
+                return entry, False
+        entry = {"box_id": box_id, "date": entry_date}
+        self._pending_new.append((box_id, entry))
+        return entry, True
+
+    def flush(self) -> int:
+        """Write back entries handed out by checkout(). Returns rows written."""
+        if not self._checked_out and not self._pending_new:
+            return 0
+        conn = self._connect()
+        try:
+            with self._lock:
+                conn.executemany(
+                    "UPDATE history_entries SET box_id = ?, date = ?, data_type = ?, data = ? WHERE id = ?",
+                    [(*_row_values(box_id, e), entry_id) for entry_id, (box_id, e) in self._checked_out.items()],
+                )
+                conn.executemany(
+                    "INSERT INTO history_entries (box_id, date, data_type, data) VALUES (?, ?, ?, ?)",
+                    [_row_values(box_id, e) for box_id, e in self._pending_new],
+                )
+                conn.commit()
+            written = len(self._checked_out) + len(self._pending_new)
+            self._checked_out.clear()
+            self._pending_new.clear()
+            return written
+        finally:
+            conn.close()
+
+    def export_json(self, path: Optional[Path] = None) -> Path:
+        """Write the {box_id: [entries]} JSON the tools used to keep."""
+        path = Path(path) if path else LEGACY_JSON
+        with open(path, "w") as f:
+            json.dump(self.load_all(), f, indent=2)
+        return path
+
+
+# Global instance
+history_store = HistoryStore()
@@ -0,0 +1,233 @@
+"""
+Listing Snapshots (identity diffing)
+Each day's filtered active listings (all prices, not only the 20% floor window)
+are stored per box:
+
+    tcg_listings_raw          TCGplayer (scripts/listings_scraper.py)
+    ebay_active_listings_raw  eBay active (scripts/ebay_serpapi.py, scripts/ebay_scraper.py,
+                              migration 015)
+
+diff_snapshots() compares today's snapshot with the previous day's by listing
+identity in one SQL pass per source (FULL OUTER JOIN on booster_box_id +
+listing_id). With max_prices, one fixed price cap per box is applied to both
+days, so a moving floor cannot turn an unchanged listing into an add or a
+remove: listings only in today's snapshot and under the cap were added,
+listings only in yesterday's and under the cap were removed (sold or
+delisted), and listings on both days with a different price were repriced,
+including repricing across the cap. Units follow the listed quantity,
+including quantity changes on a listing under the cap on both days.
+
+Callers pass the wider of today's and yesterday's 20% window as the cap and
+write net_units (added_units - removed_units) to boxes_added_today /
+ebay_listings_added_today instead of a count delta, so the columns stay net
+supply change for their readers (market index, fear & greed, box detail).
+Boxes without a previous snapshot report has_previous=False and the callers
+keep the count-delta fallback for that day.
+
+Both tables are compacted by scripts/compact_raw_tables.py after the retention
+horizon; the diff only reads the last two days.
+
+Identities: TCGplayer has no listing id in the page, so a listing is its seller
++ condition + printing (one listing per seller per condition); price is not part
+of it so repricing is visible. eBay uses the item id (title hash when missing).
+"""
+
+import hashlib
+import json
+import logging
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy import text
+
+from app.services.db_historical_reader import _get_sync_engine
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_TABLES = {
+    "tcgplayer": "tcg_listings_raw",
+    "ebay": "ebay_active_listings_raw",
+}
+
+_DELETE_SQL = """
+    DELETE FROM {table}
+    WHERE booster_box_id = CAST(:bid AS uuid) AND snapshot_date = CAST(:sd AS date)
+"""
+
+_INSERT_SQL = """
+    INSERT INTO {table} (
+        booster_box_id, snapshot_date, listing_id, seller_id,
+        listed_price_usd, quantity, snapshot_timestamp, raw_data
+    ) VALUES (
+        CAST(:bid AS uuid), CAST(:sd AS date), :lid, :sid,
+        :price, :qty, :ts, CAST(:rd AS jsonb)
+    )
+"""
+
+# One pass over both days' rows; a row on only one side of the join was added
+# or removed, a row on both sides may have been repriced / changed quantity.
+# t_in / y_in: the listing is under the box's cap (no cap: always) on that day.
+_DIFF_SQL = """
+    WITH t AS (
+        SELECT booster_box_id, listing_id, listed_price_usd, quantity
+        FROM {table}
+        WHERE snapshot_date = CAST(:today AS date) {box_filter}
+    ), y AS (
+        SELECT booster_box_id, listing_id, listed_price_usd, quantity
+        FROM {table}
+        WHERE snapshot_date = CAST(:previous AS date) {box_filter}
+    ), caps AS (
+        {caps}
+    ), j AS (
+        SELECT
+            COALESCE(t.booster_box_id, y.booster_box_id) AS booster_box_id,
+            t.listing_id AS t_id, y.listing_id AS y_id,
+            t.listed_price_usd AS t_price, y.listed_price_usd AS y_price,
+            t.quantity AS t_qty, y.quantity AS y_qty
+        FROM t
+        FULL OUTER JOIN y
+          ON t.booster_box_id = y.booster_box_id AND t.listing_id = y.listing_id
+    ), w AS (
+        SELECT j.*,
+               j.t_id IS NOT NULL AND (c.max_price IS NULL OR j.t_price <= c.max_price) AS t_in,
+               j.y_id IS NOT NULL AND (c.max_price IS NULL OR j.y_price <= c.max_price) AS y_in
+        FROM j
+        LEFT JOIN caps c ON c.booster_box_id = j.booster_box_id
+    )
+    SELECT
+        booster_box_id,
+        COUNT(*) FILTER (WHERE t_in AND y_id IS NULL) AS added,
+        COUNT(*) FILTER (WHERE y_in AND t_id IS NULL) AS removed,
+        COUNT(*) FILTER (WHERE (t_in OR y_in) AND t_id IS NOT NULL AND y_id IS NOT NULL
+                           AND t_price <> y_price) AS repriced,
+        COALESCE(SUM(CASE WHEN t_in AND y_id IS NULL THEN t_qty
+                          WHEN t_in AND y_in THEN GREATEST(t_qty - y_qty, 0)
+                          ELSE 0 END), 0) AS added_units,
+        COALESCE(SUM(CASE WHEN y_in AND t_id IS NULL THEN y_qty
+                          WHEN t_in AND y_in THEN GREATEST(y_qty - t_qty, 0)
+                          ELSE 0 END), 0) AS removed_units,
+        BOOL_OR(y_id IS NOT NULL) AS has_previous,
+        BOOL_OR(t_id IS NOT NULL) AS has_today
+    FROM w
+    GROUP BY 1
+"""
+
+_CAPS_SQL = "SELECT * FROM unnest(CAST(:cap_bids AS uuid[]), CAST(:caps AS numeric[])) AS c(booster_box_id, max_price)"
+_NO_CAPS_SQL = "SELECT CAST(NULL AS uuid) AS booster_box_id, CAST(NULL AS numeric) AS max_price WHERE false"
+
+
+def _table(source: str) -> str:
+    if source not in SNAPSHOT_TABLES:
+        raise ValueError(f"Unknown listing snapshot source: {source} (expected one of {sorted(SNAPSHOT_TABLES)})")
+    return SNAPSHOT_TABLES[source]
+
+
+def _digest(*parts: Any) -> str:
+    key = "|".join(str(p or "").strip().lower() for p in parts)
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()[:32]
+
+
+def tcg_listing_id(listing: Dict[str, Any]) -> str:
+    """Identity of a scraped TCGplayer listing: seller + condition + printing."""
+    return _digest(listing.get("seller"), listing.get("condition"), listing.get("variant"))
+
+
+def ebay_listing_id(item: Dict[str, Any]) -> str:
+    """Identity of an eBay active listing: the item id, else a hash of the title."""
+    return str(item.get("ebay_item_id") or "t:" + _digest(item.get("title")))
+
+
+def write_snapshot(
+    source: str,
+    booster_box_id: str,
+    snapshot_date: str,
+    rows: Iterable[Dict[str, Any]],
+) -> int:
+    """
+    Replace a box's snapshot for snapshot_date with rows
+    ({listing_id, price, quantity, seller?, raw?}). Rows sharing a listing_id
+    are merged (quantities summed, lowest price). Returns rows written, -1 on error.
+    """
+    table = _table(source)
+    merged: Dict[str, Dict[str, Any]] = {}
+    for r in rows:
+        if r.get("price") is None:
+            continue
+        lid = r["listing_id"]
+        qty = max(int(r.get("quantity") or 1), 1)
+        if lid in merged:
+            merged[lid]["qty"] += qty
+            merged[lid]["price"] = min(merged[lid]["price"], round(float(r["price"]), 2))
+            continue
+        merged[lid] = {
+            "bid": booster_box_id,
+            "sd": snapshot_date,
+            "lid": lid,
+            "sid": (r.get("seller") or "")[:255] or None,
+            "price": round(float(r["price"]), 2),
+            "qty": qty,
+            "ts": datetime.now(),
+            "rd": json.dumps(r.get("raw")) if r.get("raw") is not None else None,
+        }
+    try:
+        engine = _get_sync_engine()
+        with engine.connect() as conn:
+            with conn.begin():
+                conn.execute(text(_DELETE_SQL.format(table=table)), {"bid": booster_box_id, "sd": snapshot_date})
+                if merged:
+                    conn.execute(text(_INSERT_SQL.format(table=table)), list(merged.values()))
+        return len(merged)
+    except Exception as e:
+        logger.warning(f"Could not write {source} listing snapshot for {booster_box_id}: {e}")
+        return -1
+
+
+def diff_snapshots(
+    source: str,
+    snapshot_date: str,
+    previous_date: Optional[str] = None,
+    box_ids: Optional[List[str]] = None,
+    max_prices: Optional[Dict[str, float]] = None,
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Added / removed / repriced listings per box between previous_date (default:
+    the day before) and snapshot_date, counting adds and removes only under
+    max_prices[box_id] (the same cap on both days; boxes without one: all
+    listings). Returns {box_id: {added, removed, repriced, added_units,
+    removed_units, net_units, has_previous, has_today}}; {} on error.
+    """
+    table = _table(source)
+    if previous_date is None:
+        previous_date = (date.fromisoformat(snapshot_date) - timedelta(days=1)).isoformat()
+    params: Dict[str, Any] = {"today": snapshot_date, "previous": previous_date}
+    box_filter = ""
+    if box_ids:
+        box_filter = "AND booster_box_id = ANY(CAST(:bids AS uuid[]))"
+        params["bids"] = list(box_ids)
+    caps = {bid: cap for bid, cap in (max_prices or {}).items() if cap is not None}
+    if caps:
+        params["cap_bids"] = list(caps)
+        params["caps"] = [round(float(c), 2) for c in caps.values()]
+    sql = _DIFF_SQL.format(table=table, box_filter=box_filter, caps=_CAPS_SQL if caps else _NO_CAPS_SQL)
+    try:
+        engine = _get_sync_engine()
+        with engine.connect() as conn:
+            rows = conn.execute(text(sql), params).fetchall()
+    except Exception as e:
+        logger.warning(f"Could not diff {source} listing snapshots for {snapshot_date}: {e}")
+        return {}
+
+    out: Dict[str, Dict[str, Any]] = {}
+    for r in rows:
+        d = r._mapping if hasattr(r, "_mapping") else dict(r)
+        out[str(d["booster_box_id"])] = {
+            "added": int(d["added"]),
+            "removed": int(d["removed"]),
+            "repriced": int(d["repriced"]),
+            "added_units": int(d["added_units"]),
+            "removed_units": int(d["removed_units"]),
+            "net_units": int(d["added_units"]) - int(d["removed_units"]),
+            "has_previous": bool(d["has_previous"]),
+            "has_today": bool(d["has_today"]),
+        }
+    return out
@@ -1,9 +1,10 @@
 """
-Write one day of market index data into market_index_daily.
-Called by scripts/market_index.py after all aggregate data is computed.
+Write market index data into market_index_daily.
+Called by scripts/market_index.py after all aggregate data is computed (one day),
+and by scripts/market_index_range.py for a whole date range (one bulk upsert).
 """
 
-from typing import Optional
+from typing import Any, Dict, List, Optional
 
 from sqlalchemy import text
 
@@ -64,6 +65,39 @@ _upsert_sql = text("""
         updated_at = NOW()
 """)
 
+# upsert_market_index() keyword -> _upsert_sql bind parameter
+_PARAMS = {
+    "metric_date": "md",
+    "index_value": "iv",
+    "index_1d_change_pct": "i1d",
+    "index_7d_change_pct": "i7d",
+    "index_30d_change_pct": "i30d",
+    "sentiment": "sent",
+    "fear_greed_score": "fg",
+    "floors_up_count": "fup",
+    "floors_down_count": "fdn",
+    "floors_flat_count": "ffl",
+    "biggest_gainer_box_id": "bg_id",
+    "biggest_gainer_pct": "bg_pct",
+    "biggest_loser_box_id": "bl_id",
+    "biggest_loser_pct": "bl_pct",
+    "total_daily_volume_usd": "tdv",
+    "total_7d_volume_usd": "t7v",
+    "total_30d_volume_usd": "t30v",
+    "volume_1d_change_pct": "v1d",
+    "volume_7d_change_pct": "v7d",
+    "avg_liquidity_score": "aliq",
+    "total_boxes_sold_today": "tbst",
+    "total_active_listings": "tal",
+    "total_boxes_added_today": "tbat",
+    "net_supply_change": "nsc",
+    "listings_1d_change": "l1d",
+}
+
+
+def _bind(row: Dict[str, Any]) -> Dict[str, Any]:
+    return {param: row.get(name) for name, param in _PARAMS.items()}
+
 
 def upsert_market_index(
     metric_date: str,
@@ -93,37 +127,29 @@ def upsert_market_index(
     listings_1d_change: Optional[int] = None,
 ) -> bool:
     """Upsert one row into market_index_daily. Returns True on success, False on error."""
+    params = _bind(locals())
     try:
         engine = _get_sync_engine()
         with engine.connect() as conn:
             with conn.begin():
-                conn.execute(_upsert_sql, {
-                    "md": metric_date,
-                    "iv": index_value,
-                    "i1d": index_1d_change_pct,
-                    "i7d": index_7d_change_pct,
-                    "i30d": index_30d_change_pct,
-                    "sent": sentiment,
-                    "fg": fear_greed_score,
-                    "fup": floors_up_count,
-                    "fdn": floors_down_count,
-                    "ffl": floors_flat_count,
-                    "bg_id": biggest_gainer_box_id,
-                    "bg_pct": biggest_gainer_pct,
-                    "bl_id": biggest_loser_box_id,
-                    "bl_pct": biggest_loser_pct,
-                    "tdv": total_daily_volume_usd,
-                    "t7v": total_7d_volume_usd,
-                    "t30v": total_30d_volume_usd,
-                    "v1d": volume_1d_change_pct,
-                    "v7d": volume_7d_change_pct,
-                    "aliq": avg_liquidity_score,
-                    "tbst": total_boxes_sold_today,
-                    "tal": total_active_listings,
-                    "tbat": total_boxes_added_today,
-                    "nsc": net_supply_change,
-                    "l1d": listings_1d_change,
-                })
+                conn.execute(_upsert_sql, params)
         return True
     except Exception:
         return False
+
+
+def upsert_market_index_many(rows: List[Dict[str, Any]]) -> int:
+    """
+    Upsert many days in one transaction (executemany). Each row uses the
+    upsert_market_index() keyword names. Returns rows written, -1 on error.
+    """
+    if not rows:
+        return 0
+    try:
+        engine = _get_sync_engine()
+        with engine.connect() as conn:
+            with conn.begin():
+                conn.execute(_upsert_sql, [_bind(r) for r in rows])
+        return len(rows)
+    except Exception:
+        return -1
@@ -0,0 +1,292 @@
+"""
+Memory Profile (daily cron)
+Peak RSS per pipeline phase and per scraped box, optional tracemalloc top
+allocators, and a soft memory budget so scripts/daily_refresh.py fits Render's
+512Mi cron with the scraper phase enabled.
+
+RSS is the whole process tree: the Python process plus Playwright's Chromium
+children, which tracemalloc cannot see. A background thread samples it every
+SAMPLE_SECONDS and keeps the peak of every open phase / box, so short spikes
+between checkpoints are caught.
+
+Profiling mode (CRON_MEMORY_PROFILE=1 or daily_refresh.py --memory-profile)
+also runs tracemalloc and records the Python allocation sites that grew most
+during each phase (TOP_N) and each box (TOP_N_BOX). tracemalloc slows the run
+and adds its own overhead, so it is off by default; RSS peaks are always kept.
+Phases that overlap (pipeline without CRON_LOW_MEMORY) share one process, so
+their tracemalloc diffs include each other's allocations.
+
+The budget (CRON_MEMORY_BUDGET_MB; DEFAULT_LOW_MEMORY_BUDGET_MB when
+CRON_LOW_MEMORY is set) is soft: callers check over_budget() at safe points
+and mitigate before the OOM killer does. mitigate() runs gc and returns freed
+heap to the OS (malloc_trim); the scraper also closes its browser context
+between boxes. Every mitigation is recorded with RSS before and after.
+
+Everything lands in summary(), saved under "memory" in
+logs/daily_refresh_status.json. Without /proc (macOS), RSS is unavailable:
+no peaks, no budget, tracemalloc still works.
+"""
+
+import ctypes
+import gc
+import logging
+import os
+import threading
+import time
+import tracemalloc
+from collections import defaultdict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_SECONDS = 1.0
+TOP_N = 10
+TOP_N_BOX = 3
+TRACEMALLOC_FRAMES = 1
+DEFAULT_LOW_MEMORY_BUDGET_MB = 400  # of Render's 512Mi: headroom for the sample interval
+
+_PROC = "/proc"
+_PAGE_MB = (os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096) / (1024 * 1024)
+_PROJECT_ROOT = str(Path(__file__).parent.parent.parent) + os.sep
+_TRACE_FILTERS = [
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, __file__),  # the sampler's own /proc reads
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+]
+
+
+def _env_flag(name: str) -> bool:
+    return os.environ.get(name, "").lower() in ("1", "true", "yes")
+
+
+def process_tree_rss_mb(root_pid: Optional[int] = None) -> Optional[float]:
+    """RSS of root_pid (default: this process) and all its descendants, in MB. None without /proc."""
+    try:
+        entries = os.listdir(_PROC)
+    except OSError:
+        return None
+    root_pid = root_pid or os.getpid()
+    children: Dict[int, List[int]] = defaultdict(list)
+    pages: Dict[int, int] = {}
+    for name in entries:
+        if not name.isdigit():
+            continue
+        try:
+            with open(f"{_PROC}/{name}/stat") as f:
+                stat = f.read()
+            with open(f"{_PROC}/{name}/statm") as f:
+                statm = f.read().split()
+        except OSError:
+            continue  # exited while scanning
+        pid = int(name)
+        # comm (field 2) may contain spaces; ppid is the 2nd field after the closing paren
+        children[int(stat.rsplit(")", 1)[1].split()[1])].append(pid)
+        pages[pid] = int(statm[1])
+    if root_pid not in pages:
+        return None
+    total, stack = 0, [root_pid]
+    while stack:
+        pid = stack.pop()
+        total += pages.get(pid, 0)
+        stack.extend(children.get(pid, ()))
+    return round(total * _PAGE_MB, 1)
+
+
+def _python_peak_rss_mb() -> Optional[float]:
+    try:
+        import resource
+    except ImportError:
+        return None
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)  # KB on Linux
+
+
+def _malloc_trim() -> None:
+    """Hand freed heap pages back to the OS (glibc only). gc alone rarely lowers RSS."""
+    try:
+        ctypes.CDLL("libc.so.6").malloc_trim(0)
+    except (OSError, AttributeError):
+        pass
+
+
+def _where(frame) -> str:
+    filename = frame.filename
+    if filename.startswith(_PROJECT_ROOT):
+        filename = filename[len(_PROJECT_ROOT):]
+    elif "site-packages" + os.sep in filename:
+        filename = filename.split("site-packages" + os.sep, 1)[1]
+    return f"{filename}:{frame.lineno}"
+
+
+class MemoryProfiler:
+    """Per-phase / per-box memory peaks, tracemalloc diffs and a soft budget"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._sampler: Optional[threading.Thread] = None
+        self._open: Dict[tuple, float] = {}  # (phase,) or (phase, box_id) -> peak MB so far
+        self.profile = False
+        self.budget_mb: Optional[float] = None
+        self.reset()
+
+    def reset(self) -> None:
+        self.peak_mb: Optional[float] = None
+        self.over_budget_samples = 0
+        self.phases: Dict[str, Dict[str, Any]] = {}
+        self.boxes: Dict[str, Dict[str, Dict[str, Any]]] = defaultdict(dict)
+        self.mitigations: List[Dict[str, Any]] = []
+
+    def configure_from_env(self, profile: bool = False) -> "MemoryProfiler":
+        """CRON_MEMORY_PROFILE / CRON_MEMORY_BUDGET_MB / CRON_LOW_MEMORY; profile=True forces tracemalloc on."""
+        self.profile = profile or _env_flag("CRON_MEMORY_PROFILE")
+        budget = os.environ.get("CRON_MEMORY_BUDGET_MB", "").strip()
+        if budget:
+            self.budget_mb = float(budget) or None  # 0 disables
+        elif _env_flag("CRON_LOW_MEMORY"):
+            self.budget_mb = DEFAULT_LOW_MEMORY_BUDGET_MB
+        else:
+            self.budget_mb = None
+        return self
+
+    def start(self) -> None:
+        if self.profile and not tracemalloc.is_tracing():
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+        if self._sampler is None and self.used_mb() is not None:
+            self._stop.clear()
+            self._sampler = threading.Thread(target=self._sample_loop, name="memory-sampler", daemon=True)
+            self._sampler.start()
+        logger.info(
+            f"Memory profile: RSS sampling {'on' if self._sampler else 'unavailable'}, "
+            f"tracemalloc {'on' if self.profile else 'off'}, "
+            f"budget {f'{self.budget_mb:.0f} MB' if self.budget_mb else 'none'}"
+        )
+
+    def stop(self) -> None:
+        if self._sampler is not None:
+            self._stop.set()
+            self._sampler.join(timeout=SAMPLE_SECONDS * 2)
+            self._sampler = None
+        if self.profile and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    def _sample_loop(self) -> None:
+        while not self._stop.wait(SAMPLE_SECONDS):
+            self._sample()
+
+    def _sample(self) -> Optional[float]:
+        mb = self.used_mb()
+        if mb is None:
+            return None
+        with self._lock:
+            self.peak_mb = max(self.peak_mb or 0.0, mb)
+            for key, peak in self._open.items():
+                self._open[key] = max(peak, mb)
+            if self.budget_mb and mb >= self.budget_mb:
+                self.over_budget_samples += 1
+        return mb
+
+    def used_mb(self) -> Optional[float]:
+        """Current RSS of the process tree (Python + browser), in MB."""
+        return process_tree_rss_mb()
+
+    def over_budget(self) -> bool:
+        if not self.budget_mb:
+            return False
+        mb = self._sample()
+        return mb is not None and mb >= self.budget_mb
+
+    def _snapshot(self) -> Optional[tracemalloc.Snapshot]:
+        if not tracemalloc.is_tracing():
+            return None
+        return tracemalloc.take_snapshot().filter_traces(_TRACE_FILTERS)
+
+    def _top_allocators(self, before: tracemalloc.Snapshot, n: int) -> List[Dict[str, Any]]:
+        diff = self._snapshot().compare_to(before, "lineno")
+        return [
+            {
+                "where": _where(s.traceback[0]),
+                "size_diff_kb": round(s.size_diff / 1024, 1),
+                "size_kb": round(s.size / 1024, 1),
+                "count_diff": s.count_diff,
+            }
+            for s in diff[:n]
+            if s.size_diff > 0
+        ]
+
+    @contextmanager
+    def _measure(self, key: tuple, top_n: int, store: Dict[str, Any], log: bool = False):
+        """Stores start/end/peak MB (and top allocators when tracing) under store[key[-1]], also on error."""
+        start_mb = self._sample()
+        before = self._snapshot()
+        with self._lock:
+            self._open[key] = start_mb or 0.0
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            end_mb = self._sample()
+            with self._lock:
+                peak = self._open.pop(key, 0.0)
+            entry: Dict[str, Any] = {
+                "start_mb": start_mb,
+                "end_mb": end_mb,
+                "peak_mb": round(max(peak, end_mb or 0.0), 1) if start_mb is not None else None,
+                "growth_mb": round(end_mb - start_mb, 1) if start_mb is not None and end_mb is not None else None,
+                "seconds": round(time.perf_counter() - t0, 1),
+            }
+            if before is not None:
+                entry["top_allocators"] = self._top_allocators(before, top_n)
+            store[key[-1]] = entry
+            if log:
+                logger.info(f"Memory {key[-1]}: peak {entry['peak_mb']} MB, {start_mb} -> {end_mb} MB")
+
+    @contextmanager
+    def phase(self, name: str):
+        with self._measure((name,), TOP_N, self.phases, log=True):
+            yield
+
+    @contextmanager
+    def box(self, phase: str, box_id: str):
+        with self._measure((phase, box_id), TOP_N_BOX, self.boxes[phase]):
+            yield
+
+    def mitigate(self, where: str, action: str = "gc", before_mb: Optional[float] = None) -> Optional[float]:
+        """gc + malloc_trim, recorded with RSS before / after. Returns RSS after (MB)."""
+        if before_mb is None:
+            before_mb = self.used_mb()
+        collected = gc.collect()
+        _malloc_trim()
+        after_mb = self.used_mb()
+        self.mitigations.append({
+            "where": where,
+            "action": action,
+            "before_mb": before_mb,
+            "after_mb": after_mb,
+            "gc_collected": collected,
+        })
+        logger.warning(
+            f"Memory over budget ({self.budget_mb:.0f} MB) at {where}: {action}, "
+            f"{before_mb} -> {after_mb} MB"
+        )
+        return after_mb
+
+    def summary(self) -> Dict[str, Any]:
+        traced_peak = tracemalloc.get_traced_memory()[1] if tracemalloc.is_tracing() else None
+        return {
+            "profiling": self.profile,
+            "budget_mb": self.budget_mb,
+            "peak_mb": self.peak_mb,
+            "python_peak_rss_mb": _python_peak_rss_mb(),
+            "tracemalloc_peak_mb": round(traced_peak / (1024 * 1024), 1) if traced_peak is not None else None,
+            "over_budget_samples": self.over_budget_samples,
+            "phases": self.phases,
+            "boxes": dict(self.boxes),
+            "mitigations": self.mitigations,
+        }
+
+
+memory_profiler = MemoryProfiler()
@@ -0,0 +1,237 @@
+"""
+Pipeline Checkpoints
+Per-(run, phase, unit) status for the daily refresh (tables from migration 013).
+
+Every paid or slow unit of work (one Apify actor run, one SerpApi box, one
+scraped box) records a pipeline_tasks row with its status and a hash of what it
+wrote. `daily_refresh.py --resume <run_id>` loads the run, skips every unit
+already marked succeeded and re-executes the rest, so a crash at box 14 of 18
+costs 4 boxes on the rerun instead of 18.
+
+Writers follow box_metrics_writer: they return a bool and never raise, so a
+checkpoint hiccup cannot fail the pipeline itself.
+"""
+
+import hashlib
+import json
+import logging
+import threading
+import uuid
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
+
+from sqlalchemy import text
+
+from app.services.db_historical_reader import _get_sync_engine
+
+logger = logging.getLogger(__name__)
+
+WHOLE_PHASE = "*"
+
+TASK_SUCCEEDED = "succeeded"
+TASK_FAILED = "failed"
+
+
+def new_run_id() -> str:
+    return str(uuid.uuid4())
+
+
+def output_hash(output: Any) -> Optional[str]:
+    """sha256 of the canonical JSON of a unit's output (None for no output)."""
+    if output is None:
+        return None
+    payload = json.dumps(output, sort_keys=True, default=str, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# RUNS
+# ═══════════════════════════════════════════════════════════════════════════
+
+def start_run(run_id: str, pipeline: str, run_date: str) -> bool:
+    """Create the run row, or reopen it (attempts + 1) when resuming."""
+    try:
+        engine = _get_sync_engine()
+        with engine.connect() as conn:
+            with conn.begin():
+                conn.execute(text("""
+                    INSERT INTO pipeline_runs (run_id, pipeline, run_date, status, attempts, started_at)
+                    VALUES (:rid, :pipeline, CAST(:rd AS date), 'running', 1, NOW())
+                    ON CONFLICT (run_id) DO UPDATE SET
+                        status = 'running',
+                        attempts = pipeline_runs.attempts + 1,
+                        finished_at = NULL
+                """), {"rid": run_id, "pipeline": pipeline, "rd": run_date})
+        return True
+    except Exception as e:
+        logger.warning(f"Could not record pipeline run {run_id}: {e}")
+        return False
+
+
+def finish_run(run_id: str, status: str, summary: Optional[Dict[str, Any]] = None) -> bool:
+    try:
+        engine = _get_sync_engine()
+        with engine.connect() as conn:
+            with conn.begin():
+                conn.execute(text("""
+                    UPDATE pipeline_runs
+                    SET status = :status, finished_at = NOW(), summary = CAST(:summary AS jsonb)
+                    WHERE run_id = :rid
+                """), {"rid": run_id, "status": status, "summary": json.dumps(summary or {}, default=str)})
+        return True
+    except Exception as e:
+        logger.warning(f"Could not finish pipeline run {run_id}: {e}")
+        return False
+
+
+def get_run(run_id: str) -> Optional[Dict[str, Any]]:
+    """Run row plus its tasks, or None if the run does not exist."""
+    engine = _get_sync_engine()
+    with engine.connect() as conn:
+        row = conn.execute(text("""
+            SELECT run_id, pipeline, run_date, status, attempts, started_at, finished_at
+            FROM pipeline_runs WHERE run_id = :rid
+        """), {"rid": run_id}).fetchone()
+        if row is None:
+            return None
+        tasks = conn.execute(text("""
+            SELECT phase, unit_key, status, output_hash, error, attempts, finished_at
+            FROM pipeline_tasks WHERE run_id = :rid
+            ORDER BY phase, unit_key
+        """), {"rid": run_id}).fetchall()
+    run = dict(row._mapping)
+    run["run_date"] = run["run_date"].isoformat() if hasattr(run["run_date"], "isoformat") else str(run["run_date"])
+    run["tasks"] = [dict(t._mapping) for t in tasks]
+    return run
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# TASKS
+# ═══════════════════════════════════════════════════════════════════════════
+
+def record_task(
+    run_id: str,
+    phase: str,
+    unit_key: str,
+    status: str,
+    output: Any = None,
+    error: Optional[str] = None,
+    started_at: Optional[datetime] = None,
+) -> bool:
+    try:
+        engine = _get_sync_engine()
+        with engine.connect() as conn:
+            with conn.begin():
+                conn.execute(text("""
+                    INSERT INTO pipeline_tasks (run_id, phase, unit_key, status, output_hash, error, attempts, started_at, finished_at)
+                    VALUES (:rid, :phase, :unit, :status, :hash, :error, 1, :started, NOW())
+                    ON CONFLICT (run_id, phase, unit_key) DO UPDATE SET
+                        status = EXCLUDED.status,
+                        output_hash = EXCLUDED.output_hash,
+                        error = EXCLUDED.error,
+                        attempts = pipeline_tasks.attempts + 1,
+                        started_at = EXCLUDED.started_at,
+                        finished_at = NOW()
+                """), {
+                    "rid": run_id,
+                    "phase": phase,
+                    "unit": unit_key,
+                    "status": status,
+                    "hash": output_hash(output),
+                    "error": (error or "")[:2000] or None,
+                    "started": started_at,
+                })
+        return True
+    except Exception as e:
+        logger.warning(f"Could not checkpoint {phase}/{unit_key}: {e}")
+        return False
+
+
+def completed_units(run_id: str, phase: str) -> Set[str]:
+    """Unit keys of `phase` already succeeded in this run."""
+    try:
+        engine = _get_sync_engine()
+        with engine.connect() as conn:
+            rows = conn.execute(text("""
+                SELECT unit_key FROM pipeline_tasks
+                WHERE run_id = :rid AND phase = :phase AND status = :ok
+            """), {"rid": run_id, "phase": phase, "ok": TASK_SUCCEEDED}).fetchall()
+        return {r[0] for r in rows}
+    except Exception as e:
+        logger.warning(f"Could not load checkpoints for {phase}: {e}")
+        return set()
+
+
+class RunCheckpoint:
+    """
+    Checkpoint state for one pipeline run, shared by the phase threads.
+
+    pending(phase, units) is the work list for a phase (everything on a fresh
+    run; only failed/missing units on a resume). unit_callback(phase) returns the
+    on_unit_done(unit_key, ok, output=None, error=None, started_at=None) hook the
+    phase loops call; started_at gives the unit's duration in pipeline_tasks.
+    """
+
+    def __init__(self, run_id: str, resumed: bool = False):
+        self.run_id = run_id
+        self.resumed = resumed
+        self._lock = threading.Lock()
+        self.executed: Dict[str, Set[str]] = {}
+        self.failed: Dict[str, Set[str]] = {}
+
+    def pending(self, phase: str, units: Iterable[str]) -> List[str]:
+        units = list(units)
+        if not self.resumed:
+            return units
+        done = completed_units(self.run_id, phase)
+        todo = [u for u in units if u not in done]
+        logger.info(f"Resume {self.run_id[:8]}: {phase} {len(units) - len(todo)} done, {len(todo)} to re-run")
+        return todo
+
+    def phase_done(self, phase: str) -> bool:
+        """True when a whole-phase unit already succeeded in this run (resume only)."""
+        return self.resumed and WHOLE_PHASE in completed_units(self.run_id, phase)
+
+    def executed_any(self, *phases: str) -> bool:
+        with self._lock:
+            return any(self.executed.get(p) for p in phases)
+
+    def record(
+        self,
+        phase: str,
+        unit_key: str,
+        ok: bool,
+        output: Any = None,
+        error: Optional[str] = None,
+        started_at: Optional[datetime] = None,
+    ) -> None:
+        with self._lock:
+            self.executed.setdefault(phase, set()).add(unit_key)
+            if ok:
+                self.failed.get(phase, set()).discard(unit_key)
+            else:
+                self.failed.setdefault(phase, set()).add(unit_key)
+        record_task(
+            self.run_id, phase, unit_key, TASK_SUCCEEDED if ok else TASK_FAILED,
+            output=output, error=error, started_at=started_at,
+        )
+
+    def record_phase(self, phase: str, ok: bool, output: Any = None, error: Optional[str] = None) -> None:
+        self.record(phase, WHOLE_PHASE, ok, output=output, error=error)
+
+    def unit_callback(self, phase: str) -> Callable[..., None]:
+        def on_unit_done(
+            unit_key: str, ok: bool, output: Any = None, error: Optional[str] = None,
+            started_at: Optional[datetime] = None,
+        ) -> None:
+            self.record(phase, unit_key, ok, output=output, error=error, started_at=started_at)
+        return on_unit_done
+
+    def executed_units(self) -> Dict[str, List[str]]:
+        """Units recorded by this process (this attempt), per phase."""
+        with self._lock:
+            return {p: sorted(u) for p, u in self.executed.items()}
+
+    def failed_units(self) -> Dict[str, List[str]]:
+        with self._lock:
+            return {p: sorted(u) for p, u in self.failed.items() if u}
@@ -0,0 +1,263 @@
+"""
+Pipeline Telemetry
+Per-phase telemetry of the daily refresh (pipeline_phase_runs, migration 016)
+and the reads behind /health/cron and /admin/pipeline-runs.
+
+scripts/daily_refresh.py writes one row per phase as soon as the phase's node
+finishes and upserts all of them again at the end of the run (final memory and
+provider numbers), keyed by the pipeline_runs attempt, so a crash keeps the
+finished phases and a --resume adds rows instead of overwriting the original
+run's numbers:
+
+  duration_seconds   wall time of the phase node (pipeline_runner timeline)
+  units_ok/failed    pipeline_tasks units this attempt executed in that phase
+                     (on a resume, only the re-run units; not the run's totals)
+  retries            executions of those units before this one (pipeline_tasks.attempts - 1)
+  api_calls          provider calls actually made (response-cache replays excluded)
+  cost_units         provider billing units: Apify compute units, one per SerpApi search
+  rows_written       DB rows the phase reported writing
+  peak_mb            peak process-tree RSS during the phase (app/services/memory_profile.py)
+  details            per-box seconds / peak MB, phase counters, node error
+
+Provider calls are counted in-process with count_call() where they are made
+(tcgplayer_apify, ebay_serpapi, listings_scraper), by provider; the cron maps
+providers to phases.
+
+Writers follow pipeline_checkpoint: they return a bool and never raise. The
+readers take an AsyncSession for the API.
+"""
+
+import json
+import logging
+import statistics
+import threading
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.services.db_historical_reader import _get_sync_engine
+from app.services.pipeline_checkpoint import WHOLE_PHASE
+
+logger = logging.getLogger(__name__)
+
+# A phase is flagged slow when its latest run takes SLOW_RATIO x its median over
+# the window and at least SLOW_MIN_SECONDS more; memory likewise with MEMORY_RATIO
+SLOW_RATIO = 1.5
+SLOW_MIN_SECONDS = 30.0
+MEMORY_RATIO = 1.25
+
+_calls_lock = threading.Lock()
+_calls: Dict[str, Dict[str, float]] = {}
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# PROVIDER CALLS (in-process)
+# ═══════════════════════════════════════════════════════════════════════════
+
+def count_call(provider: str, calls: int = 1, cost_units: float = 0.0) -> None:
+    with _calls_lock:
+        c = _calls.setdefault(provider, {"calls": 0, "cost_units": 0.0})
+        c["calls"] += calls
+        c["cost_units"] += float(cost_units or 0.0)
+
+
+def provider_calls() -> Dict[str, Dict[str, float]]:
+    with _calls_lock:
+        return {p: dict(c) for p, c in _calls.items()}
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# WRITE (cron)
+# ═══════════════════════════════════════════════════════════════════════════
+
+def task_stats(
+    run_id: str,
+    executed: Optional[Dict[str, Iterable[str]]] = None,
+    phase: Optional[str] = None,
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Per phase: units_ok, units_failed, retries and per-unit {status, seconds,
+    attempts} from pipeline_tasks. executed ({phase: unit keys}, the
+    RunCheckpoint's) limits the counts to the units this attempt ran; without
+    it they are run-level totals across attempts. phase limits the query to one phase.
+    """
+    out: Dict[str, Dict[str, Any]] = {}
+    try:
+        engine = _get_sync_engine()
+        with engine.connect() as conn:
+            rows = conn.execute(text("""
+                SELECT phase, unit_key, status, attempts,
+                       EXTRACT(EPOCH FROM (finished_at - started_at)) AS seconds
+                FROM pipeline_tasks
+                WHERE run_id = :rid AND (CAST(:phase AS text) IS NULL OR phase = :phase)
+            """), {"rid": run_id, "phase": phase}).fetchall()
+    except Exception as e:
+        logger.warning(f"Could not load task stats for run {run_id}: {e}")
+        return out
+    if executed is not None:
+        executed = {p: set(units) for p, units in executed.items()}
+    for r in rows:
+        d = r._mapping
+        if executed is not None and d["unit_key"] not in executed.get(d["phase"], ()):
+            continue
+        p = out.setdefault(d["phase"], {"units_ok": 0, "units_failed": 0, "retries": 0, "units": {}})
+        p["units_ok" if d["status"] == "succeeded" else "units_failed"] += 1
+        p["retries"] += max(int(d["attempts"]) - 1, 0)
+        if d["unit_key"] != WHOLE_PHASE:
+            p["units"][d["unit_key"]] = {
+                "status": d["status"],
+                "seconds": round(float(d["seconds"]), 1) if d["seconds"] is not None else None,
+                "attempts": int(d["attempts"]),
+            }
+    return out
+
+
+def record_phase_runs(run_id: str, attempt: int, phases: List[Dict[str, Any]]) -> bool:
+    """Upsert one pipeline_phase_runs row per phase dict (keys as the table's columns)."""
+    try:
+        engine = _get_sync_engine()
+        with engine.connect() as conn:
+            with conn.begin():
+                for p in phases:
+                    conn.execute(text("""
+                        INSERT INTO pipeline_phase_runs (
+                            run_id, phase, attempt, status, started_at, finished_at, duration_seconds,
+                            units_ok, units_failed, retries, api_calls, cost_units, rows_written, peak_mb, details
+                        ) VALUES (
+                            :rid, :phase, :attempt, :status, :started_at, :finished_at, :duration_seconds,
+                            :units_ok, :units_failed, :retries, :api_calls, :cost_units, :rows_written, :peak_mb,
+                            CAST(:details AS jsonb)
+                        )
+                        ON CONFLICT (run_id, phase, attempt) DO UPDATE SET
+                            status = EXCLUDED.status,
+                            started_at = EXCLUDED.started_at,
+                            finished_at = EXCLUDED.finished_at,
+                            duration_seconds = EXCLUDED.duration_seconds,
+                            units_ok = EXCLUDED.units_ok,
+                            units_failed = EXCLUDED.units_failed,
+                            retries = EXCLUDED.retries,
+                            api_calls = EXCLUDED.api_calls,
+                            cost_units = EXCLUDED.cost_units,
+                            rows_written = EXCLUDED.rows_written,
+                            peak_mb = EXCLUDED.peak_mb,
+                            details = EXCLUDED.details
+                    """), {
+                        "rid": run_id,
+                        "attempt": attempt,
+                        "phase": p["phase"],
+                        "status": p["status"],
+                        "started_at": p.get("started_at"),
+                        "finished_at": p.get("finished_at"),
+                        "duration_seconds": p.get("duration_seconds"),
+                        "units_ok": p.get("units_ok", 0),
+                        "units_failed": p.get("units_failed", 0),
+                        "retries": p.get("retries", 0),
+                        "api_calls": p.get("api_calls", 0),
+                        "cost_units": p.get("cost_units", 0.0),
+                        "rows_written": p.get("rows_written", 0),
+                        "peak_mb": p.get("peak_mb"),
+                        "details": json.dumps(p.get("details") or {}, default=str),
+                    })
+        return True
+    except Exception as e:
+        logger.warning(f"Could not record phase telemetry for run {run_id}: {e}")
+        return False
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# READ (API)
+# ═══════════════════════════════════════════════════════════════════════════
+
+def _iso(v: Any) -> Any:
+    return v.isoformat() if isinstance(v, (date, datetime)) else v
+
+
+def _json(v: Any) -> Dict[str, Any]:
+    return json.loads(v) if isinstance(v, str) else (v or {})
+
+
+async def recent_runs(db: AsyncSession, pipeline: str = "daily_refresh", days: int = 14) -> List[Dict[str, Any]]:
+    """
+    Runs of the last `days` days, newest first, each with its phase rows (all
+    attempts) and hours_ago since it finished (or started, while running).
+    """
+    since = date.today() - timedelta(days=days - 1)
+    runs = (await db.execute(text("""
+        SELECT run_id, run_date, status, attempts, started_at, finished_at, summary,
+               EXTRACT(EPOCH FROM (NOW() - COALESCE(finished_at, started_at))) / 3600.0 AS hours_ago
+        FROM pipeline_runs
+        WHERE pipeline = :pipeline AND run_date >= :since
+        ORDER BY started_at DESC
+    """), {"pipeline": pipeline, "since": since})).fetchall()
+    if not runs:
+        return []
+    phases = (await db.execute(text("""
+        SELECT p.run_id, p.phase, p.attempt, p.status, p.started_at, p.finished_at, p.duration_seconds,
+               p.units_ok, p.units_failed, p.retries, p.api_calls, p.cost_units, p.rows_written, p.peak_mb, p.details
+        FROM pipeline_phase_runs p
+        JOIN pipeline_runs r ON r.run_id = p.run_id
+        WHERE r.pipeline = :pipeline AND r.run_date >= :since
+        ORDER BY p.attempt, p.started_at NULLS LAST
+    """), {"pipeline": pipeline, "since": since})).fetchall()
+    by_run: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+    for r in phases:
+        row = {k: _iso(v) for k, v in r._mapping.items() if k != "run_id"}
+        row["details"] = _json(row["details"])
+        by_run[r._mapping["run_id"]].append(row)
+    out = []
+    for r in runs:
+        run = {k: _iso(v) for k, v in r._mapping.items()}
+        run["hours_ago"] = float(run["hours_ago"]) if run["hours_ago"] is not None else None
+        run["summary"] = _json(run["summary"])
+        run["phases"] = by_run.get(run["run_id"], [])
+        out.append(run)
+    return out
+
+
+def phase_trends(runs: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """
+    Per phase over `runs` (newest first): latest vs median of the earlier runs for
+    duration and peak memory, with slow / memory_regression flags, plus averages
+    of calls, cost and rows. Only first attempts that succeeded are compared — a
+    resume re-runs a subset of units and would read as a speedup.
+    """
+    by_phase: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+    for run in runs:
+        for p in run["phases"]:
+            if p["attempt"] == 1 and p["status"] == "succeeded" and p["duration_seconds"] is not None:
+                by_phase[p["phase"]].append({**p, "run_date": run["run_date"]})
+
+    out = {}
+    for phase, rows in by_phase.items():
+        latest, earlier = rows[0], rows[1:]
+        median_s = statistics.median(p["duration_seconds"] for p in earlier) if earlier else None
+        peaks = [p["peak_mb"] for p in earlier if p["peak_mb"] is not None]
+        median_peak = statistics.median(peaks) if peaks else None
+        out[phase] = {
+            "runs": len(rows),
+            "latest_run_date": latest["run_date"],
+            "latest_seconds": round(latest["duration_seconds"], 1),
+            "median_seconds": round(median_s, 1) if median_s is not None else None,
+            "max_seconds": round(max(p["duration_seconds"] for p in rows), 1),
+            "latest_peak_mb": latest["peak_mb"],
+            "median_peak_mb": median_peak,
+            "avg_api_calls": round(statistics.mean(p["api_calls"] for p in rows), 1),
+            "total_cost_units": round(sum(p["cost_units"] for p in rows), 2),
+            "avg_rows_written": round(statistics.mean(p["rows_written"] for p in rows), 1),
+            "failed_units": sum(p["units_failed"] for p in rows),
+            "retries": sum(p["retries"] for p in rows),
+            "slow": (
+                median_s is not None
+                and latest["duration_seconds"] > SLOW_RATIO * median_s
+                and latest["duration_seconds"] - median_s >= SLOW_MIN_SECONDS
+            ),
+            "memory_regression": (
+                median_peak is not None
+                and latest["peak_mb"] is not None
+                and latest["peak_mb"] > MEMORY_RATIO * median_peak
+            ),
+        }
+    return out
@@ -0,0 +1,136 @@
+"""
+Query Budget
+Counts the SQL statements issued while a block runs, so endpoint checks can
+fail when a route issues more queries than it is allowed, or issues the same
+statement again and again (an N+1: one query per item inside a loop).
+
+    with query_budget(3, name="GET /booster-boxes") as counter:
+        client.get("/booster-boxes")
+    # raises QueryBudgetExceeded with every statement listed
+
+Counting hooks SQLAlchemy's before_cursor_execute on the Engine class, so it
+sees every engine in the process (async engines run on a sync Engine too)
+without touching app/db_engines.py. Statements are grouped by shape: literals,
+bind parameters and IN lists are normalized, so "the same query for box 1, 2,
+3" counts as one shape repeated three times.
+
+ENDPOINT_BUDGETS are the declared per-request budgets, with cold caches (the
+worst case: leaderboard / rank caches and history_cache empty) and box ids
+given as DB UUIDs. Used by scripts/check_query_budgets.py and the pytest
+plugin in app/services/query_budget_pytest.py.
+"""
+
+import re
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from typing import Iterator, List, Optional, Tuple
+
+# A statement shape seen this many times in one block is reported as an N+1
+N_PLUS_ONE_THRESHOLD = 3
+
+ENDPOINT_BUDGETS = {
+    # boxes + latest metrics per box (one join)
+    "GET /booster-boxes": 3,
+    # box, latest metric, eBay daily, history version + load
+    "GET /booster-boxes/{box_id}": 6,
+    # history version + load
+    "GET /booster-boxes/{box_id}/time-series": 3,
+    # latest index row + previous day
+    "GET /booster-boxes/market-macro": 2,
+    "GET /booster-boxes/market-index/time-series": 1,
+    # box by set code, then the box detail queries
+    "GET /extension/box/{set_code}": 6,
+    "GET /extension/compare": 10,
+    # matched boxes + their latest metrics
+    "GET /extension/search": 2,
+    "GET /extension/top-movers": 1,
+}
+
+_WS = re.compile(r"\s+")
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PARAM = re.compile(r"%\(\w+\)s|%s|\$\d+|\?|:\w+")
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+
+
+def normalize_statement(statement: str) -> str:
+    """Statement shape: literals and parameters become ?, IN lists become (?)."""
+    s = _WS.sub(" ", statement).strip()
+    s = _STRING.sub("?", s)
+    s = _PARAM.sub("?", s)
+    s = _NUMBER.sub("?", s)
+    return _IN_LIST.sub("(?)", s)
+
+
+class QueryBudgetExceeded(AssertionError):
+    """A block issued more statements than its budget, or a repeated (N+1) statement."""
+
+
+class QueryCounter:
+    """
+    Records every SQL statement executed on any Engine while active (context
+    manager). It sees the whole process, including statements from other threads.
+    """
+
+    def __init__(self):
+        self.statements: List[str] = []
+        self._lock = threading.Lock()
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        with self._lock:
+            self.statements.append(statement)
+
+    def __enter__(self) -> "QueryCounter":
+        from sqlalchemy import event
+        from sqlalchemy.engine import Engine
+
+        event.listen(Engine, "before_cursor_execute", self._on_execute)
+        return self
+
+    def __exit__(self, *exc) -> None:
+        from sqlalchemy import event
+        from sqlalchemy.engine import Engine
+
+        event.remove(Engine, "before_cursor_execute", self._on_execute)
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def reset(self) -> None:
+        with self._lock:
+            self.statements.clear()
+
+    def repeated(self, threshold: int = N_PLUS_ONE_THRESHOLD) -> List[Tuple[str, int]]:
+        """Statement shapes executed at least threshold times, most frequent first."""
+        shapes = Counter(normalize_statement(s) for s in self.statements)
+        return [(shape, n) for shape, n in shapes.most_common() if n >= threshold]
+
+    def report(self) -> str:
+        lines = [f"{self.count} statement(s):"]
+        for i, s in enumerate(self.statements, 1):
+            lines.append(f"  {i}. {_WS.sub(' ', s).strip()[:200]}")
+        for shape, n in self.repeated():
+            lines.append(f"  repeated {n}x (N+1?): {shape[:200]}")
+        return "\n".join(lines)
+
+    def check(self, budget: int, name: str = "block", detect_n_plus_one: bool = True) -> None:
+        """Raise QueryBudgetExceeded if over budget or (optionally) a shape repeats."""
+        if self.count > budget:
+            raise QueryBudgetExceeded(f"{name}: {self.count} queries, budget {budget}\n{self.report()}")
+        if detect_n_plus_one and self.repeated():
+            raise QueryBudgetExceeded(f"{name}: repeated statement within budget {budget}\n{self.report()}")
+
+
+@contextmanager
+def query_budget(budget: int, name: str = "block", detect_n_plus_one: bool = True) -> Iterator[QueryCounter]:
+    """Count statements in the block and check them against budget on exit."""
+    with QueryCounter() as counter:
+        yield counter
+    counter.check(budget, name=name, detect_n_plus_one=detect_n_plus_one)
+
+
+def budget_for(endpoint: str) -> Optional[int]:
+    """Declared budget for "METHOD /route/template", or None."""
+    return ENDPOINT_BUDGETS.get(endpoint)
@@ -0,0 +1,67 @@
+"""
+Query Budget — pytest plugin
+Enable with:  pytest -p app.services.query_budget_pytest
+
+  @pytest.mark.query_budget(3)                         explicit budget
+  @pytest.mark.query_budget(endpoint="GET /booster-boxes")   ENDPOINT_BUDGETS entry
+  @pytest.mark.query_budget(2, n_plus_one=False)       count only, allow repeats
+
+Only the test call is counted (not fixtures, so seeding data is free). The test
+fails with the statement list when it goes over budget or repeats a statement
+shape N_PLUS_ONE_THRESHOLD times.
+
+The query_counter fixture gives a test its own QueryCounter for finer checks:
+
+    def test_search(client, query_counter):
+        with query_counter:
+            client.get("/extension/search", params={"q": "OP"})
+        query_counter.check(2, name="search")
+"""
+
+import pytest
+
+from app.services.query_budget import ENDPOINT_BUDGETS, QueryBudgetExceeded, QueryCounter
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        "markers",
+        "query_budget(n=None, endpoint=None, n_plus_one=True): fail if the test issues more than n SQL statements",
+    )
+
+
+def _budget(marker) -> int:
+    if marker.args:
+        return int(marker.args[0])
+    endpoint = marker.kwargs.get("endpoint")
+    if endpoint is not None:
+        if endpoint not in ENDPOINT_BUDGETS:
+            raise pytest.UsageError(f"query_budget: no budget declared for {endpoint!r}")
+        return ENDPOINT_BUDGETS[endpoint]
+    return int(marker.kwargs["n"])
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_call(item):
+    marker = item.get_closest_marker("query_budget")
+    if marker is None:
+        yield
+        return
+    budget = _budget(marker)
+    with QueryCounter() as counter:
+        outcome = yield
+    if outcome.excinfo is not None:
+        return  # the test already failed; its own error is the useful one
+    try:
+        counter.check(
+            budget,
+            name=marker.kwargs.get("endpoint") or item.nodeid,
+            detect_n_plus_one=marker.kwargs.get("n_plus_one", True),
+        )
+    except QueryBudgetExceeded as e:
+        outcome.force_exception(e)
+
+
+@pytest.fixture
+def query_counter():
+    return QueryCounter()
@@ -0,0 +1,303 @@
+"""
+Raw Table Archive (cold storage)
+Row-level detail from tcg_listings_raw / ebay_sales_raw / ebay_active_listings_raw
+that is older than the retention horizon is moved to compressed Parquet files, partitioned as
+
+    <raw_archive_dir>/<table>/box_id=<uuid>/month=<YYYY-MM>/part-<timestamp>.parquet
+
+and summarised into tcg_listings_daily_agg / ebay_sales_daily_agg (migration 012)
+and ebay_active_listings_daily_agg (migration 017).
+scripts/compact_raw_tables.py drives the compaction; read_archived_rows() and
+rehydrate_archived_rows() bring the detail back for backfills.
+
+pyarrow is optional: without it compaction refuses to run and the reader returns [].
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PARQUET_AVAILABLE = True
+except ImportError:
+    PARQUET_AVAILABLE = False
+    pa = None
+    pq = None
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+PARQUET_COMPRESSION = "zstd"
+
+# ═══════════════════════════════════════════════════════════════════════════
+# TABLE SPECS
+# ═══════════════════════════════════════════════════════════════════════════
+# columns: (name, arrow type factory). Types are built lazily so the module
+# imports without pyarrow.
+
+RAW_TABLES: Dict[str, Dict[str, Any]] = {
+    "tcg_listings_raw": {
+        "date_col": "snapshot_date",
+        "agg_table": "tcg_listings_daily_agg",
+        "unique_cols": ("booster_box_id", "listing_id", "snapshot_date"),
+        "columns": [
+            ("id", lambda: pa.string()),
+            ("booster_box_id", lambda: pa.string()),
+            ("snapshot_date", lambda: pa.date32()),
+            ("listing_id", lambda: pa.string()),
+            ("seller_id", lambda: pa.string()),
+            ("listed_price_usd", lambda: pa.decimal128(10, 2)),
+            ("quantity", lambda: pa.int32()),
+            ("snapshot_timestamp", lambda: pa.timestamp("us")),
+            ("is_active", lambda: pa.bool_()),
+            ("raw_data", lambda: pa.string()),
+            ("created_at", lambda: pa.timestamp("us")),
+        ],
+        # Aggregate for one (box, month) partition; :bid/:start/:end bound by caller.
+        "agg_sql": """
+            INSERT INTO tcg_listings_daily_agg (
+                booster_box_id, snapshot_date, listings_count, total_quantity,
+                min_price_usd, median_price_usd, max_price_usd, archive_path
+            )
+            SELECT booster_box_id, snapshot_date, COUNT(*), COALESCE(SUM(quantity), 0),
+                   MIN(listed_price_usd),
+                   PERCENTILE_CONT(0.5) WITHIN GROUP (ORDER BY listed_price_usd),
+                   MAX(listed_price_usd), :path
+            FROM tcg_listings_raw t
+            WHERE {where}
+            GROUP BY booster_box_id, snapshot_date
+            ON CONFLICT (booster_box_id, snapshot_date) DO NOTHING
+        """,
+    },
+    "ebay_sales_raw": {
+        "date_col": "sale_date",
+        "agg_table": "ebay_sales_daily_agg",
+        "unique_cols": ("booster_box_id", "ebay_item_id"),
+        "columns": [
+            ("id", lambda: pa.string()),
+            ("booster_box_id", lambda: pa.string()),
+            ("sale_date", lambda: pa.date32()),
+            ("sale_timestamp", lambda: pa.timestamp("us")),
+            ("ebay_item_id", lambda: pa.string()),
+            ("sold_price_usd", lambda: pa.decimal128(10, 2)),
+            ("quantity", lambda: pa.int32()),
+            ("seller_id", lambda: pa.string()),
+            ("listing_type", lambda: pa.string()),
+            ("raw_data", lambda: pa.string()),
+            ("created_at", lambda: pa.timestamp("us")),
+        ],
+        # Volume mirrors query_accumulated_ebay_metrics (SUM of sold_price_usd, distinct items).
+        "agg_sql": """
+            INSERT INTO ebay_sales_daily_agg (
+                booster_box_id, sale_date, sales_count, units_sold, volume_usd,
+                min_price_usd, median_price_usd, max_price_usd, archive_path
+            )
+            SELECT booster_box_id, sale_date, COUNT(DISTINCT ebay_item_id),
+                   COALESCE(SUM(quantity), 0), COALESCE(SUM(sold_price_usd), 0),
+                   MIN(sold_price_usd),
+                   PERCENTILE_CONT(0.5) WITHIN GROUP (ORDER BY sold_price_usd),
+                   MAX(sold_price_usd), :path
+            FROM ebay_sales_raw t
+            WHERE {where}
+            GROUP BY booster_box_id, sale_date
+            ON CONFLICT (booster_box_id, sale_date) DO NOTHING
+        """,
+    },
+    # Daily snapshots for listing_snapshots.diff_snapshots, which only reads the
+    # last two days; older days are archived like tcg_listings_raw.
+    "ebay_active_listings_raw": {
+        "date_col": "snapshot_date",
+        "agg_table": "ebay_active_listings_daily_agg",
+        "unique_cols": ("booster_box_id", "listing_id", "snapshot_date"),
+        "columns": [
+            ("id", lambda: pa.string()),
+            ("booster_box_id", lambda: pa.string()),
+            ("snapshot_date", lambda: pa.date32()),
+            ("listing_id", lambda: pa.string()),
+            ("seller_id", lambda: pa.string()),
+            ("listed_price_usd", lambda: pa.decimal128(10, 2)),
+            ("quantity", lambda: pa.int32()),
+            ("snapshot_timestamp", lambda: pa.timestamp("us")),
+            ("raw_data", lambda: pa.string()),
+            ("created_at", lambda: pa.timestamp("us")),
+        ],
+        "agg_sql": """
+            INSERT INTO ebay_active_listings_daily_agg (
+                booster_box_id, snapshot_date, listings_count, total_quantity,
+                min_price_usd, median_price_usd, max_price_usd, archive_path
+            )
+            SELECT booster_box_id, snapshot_date, COUNT(*), COALESCE(SUM(quantity), 0),
+                   MIN(listed_price_usd),
+                   PERCENTILE_CONT(0.5) WITHIN GROUP (ORDER BY listed_price_usd),
+                   MAX(listed_price_usd), :path
+            FROM ebay_active_listings_raw t
+            WHERE {where}
+            GROUP BY booster_box_id, snapshot_date
+            ON CONFLICT (booster_box_id, snapshot_date) DO NOTHING
+        """,
+    },
+}
+
+
+def _spec(table: str) -> Dict[str, Any]:
+    if table not in RAW_TABLES:
+        raise ValueError(f"Unknown raw table: {table} (expected one of {sorted(RAW_TABLES)})")
+    return RAW_TABLES[table]
+
+
+def _arrow_schema(table: str):
+    return pa.schema([(name, factory()) for name, factory in _spec(table)["columns"]])
+
+
+def archive_root() -> Path:
+    root = Path(settings.raw_archive_dir)
+    if not root.is_absolute():
+        root = Path(__file__).parent.parent.parent / root
+    return root
+
+
+def partition_dir(table: str, box_id: str, month: str) -> Path:
+    """month is 'YYYY-MM'."""
+    return archive_root() / table / f"box_id={box_id}" / f"month={month}"
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# WRITE
+# ═══════════════════════════════════════════════════════════════════════════
+
+def _to_archive_row(table: str, d: Dict[str, Any]) -> Dict[str, Any]:
+    out = {}
+    for name, _ in _spec(table)["columns"]:
+        v = d.get(name)
+        if name in ("id", "booster_box_id") and v is not None:
+            v = str(v)
+        elif name == "raw_data" and v is not None and not isinstance(v, str):
+            v = json.dumps(v, default=str)
+        out[name] = v
+    return out
+
+
+def write_partition(table: str, box_id: str, month: str, rows: List[Dict[str, Any]]) -> Path:
+    """
+    Write one Parquet part for a (box, month) partition. Written to a temp name
+    and renamed so a crash never leaves a half-written part for the reader.
+    """
+    if not PARQUET_AVAILABLE:
+        raise RuntimeError("pyarrow is not installed; cannot write Parquet archive")
+    target_dir = partition_dir(table, box_id, month)
+    target_dir.mkdir(parents=True, exist_ok=True)
+    stamp = datetime.utcnow().strftime("%Y%m%dT%H%M%S%f")
+    path = target_dir / f"part-{stamp}.parquet"
+    tmp = target_dir / f".part-{stamp}.parquet.tmp"
+    arrow_table = pa.Table.from_pylist([_to_archive_row(table, r) for r in rows], schema=_arrow_schema(table))
+    pq.write_table(arrow_table, tmp, compression=PARQUET_COMPRESSION)
+    os.replace(tmp, path)
+    return path
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# READ / REHYDRATE
+# ═══════════════════════════════════════════════════════════════════════════
+
+def _month_key(d: date) -> str:
+    return f"{d.year:04d}-{d.month:02d}"
+
+
+def _iter_part_files(
+    table: str,
+    box_id: Optional[str],
+    start_date: Optional[date],
+    end_date: Optional[date],
+) -> Iterator[Path]:
+    base = archive_root() / table
+    if not base.exists():
+        return
+    box_dirs = [base / f"box_id={box_id}"] if box_id else sorted(base.glob("box_id=*"))
+    lo = _month_key(start_date) if start_date else None
+    hi = _month_key(end_date) if end_date else None
+    for box_dir in box_dirs:
+        if not box_dir.is_dir():
+            continue
+        for month_dir in sorted(box_dir.glob("month=*")):
+            month = month_dir.name.split("=", 1)[1]
+            if (lo and month < lo) or (hi and month > hi):
+                continue
+            yield from sorted(month_dir.glob("part-*.parquet"))
+
+
+def read_archived_rows(
+    table: str,
+    box_id: Optional[str] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Load archived raw rows (same column names as the hot table) for an optional
+    box and inclusive date range. raw_data is decoded back to a dict.
+    """
+    if not PARQUET_AVAILABLE:
+        logger.warning("pyarrow is not installed; archived raw rows are unavailable")
+        return []
+    date_col = _spec(table)["date_col"]
+    out: List[Dict[str, Any]] = []
+    for path in _iter_part_files(table, box_id, start_date, end_date):
+        for row in pq.read_table(path).to_pylist():
+            d = row.get(date_col)
+            if (start_date and d < start_date) or (end_date and d > end_date):
+                continue
+            if row.get("raw_data"):
+                try:
+                    row["raw_data"] = json.loads(row["raw_data"])
+                except (TypeError, ValueError):
+                    pass
+            out.append(row)
+    out.sort(key=lambda r: (r["booster_box_id"], r[date_col]))
+    return out
+
+
+def rehydrate_archived_rows(
+    table: str,
+    box_id: Optional[str] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    dry_run: bool = False,
+) -> int:
+    """
+    Copy archived rows back into the hot table for a backfill. Existing rows win
+    (ON CONFLICT DO NOTHING). The next compaction run deletes them again without
+    re-archiving, because their days already have an aggregate row.
+    Returns the number of rows read from the archive.
+    """
+    from sqlalchemy import text
+    from app.services.db_historical_reader import _get_sync_engine
+
+    rows = read_archived_rows(table, box_id, start_date, end_date)
+    if dry_run or not rows:
+        return len(rows)
+    cols = [name for name, _ in _spec(table)["columns"] if name != "id"]
+    casts = {"booster_box_id": "CAST(:booster_box_id AS uuid)", "raw_data": "CAST(:raw_data AS jsonb)"}
+    values = ", ".join(casts.get(c, f":{c}") for c in cols)
+    sql = text(
+        f"INSERT INTO {table} ({', '.join(cols)}) VALUES ({values}) "
+        f"ON CONFLICT ({', '.join(_spec(table)['unique_cols'])}) DO NOTHING"
+    )
+    params = []
+    for r in rows:
+        p = {c: r.get(c) for c in cols}
+        if p.get("raw_data") is not None and not isinstance(p["raw_data"], str):
+            p["raw_data"] = json.dumps(p["raw_data"])
+        params.append(p)
+    engine = _get_sync_engine()
+    with engine.connect() as conn:
+        with conn.begin():
+            conn.execute(sql, params)
+    logger.info(f"Rehydrated {len(rows)} archived rows into {table}")
+    return len(rows)
@@ -0,0 +1,263 @@
+"""
+Request Metrics
+In-process counters and histograms for the API hot path, rendered in the
+Prometheus text format at /metrics (no prometheus_client dependency).
+
+Per request (RequestMetricsMiddleware, app/middleware/metrics.py):
+  latency histogram and request count per route template and status
+  DB query count and time (SQLAlchemy cursor events on every engine from
+    app/db_engines.py, async and sync)
+  time in named sections: "serialize" (JSON response rendering),
+    "history_load" (box history through history_cache)
+Process-wide:
+  cache hits / misses per cache ("leaderboard", "rank_index", "redis", "history")
+  DB queries and query time per engine, including the cron pipeline
+  connection pool gauges from pool_stats()
+
+A request's numbers live in a RequestStats object held in a ContextVar; the
+SQLAlchemy hooks and timed() add to it from whatever code runs for the request.
+Outside a request (cron, startup) only the process-wide series move.
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+PREFIX = "boosterbox"
+
+# Seconds; request latency and single-query time share the buckets
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89)
+
+
+class RequestStats:
+    """What one request spent, filled in by the DB hooks and timed()."""
+
+    __slots__ = ("db_queries", "db_seconds", "sections")
+
+    def __init__(self):
+        self.db_queries = 0
+        self.db_seconds = 0.0
+        self.sections: Dict[str, float] = {}
+
+    def add_section(self, name: str, seconds: float) -> None:
+        self.sections[name] = self.sections.get(name, 0.0) + seconds
+
+
+_current: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+def current_stats() -> Optional[RequestStats]:
+    return _current.get()
+
+
+def start_request() -> Tuple[RequestStats, Any]:
+    stats = RequestStats()
+    return stats, _current.set(stats)
+
+
+def end_request(token: Any) -> None:
+    _current.reset(token)
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# REGISTRY
+# ═══════════════════════════════════════════════════════════════════════════
+
+class _Histogram:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class MetricsRegistry:
+    """Counters and histograms keyed by (name, label values); one lock, plain dicts."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[Tuple, float]] = {}
+        self._histograms: Dict[str, Dict[Tuple, _Histogram]] = {}
+        self._labels: Dict[str, Tuple[str, ...]] = {}
+        self._help: Dict[str, str] = {}
+        self._buckets: Dict[str, Tuple[float, ...]] = {}
+
+    def counter(self, name: str, help_text: str, labels: Tuple[str, ...]) -> None:
+        self._counters[name] = {}
+        self._labels[name] = labels
+        self._help[name] = help_text
+
+    def histogram(self, name: str, help_text: str, labels: Tuple[str, ...], buckets: Tuple[float, ...]) -> None:
+        self._histograms[name] = {}
+        self._labels[name] = labels
+        self._help[name] = help_text
+        self._buckets[name] = buckets
+
+    def inc(self, name: str, labels: Tuple, value: float = 1.0) -> None:
+        with self._lock:
+            series = self._counters[name]
+            series[labels] = series.get(labels, 0.0) + value
+
+    def observe(self, name: str, labels: Tuple, value: float) -> None:
+        with self._lock:
+            series = self._histograms[name]
+            h = series.get(labels)
+            if h is None:
+                h = series[labels] = _Histogram(self._buckets[name])
+            h.observe(value)
+
+    def reset(self) -> None:
+        with self._lock:
+            for series in self._counters.values():
+                series.clear()
+            for series in self._histograms.values():
+                series.clear()
+
+    def _label_str(self, name: str, values: Tuple, extra: str = "") -> str:
+        parts = [f'{k}="{_escape(v)}"' for k, v in zip(self._labels[name], values)]
+        if extra:
+            parts.append(extra)
+        return "{" + ",".join(parts) + "}" if parts else ""
+
+    def render(self) -> List[str]:
+        lines: List[str] = []
+        with self._lock:
+            for name, series in self._counters.items():
+                lines.append(f"# HELP {PREFIX}_{name} {self._help[name]}")
+                lines.append(f"# TYPE {PREFIX}_{name} counter")
+                for values, v in series.items():
+                    lines.append(f"{PREFIX}_{name}{self._label_str(name, values)} {_num(v)}")
+            for name, series in self._histograms.items():
+                lines.append(f"# HELP {PREFIX}_{name} {self._help[name]}")
+                lines.append(f"# TYPE {PREFIX}_{name} histogram")
+                for values, h in series.items():
+                    cumulative = 0
+                    for bound, c in zip(h.buckets, h.counts):
+                        cumulative += c
+                        le = 'le="%s"' % _num(bound)
+                        lines.append(f"{PREFIX}_{name}_bucket{self._label_str(name, values, le)} {cumulative}")
+                    le = 'le="+Inf"'
+                    lines.append(f"{PREFIX}_{name}_bucket{self._label_str(name, values, le)} {h.count}")
+                    lines.append(f"{PREFIX}_{name}_sum{self._label_str(name, values)} {_num(h.sum)}")
+                    lines.append(f"{PREFIX}_{name}_count{self._label_str(name, values)} {h.count}")
+        return lines
+
+
+def _escape(v: Any) -> str:
+    return str(v).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _num(v: float) -> str:
+    return str(int(v)) if float(v).is_integer() else repr(float(v))
+
+
+registry = MetricsRegistry()
+registry.counter("http_requests_total", "HTTP requests by route template and status", ("method", "route", "status"))
+registry.histogram("http_request_duration_seconds", "Request latency by route template", ("route",), LATENCY_BUCKETS)
+registry.histogram("http_request_db_queries", "DB queries issued per request", ("route",), QUERY_COUNT_BUCKETS)
+registry.counter("http_request_db_seconds_total", "DB time spent inside requests", ("route",))
+registry.counter("http_request_section_seconds_total", "Time in instrumented sections inside requests", ("route", "section"))
+registry.counter("cache_requests_total", "Cache lookups by cache and result", ("cache", "result"))
+registry.counter("db_queries_total", "SQL statements executed by engine", ("engine",))
+registry.histogram("db_query_duration_seconds", "SQL statement time by engine", ("engine",), LATENCY_BUCKETS)
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# RECORDING
+# ═══════════════════════════════════════════════════════════════════════════
+
+def record_request(method: str, route: str, status: int, seconds: float, stats: RequestStats) -> None:
+    registry.inc("http_requests_total", (method, route, str(status)))
+    registry.observe("http_request_duration_seconds", (route,), seconds)
+    registry.observe("http_request_db_queries", (route,), stats.db_queries)
+    if stats.db_seconds:
+        registry.inc("http_request_db_seconds_total", (route,), stats.db_seconds)
+    for section, s in stats.sections.items():
+        registry.inc("http_request_section_seconds_total", (route, section), s)
+
+
+def record_cache(cache: str, result: str) -> None:
+    """result: "hit", "miss" (or "delta" for history_cache's incremental refresh)."""
+    registry.inc("cache_requests_total", (cache, result))
+
+
+@contextmanager
+def timed(section: str) -> Iterator[None]:
+    """Add the block's wall time to the current request's section (no-op outside requests)."""
+    stats = _current.get()
+    if stats is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        stats.add_section(section, time.perf_counter() - start)
+
+
+def instrument_engine(engine: Any, name: str) -> None:
+    """
+    Count and time every statement on a (sync) Engine; for an AsyncEngine pass
+    engine.sync_engine. Called once per engine by app/db_engines.py.
+    """
+    from sqlalchemy import event
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context._bbp_query_start = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        start = getattr(context, "_bbp_query_start", None)
+        if start is None:
+            return
+        elapsed = time.perf_counter() - start
+        registry.inc("db_queries_total", (name,))
+        registry.observe("db_query_duration_seconds", (name,), elapsed)
+        stats = _current.get()
+        if stats is not None:
+            stats.db_queries += 1
+            stats.db_seconds += elapsed
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# EXPOSITION
+# ═══════════════════════════════════════════════════════════════════════════
+
+_POOL_GAUGES = (
+    ("pool_size", "db_pool_size", "Configured pool size"),
+    ("in_use", "db_pool_in_use", "Connections checked out"),
+    ("idle", "db_pool_idle", "Idle connections in the pool"),
+    ("overflow", "db_pool_overflow", "Overflow connections open"),
+    ("checkouts", "db_pool_checkouts_total", "Connection checkouts since start"),
+    ("checkout_timeouts", "db_pool_checkout_timeouts_total", "Checkouts that timed out"),
+    ("checkout_wait_max_ms", "db_pool_checkout_wait_max_ms", "Longest checkout wait"),
+)
+
+
+def render_prometheus() -> str:
+    lines = registry.render()
+    try:
+        from app.db_engines import pool_stats
+        pools = pool_stats()
+    except Exception:
+        pools = {}
+    for key, metric, help_text in _POOL_GAUGES:
+        kind = "counter" if metric.endswith("_total") else "gauge"
+        lines.append(f"# HELP {PREFIX}_{metric} {help_text}")
+        lines.append(f"# TYPE {PREFIX}_{metric} {kind}")
+        for pool, ps in pools.items():
+            lines.append(f'{PREFIX}_{metric}{{pool="{pool}"}} {_num(ps.get(key) or 0)}')
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,216 @@
+"""
+Response Cache (paid data providers)
+Content-addressed on-disk cache of raw Apify / SerpApi responses so reprocessing
+(refresh_for_date.py, refresh_single_box.py, /admin/refresh-sales-data, --debug
+runs, a same-day --resume) replays data that was already paid for that day.
+
+Key = sha256(provider, normalized request params, date bucket). Secrets such as
+api_key are dropped from the params before hashing. Each entry is gzipped JSON:
+
+    <response_cache_dir>/<provider>/<key[:2]>/<key>.json.gz
+
+Entries expire after response_cache_ttl_hours; the oldest are evicted once the
+directory passes response_cache_max_mb.
+
+Modes (settings.response_cache_mode / RESPONSE_CACHE_MODE):
+  replay   serve a hit, otherwise fetch and store (default)
+  refresh  always fetch, store the new response
+  offline  serve hits only; a miss raises CacheMissError (fixtures / offline tests)
+  off      bypass the cache entirely
+
+iter_entries() exposes the stored responses as fixtures for parser tests.
+"""
+
+import gzip
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, Optional
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+MODES = ("replay", "refresh", "offline", "off")
+
+# Request params never part of the key (credentials)
+_SECRET_PARAMS = {"api_key", "token", "apify_token"}
+
+
+class CacheMissError(LookupError):
+    """No cached response in offline mode."""
+
+
+def _normalize(params: Dict[str, Any]) -> str:
+    clean = {k: v for k, v in params.items() if k not in _SECRET_PARAMS}
+    return json.dumps(clean, sort_keys=True, default=str, separators=(",", ":"))
+
+
+def cache_key(provider: str, params: Dict[str, Any], bucket: str) -> str:
+    raw = f"{provider}\n{_normalize(params)}\n{bucket}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """Gzipped JSON responses on disk, keyed by provider + params + date bucket"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.mode_override: Optional[str] = None
+        self.stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+
+    @property
+    def mode(self) -> str:
+        mode = (self.mode_override or settings.response_cache_mode or "replay").lower()
+        return mode if mode in MODES else "replay"
+
+    @property
+    def root(self) -> Path:
+        root = Path(settings.response_cache_dir)
+        if not root.is_absolute():
+            root = Path(__file__).parent.parent.parent / root
+        return root
+
+    def _path(self, provider: str, key: str) -> Path:
+        return self.root / provider / key[:2] / f"{key}.json.gz"
+
+    # ── read / write ────────────────────────────────────────────────────────
+
+    def get(self, provider: str, params: Dict[str, Any], bucket: Optional[str] = None) -> Optional[Any]:
+        bucket = bucket or datetime.now().strftime("%Y-%m-%d")
+        path = self._path(provider, cache_key(provider, params, bucket))
+        try:
+            if time.time() - path.stat().st_mtime > settings.response_cache_ttl_hours * 3600:
+                return None
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                return json.load(f)["response"]
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Unreadable cache entry {path.name}: {e}")
+            return None
+
+    def put(self, provider: str, params: Dict[str, Any], response: Any, bucket: Optional[str] = None) -> Optional[Path]:
+        bucket = bucket or datetime.now().strftime("%Y-%m-%d")
+        path = self._path(provider, cache_key(provider, params, bucket))
+        entry = {
+            "provider": provider,
+            "params": json.loads(_normalize(params)),
+            "bucket": bucket,
+            "fetched_at": datetime.now().isoformat(),
+            "response": response,
+        }
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+            with gzip.open(tmp, "wt", encoding="utf-8") as f:
+                json.dump(entry, f, default=str)
+            os.replace(tmp, path)
+            self.stats["stores"] += 1
+        except Exception as e:
+            logger.warning(f"Could not store {provider} response in cache: {e}")
+            return None
+        self.prune()
+        return path
+
+    def lookup(self, provider: str, params: Dict[str, Any], bucket: Optional[str] = None) -> Optional[Any]:
+        """Cached response to serve under the current mode, or None to go to the provider."""
+        mode = self.mode
+        if mode in ("off", "refresh"):
+            return None
+        cached = self.get(provider, params, bucket)
+        if cached is not None:
+            self.stats["hits"] += 1
+            logger.info(f"  ↺ {provider} response replayed from cache")
+            return cached
+        self.stats["misses"] += 1
+        if mode == "offline":
+            raise CacheMissError(f"No cached {provider} response for {_normalize(params)}")
+        return None
+
+    def store(
+        self,
+        provider: str,
+        params: Dict[str, Any],
+        response: Any,
+        bucket: Optional[str] = None,
+        store_if: Callable[[Any], bool] = bool,
+    ) -> None:
+        """Keep a fresh response. Responses failing store_if (default: empty) are not cached."""
+        if self.mode != "off" and store_if(response):
+            self.put(provider, params, response, bucket)
+
+    def fetch(
+        self,
+        provider: str,
+        params: Dict[str, Any],
+        fetch: Callable[[], Any],
+        bucket: Optional[str] = None,
+        store_if: Callable[[Any], bool] = bool,
+    ) -> Any:
+        """
+        Return the cached response for (provider, params, bucket) or call fetch()
+        and store the result, according to the mode. By default empty responses
+        are not cached, so a failed provider run is retried next time.
+        """
+        cached = self.lookup(provider, params, bucket)
+        if cached is not None:
+            return cached
+        response = fetch()
+        self.store(provider, params, response, bucket, store_if)
+        return response
+
+    # ── housekeeping ────────────────────────────────────────────────────────
+
+    def prune(self) -> Dict[str, int]:
+        """Drop expired entries, then the oldest ones until under response_cache_max_mb."""
+        removed = 0
+        with self._lock:
+            if not self.root.exists():
+                return {"removed": 0, "bytes": 0}
+            ttl = settings.response_cache_ttl_hours * 3600
+            now = time.time()
+            files = []
+            for path in self.root.glob("*/*/*.json.gz"):
+                try:
+                    st = path.stat()
+                except FileNotFoundError:
+                    continue
+                if now - st.st_mtime > ttl:
+                    path.unlink(missing_ok=True)
+                    removed += 1
+                    continue
+                files.append((st.st_mtime, st.st_size, path))
+            total = sum(size for _, size, _ in files)
+            cap = settings.response_cache_max_mb * 1024 * 1024
+            for _, size, path in sorted(files, key=lambda f: f[0]):
+                if total <= cap:
+                    break
+                path.unlink(missing_ok=True)
+                total -= size
+                removed += 1
+            self.stats["evictions"] += removed
+        return {"removed": removed, "bytes": total}
+
+    def iter_entries(self, provider: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """Every stored entry (provider, params, bucket, fetched_at, response), oldest first."""
+        pattern = f"{provider}/*/*.json.gz" if provider else "*/*/*.json.gz"
+        paths = sorted(self.root.glob(pattern), key=lambda p: p.stat().st_mtime) if self.root.exists() else []
+        for path in paths:
+            try:
+                with gzip.open(path, "rt", encoding="utf-8") as f:
+                    yield json.load(f)
+            except Exception as e:
+                logger.warning(f"Skipping unreadable cache entry {path.name}: {e}")
+
+    def info(self) -> Dict[str, Any]:
+        return {"mode": self.mode, "root": str(self.root), **self.stats}
+
+
+# Global instance
+response_cache = ResponseCache()
@@ -4,7 +4,7 @@ Fetches sales history data from TCGplayer via Apify actor
 """
 
 import logging
-from typing import Dict, List, Optional, Any
+from typing import Callable, Dict, Iterable, List, Optional, Any
 from datetime import datetime, timedelta
 from apify_client import ApifyClient
 
@@ -93,6 +93,32 @@ TCGPLAYER_URLS = {
 }
 
 
+APIFY_SALES_ACTOR = "scraped/tcgplayer-sales-history"
+
+
+def fetch_sales_history_items(client: ApifyClient, tcgplayer_url: str, limit: Optional[int] = 1) -> List[Dict[str, Any]]:
+    """
+    Dataset items of one sales-history actor run for a product URL (the first
+    `limit`; the product's history is the first item, None = all). The dataset is
+    streamed, so items past the limit are never fetched. Goes through the
+    response cache, so reprocessing the same day replays instead of paying for
+    another actor run. Empty runs are not cached.
+    """
+    from app.services.apify_stream import iter_dataset_items
+    from app.services.pipeline_telemetry import count_call
+    from app.services.response_cache import response_cache
+
+    def _run_actor() -> List[Dict[str, Any]]:
+        run = client.actor(APIFY_SALES_ACTOR).call(run_input={"url": tcgplayer_url})
+        count_call("apify", cost_units=(run.get("stats") or {}).get("computeUnits") or 0.0)
+        return list(iter_dataset_items(client, run["defaultDatasetId"], limit=limit))
+
+    params: Dict[str, Any] = {"actor": APIFY_SALES_ACTOR, "url": tcgplayer_url}
+    if limit is not None:
+        params["limit"] = limit
+    return response_cache.fetch("apify", params, _run_actor)
+
+
 class TCGplayerApifyService:
     """Service for fetching TCGplayer sales data via Apify"""
     
@@ -103,7 +129,7 @@ class TCGplayerApifyService:
             raise ValueError("APIFY_API_TOKEN not configured. Set it in .env file.")
         
         self.client = ApifyClient(self.api_token)
-        self.actor_id = "scraped/tcgplayer-sales-history"
+        self.actor_id = APIFY_SALES_ACTOR
     
     def fetch_sales_history(self, tcgplayer_url: str) -> Optional[Dict[str, Any]]:
         """
@@ -118,13 +144,8 @@ class TCGplayerApifyService:
         try:
             logger.info(f"Fetching sales history from: {tcgplayer_url}")
             
-            # Run the actor
-            run = self.client.actor(self.actor_id).call(
-                run_input={"url": tcgplayer_url}
-            )
-            
-            # Get results from dataset
-            items = list(self.client.dataset(run["defaultDatasetId"]).iterate_items())
+            # Run the actor (or replay today's cached run)
+            items = fetch_sales_history_items(self.client, tcgplayer_url)
             
             if not items:
                 logger.warning(f"No data returned for URL: {tcgplayer_url}")
@@ -153,25 +174,25 @@ class TCGplayerApifyService:
 
         target_date = target_date or datetime.now().strftime('%Y-%m-%d')
 
-        buckets = raw_data.get('buckets', [])
-        buckets = sorted(buckets, key=lambda b: b.get("bucketStartDate", ""), reverse=True)
+        summary = summarize_buckets(raw_data.get('buckets', []), today=target_date)
+        newest = summary["newest"]
 
         # Market price from most recent bucket
-        if buckets:
-            market_price = _safe_float(buckets[0].get('marketPrice'))
-            low_sale_price = _safe_float(buckets[0].get('lowSalePrice'))
+        if newest:
+            market_price = _safe_float(newest.get('marketPrice'))
+            low_sale_price = _safe_float(newest.get('lowSalePrice'))
             floor_price = market_price if market_price > 0 else low_sale_price
         else:
             market_price = 0
             floor_price = 0
 
         # Compute daily sales from weekly buckets
-        _weekly_fallback = compute_daily_sales_from_buckets(buckets, today=target_date) or 0
-        boxes_sold_today = compute_this_week_daily_rate(buckets, today=target_date) or _weekly_fallback
+        _weekly_fallback = summary["daily_rate"] or 0
+        boxes_sold_today = summary["this_week_rate"] or _weekly_fallback
         daily_volume = round(boxes_sold_today * market_price, 2) if market_price else 0
 
         # Track current incomplete bucket for delta computation on next run
-        incomplete_bucket = get_current_incomplete_bucket(buckets, target_date)
+        incomplete_bucket = summary["incomplete"]
         current_bucket_start = incomplete_bucket.get("bucketStartDate", "")[:10] if incomplete_bucket else None
         current_bucket_qty = _safe_int(incomplete_bucket.get("quantitySold")) if incomplete_bucket else None
 
@@ -442,6 +463,77 @@ def calculate_30d_volume_from_buckets(buckets: List[Dict]) -> float:
     return total_volume
 
 
+def summarize_buckets(
+    buckets: Iterable[Dict],
+    today: Optional[str] = None,
+    volume_cutoff: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Everything the daily refresh reads from the weekly buckets, in one pass with
+    bounded state (no sort, no copies):
+
+      newest           most recent bucket (market price / low sale / bucket date)
+      newest_complete  most recent bucket before today
+      incomplete       bucket whose 7-day window contains today
+      this_week_rate   compute_this_week_daily_rate()
+      daily_rate       compute_daily_sales_from_buckets() (all active weeks)
+      volume_30d       calculate_30d_volume_from_buckets()
+
+    Ties on bucketStartDate resolve like the stable newest-first sort the
+    helpers above use (earlier item wins).
+    """
+    today = today or datetime.now().strftime("%Y-%m-%d")
+    today_dt = datetime.strptime(today, "%Y-%m-%d")
+    volume_cutoff = volume_cutoff or (datetime.now() - timedelta(days=30)).strftime("%Y-%m-%d")
+
+    newest = newest_key = None
+    newest_complete = complete_key = None
+    incomplete = incomplete_key = None
+    volume_30d = 0.0
+    n_complete = 0
+    sold_total = 0
+    oldest_sale_key = None
+    pre_sale_zero_keys: List[tuple] = []  # zero-sale weeks older than the oldest sale so far
+
+    for i, b in enumerate(buckets or ()):
+        start = b.get("bucketStartDate", "")
+        key = (start, -i)  # newest-first order == descending key
+        if newest_key is None or key > newest_key:
+            newest, newest_key = b, key
+
+        if start >= volume_cutoff:
+            volume_30d += _safe_float(b.get("marketPrice", 0)) * _safe_int(b.get("quantitySold", 0))
+
+        if start:
+            start_dt = datetime.strptime(start[:10], "%Y-%m-%d")
+            if start_dt <= today_dt < start_dt + timedelta(days=7) and (incomplete_key is None or key > incomplete_key):
+                incomplete, incomplete_key = b, key
+
+        if not start < today:
+            continue
+        n_complete += 1
+        if complete_key is None or key > complete_key:
+            newest_complete, complete_key = b, key
+        qty = _safe_int(b.get("quantitySold", 0))
+        if qty > 0:
+            sold_total += qty
+            if oldest_sale_key is None or key < oldest_sale_key:
+                oldest_sale_key = key
+                pre_sale_zero_keys = [k for k in pre_sale_zero_keys if k < key]
+        elif oldest_sale_key is None or key < oldest_sale_key:
+            pre_sale_zero_keys.append(key)
+
+    active_weeks = n_complete - len(pre_sale_zero_keys)
+    return {
+        "newest": newest,
+        "newest_complete": newest_complete,
+        "incomplete": incomplete,
+        "this_week_rate": round(_safe_int(newest_complete.get("quantitySold", 0)) / 7, 2) if newest_complete else None,
+        "daily_rate": round(sold_total / (active_weeks * 7), 2) if oldest_sale_key is not None and active_weeks > 0 else None,
+        "volume_30d": volume_30d,
+    }
+
+
 def set_box_url(box_id: str, url: str) -> bool:
     """
     Set the TCGplayer URL for a box.
@@ -534,7 +626,10 @@ def detect_spike(current_value: float, baseline: float, threshold_pct: float = 5
     return None
 
 
-def refresh_all_boxes_sales_data() -> Dict[str, Any]:
+def refresh_all_boxes_sales_data(
+    box_ids: Optional[Iterable[str]] = None,
+    on_box_done: Optional[Callable[..., None]] = None,
+) -> Dict[str, Any]:
     """
     Pull fresh sales data from TCGplayer for all boxes and save to DB.
 
@@ -546,6 +641,11 @@ def refresh_all_boxes_sales_data() -> Dict[str, Any]:
 
     Fallback for first run (no yesterday data): use weekly bucket average.
 
+    Args:
+        box_ids: Only refresh these boxes (resume of a checkpointed run).
+        on_box_done: Called as on_box_done(box_id, ok, output=..., error=..., started_at=...)
+                     after each box, for pipeline checkpoints.
+
     Returns:
         Dict with success_count, error_count, date, top_5 results, and alerts
     """
@@ -597,7 +697,15 @@ def refresh_all_boxes_sales_data() -> Dict[str, Any]:
     success_count = 0
     error_count = 0
 
+    only = set(box_ids) if box_ids is not None else None
+
+    def _box_done(box_id: str, started_at: datetime, ok: bool, output: Any = None, error: Optional[str] = None) -> None:
+        if on_box_done:
+            on_box_done(box_id, ok, output=output, error=error, started_at=started_at)
+
     for box_id, config in TCGPLAYER_URLS.items():
+        if only is not None and box_id not in only:
+            continue
         url = config.get("url")
         name = config.get("name", box_id)
 
@@ -606,21 +714,23 @@ def refresh_all_boxes_sales_data() -> Dict[str, Any]:
             continue
 
         logger.info(f"Fetching {name}...")
+        started_at = datetime.now()
 
         try:
-            # Call Apify
-            run = client.actor("scraped/tcgplayer-sales-history").call(run_input={"url": url})
-            items = list(client.dataset(run["defaultDatasetId"]).iterate_items())
+            # Call Apify (or replay today's cached run)
+            items = fetch_sales_history_items(client, url)
 
             if not items:
                 logger.warning(f"No data returned for {name}")
                 error_count += 1
+                _box_done(box_id, started_at, False, error="no data returned")
                 continue
 
             data = items[0]
             if not isinstance(data, dict):
                 logger.warning(f"Unexpected data type for {name}: {type(data)}")
                 error_count += 1
+                _box_done(box_id, started_at, False, error=f"unexpected data type {type(data).__name__}")
                 continue
 
             # Extract top-level metrics (for reference only)
@@ -628,17 +738,17 @@ def refresh_all_boxes_sales_data() -> Dict[str, Any]:
             total_quantity_sold = _safe_int(data.get("totalQuantitySold"))
             total_transaction_count = _safe_int(data.get("totalTransactionCount"))
 
-            buckets = data.get("buckets") or []
-
-            # Sort buckets newest-first
-            buckets = sorted(buckets, key=lambda b: b.get("bucketStartDate", ""), reverse=True)
+            # One pass over the weekly buckets (newest / newest complete /
+            # current week / rates / 30d volume) — no sorting or copies
+            bucket_summary = summarize_buckets(data.get("buckets") or [], today=today)
+            newest = bucket_summary["newest"]
 
             # Get market price from the most recent bucket (even if incomplete)
-            if buckets:
-                market_price = _safe_float(buckets[0].get("marketPrice"))
-                low_sale = _safe_float(buckets[0].get("lowSalePrice"))
+            if newest:
+                market_price = _safe_float(newest.get("marketPrice"))
+                low_sale = _safe_float(newest.get("lowSalePrice"))
                 floor = market_price if market_price > 0 else low_sale
-                bucket_date = buckets[0].get("bucketStartDate", "")
+                bucket_date = newest.get("bucketStartDate", "")
             else:
                 market_price = 0
                 floor = 0
@@ -655,15 +765,15 @@ def refresh_all_boxes_sales_data() -> Dict[str, Any]:
                 logger.info(f"  Sales delta: {total_quantity_sold} - {prev_total} = {boxes_sold_today} sold today")
             else:
                 # First run or no previous total — fall back to weekly bucket average
-                boxes_sold_today = compute_this_week_daily_rate(buckets, today=today) or 0
+                boxes_sold_today = bucket_summary["this_week_rate"] or 0
                 if boxes_sold_today == 0:
-                    boxes_sold_today = compute_daily_sales_from_buckets(buckets, today=today) or 0
+                    boxes_sold_today = bucket_summary["daily_rate"] or 0
                 logger.info(f"  No previous total — using weekly avg fallback: {boxes_sold_today}/day")
 
             # Keep bucket reference data (not used for sales calc, just stored)
-            complete_buckets = get_complete_weekly_buckets(buckets, today)
-            recent_bucket_qty = _safe_int(complete_buckets[0].get("quantitySold")) if complete_buckets else 0
-            incomplete_bucket = get_current_incomplete_bucket(buckets, today)
+            newest_complete = bucket_summary["newest_complete"]
+            recent_bucket_qty = _safe_int(newest_complete.get("quantitySold")) if newest_complete else 0
+            incomplete_bucket = bucket_summary["incomplete"]
             current_bucket_start = incomplete_bucket.get("bucketStartDate", "")[:10] if incomplete_bucket else None
             current_bucket_qty = _safe_int(incomplete_bucket.get("quantitySold")) if incomplete_bucket else None
 
@@ -691,7 +801,7 @@ def refresh_all_boxes_sales_data() -> Dict[str, Any]:
             daily_vol = round(boxes_sold_today * market_price, 2) if market_price and boxes_sold_today else 0
 
             # 30-day volume from buckets (actual weekly totals × market prices)
-            volume_30d = calculate_30d_volume_from_buckets(buckets)
+            volume_30d = bucket_summary["volume_30d"]
 
             # Create enriched entry
             new_entry = {
@@ -742,25 +852,26 @@ def refresh_all_boxes_sales_data() -> Dict[str, Any]:
                 boxes_sold_30d_avg = round(sum(vals) / len(vals), 2) if vals else None
 
             # Write to DB
+            db_row = {
+                "floor_price_usd": floor,
+                "boxes_sold_today": boxes_sold_today,
+                "unified_volume_usd": volume_30d,
+                "boxes_sold_30d_avg": boxes_sold_30d_avg,
+                "current_bucket_start": current_bucket_start,
+                "current_bucket_qty": current_bucket_qty,
+                "total_quantity_sold": total_quantity_sold,
+                # Reset eBay sold count so Phase 3's subtraction-based
+                # idempotency works (COALESCE would otherwise preserve
+                # stale combined-era values from previous Phase 3 runs).
+                "ebay_units_sold_count": 0,
+            }
+            saved = False
             try:
                 from app.services.box_metrics_writer import upsert_daily_metrics
-                upsert_daily_metrics(
-                    booster_box_id=box_id,
-                    metric_date=today,
-                    floor_price_usd=floor,
-                    boxes_sold_today=boxes_sold_today,
-                    unified_volume_usd=volume_30d,
-                    boxes_sold_30d_avg=boxes_sold_30d_avg,
-                    current_bucket_start=current_bucket_start,
-                    current_bucket_qty=current_bucket_qty,
-                    total_quantity_sold=total_quantity_sold,
-                    # Reset eBay sold count so Phase 3's subtraction-based
-                    # idempotency works (COALESCE would otherwise preserve
-                    # stale combined-era values from previous Phase 3 runs).
-                    ebay_units_sold_count=0,
-                )
+                saved = upsert_daily_metrics(booster_box_id=box_id, metric_date=today, **db_row)
             except Exception as e:
                 logger.warning(f"DB upsert skipped for {name}: {e}")
+            _box_done(box_id, started_at, saved, output=db_row, error=None if saved else "DB upsert failed")
 
             # Log with context
             change_str = f" ({avg_change_pct:+.1f}%)" if avg_change_pct else ""
@@ -779,6 +890,7 @@ def refresh_all_boxes_sales_data() -> Dict[str, Any]:
         except Exception as e:
             logger.error(f"Error fetching {name}: {str(e)}")
             error_count += 1
+            _box_done(box_id, started_at, False, error=str(e))
 
     # DB is source of truth — skip JSON write
 
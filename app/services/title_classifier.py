@@ -0,0 +1,269 @@
+"""
+Title Classifier
+Compiled keyword matcher shared by every listing-title filter (130point,
+Playwright eBay, Apify / SerpApi eBay, TCGplayer listings, screenshot data).
+
+Each source keeps its own keyword lists and flag logic; it builds one
+TitleClassifier from them at import time. match(text) lowercases the text once
+and finds every keyword of every group in a single scan, so a source computes
+all of its flags from one TitleMatch instead of re-lowering and re-scanning the
+title per check.
+
+Scan backends (default: the first one available):
+  ahocorasick   pyahocorasick automaton over all keywords
+  regex         one trie-shaped regex inside a lookahead, tried at every
+                position (overlapping matches are kept)
+  linear        str.find per keyword — the old per-list scans; parity reference
+
+Word-boundary rules (r'\\bcase\\b') are answered from TitleMatch.words — the set
+of \\w+ runs, which is exactly what \\b...\\b matches — or TitleMatch.bounded(kw)
+for multi-word phrases. Lot-quantity extraction is pluggable per source;
+lot_quantity() is the 130point / Playwright variant.
+
+classify_many() runs a source's classify function over a batch through the
+cross-day memo (app/services/classification_memo.py), keyed by the classifier's
+fingerprint and the source of the classify function, so cached flags are
+dropped whenever the keyword lists, the quantity extractor or the flag logic
+change. Helpers a classify function calls are not hashed: bump the source's
+version when only those change.
+
+benchmarks/bench_title_classifier.py measures throughput against the linear
+keyword scans.
+"""
+
+import hashlib
+import inspect
+import json
+import logging
+import re
+from typing import Any, Callable, Dict, FrozenSet, Iterable, List, Optional, Set
+
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ("ahocorasick", "regex", "linear")
+
+_WORD_RE = re.compile(r"\w+")
+
+
+def _source_of(fn: Optional[Callable]) -> str:
+    """Source of fn for fingerprints; its qualified name where the source is unavailable."""
+    if fn is None:
+        return ""
+    try:
+        return inspect.getsource(fn)
+    except (OSError, TypeError):
+        return f"{getattr(fn, '__module__', '')}.{getattr(fn, '__qualname__', repr(fn))}"
+
+
+def _is_word_char(c: str) -> bool:
+    return c.isalnum() or c == "_"
+
+
+def _trie_pattern(keywords: Iterable[str]) -> str:
+    """Regex matching the longest keyword at a position (alternatives share prefixes)."""
+    trie: Dict[str, Any] = {}
+    for kw in keywords:
+        node = trie
+        for ch in kw:
+            node = node.setdefault(ch, {})
+        node[""] = True
+
+    def build(node: Dict[str, Any]) -> str:
+        alts = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch != ""]
+        if not alts:
+            return ""
+        body = alts[0] if len(alts) == 1 else "(?:" + "|".join(alts) + ")"
+        return f"(?:{body})?" if "" in node else body
+
+    return build(trie)
+
+
+class TitleMatch:
+    """Result of one scan: matched keywords (with start offsets) and per-group flags."""
+
+    __slots__ = ("text", "hits", "flags", "_quantity_fn", "_quantity", "_words", "_tokens")
+
+    def __init__(
+        self,
+        text: str,
+        hits: Dict[str, List[int]],
+        flags: Dict[str, bool],
+        quantity_fn: Optional[Callable[[str], int]],
+    ):
+        self.text = text
+        self.hits = hits
+        self.flags = flags
+        self._quantity_fn = quantity_fn
+        self._quantity: Optional[int] = None
+        self._words: Optional[Set[str]] = None
+        self._tokens: Optional[Set[str]] = None
+
+    def has(self, *keywords: str) -> bool:
+        """Any of these keywords occurs as a substring (keywords must be registered)."""
+        return any(kw in self.hits for kw in keywords)
+
+    @property
+    def words(self) -> Set[str]:
+        """Maximal \\w+ runs — `w in words` is equivalent to re.search(r'\\bw\\b', text)."""
+        if self._words is None:
+            self._words = set(_WORD_RE.findall(self.text))
+        return self._words
+
+    @property
+    def tokens(self) -> Set[str]:
+        """Whitespace-separated tokens (text.split())."""
+        if self._tokens is None:
+            self._tokens = set(self.text.split())
+        return self._tokens
+
+    def bounded(self, keyword: str) -> bool:
+        """keyword occurs with a \\b at both ends, i.e. re.search(r'\\b' + re.escape(kw) + r'\\b')."""
+        t = self.text
+        n = len(t)
+        for start in self.hits.get(keyword, ()):
+            end = start + len(keyword)
+            before = start > 0 and _is_word_char(t[start - 1])
+            first = _is_word_char(t[start])
+            last = _is_word_char(t[end - 1])
+            after = end < n and _is_word_char(t[end])
+            if before != first and last != after:
+                return True
+        return False
+
+    @property
+    def quantity(self) -> int:
+        """Lot quantity from the source's extractor (1 without one)."""
+        if self._quantity is None:
+            self._quantity = self._quantity_fn(self.text) if self._quantity_fn else 1
+        return self._quantity
+
+
+class TitleClassifier:
+    """Keyword groups compiled into one matcher; match(text) scans the text once."""
+
+    def __init__(
+        self,
+        groups: Dict[str, Iterable[str]],
+        quantity: Optional[Callable[[str], int]] = None,
+        backend: Optional[str] = None,
+        version: str = "1",
+    ):
+        self.groups: Dict[str, FrozenSet[str]] = {
+            name: frozenset(kw.lower() for kw in keywords) for name, keywords in groups.items()
+        }
+        self.keywords: FrozenSet[str] = frozenset().union(*self.groups.values()) if self.groups else frozenset()
+        self.quantity = quantity
+        # Identifies the rules for cached classifications: keyword lists, quantity
+        # extractor source and the source's version; classify_many() adds the
+        # classify function's source
+        rules = json.dumps({name: sorted(kws) for name, kws in self.groups.items()}, sort_keys=True)
+        self.fingerprint = hashlib.sha256(
+            f"{version}|{_source_of(quantity)}|{rules}".encode("utf-8")
+        ).hexdigest()[:16]
+        self._classify_fingerprints: Dict[Callable, str] = {}
+        if backend is None:
+            backend = "ahocorasick" if AHOCORASICK_AVAILABLE else "regex"
+        if backend not in BACKENDS or (backend == "ahocorasick" and not AHOCORASICK_AVAILABLE):
+            raise ValueError(f"Title classifier backend not available: {backend}")
+        self.backend = backend
+
+        if backend == "ahocorasick":
+            self._automaton = ahocorasick.Automaton()
+            for kw in self.keywords:
+                self._automaton.add_word(kw, (len(kw) - 1, kw))
+            self._automaton.make_automaton()
+        elif backend == "regex":
+            # The lookahead captures the longest keyword at each position; every
+            # shorter keyword starting there is one of its prefixes.
+            self._regex = re.compile("(?=(" + _trie_pattern(self.keywords) + "))") if self.keywords else None
+            self._prefixes: Dict[str, List[str]] = {
+                kw: [p for p in self.keywords if kw.startswith(p)] for kw in self.keywords
+            }
+
+    def _scan(self, t: str) -> Dict[str, List[int]]:
+        hits: Dict[str, List[int]] = {}
+        if self.backend == "ahocorasick":
+            if self.keywords:
+                for end, (offset, kw) in self._automaton.iter(t):
+                    hits.setdefault(kw, []).append(end - offset)
+        elif self.backend == "regex":
+            if self._regex is not None:
+                prefixes = self._prefixes
+                for m in self._regex.finditer(t):
+                    start = m.start()
+                    for kw in prefixes[m.group(1)]:
+                        hits.setdefault(kw, []).append(start)
+        else:
+            for kw in self.keywords:
+                i = t.find(kw)
+                while i >= 0:
+                    hits.setdefault(kw, []).append(i)
+                    i = t.find(kw, i + 1)
+        return hits
+
+    def match(self, text: Optional[str]) -> TitleMatch:
+        t = (text or "").lower()
+        hits = self._scan(t)
+        found = hits.keys()
+        flags = {name: not kws.isdisjoint(found) for name, kws in self.groups.items()}
+        return TitleMatch(t, hits, flags, self.quantity)
+
+    def fingerprint_for(self, classify: Callable[[str], Dict[str, Any]]) -> str:
+        """fingerprint extended with the source of a classify function (memo key)."""
+        fp = self._classify_fingerprints.get(classify)
+        if fp is None:
+            fp = hashlib.sha256(f"{self.fingerprint}|{_source_of(classify)}".encode("utf-8")).hexdigest()[:16]
+            self._classify_fingerprints[classify] = fp
+        return fp
+
+
+def classify_many(
+    namespace: str,
+    classifier: TitleClassifier,
+    texts: Iterable[str],
+    classify: Callable[[str], Dict[str, Any]],
+) -> Dict[str, Dict[str, Any]]:
+    """
+    {text: classify(text)} for a batch, served from the cross-day memo
+    (app/services/classification_memo.py) where possible. Without app settings
+    (offline replay, benchmarks) every text is classified directly.
+    """
+    texts = list(texts)
+    try:
+        from app.services.classification_memo import classification_memo
+    except Exception as e:
+        logger.debug(f"Classification memo not available: {e}")
+        return {t: classify(t) for t in dict.fromkeys(texts)}
+    return classification_memo.classify_many(namespace, classifier.fingerprint_for(classify), texts, classify)
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# LOT QUANTITY
+# ═══════════════════════════════════════════════════════════════════════════
+
+_LOT_OF_RE = re.compile(r'(?:lot|set|bundle)\s+of\s+(\d+)')
+_N_X_RE = re.compile(r'(?:^|\s)(\d+)\s*x\s+')
+_X_N_RE = re.compile(r'\bx\s*(\d+)(?:\s|$)')
+_N_BOXES_RE = re.compile(r'(?:^|\s)(\d+)\s+(?:booster\s+)?box(?:es)?(?:\s+lot)?')
+
+
+def lot_quantity(t: str) -> int:
+    """Multi-box quantity from a lowercased title (130point / Playwright rules).
+
+    Detects "lot of 2", "set of 2", "bundle of 2", "2x", "x2", "2 boxes",
+    "2 box lot". Returns 1 if no multi-box pattern found. Capped at 6 to avoid
+    false positives from product codes (OP-01, EB-02).
+    """
+    for pattern in (_LOT_OF_RE, _N_X_RE, _X_N_RE, _N_BOXES_RE):
+        m = pattern.search(t)
+        if m:
+            qty = int(m.group(1))
+            if 2 <= qty <= 6:
+                return qty
+    return 1
@@ -0,0 +1,444 @@
+#!/usr/bin/env python3
+"""
+Analytics Hot Path Benchmarks
+-----------------------------
+Times the analytics functions behind the API and the daily pipeline over
+synthetic catalogs of several sizes (scripts/generate_synthetic_data.py, seeded)
+and writes the results to JSON, so runs can be compared across commits.
+
+  merge_same_date_entries, filter_to_one_per_month      per box history
+  get_box_price_history (cold / warm history_cache)     every box, 90 days
+  get_all_boxes_latest_for_leaderboard                  all boxes, one batch
+  calculate_ranks_for_date                              last 30 days
+  MetricsCalculator.calculate_daily_metrics             per box history
+  process_listings                                      one day's snapshot per box
+  title filters (classify_title / classify_listing)     50 titles per box
+
+History-backed functions read from an in-memory copy of the synthetic rows
+(same entry shape as db_historical_reader), so the numbers are the Python work
+without DB round trips. The classification memo is off, so the filters
+classify every title.
+
+--db times the DB-backed paths against DATABASE_URL instead (seed it with
+generate_synthetic_data.py first): the leaderboard batch, cold box history,
+compute_rolling_metrics and compute_market_index. The last two WRITE their
+results for the latest date, so it refuses a DATABASE_URL that is not localhost
+unless --i-know-this-is-local is passed, and never with ENVIRONMENT=production.
+
+Results go to benchmarks/results/<timestamp>-<commit>.json. --compare takes a
+previous results file (or "latest") and exits 1 when a case got slower than
+--threshold times its baseline (ignoring differences under --min-delta-ms).
+
+Run standalone:
+    python benchmarks/bench_analytics.py                       # sizes 18,180,1800 boxes
+    python benchmarks/bench_analytics.py --sizes 18,180 --years 1 --compare latest
+    python benchmarks/bench_analytics.py --db --compare benchmarks/results/<file>.json
+"""
+from __future__ import annotations
+
+import importlib
+import json
+import logging
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from bench_title_classifier import SOURCES, make_titles  # noqa: E402
+
+RESULTS_DIR = Path(__file__).parent / "results"
+DEFAULT_SIZES = (18, 180, 1800)
+
+# generate_synthetic_data metric row keys -> box_metrics_unified columns
+_COLUMNS = {
+    "md": "metric_date", "fp": "floor_price_usd", "fp1d": "floor_price_1d_change_pct",
+    "dv": "daily_volume_usd", "tdv": "tcg_daily_volume_usd", "edv": "ebay_daily_volume_usd",
+    "uv": "unified_volume_usd", "uv7": "unified_volume_7d_ema", "sold": "boxes_sold_per_day",
+    "esold": "ebay_units_sold_count", "sold30": "boxes_sold_30d_avg",
+    "active": "active_listings_count", "eactive": "ebay_active_listings_count",
+    "added": "boxes_added_today", "added30": "avg_boxes_added_per_day", "liq": "liquidity_score",
+    "d20": "days_to_20pct_increase", "eds": "expected_days_to_sell",
+}
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# DATA
+# ═══════════════════════════════════════════════════════════════════════════
+
+def build_data(boxes: int, years: float, seed: int) -> Dict[str, Any]:
+    """Synthetic histories, one listing snapshot per box and titles for the filters."""
+    from app.services.db_historical_reader import _row_to_entry
+    from scripts.generate_synthetic_data import generate_boxes
+
+    end = date.today()
+    start = end - timedelta(days=int(years * 365) - 1)
+    histories: Dict[str, List[Dict[str, Any]]] = {}
+    snapshots: Dict[str, List[Dict[str, Any]]] = {}
+    names: Dict[str, str] = {}
+    for g in generate_boxes(boxes, start, end, seed=seed, raw_days=1):
+        bid = g["box"]["id"]
+        names[bid] = g["box"]["name"]
+        rows = []
+        for m in g["metrics"]:
+            row = {_COLUMNS[k]: v for k, v in m.items() if k in _COLUMNS}
+            row["metric_date"] = date.fromisoformat(row["metric_date"])
+            rows.append(_row_to_entry(row))
+        histories[bid] = rows
+        snapshots[bid] = g["tcg_listings"]
+
+    from scripts import ebay_scraper
+    titles = make_titles(boxes * 50, sorted(ebay_scraper.TITLE_RULES.keywords), seed)
+    listings: Dict[str, List[Dict[str, Any]]] = {}
+    for k, (bid, rows) in enumerate(snapshots.items()):
+        listings[bid] = [
+            {
+                "title": names[bid],
+                "description": titles[(k * 31 + j) % len(titles)] if j % 5 == 0 else "",
+                "condition": "Near Mint",
+                "variant": "Unopened",
+                "seller": r["sid"],
+                "price": r["price"],
+                "quantity": r["qty"],
+            }
+            for j, r in enumerate(rows)
+        ]
+    return {"boxes": boxes, "histories": histories, "listings": listings, "titles": titles}
+
+
+@contextmanager
+def memory_history(histories: Dict[str, List[Dict[str, Any]]]) -> Iterator[None]:
+    """Serve db_historical_reader's history reads from histories while active."""
+    from app.services import db_historical_reader as reader
+
+    names = (
+        "get_box_historical_entries_from_db",
+        "get_all_boxes_historical_entries_from_db",
+        "get_history_data_version",
+        "get_box_historical_entries_changed_since",
+    )
+    saved = {name: getattr(reader, name) for name in names}
+
+    def one(box_id):
+        return [dict(e) for e in histories.get(box_id, [])]
+
+    def many(box_ids, since=None):
+        out = {}
+        for bid in box_ids:
+            entries = histories.get(bid, [])
+            if since is not None:
+                window = [e for e in entries if e["date"] >= since]
+                entries = entries[-2:] if len(window) < 2 else window
+            out[bid] = [dict(e) for e in entries]
+        return out
+
+    reader.get_box_historical_entries_from_db = one
+    reader.get_all_boxes_historical_entries_from_db = many
+    reader.get_history_data_version = lambda: "bench"
+    reader.get_box_historical_entries_changed_since = lambda box_id, watermark: []
+    try:
+        yield
+    finally:
+        for name, fn in saved.items():
+            setattr(reader, name, fn)
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# TIMING
+# ═══════════════════════════════════════════════════════════════════════════
+
+def measure(call: Callable[[], Any], repeat: int, setup: Optional[Callable[[], Any]] = None, items: int = 0) -> Dict[str, Any]:
+    """Best and median wall time of call() over repeat runs, after one warm-up (setup is not timed)."""
+    if setup:
+        setup()
+    call()
+    timings = []
+    for _ in range(max(1, repeat)):
+        if setup:
+            setup()
+        t0 = time.perf_counter()
+        call()
+        timings.append(time.perf_counter() - t0)
+    best = min(timings)
+    return {
+        "best_ms": round(best * 1000, 3),
+        "median_ms": round(statistics.median(timings) * 1000, 3),
+        "runs": len(timings),
+        "items": items,
+        "us_per_item": round(best / items * 1e6, 3) if items else None,
+    }
+
+
+def _import(module: str, attr: str):
+    try:
+        return getattr(importlib.import_module(module), attr)
+    except Exception as e:
+        return f"{type(e).__name__}: {e}"[:120]
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# CASES
+# ═══════════════════════════════════════════════════════════════════════════
+
+def bench_memory(data: Dict[str, Any], repeat: int) -> Dict[str, Any]:
+    from app.services.history_cache import history_cache
+    from app.services.historical_data import (
+        filter_to_one_per_month,
+        get_all_boxes_latest_for_leaderboard,
+        get_box_price_history,
+        merge_same_date_entries,
+    )
+    from app.services.rank_history_from_metrics import calculate_ranks_for_date
+    from scripts.metrics_calculator import MetricsCalculator
+
+    histories = data["histories"]
+    box_ids = list(histories)
+    total = sum(len(h) for h in histories.values())
+    results: Dict[str, Any] = {}
+
+    # Same-date duplicates like old JSON + DB merges: every 10th day appears twice
+    with_dupes = {bid: h + [{"date": e["date"], "floor_price_usd": e["floor_price_usd"]} for e in h[::10]]
+                  for bid, h in histories.items()}
+    results["merge_same_date_entries"] = measure(
+        lambda: [merge_same_date_entries(h) for h in with_dupes.values()], repeat,
+        items=sum(len(h) for h in with_dupes.values()))
+    results["filter_to_one_per_month"] = measure(
+        lambda: [filter_to_one_per_month(h) for h in histories.values()], repeat, items=total)
+
+    with memory_history(histories):
+        results["get_box_price_history[cold]"] = measure(
+            lambda: [get_box_price_history(bid, days=90) for bid in box_ids], repeat,
+            setup=history_cache.clear, items=len(box_ids))
+        results["get_box_price_history[warm]"] = measure(
+            lambda: [get_box_price_history(bid, days=90) for bid in box_ids], repeat, items=len(box_ids))
+        history_cache.clear()
+        results["get_all_boxes_latest_for_leaderboard"] = measure(
+            lambda: get_all_boxes_latest_for_leaderboard(box_ids), repeat, items=len(box_ids))
+
+    last_dates = sorted({e["date"] for h in histories.values() for e in h[-30:]})[-30:]
+    volumes_by_date = {d: {} for d in last_dates}
+    for bid, h in histories.items():
+        for e in h[-30:]:
+            if e["date"] in volumes_by_date:
+                volumes_by_date[e["date"]][bid] = e.get("unified_volume_usd")
+    results["calculate_ranks_for_date"] = measure(
+        lambda: [calculate_ranks_for_date(d, v) for d, v in volumes_by_date.items()], repeat,
+        items=sum(len(v) for v in volumes_by_date.values()))
+
+    calc = MetricsCalculator()
+    results["MetricsCalculator.calculate_daily_metrics"] = measure(
+        lambda: [calc.calculate_daily_metrics(h) for h in histories.values()], repeat, items=total)
+
+    process_listings = _import("scripts.listings_scraper", "process_listings")
+    if isinstance(process_listings, str):
+        results["process_listings"] = {"skipped": process_listings}
+    else:
+        listings = data["listings"]
+        floors = {bid: h[-1]["floor_price_usd"] for bid, h in histories.items() if h}
+        results["process_listings"] = measure(
+            lambda: [process_listings([dict(l) for l in ls], floors.get(bid) or 100.0) for bid, ls in listings.items() if ls],
+            repeat, items=sum(len(ls) for ls in listings.values()))
+
+    titles = data["titles"]
+    for name, (module, func) in SOURCES.items():
+        fn = _import(module, func)
+        key = f"title_filter[{name}]"
+        if isinstance(fn, str):
+            results[key] = {"skipped": fn}
+        elif name == "listings_scraper":
+            rows = [{"title": t, "description": "", "condition": "New", "variant": ""} for t in titles]
+            results[key] = measure(lambda: [fn(r) for r in rows], repeat, items=len(rows))
+        else:
+            results[key] = measure(lambda: [fn(t) for t in titles], repeat, items=len(titles))
+    return results
+
+
+def bench_db(repeat: int, allow_remote: bool = False) -> Dict[str, Any]:
+    """
+    DB-backed paths against DATABASE_URL (writes rolling metrics / market index for the latest date).
+
+    allow_remote (--i-know-this-is-local) permits a DATABASE_URL that is not localhost.
+    """
+    from sqlalchemy import text
+    from app.config import settings
+    from app.services.db_historical_reader import _get_sync_engine
+    from app.services.history_cache import history_cache
+    from app.services.historical_data import get_all_boxes_latest_for_leaderboard, get_box_price_history
+    from scripts.generate_synthetic_data import is_local_database
+
+    if settings.environment == "production":
+        raise SystemExit("Refusing to run DB benchmarks with ENVIRONMENT=production")
+    if not allow_remote and not is_local_database(settings.database_url):
+        raise SystemExit(
+            "Refusing to run DB benchmarks: DATABASE_URL is not localhost. "
+            "Pass --i-know-this-is-local if it is a local database under another name."
+        )
+
+    engine = _get_sync_engine()
+    with engine.connect() as conn:
+        box_ids = [str(r[0]) for r in conn.execute(text("SELECT id FROM booster_boxes ORDER BY id")).fetchall()]
+        latest = conn.execute(text("SELECT MAX(metric_date) FROM box_metrics_unified")).scalar()
+    if not box_ids or latest is None:
+        raise SystemExit("No box data in the database; run scripts/generate_synthetic_data.py first")
+    latest = latest.isoformat()
+
+    from scripts.market_index import compute_market_index
+    from scripts.rolling_metrics import compute_rolling_metrics
+
+    sample = box_ids[:50]
+    return {
+        "boxes": len(box_ids),
+        "cases": {
+            "get_all_boxes_latest_for_leaderboard": measure(
+                lambda: get_all_boxes_latest_for_leaderboard(box_ids), repeat, items=len(box_ids)),
+            "get_box_price_history[cold]": measure(
+                lambda: [get_box_price_history(bid, days=90) for bid in sample], repeat,
+                setup=history_cache.clear, items=len(sample)),
+            "compute_rolling_metrics": measure(
+                lambda: compute_rolling_metrics(latest), max(1, repeat // 2), items=len(box_ids)),
+            "compute_market_index": measure(
+                lambda: compute_market_index(latest), repeat, items=len(box_ids)),
+        },
+    }
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# RESULTS
+# ═══════════════════════════════════════════════════════════════════════════
+
+def _git(*args: str) -> Optional[str]:
+    try:
+        return subprocess.run(["git", *args], cwd=project_root, capture_output=True, text=True, timeout=10).stdout.strip() or None
+    except Exception:
+        return None
+
+
+def environment() -> Dict[str, Any]:
+    return {
+        "commit": _git("rev-parse", "--short", "HEAD"),
+        "dirty": bool(_git("status", "--porcelain", "--untracked-files=no")),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+    }
+
+
+def flatten(report: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """{"<case>@<boxes>": result} over every size in a report."""
+    out = {}
+    for run in report["runs"]:
+        for case, r in run["cases"].items():
+            if "best_ms" in r:
+                out[f"{case}@{run['boxes']}{'/db' if run.get('db') else ''}"] = r
+    return out
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float, min_delta_ms: float) -> List[Dict[str, Any]]:
+    base, now = flatten(baseline), flatten(current)
+    rows = []
+    for key in sorted(now):
+        if key not in base:
+            continue
+        b, c = base[key]["best_ms"], now[key]["best_ms"]
+        ratio = c / b if b > 0 else None
+        rows.append({
+            "case": key,
+            "baseline_ms": b,
+            "current_ms": c,
+            "ratio": round(ratio, 3) if ratio is not None else None,
+            "regression": ratio is not None and ratio > threshold and c - b > min_delta_ms,
+        })
+    return rows
+
+
+def latest_results(exclude: Optional[Path] = None) -> Optional[Path]:
+    files = sorted(p for p in RESULTS_DIR.glob("*.json") if p != exclude)
+    return files[-1] if files else None
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    env = report["environment"]
+    print(f"commit {env['commit']}{' (dirty)' if env['dirty'] else ''}, Python {env['python']}, seed {report['seed']}\n")
+    for run in report["runs"]:
+        print(f"{run['boxes']} boxes{' (database)' if run.get('db') else ''}")
+        for case, r in run["cases"].items():
+            if "skipped" in r:
+                print(f"  {case:<45} skipped ({r['skipped']})")
+            else:
+                per = f"{r['us_per_item']:>10.2f} us/item" if r["us_per_item"] is not None else ""
+                print(f"  {case:<45} {r['best_ms']:>10.2f} ms  (median {r['median_ms']:.2f}) {per}")
+        print()
+
+
+def run(sizes: List[int], years: float, seed: int, repeat: int, db: bool, allow_remote: bool = False) -> Dict[str, Any]:
+    from app.config import settings
+
+    settings.classification_memo_enabled = False
+    logging.disable(logging.INFO)
+    report: Dict[str, Any] = {"environment": environment(), "seed": seed, "years": years, "runs": []}
+    try:
+        if db:
+            result = bench_db(repeat, allow_remote=allow_remote)
+            report["runs"].append({"boxes": result["boxes"], "db": True, "cases": result["cases"]})
+        else:
+            for boxes in sizes:
+                data = build_data(boxes, years, seed)
+                report["runs"].append({
+                    "boxes": boxes,
+                    "entries": sum(len(h) for h in data["histories"].values()),
+                    "cases": bench_memory(data, repeat),
+                })
+    finally:
+        logging.disable(logging.NOTSET)
+    return report
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark the analytics hot paths")
+    parser.add_argument("--sizes", type=str, default=",".join(str(s) for s in DEFAULT_SIZES), help="Box counts, comma-separated")
+    parser.add_argument("--years", type=float, default=2.0, help="Years of synthetic history per box")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per case (best is compared)")
+    parser.add_argument("--db", action="store_true", help="Time the DB-backed paths against DATABASE_URL")
+    parser.add_argument("--i-know-this-is-local", action="store_true",
+                        help="With --db, allow a DATABASE_URL that is not localhost (it must still be a local database)")
+    parser.add_argument("--out", type=str, default=None, help="Results file (default: benchmarks/results/<timestamp>-<commit>.json)")
+    parser.add_argument("--compare", type=str, default=None, help='Baseline results file, or "latest"')
+    parser.add_argument("--threshold", type=float, default=1.2, help="Slowdown ratio that counts as a regression")
+    parser.add_argument("--min-delta-ms", type=float, default=1.0, help="Ignore slowdowns smaller than this")
+    args = parser.parse_args()
+
+    report = run([int(s) for s in args.sizes.split(",") if s], args.years, args.seed, args.repeat, args.db,
+                 allow_remote=args.i_know_this_is_local)
+    print_report(report)
+
+    RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+    stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+    out = Path(args.out) if args.out else RESULTS_DIR / f"{stamp}-{report['environment']['commit'] or 'nogit'}.json"
+    baseline_path = None
+    if args.compare:
+        baseline_path = latest_results(exclude=out) if args.compare == "latest" else Path(args.compare)
+    out.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print(f"Results: {out}")
+
+    if args.compare:
+        if baseline_path is None or not baseline_path.exists():
+            print("No baseline results to compare against")
+            sys.exit(0)
+        rows = compare(report, json.loads(baseline_path.read_text(encoding="utf-8")), args.threshold, args.min_delta_ms)
+        print(f"\nCompared with {baseline_path.name} (regression: > x{args.threshold} and > {args.min_delta_ms} ms)")
+        for r in rows:
+            mark = "REGRESSION" if r["regression"] else ""
+            print(f"  {r['case']:<55} {r['baseline_ms']:>10.2f} -> {r['current_ms']:>10.2f} ms  x{r['ratio']}  {mark}")
+        sys.exit(1 if any(r["regression"] for r in rows) else 0)
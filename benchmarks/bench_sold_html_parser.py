@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Sold Listings HTML Parser Benchmark
+-----------------------------------
+Times every installed backend of scripts.ebay_scraper.parse_sold_listings_html
+(selectolax, lxml iterparse, BeautifulSoup) on the 130point fixtures in
+benchmarks/fixtures/ebay_130point/, scaled up to realistic response sizes, and
+checks that each backend returns exactly what BeautifulSoup returns.
+
+Reports best-of-N time, rows/sec, peak Python memory (tracemalloc — the C-side
+DOM of selectolax/lxml is not counted) and the speed-up over bs4.
+
+Run standalone:
+    python benchmarks/bench_sold_html_parser.py
+    python benchmarks/bench_sold_html_parser.py --scale 200 --repeat 10
+"""
+from __future__ import annotations
+
+import json
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Dict, List
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from replay_parsers import fixture_paths, scale_table_html  # noqa: E402
+from scripts.ebay_scraper import _available_sold_html_backends, parse_sold_listings_html  # noqa: E402
+
+
+def bench_backend(html: str, backend: str, repeat: int) -> Dict[str, Any]:
+    rows = parse_sold_listings_html(html, backend=backend)  # warm-up
+    timings = []
+    for _ in range(max(1, repeat)):
+        t0 = time.perf_counter()
+        parse_sold_listings_html(html, backend=backend)
+        timings.append(time.perf_counter() - t0)
+    tracemalloc.start()
+    parse_sold_listings_html(html, backend=backend)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    best = min(timings)
+    return {
+        "backend": backend,
+        "rows": len(rows),
+        "best_ms": round(best * 1000, 2),
+        "rows_per_sec": round(len(rows) / best, 1) if best > 0 else None,
+        "peak_kb": round(peak / 1024, 1),
+        "output": rows,
+    }
+
+
+def run(scales: List[int], repeat: int) -> Dict[str, Any]:
+    backends = _available_sold_html_backends()
+    report: Dict[str, Any] = {"backends": backends, "cases": [], "mismatches": 0}
+    if not backends:
+        return report
+    for fixture in fixture_paths("ebay_130point"):
+        base = fixture.read_text(encoding="utf-8")
+        for scale in scales:
+            html = scale_table_html(base, scale)
+            results = [bench_backend(html, b, repeat) for b in backends]
+            reference = next((r for r in results if r["backend"] == "bs4"), results[-1])
+            for r in results:
+                r["matches_bs4"] = r["output"] == reference["output"]
+                r["speedup"] = round(reference["best_ms"] / r["best_ms"], 2) if r["best_ms"] else None
+                report["mismatches"] += 0 if r["matches_bs4"] else 1
+                del r["output"]
+            report["cases"].append({
+                "fixture": fixture.name,
+                "scale": scale,
+                "html_kb": round(len(html.encode("utf-8")) / 1024, 1),
+                "results": results,
+            })
+    return report
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    if not report["backends"]:
+        print("No HTML parser installed (pip install selectolax lxml beautifulsoup4)")
+        return
+    print(f"Backends: {', '.join(report['backends'])}\n")
+    for case in report["cases"]:
+        print(f"{case['fixture']} x{case['scale']} ({case['html_kb']} KB)")
+        for r in case["results"]:
+            rps = f"{r['rows_per_sec']:,.0f}" if r["rows_per_sec"] is not None else "-"
+            print(f"  {r['backend']:<11} {r['rows']:>6} rows {r['best_ms']:>9.2f} ms {rps:>11} rows/s "
+                  f"{r['peak_kb']:>10.1f} KB  x{r['speedup']:<6} {'ok' if r['matches_bs4'] else 'MISMATCH'}")
+        print()
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Benchmark sold listings HTML parser backends")
+    parser.add_argument("--scale", type=int, action="append", help="Row multiplier (repeatable, default 1, 20, 200)")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per backend (best is reported)")
+    parser.add_argument("--json", type=str, default=None, help="Also write the report to this JSON file")
+    args = parser.parse_args()
+
+    report = run(args.scale or [1, 20, 200], args.repeat)
+    print_report(report)
+    if args.json:
+        Path(args.json).write_text(json.dumps(report, indent=2), encoding="utf-8")
+    sys.exit(1 if report["mismatches"] else 0)
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Title Classifier Benchmark
+--------------------------
+Throughput of app/services/title_classifier.py over a few hundred thousand
+synthetic listing titles (seeded, so runs are comparable).
+
+  1. Engine: TitleClassifier.match() with each scan backend (ahocorasick when
+     installed, regex, linear = str.find per keyword like the old filters) over
+     the 130point rule groups, plus a check that every backend finds the same
+     keywords at the same offsets.
+  2. Sources: each source's classify_title() (all flags + lot quantity) with the
+     default backend. Sources whose module imports fail (apify_client,
+     playwright, ...) are skipped.
+
+Run standalone:
+    python benchmarks/bench_title_classifier.py
+    python benchmarks/bench_title_classifier.py --titles 500000 --seed 3
+"""
+from __future__ import annotations
+
+import importlib
+import json
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from app.services.title_classifier import AHOCORASICK_AVAILABLE, BACKENDS, TitleClassifier  # noqa: E402
+
+# Title building blocks besides the rule keywords themselves
+BASE_WORDS = [
+    "one piece", "op-05", "op13", "eb-01", "prb-02", "awakening of the new era", "romance dawn",
+    "booster box", "sealed", "factory sealed", "english", "new", "bandai", "tcg", "card game",
+    "x2", "2x", "lot of 3", "qty 2", "3 boxes", "24 packs", "case fresh", "showcase", "uk",
+    "free shipping", "mint", "display case", "-", "/", "(", ")", "!",
+]
+
+SOURCES = {
+    "ebay_scraper": ("scripts.ebay_scraper", "classify_title"),
+    "ebay_playwright": ("scripts.ebay_playwright", "classify_title"),
+    "ebay_apify": ("scripts.ebay_apify", "classify_title"),
+    "listings_scraper": ("scripts.listings_scraper", "classify_listing"),
+}
+
+
+def make_titles(n: int, keywords: List[str], seed: int) -> List[str]:
+    rng = random.Random(seed)
+    vocab = BASE_WORDS * 3 + keywords
+    titles = []
+    for _ in range(n):
+        words = rng.choices(vocab, k=rng.randint(5, 14))
+        title = " ".join(words)
+        roll = rng.random()
+        titles.append(title.title() if roll < 0.6 else title.upper() if roll < 0.7 else title)
+    return titles
+
+
+def _time(fn: Callable[[str], Any], titles: List[str]) -> Dict[str, Any]:
+    t0 = time.perf_counter()
+    for t in titles:
+        fn(t)
+    elapsed = time.perf_counter() - t0
+    return {
+        "seconds": round(elapsed, 3),
+        "titles_per_sec": round(len(titles) / elapsed) if elapsed > 0 else None,
+        "us_per_title": round(elapsed / len(titles) * 1e6, 2) if titles else None,
+    }
+
+
+def bench_engine(titles: List[str], groups: Dict[str, Any], parity_sample: int) -> Dict[str, Any]:
+    backends = [b for b in BACKENDS if b != "ahocorasick" or AHOCORASICK_AVAILABLE]
+    classifiers = {b: TitleClassifier(groups, backend=b) for b in backends}
+    results = {b: _time(c.match, titles) for b, c in classifiers.items()}
+
+    mismatches = 0
+    reference = classifiers["linear"]
+    for t in titles[:parity_sample]:
+        expected = {kw: sorted(pos) for kw, pos in reference.match(t).hits.items()}
+        for b, c in classifiers.items():
+            if {kw: sorted(pos) for kw, pos in c.match(t).hits.items()} != expected:
+                mismatches += 1
+    base = results["linear"]["seconds"]
+    for r in results.values():
+        r["speedup_vs_linear"] = round(base / r["seconds"], 2) if r["seconds"] else None
+    return {"keywords": len(reference.keywords), "backends": results, "parity_mismatches": mismatches}
+
+
+def bench_sources(titles: List[str]) -> Dict[str, Any]:
+    out: Dict[str, Any] = {}
+    for name, (module, func) in SOURCES.items():
+        try:
+            fn = getattr(importlib.import_module(module), func)
+        except Exception as e:
+            out[name] = {"skipped": f"{type(e).__name__}: {e}"[:120]}
+            continue
+        if name == "listings_scraper":
+            call = lambda t, fn=fn: fn({"title": t, "description": "", "condition": "New", "variant": ""})
+        else:
+            call = fn
+        out[name] = _time(call, titles)
+    return out
+
+
+def run(n: int, seed: int, parity_sample: int) -> Dict[str, Any]:
+    from scripts import ebay_scraper
+
+    groups = ebay_scraper.TITLE_RULES.groups
+    keywords = sorted(ebay_scraper.TITLE_RULES.keywords)
+    titles = make_titles(n, keywords, seed)
+    return {
+        "titles": n,
+        "seed": seed,
+        "ahocorasick_available": AHOCORASICK_AVAILABLE,
+        "engine": bench_engine(titles, groups, parity_sample),
+        "sources": bench_sources(titles),
+    }
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    engine = report["engine"]
+    print(f"{report['titles']:,} titles (seed {report['seed']}), {engine['keywords']} keywords\n")
+    print("Engine (TitleClassifier.match)")
+    for backend, r in engine["backends"].items():
+        print(f"  {backend:<12} {r['titles_per_sec']:>10,} titles/s {r['us_per_title']:>8.2f} us/title"
+              f"   x{r['speedup_vs_linear']}")
+    print(f"  parity mismatches: {engine['parity_mismatches']}\n")
+    print("Sources (all flags + lot quantity)")
+    for name, r in report["sources"].items():
+        if "skipped" in r:
+            print(f"  {name:<17} skipped ({r['skipped']})")
+        else:
+            print(f"  {name:<17} {r['titles_per_sec']:>10,} titles/s {r['us_per_title']:>8.2f} us/title")
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Benchmark the shared title classifier")
+    parser.add_argument("--titles", type=int, default=300_000, help="Number of synthetic titles")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--parity-sample", type=int, default=20_000, help="Titles checked for backend parity")
+    parser.add_argument("--json", type=str, default=None, help="Also write the report to this JSON file")
+    args = parser.parse_args()
+
+    report = run(args.titles, args.seed, args.parity_sample)
+    print_report(report)
+    if args.json:
+        Path(args.json).write_text(json.dumps(report, indent=2), encoding="utf-8")
+    sys.exit(1 if report["engine"]["parity_mismatches"] else 0)
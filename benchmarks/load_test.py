@@ -0,0 +1,387 @@
+#!/usr/bin/env python3
+"""
+API Load Test
+-------------
+Drives a running API (local stack seeded with scripts/generate_synthetic_data.py)
+with logged-in virtual users replaying a dashboard traffic mix, and reports per
+route throughput, p50/p95/p99 latency and error rate, plus DB pool saturation.
+
+  1. Users log in through /auth/login (real JWTs, real paywall checks).
+     --create-users N first creates N pioneer users directly in DATABASE_URL
+     (localhost only unless --i-know-this-is-local; never in production).
+  2. Box ids and set codes are discovered from the leaderboard.
+  3. Each virtual user loops until --duration: pick a request from MIX, send it,
+     wait an exponential think time (--think-ms mean).
+  4. /health/db-pool is polled every --pool-interval seconds: peak in-use per
+     pool, share of samples at pool_size + max_overflow, checkout timeouts and
+     worst checkout wait during the run.
+  5. /metrics is read before and after (if enabled; --metrics-token when set),
+     giving server-side DB queries and DB time per route for the run. A route
+     whose server time is mostly DB time while its latency climbs with users
+     is waiting on the pool or on sync DB calls made from async handlers.
+
+Login is rate limited per client IP; the driver logs users in before the run
+and waits out 429s (Retry-After), so many users take a while to log in. 429s
+during the run count as errors for their route.
+
+Run standalone:
+    python benchmarks/load_test.py --base-url http://localhost:8000 --create-users 20 --users 20 --duration 120
+    python benchmarks/load_test.py --users-file users.csv --users 50 --duration 300 --json load.json
+"""
+from __future__ import annotations
+
+import asyncio
+import csv
+import json
+import random
+import re
+import sys
+import time
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+DEFAULT_PASSWORD = "LoadTest!2345"
+
+# (weight, route template); parameters are filled in by _request()
+MIX = [
+    (30, "/booster-boxes"),
+    (20, "/booster-boxes/{box_id}"),
+    (20, "/booster-boxes/{box_id}/time-series"),
+    (10, "/booster-boxes/market-macro"),
+    (12, "/extension/box/{set_code}"),
+    (8, "/extension/top-movers"),
+]
+SORTS = ["unified_volume_usd", "floor_price_usd", "floor_price_1d_change_pct", "daily_volume_usd", "liquidity_score"]
+TIME_SERIES_DAYS = [30, 90, 365]
+
+_SET_CODE = re.compile(r"(OP|EB|PRB)-\d+", re.IGNORECASE)
+_PROM_LINE = re.compile(r"^(\w+)(?:\{(.*)\})?\s+(\S+)$")
+_PROM_LABEL = re.compile(r'(\w+)="((?:[^"\\]|\\.)*)"')
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# USERS
+# ═══════════════════════════════════════════════════════════════════════════
+
+async def create_users(n: int, password: str, allow_remote: bool = False) -> List[Tuple[str, str]]:
+    """
+    Create (or reuse) n pioneer users loadtest+<i>@example.com in DATABASE_URL.
+
+    allow_remote (--i-know-this-is-local) permits a DATABASE_URL that is not localhost.
+    """
+    from sqlalchemy import select
+    from app.config import settings
+    from app.database import AsyncSessionLocal
+    from app.models.user import User, UserRole
+    from app.utils.password import hash_password
+    from scripts.generate_synthetic_data import is_local_database
+
+    if settings.environment == "production":
+        raise SystemExit("Refusing to create load-test users with ENVIRONMENT=production")
+    if not allow_remote and not is_local_database(settings.database_url):
+        raise SystemExit(
+            "Refusing to create load-test users: DATABASE_URL is not localhost. "
+            "Pass --i-know-this-is-local if it is a local database under another name."
+        )
+    emails = [f"loadtest+{i}@example.com" for i in range(n)]
+    hashed = hash_password(password)
+    async with AsyncSessionLocal() as db:
+        existing = set((await db.execute(select(User.email).where(User.email.in_(emails)))).scalars().all())
+        for email in emails:
+            if email not in existing:
+                db.add(User(
+                    email=email,
+                    hashed_password=hashed,
+                    is_active=True,
+                    role=UserRole.USER.value,
+                    token_version=1,
+                    subscription_status="pioneer",
+                ))
+        await db.commit()
+    return [(e, password) for e in emails]
+
+
+def read_users(path: str) -> List[Tuple[str, str]]:
+    with open(path, newline="") as f:
+        return [(row[0].strip(), row[1].strip()) for row in csv.reader(f) if len(row) >= 2 and "@" in row[0]]
+
+
+async def login(client: httpx.AsyncClient, email: str, password: str, attempts: int = 20) -> Optional[str]:
+    for _ in range(attempts):
+        r = await client.post("/auth/login", json={"email": email, "password": password})
+        if r.status_code == 200:
+            return r.json()["access_token"]
+        if r.status_code != 429:
+            print(f"  login failed for {email}: HTTP {r.status_code} {r.text[:120]}")
+            return None
+        await asyncio.sleep(float(r.headers.get("Retry-After") or 60))
+    return None
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# SERVER-SIDE METRICS
+# ═══════════════════════════════════════════════════════════════════════════
+
+def parse_prometheus(text: str) -> Dict[Tuple[str, frozenset], float]:
+    out = {}
+    for line in text.splitlines():
+        if not line or line.startswith("#"):
+            continue
+        m = _PROM_LINE.match(line.strip())
+        if not m:
+            continue
+        labels = frozenset(_PROM_LABEL.findall(m.group(2) or ""))
+        try:
+            out[(m.group(1), labels)] = float(m.group(3))
+        except ValueError:
+            continue
+    return out
+
+
+async def scrape_metrics(client: httpx.AsyncClient, token: Optional[str]) -> Optional[Dict]:
+    headers = {"Authorization": f"Bearer {token}"} if token else {}
+    try:
+        r = await client.get("/metrics", headers=headers)
+    except httpx.HTTPError:
+        return None
+    return parse_prometheus(r.text) if r.status_code == 200 else None
+
+
+def server_side(before: Dict, after: Dict) -> Dict[str, Dict[str, Any]]:
+    """Per route over the run: requests, avg server ms, avg DB queries, avg DB ms, DB share."""
+    def delta(name: str, route: str) -> float:
+        key = (name, frozenset({("route", route)}))
+        return after.get(key, 0.0) - before.get(key, 0.0)
+
+    routes = {dict(labels).get("route") for (name, labels) in after if name == "boosterbox_http_request_duration_seconds_count"}
+    out = {}
+    for route in sorted(r for r in routes if r):
+        n = delta("boosterbox_http_request_duration_seconds_count", route)
+        if n <= 0:
+            continue
+        seconds = delta("boosterbox_http_request_duration_seconds_sum", route)
+        db_seconds = delta("boosterbox_http_request_db_seconds_total", route)
+        out[route] = {
+            "requests": int(n),
+            "avg_server_ms": round(seconds / n * 1000, 2),
+            "avg_db_queries": round(delta("boosterbox_http_request_db_queries_sum", route) / n, 2),
+            "avg_db_ms": round(db_seconds / n * 1000, 2),
+            "db_share": round(db_seconds / seconds, 3) if seconds > 0 else None,
+        }
+    return out
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# RUN
+# ═══════════════════════════════════════════════════════════════════════════
+
+class Recorder:
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, Counter] = defaultdict(Counter)
+        self.pool_samples: List[Dict[str, Any]] = []
+
+    def record(self, label: str, ms: float, status: Any) -> None:
+        self.latencies[label].append(ms)
+        if not (isinstance(status, int) and status < 400):
+            self.errors[label][str(status)] += 1
+
+
+def _request(rng: random.Random, catalog: Dict[str, List[str]]) -> Tuple[str, str, Dict[str, Any]]:
+    """(label, path, params) for one request from MIX."""
+    template = rng.choices([t for _, t in MIX], weights=[w for w, _ in MIX])[0]
+    if template == "/booster-boxes":
+        return template, template, {"sort": rng.choice(SORTS), "limit": rng.choice([10, 25, 50]), "offset": rng.choice([0, 0, 10, 20, 50])}
+    if template == "/booster-boxes/{box_id}":
+        return template, f"/booster-boxes/{rng.choice(catalog['box_ids'])}", {}
+    if template == "/booster-boxes/{box_id}/time-series":
+        days = rng.choice(TIME_SERIES_DAYS)
+        return f"{template}?days={days}", f"/booster-boxes/{rng.choice(catalog['box_ids'])}/time-series", {"days": days}
+    if template == "/extension/box/{set_code}":
+        return template, f"/extension/box/{rng.choice(catalog['set_codes'])}", {}
+    return template, template, {}
+
+
+async def virtual_user(client, token, catalog, rec: Recorder, deadline: float, think_ms: float, seed: int) -> None:
+    rng = random.Random(seed)
+    headers = {"Authorization": f"Bearer {token}"}
+    while time.monotonic() < deadline:
+        label, path, params = _request(rng, catalog)
+        t0 = time.perf_counter()
+        try:
+            r = await client.get(path, params=params, headers=headers)
+            status: Any = r.status_code
+        except httpx.HTTPError as e:
+            status = type(e).__name__
+        rec.record(label, (time.perf_counter() - t0) * 1000, status)
+        if think_ms > 0:
+            await asyncio.sleep(min(rng.expovariate(1000.0 / think_ms), 10 * think_ms / 1000.0))
+
+
+async def poll_pools(client, rec: Recorder, deadline: float, interval: float) -> None:
+    while time.monotonic() < deadline:
+        try:
+            r = await client.get("/health/db-pool")
+            if r.status_code == 200:
+                rec.pool_samples.append(r.json().get("pools", {}))
+        except httpx.HTTPError:
+            pass
+        await asyncio.sleep(interval)
+
+
+async def discover(client: httpx.AsyncClient, token: str) -> Dict[str, List[str]]:
+    r = await client.get("/booster-boxes", params={"limit": 100}, headers={"Authorization": f"Bearer {token}"})
+    r.raise_for_status()
+    boxes = r.json().get("data", [])
+    codes = []
+    for b in boxes:
+        m = _SET_CODE.search(b.get("product_name") or "")
+        if m and m.group(0).upper() not in codes:
+            codes.append(m.group(0).upper())
+    return {"box_ids": [b["id"] for b in boxes if b.get("id")], "set_codes": codes or ["OP-01"]}
+
+
+def _percentile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(round(q * (len(sorted_values) - 1))))]
+
+
+def summarize(rec: Recorder, elapsed: float) -> Dict[str, Any]:
+    routes = {}
+    for label in sorted(rec.latencies):
+        lat = sorted(rec.latencies[label])
+        errors = sum(rec.errors[label].values())
+        routes[label] = {
+            "requests": len(lat),
+            "rps": round(len(lat) / elapsed, 2),
+            "p50_ms": round(_percentile(lat, 0.50), 1),
+            "p95_ms": round(_percentile(lat, 0.95), 1),
+            "p99_ms": round(_percentile(lat, 0.99), 1),
+            "max_ms": round(lat[-1], 1),
+            "error_rate": round(errors / len(lat), 4),
+            "errors": dict(rec.errors[label]),
+        }
+    total = sum(r["requests"] for r in routes.values())
+    total_errors = sum(sum(c.values()) for c in rec.errors.values())
+
+    pools: Dict[str, Any] = {}
+    if rec.pool_samples:
+        first, last = rec.pool_samples[0], rec.pool_samples[-1]
+        for name in last:
+            samples = [s[name] for s in rec.pool_samples if name in s]
+            cap = (last[name].get("pool_size") or 0) + (last[name].get("max_overflow") or 0)
+            pools[name] = {
+                "pool_size": last[name].get("pool_size"),
+                "max_overflow": last[name].get("max_overflow"),
+                "peak_in_use": max(s.get("in_use", 0) for s in samples),
+                "saturated_share": round(sum(1 for s in samples if cap and s.get("in_use", 0) >= cap) / len(samples), 3),
+                "checkout_timeouts": last[name].get("checkout_timeouts", 0) - first.get(name, {}).get("checkout_timeouts", 0),
+                "checkout_wait_max_ms": last[name].get("checkout_wait_max_ms"),
+            }
+    return {
+        "elapsed_s": round(elapsed, 1),
+        "requests": total,
+        "rps": round(total / elapsed, 2) if elapsed else None,
+        "error_rate": round(total_errors / total, 4) if total else None,
+        "routes": routes,
+        "pools": pools,
+    }
+
+
+async def run(args) -> Dict[str, Any]:
+    if args.create_users:
+        users = await create_users(args.create_users, args.password, allow_remote=args.i_know_this_is_local)
+    elif args.users_file:
+        users = read_users(args.users_file)
+    elif args.email:
+        users = [(args.email, args.password)]
+    else:
+        raise SystemExit("Give --create-users, --users-file or --email")
+
+    limits = httpx.Limits(max_connections=args.users + 4, max_keepalive_connections=args.users + 4)
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout, limits=limits) as client:
+        print(f"Logging in {len(users)} user(s)...")
+        tokens = [t for t in [await login(client, e, p) for e, p in users] if t]
+        if not tokens:
+            raise SystemExit("No user could log in")
+        catalog = await discover(client, tokens[0])
+        print(f"{len(catalog['box_ids'])} boxes, {len(catalog['set_codes'])} set codes; "
+              f"{args.users} virtual users for {args.duration}s")
+
+        before = await scrape_metrics(client, args.metrics_token)
+        rec = Recorder()
+        start = time.monotonic()
+        deadline = start + args.duration
+        tasks = [asyncio.create_task(poll_pools(client, rec, deadline, args.pool_interval))]
+        for i in range(args.users):
+            if args.ramp > 0:
+                await asyncio.sleep(args.ramp / args.users)
+            tasks.append(asyncio.create_task(virtual_user(
+                client, tokens[i % len(tokens)], catalog, rec, deadline, args.think_ms, args.seed + i)))
+        await asyncio.gather(*tasks)
+        elapsed = time.monotonic() - start
+        after = await scrape_metrics(client, args.metrics_token)
+
+    report = summarize(rec, elapsed)
+    report["config"] = {
+        "base_url": args.base_url, "users": args.users, "logged_in": len(tokens),
+        "duration_s": args.duration, "think_ms": args.think_ms, "seed": args.seed,
+    }
+    report["server"] = server_side(before, after) if before is not None and after is not None else None
+    return report
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    print(f"\n{report['requests']} requests in {report['elapsed_s']}s: {report['rps']} req/s, "
+          f"error rate {report['error_rate']}\n")
+    print(f"  {'route':<48} {'req':>6} {'rps':>7} {'p50':>8} {'p95':>8} {'p99':>8} {'err%':>6}")
+    for label, r in report["routes"].items():
+        print(f"  {label:<48} {r['requests']:>6} {r['rps']:>7} {r['p50_ms']:>8} {r['p95_ms']:>8} "
+              f"{r['p99_ms']:>8} {r['error_rate'] * 100:>6.2f}  {r['errors'] or ''}")
+    if report["pools"]:
+        print("\nDB pools (polled /health/db-pool)")
+        for name, p in report["pools"].items():
+            print(f"  {name:<20} size {p['pool_size']}+{p['max_overflow']}, peak in use {p['peak_in_use']}, "
+                  f"saturated {p['saturated_share'] * 100:.1f}% of samples, checkout timeouts {p['checkout_timeouts']}, "
+                  f"max wait {p['checkout_wait_max_ms']} ms")
+    if report.get("server"):
+        print("\nServer side (/metrics delta)")
+        for route, s in report["server"].items():
+            print(f"  {route:<48} {s['avg_server_ms']:>8} ms, {s['avg_db_queries']:>5} queries, "
+                  f"{s['avg_db_ms']:>8} ms DB ({(s['db_share'] or 0) * 100:.0f}%)")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Load test the API with a dashboard traffic mix")
+    parser.add_argument("--base-url", type=str, default="http://localhost:8000")
+    parser.add_argument("--users", type=int, default=10, help="Concurrent virtual users")
+    parser.add_argument("--duration", type=float, default=60.0, help="Seconds of traffic")
+    parser.add_argument("--ramp", type=float, default=5.0, help="Seconds to start all users")
+    parser.add_argument("--think-ms", type=float, default=500.0, help="Mean think time between requests (0 = closed loop)")
+    parser.add_argument("--create-users", type=int, default=0, help="Create N pioneer users in DATABASE_URL first")
+    parser.add_argument("--i-know-this-is-local", action="store_true",
+                        help="With --create-users, allow a DATABASE_URL that is not localhost (it must still be a local database)")
+    parser.add_argument("--users-file", type=str, default=None, help="CSV of email,password")
+    parser.add_argument("--email", type=str, default=None, help="Single account shared by all virtual users")
+    parser.add_argument("--password", type=str, default=DEFAULT_PASSWORD)
+    parser.add_argument("--metrics-token", type=str, default=None, help="METRICS_TOKEN of the server, if set")
+    parser.add_argument("--pool-interval", type=float, default=1.0, help="Seconds between /health/db-pool samples")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Per-request timeout in seconds")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", type=str, default=None, help="Also write the report to this JSON file")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    print_report(report)
+    if args.json:
+        Path(args.json).write_text(json.dumps(report, indent=2), encoding="utf-8")
@@ -0,0 +1,371 @@
+#!/usr/bin/env python3
+"""
+Offline Parser Replay
+---------------------
+Runs every scraper parser / filter pipeline against recorded pages under
+benchmarks/fixtures/ and reports rows/sec, peak Python memory and the diff of
+each output against its golden file in benchmarks/goldens/.
+
+Parsers (fixture dir -> function):
+  ebay_130point       *.html  scripts.ebay_scraper.parse_sold_listings_html
+  ebay_sold_page      *.html  scripts.ebay_playwright._extract_sold_items      (needs Playwright)
+  tcgplayer_listings  *.html  scripts.listings_scraper.scrape_listings_page    (needs Playwright)
+  serpapi             *.json  scripts.ebay_serpapi.filter_serpapi_results
+  ebay_apify          *.json  scripts.ebay_apify.filter_listing
+
+The Playwright parsers load the fixture with page.set_content(); their JS runs in
+the browser, so peak memory covers only the Python side. Parsers whose imports
+are missing are reported as skipped.
+
+Goldens are the canonical JSON output of a parser for a fixture. After an
+intentional output change, re-record them with --update-goldens and review the
+git diff. --scale N multiplies the rows of table/JSON fixtures for throughput
+runs (goldens are only compared at scale 1).
+
+SerpApi / Apify responses kept by the response cache (app/services/response_cache.py)
+can be turned into fixtures with --import-cache.
+
+Run standalone:
+    python benchmarks/replay_parsers.py
+    python benchmarks/replay_parsers.py --parser ebay_130point --repeat 20 --scale 50
+    python benchmarks/replay_parsers.py --update-goldens
+"""
+from __future__ import annotations
+
+import asyncio
+import difflib
+import json
+import logging
+import re
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+logging.basicConfig(level=logging.WARNING, format="%(asctime)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+BENCH_DIR = Path(__file__).parent
+FIXTURES_DIR = BENCH_DIR / "fixtures"
+GOLDENS_DIR = BENCH_DIR / "goldens"
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# FIXTURE LOADING / SCALING
+# ═══════════════════════════════════════════════════════════════════════════
+
+def _read_text(path: Path) -> str:
+    return path.read_text(encoding="utf-8")
+
+
+def _read_json(path: Path) -> Dict[str, Any]:
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def _meta(path: Path) -> Dict[str, Any]:
+    """Optional <case>.meta.json next to an HTML fixture (extra call arguments)."""
+    meta = path.with_suffix(".meta.json")
+    return _read_json(meta) if meta.exists() else {}
+
+
+_ROW_RE = re.compile(r"<tr\b[^>]*\bdata-price=.*?</tr>", re.S)
+
+
+def scale_table_html(html: str, n: int) -> str:
+    """Repeat every data-price row n times (130point table)."""
+    if n <= 1:
+        return html
+    rows = _ROW_RE.findall(html)
+    if not rows:
+        return html
+    last = rows[-1]
+    idx = html.rindex(last) + len(last)
+    return html[:idx] + "\n".join(rows) * (n - 1) + html[idx:]
+
+
+def _scale_list(payload: Dict[str, Any], key: str, n: int) -> Dict[str, Any]:
+    if n <= 1:
+        return payload
+    return {**payload, key: payload[key] * n}
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# PARSER ADAPTERS
+# Each returns the parser output as a JSON-serialisable list of rows.
+# ═══════════════════════════════════════════════════════════════════════════
+
+def _run_130point(html: str) -> List[Dict[str, Any]]:
+    from scripts.ebay_scraper import parse_sold_listings_html
+    return parse_sold_listings_html(html)
+
+
+def _run_serpapi(payload: Dict[str, Any]) -> List[Dict[str, Any]]:
+    from scripts.ebay_serpapi import filter_serpapi_results
+    return filter_serpapi_results(
+        payload["results"], payload["search_type"], payload.get("tcg_floor_price"),
+        payload["min_price"], payload["max_price"],
+    )
+
+
+def _run_ebay_apify(payload: Dict[str, Any]) -> List[Dict[str, Any]]:
+    from scripts.ebay_apify import filter_listing
+    out = []
+    for item in payload["items"]:
+        keep, qty = filter_listing(item, payload["min_price"])
+        out.append({"title": item.get("title"), "keep": keep, "quantity": qty})
+    return out
+
+
+class _BrowserPage:
+    """One headless Chromium page reused for every Playwright fixture."""
+
+    def __init__(self):
+        self._pw = None
+        self._browser = None
+        self.page = None
+        self.loop = asyncio.new_event_loop()
+
+    def open(self):
+        from playwright.async_api import async_playwright
+
+        async def _start():
+            self._pw = await async_playwright().start()
+            self._browser = await self._pw.chromium.launch(headless=True, args=["--no-sandbox"])
+            self.page = await self._browser.new_page()
+        self.loop.run_until_complete(_start())
+        return self
+
+    def run(self, coro_factory: Callable[[Any], Any], html: str):
+        async def _go():
+            await self.page.set_content(html, wait_until="domcontentloaded")
+            return await coro_factory(self.page)
+        return self.loop.run_until_complete(_go())
+
+    def close(self):
+        async def _stop():
+            if self._browser:
+                await self._browser.close()
+            if self._pw:
+                await self._pw.stop()
+        try:
+            self.loop.run_until_complete(_stop())
+        finally:
+            self.loop.close()
+
+
+_browser: Optional[_BrowserPage] = None
+
+
+def _page() -> _BrowserPage:
+    global _browser
+    if _browser is None:
+        _browser = _BrowserPage().open()
+    return _browser
+
+
+def _run_ebay_sold_page(html: str) -> List[Dict[str, Any]]:
+    from scripts.ebay_playwright import _extract_sold_items
+    return _page().run(_extract_sold_items, html)
+
+
+def _run_tcgplayer_listings(args: Dict[str, Any]) -> List[Dict[str, Any]]:
+    from scripts.listings_scraper import scrape_listings_page
+    return _page().run(lambda page: scrape_listings_page(page, args.get("min_price", 0)), args["html"])
+
+
+PARSERS: Dict[str, Dict[str, Any]] = {
+    "ebay_130point": {
+        "pattern": "*.html",
+        "load": _read_text,
+        "scale": scale_table_html,
+        "run": _run_130point,
+    },
+    "ebay_sold_page": {
+        "pattern": "*.html",
+        "load": _read_text,
+        "scale": None,
+        "run": _run_ebay_sold_page,
+    },
+    "tcgplayer_listings": {
+        "pattern": "*.html",
+        "load": lambda p: {"html": _read_text(p), **_meta(p)},
+        "scale": None,
+        "run": _run_tcgplayer_listings,
+    },
+    "serpapi": {
+        "pattern": "*.json",
+        "load": _read_json,
+        "scale": lambda payload, n: _scale_list(payload, "results", n),
+        "run": _run_serpapi,
+    },
+    "ebay_apify": {
+        "pattern": "*.json",
+        "load": _read_json,
+        "scale": lambda payload, n: _scale_list(payload, "items", n),
+        "run": _run_ebay_apify,
+    },
+}
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# HARNESS
+# ═══════════════════════════════════════════════════════════════════════════
+
+def _canonical(rows: Any) -> str:
+    return json.dumps(rows, indent=2, sort_keys=True, default=str, ensure_ascii=False) + "\n"
+
+
+def _golden_path(parser: str, fixture: Path) -> Path:
+    return GOLDENS_DIR / parser / f"{fixture.stem}.json"
+
+
+def fixture_paths(parser: str) -> List[Path]:
+    spec = PARSERS[parser]
+    return sorted(p for p in (FIXTURES_DIR / parser).glob(spec["pattern"]) if not p.name.endswith(".meta.json"))
+
+
+def replay_fixture(
+    parser: str,
+    fixture: Path,
+    repeat: int = 5,
+    scale: int = 1,
+    update_goldens: bool = False,
+) -> Dict[str, Any]:
+    """Time one parser on one fixture; compare against (or write) its golden."""
+    spec = PARSERS[parser]
+    payload = spec["load"](fixture)
+    if scale > 1 and spec["scale"] is not None:
+        payload = spec["scale"](payload, scale)
+    result: Dict[str, Any] = {"parser": parser, "fixture": fixture.name, "scale": scale}
+
+    # Warm-up (imports, regex compilation) and output capture
+    rows = spec["run"](payload)
+    result["rows"] = len(rows)
+
+    timings = []
+    for _ in range(max(1, repeat)):
+        t0 = time.perf_counter()
+        spec["run"](payload)
+        timings.append(time.perf_counter() - t0)
+    best = min(timings)
+    result["best_ms"] = round(best * 1000, 3)
+    result["mean_ms"] = round(sum(timings) / len(timings) * 1000, 3)
+    result["rows_per_sec"] = round(len(rows) / best, 1) if best > 0 else None
+
+    tracemalloc.start()
+    spec["run"](payload)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    result["peak_kb"] = round(peak / 1024, 1)
+
+    # Goldens are recorded / compared at scale 1 only
+    if scale == 1:
+        golden = _golden_path(parser, fixture)
+        actual = _canonical(rows)
+        if update_goldens:
+            golden.parent.mkdir(parents=True, exist_ok=True)
+            golden.write_text(actual, encoding="utf-8")
+            result["golden"] = "updated"
+        elif not golden.exists():
+            result["golden"] = "missing"
+        else:
+            expected = golden.read_text(encoding="utf-8")
+            if expected == actual:
+                result["golden"] = "match"
+            else:
+                result["golden"] = "DIFF"
+                result["diff"] = "".join(difflib.unified_diff(
+                    expected.splitlines(keepends=True), actual.splitlines(keepends=True),
+                    fromfile=f"golden/{golden.name}", tofile=f"actual/{golden.name}", n=2,
+                ))
+    return result
+
+
+def replay_all(
+    parsers: Optional[List[str]] = None,
+    repeat: int = 5,
+    scale: int = 1,
+    update_goldens: bool = False,
+) -> Dict[str, Any]:
+    results: List[Dict[str, Any]] = []
+    for parser in parsers or list(PARSERS):
+        for fixture in fixture_paths(parser):
+            try:
+                results.append(replay_fixture(parser, fixture, repeat=repeat, scale=scale, update_goldens=update_goldens))
+            except ImportError as e:
+                results.append({"parser": parser, "fixture": fixture.name, "skipped": f"missing dependency: {e.name or e}"})
+                break
+            except Exception as e:
+                results.append({"parser": parser, "fixture": fixture.name, "error": f"{type(e).__name__}: {e}"})
+    if _browser is not None:
+        _browser.close()
+    return {
+        "results": results,
+        "diffs": sum(1 for r in results if r.get("golden") == "DIFF"),
+        "errors": sum(1 for r in results if "error" in r),
+    }
+
+
+def import_from_response_cache(limit: int = 20) -> List[Path]:
+    """Write cached SerpApi responses as serpapi fixtures (params give the search type and price range)."""
+    from app.services.response_cache import response_cache
+
+    written = []
+    out_dir = FIXTURES_DIR / "serpapi"
+    out_dir.mkdir(parents=True, exist_ok=True)
+    for entry in list(response_cache.iter_entries("serpapi"))[-limit:]:
+        params = entry.get("params") or {}
+        search_type = "sold" if params.get("show_only") == "Sold" else "active"
+        slug = re.sub(r"[^a-z0-9]+", "_", str(params.get("_nkw", "query")).lower()).strip("_")[:40]
+        path = out_dir / f"cache_{entry.get('bucket', 'na')}_{slug}_{search_type}.json"
+        path.write_text(json.dumps({
+            "search_type": search_type,
+            "tcg_floor_price": None,
+            "min_price": int(params.get("_udlo") or 0),
+            "max_price": int(params.get("_udhi") or 0),
+            "results": entry.get("response") or [],
+        }, indent=2), encoding="utf-8")
+        written.append(path)
+    return written
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    print(f"{'parser':<20} {'fixture':<28} {'rows':>6} {'best ms':>9} {'rows/s':>11} {'peak KB':>9}  golden")
+    for r in report["results"]:
+        if "skipped" in r or "error" in r:
+            print(f"{r['parser']:<20} {r['fixture']:<28} {r.get('skipped') or 'ERROR ' + r['error']}")
+            continue
+        rps = f"{r['rows_per_sec']:,.0f}" if r["rows_per_sec"] is not None else "-"
+        print(f"{r['parser']:<20} {r['fixture']:<28} {r['rows']:>6} {r['best_ms']:>9.3f} {rps:>11} "
+              f"{r['peak_kb']:>9.1f}  {r.get('golden', '-')}")
+    for r in report["results"]:
+        if r.get("diff"):
+            print(f"\n── {r['parser']}/{r['fixture']} differs from golden ──")
+            print(r["diff"])
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Replay recorded pages through every scraper parser")
+    parser.add_argument("--parser", action="append", choices=sorted(PARSERS), help="Limit to one parser (repeatable)")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per fixture (best is reported)")
+    parser.add_argument("--scale", type=int, default=1, help="Multiply fixture rows for throughput runs")
+    parser.add_argument("--update-goldens", action="store_true", help="Re-record golden outputs")
+    parser.add_argument("--import-cache", action="store_true", help="Copy cached SerpApi responses into fixtures first")
+    parser.add_argument("--json", type=str, default=None, help="Also write the report to this JSON file")
+    args = parser.parse_args()
+
+    if args.import_cache:
+        for p in import_from_response_cache():
+            print(f"fixture written: {p.relative_to(project_root)}")
+
+    report = replay_all(args.parser, repeat=args.repeat, scale=args.scale, update_goldens=args.update_goldens)
+    print_report(report)
+    if args.json:
+        Path(args.json).write_text(json.dumps(report, indent=2, default=str), encoding="utf-8")
+    sys.exit(1 if report["diffs"] or report["errors"] else 0)
@@ -20,9 +20,12 @@ import uvicorn
 import traceback
 import logging
 import time
+from typing import Optional
 
 from app.config import settings
 from app.database import init_db
+from app.middleware.metrics import RequestMetricsMiddleware, TimedJSONResponse
+from app.services.request_metrics import record_cache
 
 # Rate limiter - import at module level for use as decorators on endpoints
 try:
@@ -53,6 +56,8 @@ async def lifespan(app: FastAPI):
     """Lifespan event handler for startup and shutdown"""
     # Startup
     logger.info(f"🚀 Starting BoosterBoxPro API in {settings.environment} mode")
+    if settings.metrics_enabled and settings.environment == "production" and not settings.metrics_token:
+        logger.warning("⚠️  METRICS_TOKEN not set: /metrics is disabled in production")
     try:
         await init_db()
         logger.info("✅ Database connection established")
@@ -82,6 +87,8 @@ app = FastAPI(
     docs_url=docs_url,
     redoc_url=redoc_url,
     openapi_url=openapi_url,
+    # Times JSON rendering per request for /metrics ("serialize" section)
+    default_response_class=TimedJSONResponse if settings.metrics_enabled else JSONResponse,
 )
 
 # ============================================================================
@@ -97,6 +104,10 @@ try:
 except ImportError as e:
     logger.warning(f"⚠️  Security middleware not available: {e}")
 
+# 1b. Request metrics (wraps request logging so its log line can include DB time)
+if settings.metrics_enabled:
+    app.add_middleware(RequestMetricsMiddleware)
+
 # 2. Rate Limiting
 try:
     from slowapi import _rate_limit_exceeded_handler
@@ -161,13 +172,140 @@ async def health():
     return {"status": "healthy"}
 
 
+@app.get("/health/db-pool")
+async def db_pool_health():
+    """
+    Connection pool telemetry for every engine in this process
+    (in-use, overflow, checkout wait). See app/db_engines.py.
+    """
+    from app.db_engines import pool_stats, replica_status
+    stats = pool_stats()
+    saturated = [name for name, ps in stats.items() if ps["in_use"] >= ps["pool_size"] + (ps["max_overflow"] or 0)]
+    return {
+        "status": "saturated" if saturated else "ok",
+        "saturated": saturated,
+        "pools": stats,
+        "read_replica": replica_status(),
+    }
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics(request: Request):
+    """
+    Prometheus text exposition: per-route latency, DB queries/time per request,
+    cache hit/miss, serialization and history-load time, pool gauges.
+    See app/services/request_metrics.py. In production it requires METRICS_TOKEN.
+    """
+    import hmac
+    from fastapi.responses import PlainTextResponse
+    from app.services.request_metrics import render_prometheus
+
+    if not settings.metrics_enabled or (settings.environment == "production" and not settings.metrics_token):
+        return JSONResponse(status_code=404, content={"detail": "Not Found"})
+    if settings.metrics_token:
+        auth = request.headers.get("authorization", "")
+        if not hmac.compare_digest(auth, f"Bearer {settings.metrics_token}"):
+            return JSONResponse(status_code=401, content={"detail": "Unauthorized"})
+    return PlainTextResponse(render_prometheus(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+# A run still "running" after this long died without finishing its pipeline_runs row
+CRON_STUCK_HOURS = 3
+
+
 @app.get("/health/cron")
 async def cron_health():
     """
     Cron job health check endpoint.
-    Returns status of last daily refresh run.
+    Returns status of last daily refresh run from pipeline_runs / pipeline_phase_runs
+    (app/services/pipeline_telemetry.py): per-phase status, duration and peak memory,
+    and phases that are slower or heavier than their 14-day median.
+    Falls back to logs/daily_refresh_status.json when the tables cannot be read
+    (local dev without migrations).
     Can be monitored by UptimeRobot or similar services.
     """
+    try:
+        from app.database import get_read_session_factory
+        from app.services.pipeline_telemetry import phase_trends, recent_runs
+
+        ReadSession = await get_read_session_factory()
+        async with ReadSession() as db:
+            runs = await recent_runs(db, "daily_refresh", days=14)
+    except Exception as e:
+        logger.warning(f"Cron health: pipeline telemetry unavailable, reading status file: {e}")
+        return _cron_health_from_status_file()
+
+    if not runs:
+        return {
+            "status": "unknown",
+            "message": "No daily refresh run recorded in the last 14 days",
+            "last_check": None,
+            "source": "db",
+        }
+
+    last = runs[0]
+    summary = last["summary"]
+    hours_ago = last["hours_ago"]
+    # Runs recorded before overall_success was stored: fall back to the run status
+    overall_success = summary.get("overall_success", last["status"] == "succeeded")
+    trends = phase_trends(runs)
+    slow = sorted(p for p, t in trends.items() if t["slow"])
+    heavy = sorted(p for p, t in trends.items() if t["memory_regression"])
+
+    is_healthy = True
+    message = "Cron is healthy"
+    if last["status"] == "running":
+        if hours_ago is not None and hours_ago > CRON_STUCK_HOURS:
+            is_healthy = False
+            message = f"Cron run {last['run_id'][:8]} still marked running after {hours_ago:.1f} hours"
+        else:
+            message = "Cron is currently running"
+    elif not overall_success:
+        is_healthy = False
+        errors = "; ".join(f"{k}: {v}" for k, v in (summary.get("errors") or {}).items())
+        message = f"Cron last run {last['status']}: {errors or 'Unknown error'}"
+    elif hours_ago and hours_ago > 25:
+        is_healthy = False
+        message = f"Cron hasn't run in {hours_ago:.1f} hours (expected daily)"
+    if is_healthy and (slow or heavy):
+        message += f" (slow: {', '.join(slow) or '-'}; memory up: {', '.join(heavy) or '-'})"
+
+    counts = summary.get("counts") or {}
+    phases = {p["phase"]: p for p in last["phases"]}  # later attempts override earlier ones
+    return {
+        "status": "healthy" if is_healthy else "unhealthy",
+        "message": message,
+        "source": "db",
+        "last_run": {
+            "run_id": last["run_id"],
+            "run_status": last["status"],
+            "attempts": last["attempts"],
+            "end_time": last["finished_at"],
+            "hours_ago": round(hours_ago, 1) if hours_ago else None,
+            "overall_success": overall_success,
+            "wall_seconds": summary.get("wall_seconds"),
+            "peak_mb": summary.get("peak_mb"),
+            "apify_success": counts.get("apify", {}).get("success_count", 0),
+            "apify_errors": counts.get("apify", {}).get("error_count", 0),
+            "scraper_success": counts.get("scraper", {}).get("success_count", 0),
+            "scraper_errors": counts.get("scraper", {}).get("error_count", 0),
+            "phases": {
+                name: {
+                    "status": p["status"],
+                    "duration_seconds": p["duration_seconds"],
+                    "peak_mb": p["peak_mb"],
+                    "units_failed": p["units_failed"],
+                }
+                for name, p in phases.items()
+            },
+        },
+        "slow_phases": slow,
+        "memory_regressions": heavy,
+    }
+
+
+def _cron_health_from_status_file():
+    """/health/cron from the cron's local status file (same instance only)."""
     from pathlib import Path
     import json
     from datetime import datetime, timedelta
@@ -214,6 +352,7 @@ async def cron_health():
         return {
             "status": "healthy" if is_healthy else "unhealthy",
             "message": message,
+            "source": "file",
             "last_run": {
                 "end_time": last_end_time,
                 "hours_ago": round(hours_ago, 1) if hours_ago else None,
@@ -234,6 +373,50 @@ async def cron_health():
 
 # In-memory response cache for leaderboard (repeat requests return instantly)
 _leaderboard_cache: dict = {}
+# Rank -> box_id index lives in the same cache so /hooks/invalidate-cache clears it too
+_RANK_INDEX_KEY = ("rank_index",)
+
+
+async def _resolve_rank_to_box_id(rank: int, db=None) -> Optional[str]:
+    """
+    Map a numeric rank (/booster-boxes/{rank}, /time-series) to a box UUID.
+    Ranking is by 7d EMA volume, then 30d volume, then unified volume. The ordered
+    id list is built once per cache TTL from the windowed leaderboard batch.
+    """
+    now_ts = time.time()
+    cached = _leaderboard_cache.get(_RANK_INDEX_KEY)
+    if cached and now_ts < cached[1]:
+        record_cache("rank_index", "hit")
+        ranked_ids = cached[0]
+    else:
+        record_cache("rank_index", "miss")
+        from sqlalchemy import select
+        from app.models.booster_box import BoosterBox
+        if db is None:
+            from app.database import get_read_session_factory
+            ReadSession = await get_read_session_factory()
+            async with ReadSession() as session:
+                all_boxes = (await session.execute(select(BoosterBox))).scalars().all()
+        else:
+            all_boxes = (await db.execute(select(BoosterBox))).scalars().all()
+        valid = [b for b in all_boxes if "(Test)" not in (b.product_name or "") and "Test Box" not in (b.product_name or "")]
+        if not valid:
+            return None
+        try:
+            from app.services.historical_data import get_all_boxes_latest_for_leaderboard
+            hist_by_box = get_all_boxes_latest_for_leaderboard([str(b.id) for b in valid])
+        except Exception:
+            # Fallback: no historical batch, only rank 1 resolvable (avoid N calls)
+            return str(valid[0].id) if rank == 1 else None
+        def vol_key(b):
+            h = hist_by_box.get(str(b.id), {})
+            return float(h.get("unified_volume_7d_ema") or h.get("volume_30d") or h.get("unified_volume_usd") or 0)
+        valid.sort(key=vol_key, reverse=True)
+        ranked_ids = [str(b.id) for b in valid]
+        _leaderboard_cache[_RANK_INDEX_KEY] = (ranked_ids, now_ts + settings.cache_ttl_leaderboard)
+    if 1 <= rank <= len(ranked_ids):
+        return ranked_ids[rank - 1]
+    return None
 
 
 @app.post("/hooks/invalidate-cache")
@@ -250,6 +433,12 @@ async def hooks_invalidate_cache(request: Request):
             return JSONResponse(status_code=401, content={"detail": "Unauthorized"})
         # Clear in-memory leaderboard cache
         _leaderboard_cache.clear()
+        # New data version on the primary: recheck the read replica before trusting it again
+        from app.db_engines import invalidate_replica_check
+        invalidate_replica_check()
+        # History cache keeps its rows; it just rechecks the data version and fetches the delta
+        from app.services.history_cache import history_cache
+        history_cache.mark_version_stale()
         # Clear Redis caches (leaderboard, box detail, time-series)
         redis_deleted = 0
         try:
@@ -422,12 +611,14 @@ async def get_booster_boxes(
     if cache_key in _leaderboard_cache:
         cached_response, expiry = _leaderboard_cache[cache_key]
         if now_ts < expiry:
+            record_cache("leaderboard", "hit")
             return cached_response
+    record_cache("leaderboard", "miss")
     import json
     from pathlib import Path
     from datetime import date
     from sqlalchemy import select, desc, func, and_
-    from app.database import AsyncSessionLocal
+    from app.database import get_read_session_factory
     from app.models.booster_box import BoosterBox
     from app.models.unified_box_metrics import UnifiedBoxMetrics
     
@@ -450,7 +641,8 @@ async def get_booster_boxes(
     json_boxes_by_name = {box.get("product_name"): box for box in boxes}
     
     # Query database for all boxes and their latest metrics (batch: 2 queries + 1 historical call)
-    async with AsyncSessionLocal() as db:
+    ReadSession = await get_read_session_factory()
+    async with ReadSession() as db:
         # 1) All booster boxes
         stmt = select(BoosterBox)
         result = await db.execute(stmt)
@@ -601,11 +793,11 @@ async def get_market_macro(
     price movers, volume, and supply data.
     Requires authentication and active subscription.
     """
-    from app.services.db_historical_reader import _get_sync_engine
+    from app.services.db_historical_reader import _get_read_engine
     from sqlalchemy import text
 
     try:
-        engine = _get_sync_engine()
+        engine = _get_read_engine()
         with engine.connect() as conn:
             # Latest row
             row = conn.execute(text("""
@@ -696,12 +888,12 @@ async def get_market_index_time_series(
     Returns metric_date, index_value, sentiment, fear_greed_score, total_daily_volume_usd per day.
     Requires authentication and active subscription.
     """
-    from app.services.db_historical_reader import _get_sync_engine
+    from app.services.db_historical_reader import _get_read_engine
     from sqlalchemy import text
     from datetime import date, timedelta
 
     try:
-        engine = _get_sync_engine()
+        engine = _get_read_engine()
         cutoff = (date.today() - timedelta(days=days)).isoformat()
         with engine.connect() as conn:
             rows = conn.execute(text("""
@@ -745,7 +937,7 @@ async def get_box_detail(
     Supports both UUID and numeric rank-based lookups
     """
     from sqlalchemy import select
-    from app.database import AsyncSessionLocal
+    from app.database import get_read_session_factory
     from app.models.booster_box import BoosterBox
     try:
         from app.services.historical_data import get_box_price_history, get_box_month_over_month_price_change
@@ -753,7 +945,8 @@ async def get_box_detail(
         get_box_price_history = None
         get_box_month_over_month_price_change = None
     
-    async with AsyncSessionLocal() as db:
+    ReadSession = await get_read_session_factory()
+    async with ReadSession() as db:
         # Try to find box by UUID
         try:
             from uuid import UUID
@@ -764,32 +957,13 @@ async def get_box_detail(
         except (ValueError, TypeError):
             db_box = None
         
-        # If not found and box_id is numeric, find by rank from leaderboard (single batch to avoid N×get_box_price_history)
+        # If not found and box_id is numeric, resolve rank via the cached rank index
         if not db_box and box_id.isdigit():
-            all_boxes_stmt = select(BoosterBox)
-            all_result = await db.execute(all_boxes_stmt)
-            all_boxes = all_result.scalars().all()
-            valid = [b for b in all_boxes if "(Test)" not in (b.product_name or "") and "Test Box" not in (b.product_name or "")]
-            if not valid:
-                db_box = None
-            else:
-                try:
-                    from app.services.historical_data import get_all_boxes_latest_for_leaderboard
-                    box_ids = [str(b.id) for b in valid]
-                    hist_by_box = get_all_boxes_latest_for_leaderboard(box_ids)
-                    # Sort by volume (7d EMA or 30d), then pick by rank
-                    def vol_key(b):
-                        h = hist_by_box.get(str(b.id), {})
-                        return float(h.get("unified_volume_7d_ema") or h.get("volume_30d") or h.get("unified_volume_usd") or 0)
-                    valid.sort(key=vol_key, reverse=True)
-                    rank = int(box_id)
-                    if 1 <= rank <= len(valid):
-                        db_box = valid[rank - 1]
-                    else:
-                        db_box = None
-                except Exception:
-                    # Fallback: no historical batch, use first box (avoid N calls)
-                    db_box = valid[0] if int(box_id) == 1 else None
+            ranked_id = await _resolve_rank_to_box_id(int(box_id), db)
+            if ranked_id:
+                from uuid import UUID
+                result = await db.execute(select(BoosterBox).where(BoosterBox.id == UUID(ranked_id)))
+                db_box = result.scalar_one_or_none()
         
         if not db_box:
             return JSONResponse(
@@ -824,24 +998,28 @@ async def get_box_time_series(
         
         # Handle numeric box_id (rank) by finding the actual box ID
         if box_id.isdigit():
-            # Load leaderboard to find box by rank
-            data_file = Path(__file__).parent / "data" / "leaderboard.json"
-            leaderboard_file = Path(__file__).parent / "mock_data" / "leaderboard.json"
-            
-            leaderboard_data = None
-            if data_file.exists():
-                with open(data_file, "r") as f:
-                    leaderboard_data = json.load(f)
-            elif leaderboard_file.exists():
-                with open(leaderboard_file, "r") as f:
-                    leaderboard_data = json.load(f)
-            
-            if leaderboard_data:
-                boxes = leaderboard_data.get("data", [])
-                rank = int(box_id)
-                box = next((b for b in boxes if b.get("rank") == rank), None)
-                if box:
-                    box_id = box.get("id")
+            ranked_id = await _resolve_rank_to_box_id(int(box_id))
+            if ranked_id:
+                box_id = ranked_id
+            else:
+                # Fallback: static leaderboard snapshot
+                data_file = Path(__file__).parent / "data" / "leaderboard.json"
+                leaderboard_file = Path(__file__).parent / "mock_data" / "leaderboard.json"
+                
+                leaderboard_data = None
+                if data_file.exists():
+                    with open(data_file, "r") as f:
+                        leaderboard_data = json.load(f)
+                elif leaderboard_file.exists():
+                    with open(leaderboard_file, "r") as f:
+                        leaderboard_data = json.load(f)
+                
+                if leaderboard_data:
+                    boxes = leaderboard_data.get("data", [])
+                    rank = int(box_id)
+                    box = next((b for b in boxes if b.get("rank") == rank), None)
+                    if box:
+                        box_id = box.get("id")
         
         # Get historical price data (includes all fields needed for AdvancedMetricsTable)
         price_history = None
@@ -907,13 +1085,13 @@ async def get_box_ebay_listings(
     Get recent eBay sold listings for a booster box.
     Returns individual sales with titles, prices, dates, and affiliate URLs.
     """
-    from app.services.db_historical_reader import _get_sync_engine
+    from app.services.db_historical_reader import _get_read_engine
     from sqlalchemy import text
 
     EPN_CAMPAIGN_ID = "YOUR_EPN_ID"
 
     try:
-        engine = _get_sync_engine()
+        engine = _get_read_engine()
         with engine.connect() as conn:
             rows = conn.execute(text("""
                 SELECT
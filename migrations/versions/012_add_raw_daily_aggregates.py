@@ -0,0 +1,55 @@
+"""Add daily aggregate tables for compacted raw listing/sales rows
+
+Revision ID: 012
+Revises: 011
+Create Date: 2026-10-19
+
+scripts/compact_raw_tables.py rolls tcg_listings_raw / ebay_sales_raw rows older
+than the retention horizon into these per-box, per-day aggregates and moves the
+row-level detail to Parquet (app/services/raw_archive.py).
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = '012'
+down_revision = '011'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'tcg_listings_daily_agg',
+        sa.Column('booster_box_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('snapshot_date', sa.Date(), nullable=False),
+        sa.Column('listings_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('total_quantity', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('min_price_usd', sa.Numeric(10, 2), nullable=True),
+        sa.Column('median_price_usd', sa.Numeric(10, 2), nullable=True),
+        sa.Column('max_price_usd', sa.Numeric(10, 2), nullable=True),
+        sa.Column('archive_path', sa.Text(), nullable=True),
+        sa.Column('compacted_at', sa.TIMESTAMP(), nullable=False, server_default=sa.text('NOW()')),
+        sa.ForeignKeyConstraint(['booster_box_id'], ['booster_boxes.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('booster_box_id', 'snapshot_date', name='pk_tcg_listings_daily_agg'),
+    )
+    op.create_table(
+        'ebay_sales_daily_agg',
+        sa.Column('booster_box_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('sale_date', sa.Date(), nullable=False),
+        sa.Column('sales_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('units_sold', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('volume_usd', sa.Numeric(12, 2), nullable=False, server_default='0'),
+        sa.Column('min_price_usd', sa.Numeric(10, 2), nullable=True),
+        sa.Column('median_price_usd', sa.Numeric(10, 2), nullable=True),
+        sa.Column('max_price_usd', sa.Numeric(10, 2), nullable=True),
+        sa.Column('archive_path', sa.Text(), nullable=True),
+        sa.Column('compacted_at', sa.TIMESTAMP(), nullable=False, server_default=sa.text('NOW()')),
+        sa.ForeignKeyConstraint(['booster_box_id'], ['booster_boxes.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('booster_box_id', 'sale_date', name='pk_ebay_sales_daily_agg'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('ebay_sales_daily_agg')
+    op.drop_table('tcg_listings_daily_agg')
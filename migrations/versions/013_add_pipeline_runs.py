@@ -0,0 +1,56 @@
+"""Add pipeline_runs / pipeline_tasks checkpoint tables
+
+Revision ID: 013
+Revises: 012
+Create Date: 2026-10-19
+
+scripts/daily_refresh.py records one pipeline_runs row per run and one
+pipeline_tasks row per (phase, box) unit, so `--resume <run_id>` re-executes only
+units that failed or never finished (app/services/pipeline_checkpoint.py).
+Whole-phase units use unit_key '*'.
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = '013'
+down_revision = '012'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'pipeline_runs',
+        sa.Column('run_id', sa.String(36), nullable=False),
+        sa.Column('pipeline', sa.String(50), nullable=False),
+        sa.Column('run_date', sa.Date(), nullable=False),
+        sa.Column('status', sa.String(20), nullable=False, server_default='running'),
+        sa.Column('attempts', sa.Integer(), nullable=False, server_default='1'),
+        sa.Column('started_at', sa.TIMESTAMP(), nullable=False, server_default=sa.text('NOW()')),
+        sa.Column('finished_at', sa.TIMESTAMP(), nullable=True),
+        sa.Column('summary', postgresql.JSONB(), nullable=True),
+        sa.PrimaryKeyConstraint('run_id', name='pk_pipeline_runs'),
+    )
+    op.create_index('ix_pipeline_runs_pipeline_date', 'pipeline_runs', ['pipeline', 'run_date'])
+
+    op.create_table(
+        'pipeline_tasks',
+        sa.Column('run_id', sa.String(36), nullable=False),
+        sa.Column('phase', sa.String(50), nullable=False),
+        sa.Column('unit_key', sa.String(64), nullable=False),
+        sa.Column('status', sa.String(20), nullable=False),
+        sa.Column('output_hash', sa.String(64), nullable=True),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('attempts', sa.Integer(), nullable=False, server_default='1'),
+        sa.Column('started_at', sa.TIMESTAMP(), nullable=True),
+        sa.Column('finished_at', sa.TIMESTAMP(), nullable=False, server_default=sa.text('NOW()')),
+        sa.ForeignKeyConstraint(['run_id'], ['pipeline_runs.run_id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('run_id', 'phase', 'unit_key', name='pk_pipeline_tasks'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('pipeline_tasks')
+    op.drop_index('ix_pipeline_runs_pipeline_date', table_name='pipeline_runs')
+    op.drop_table('pipeline_runs')
@@ -0,0 +1,34 @@
+"""Add api_budget_ledger for paid data-provider call budgets
+
+Revision ID: 014
+Revises: 013
+Create Date: 2026-10-19
+
+One row per (provider, month). app/services/api_budget.py reserves calls with a
+conditional UPDATE (calls_used < cap), so concurrent workers and separate cron
+runs share one monthly cap and a call over budget is refused before it is made.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '014'
+down_revision = '013'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'api_budget_ledger',
+        sa.Column('provider', sa.String(30), nullable=False),
+        sa.Column('month', sa.Date(), nullable=False),
+        sa.Column('calls_used', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('calls_refused', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('monthly_cap', sa.Integer(), nullable=False),
+        sa.Column('updated_at', sa.TIMESTAMP(), nullable=False, server_default=sa.text('NOW()')),
+        sa.PrimaryKeyConstraint('provider', 'month', name='pk_api_budget_ledger'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('api_budget_ledger')
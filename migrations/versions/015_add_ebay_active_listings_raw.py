@@ -0,0 +1,44 @@
+"""Add ebay_active_listings_raw for listing-identity diffing
+
+Revision ID: 015
+Revises: 014
+Create Date: 2026-10-19
+
+Daily snapshot of the filtered eBay active listings (all prices), one row
+per (box, listing, day) — the eBay counterpart of tcg_listings_raw. Column names
+match tcg_listings_raw so app/services/listing_snapshots.py diffs both sources
+with the same query.
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = '015'
+down_revision = '014'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'ebay_active_listings_raw',
+        sa.Column('id', postgresql.UUID(as_uuid=True), primary_key=True, server_default=sa.text('gen_random_uuid()'), nullable=False),
+        sa.Column('booster_box_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('snapshot_date', sa.Date(), nullable=False),
+        sa.Column('listing_id', sa.String(255), nullable=False),
+        sa.Column('seller_id', sa.String(255), nullable=True),
+        sa.Column('listed_price_usd', sa.Numeric(10, 2), nullable=False),
+        sa.Column('quantity', sa.Integer(), nullable=False),
+        sa.Column('snapshot_timestamp', sa.TIMESTAMP(), nullable=False),
+        sa.Column('raw_data', postgresql.JSONB(), nullable=True),
+        sa.Column('created_at', sa.TIMESTAMP(), nullable=False, server_default=sa.text('NOW()')),
+        sa.ForeignKeyConstraint(['booster_box_id'], ['booster_boxes.id'], ondelete='CASCADE'),
+        sa.UniqueConstraint('booster_box_id', 'listing_id', 'snapshot_date', name='uq_ebay_active_listing_date'),
+        sa.CheckConstraint('quantity > 0', name='check_ebay_active_quantity_positive'),
+    )
+    op.create_index('idx_ebay_active_box_date', 'ebay_active_listings_raw', ['booster_box_id', 'snapshot_date'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('idx_ebay_active_box_date', table_name='ebay_active_listings_raw')
+    op.drop_table('ebay_active_listings_raw')
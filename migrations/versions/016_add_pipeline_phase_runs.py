@@ -0,0 +1,49 @@
+"""Add pipeline_phase_runs telemetry table
+
+Revision ID: 016
+Revises: 015
+Create Date: 2026-10-19
+
+One row per (run, phase, attempt) of scripts/daily_refresh.py: duration, units
+succeeded / failed, re-executed units, provider calls and cost units, rows
+written and peak memory, with per-box detail in `details`. /health/cron and
+/admin/pipeline-runs read it (app/services/pipeline_telemetry.py), so the web
+service no longer depends on the cron instance's local status file.
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = '016'
+down_revision = '015'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'pipeline_phase_runs',
+        sa.Column('run_id', sa.String(36), nullable=False),
+        sa.Column('phase', sa.String(50), nullable=False),
+        sa.Column('attempt', sa.Integer(), nullable=False, server_default='1'),
+        sa.Column('status', sa.String(20), nullable=False),
+        sa.Column('started_at', sa.TIMESTAMP(), nullable=True),
+        sa.Column('finished_at', sa.TIMESTAMP(), nullable=True),
+        sa.Column('duration_seconds', sa.Float(), nullable=True),
+        sa.Column('units_ok', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('units_failed', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('retries', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('api_calls', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('cost_units', sa.Float(), nullable=False, server_default='0'),
+        sa.Column('rows_written', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('peak_mb', sa.Float(), nullable=True),
+        sa.Column('details', postgresql.JSONB(), nullable=True),
+        sa.ForeignKeyConstraint(['run_id'], ['pipeline_runs.run_id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('run_id', 'phase', 'attempt', name='pk_pipeline_phase_runs'),
+    )
+    op.create_index('ix_pipeline_phase_runs_phase_started', 'pipeline_phase_runs', ['phase', 'started_at'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_pipeline_phase_runs_phase_started', table_name='pipeline_phase_runs')
+    op.drop_table('pipeline_phase_runs')
@@ -0,0 +1,39 @@
+"""Add daily aggregate table for compacted eBay active-listing snapshots
+
+Revision ID: 017
+Revises: 016
+Create Date: 2026-10-19
+
+scripts/compact_raw_tables.py now also rolls ebay_active_listings_raw (migration
+015) rows older than the retention horizon into this per-box, per-day aggregate
+and moves the row-level detail to Parquet, like tcg_listings_raw.
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = '017'
+down_revision = '016'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'ebay_active_listings_daily_agg',
+        sa.Column('booster_box_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('snapshot_date', sa.Date(), nullable=False),
+        sa.Column('listings_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('total_quantity', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('min_price_usd', sa.Numeric(10, 2), nullable=True),
+        sa.Column('median_price_usd', sa.Numeric(10, 2), nullable=True),
+        sa.Column('max_price_usd', sa.Numeric(10, 2), nullable=True),
+        sa.Column('archive_path', sa.Text(), nullable=True),
+        sa.Column('compacted_at', sa.TIMESTAMP(), nullable=False, server_default=sa.text('NOW()')),
+        sa.ForeignKeyConstraint(['booster_box_id'], ['booster_boxes.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('booster_box_id', 'snapshot_date', name='pk_ebay_active_listings_daily_agg'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('ebay_active_listings_daily_agg')
@@ -2,11 +2,15 @@
 """
 Backfill Market Index
 ---------------------
-Iterates over all unique metric_date values in box_metrics_unified
-and computes the market index for each date.
+Computes the market index for all unique metric_date values in
+box_metrics_unified (optionally only --start/--end).
+
+By default uses range mode (scripts/market_index_range.py): one read of the
+box/date matrix, array computation for every date, one bulk upsert.
+--per-date runs compute_market_index() for each date instead.
 
 Run once after creating the market_index_daily table:
-    python scripts/backfill_market_index.py
+    python scripts/backfill_market_index.py [--start 2026-01-01] [--end 2026-02-10] [--workers 4] [--per-date]
 """
 from __future__ import annotations
 
@@ -26,8 +30,8 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
-def get_all_dates() -> list[str]:
-    """Get all unique metric_date values from box_metrics_unified, oldest first."""
+def get_all_dates(start: str | None = None, end: str | None = None) -> list[str]:
+    """Get unique metric_date values from box_metrics_unified (within start/end), oldest first."""
     from sqlalchemy import text
     from app.services.db_historical_reader import _get_sync_engine
 
@@ -36,19 +40,26 @@ def get_all_dates() -> list[str]:
         rows = conn.execute(text("""
             SELECT DISTINCT metric_date
             FROM box_metrics_unified
+            WHERE (CAST(:start AS date) IS NULL OR metric_date >= CAST(:start AS date))
+              AND (CAST(:end AS date) IS NULL OR metric_date <= CAST(:end AS date))
             ORDER BY metric_date ASC
-        """)).fetchall()
+        """), {"start": start, "end": end}).fetchall()
     return [str(r[0]) for r in rows]
 
 
-def main():
-    dates = get_all_dates()
-    logger.info(f"Found {len(dates)} unique dates to backfill")
+def backfill_range(dates: list[str], workers: int = 1) -> None:
+    from scripts.market_index_range import compute_market_index_range
+
+    summary = compute_market_index_range(dates, workers=workers)
+    if summary["db_upserted"] < 0:
+        logger.warning(f"Bulk upsert failed for {summary['computed']} dates")
+    logger.info(
+        f"Backfill complete: {max(summary['db_upserted'], 0)} upserted, "
+        f"{summary['no_data']} without data, {len(dates)} total in {summary['elapsed_s']}s"
+    )
 
-    if not dates:
-        logger.warning("No dates found in box_metrics_unified")
-        return
 
+def backfill_per_date(dates: list[str]) -> None:
     from scripts.market_index import compute_market_index
 
     success = 0
@@ -69,5 +80,28 @@ def main():
     logger.info(f"Backfill complete: {success} succeeded, {failed} failed, {len(dates)} total")
 
 
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Backfill market_index_daily")
+    parser.add_argument("--start", type=str, default=None, help="First date (YYYY-MM-DD)")
+    parser.add_argument("--end", type=str, default=None, help="Last date (YYYY-MM-DD)")
+    parser.add_argument("--workers", type=int, default=1, help="Process pool size for long ranges (range mode)")
+    parser.add_argument("--per-date", action="store_true", help="Compute each date with compute_market_index()")
+    args = parser.parse_args()
+
+    dates = get_all_dates(args.start, args.end)
+    logger.info(f"Found {len(dates)} unique dates to backfill")
+
+    if not dates:
+        logger.warning("No dates found in box_metrics_unified")
+        return
+
+    if args.per_date:
+        backfill_per_date(dates)
+    else:
+        backfill_range(dates, workers=args.workers)
+
+
 if __name__ == "__main__":
     main()
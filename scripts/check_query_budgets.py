@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Check Query Budgets
+-------------------
+Calls every budgeted endpoint (app/services/query_budget.py ENDPOINT_BUDGETS)
+in-process through FastAPI's TestClient, counts the SQL statements each request
+issues, and exits non-zero when a route goes over its budget or repeats the
+same statement (N+1).
+
+Point DATABASE_URL at a seeded local Postgres, not production. Auth
+dependencies are overridden so the paywalled routes can be called, and the
+leaderboard / rank / history caches are emptied before each request so the
+counts are the cold (worst) case. Every endpoint is called once beforehand to
+open connections, so connection setup statements are not counted.
+
+Run standalone:  python scripts/check_query_budgets.py [--box-id <uuid>] [--set-code OP-01 --set-code-2 OP-02] [--verbose]
+"""
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+
+def _pick_boxes() -> Tuple[Optional[str], List[str]]:
+    """A box id with metrics and up to two set codes from the DB."""
+    import re
+    from sqlalchemy import text
+    from app.services.db_historical_reader import _get_sync_engine
+
+    engine = _get_sync_engine()
+    with engine.connect() as conn:
+        rows = conn.execute(text("""
+            SELECT bb.id, bb.product_name
+            FROM booster_boxes bb
+            WHERE EXISTS (SELECT 1 FROM box_metrics_unified m WHERE m.booster_box_id = bb.id)
+            ORDER BY bb.product_name
+        """)).fetchall()
+    box_id = str(rows[0][0]) if rows else None
+    codes = []
+    for _, name in rows:
+        match = re.search(r"(OP|EB|PRB)-\d+", name or "", re.IGNORECASE)
+        if match and match.group(0).upper() not in codes:
+            codes.append(match.group(0).upper())
+    return box_id, codes[:2]
+
+
+def _requests(box_id: str, code1: str, code2: str) -> List[Tuple[str, str, Dict]]:
+    """(budget key, path, query params) for every budgeted endpoint."""
+    return [
+        ("GET /booster-boxes", "/booster-boxes", {"limit": 100}),
+        ("GET /booster-boxes/{box_id}", f"/booster-boxes/{box_id}", {}),
+        ("GET /booster-boxes/{box_id}/time-series", f"/booster-boxes/{box_id}/time-series", {"days": 90}),
+        ("GET /booster-boxes/market-macro", "/booster-boxes/market-macro", {}),
+        ("GET /booster-boxes/market-index/time-series", "/booster-boxes/market-index/time-series", {"days": 90}),
+        ("GET /extension/box/{set_code}", f"/extension/box/{code1}", {}),
+        ("GET /extension/compare", "/extension/compare", {"box1": code1, "box2": code2}),
+        ("GET /extension/search", "/extension/search", {"q": code1[:2], "limit": 20}),
+        ("GET /extension/top-movers", "/extension/top-movers", {}),
+    ]
+
+
+def _reset_caches() -> None:
+    import main
+    from app.services.history_cache import history_cache
+
+    main._leaderboard_cache.clear()
+    history_cache.clear()
+    history_cache.mark_version_stale()
+
+
+def check_query_budgets(
+    box_id: Optional[str] = None,
+    set_codes: Optional[List[str]] = None,
+    verbose: bool = False,
+) -> List[Dict]:
+    """Run every budgeted endpoint once (cold caches). Returns one result dict per endpoint."""
+    from fastapi.testclient import TestClient
+
+    import main
+    from app.routers.extension import optional_extension_user
+    from app.services.query_budget import ENDPOINT_BUDGETS, QueryBudgetExceeded, QueryCounter
+
+    if not box_id or not set_codes:
+        picked_id, picked_codes = _pick_boxes()
+        box_id = box_id or picked_id
+        set_codes = set_codes or picked_codes
+    if not box_id or not set_codes:
+        raise SystemExit("No boxes with metrics in the database; seed it first")
+    code1, code2 = set_codes[0], set_codes[-1]
+
+    app = main.app
+    app.dependency_overrides[optional_extension_user] = lambda: None
+    if main.require_active_subscription is not None:
+        app.dependency_overrides[main.require_active_subscription] = lambda: None
+    else:
+        app.dependency_overrides[main.get_optional_user] = lambda: None
+
+    results = []
+    with TestClient(app) as client:
+        planned = _requests(box_id, code1, code2)
+        for _, path, params in planned:
+            client.get(path, params=params)
+
+        for key, path, params in planned:
+            _reset_caches()
+            budget = ENDPOINT_BUDGETS[key]
+            with QueryCounter() as counter:
+                response = client.get(path, params=params)
+            error = None
+            try:
+                counter.check(budget, name=key)
+            except QueryBudgetExceeded as e:
+                error = str(e)
+            results.append({
+                "endpoint": key,
+                "status": response.status_code,
+                "queries": counter.count,
+                "budget": budget,
+                "ok": error is None and response.status_code < 500,
+                "error": error,
+                "report": counter.report() if verbose else None,
+            })
+    app.dependency_overrides.clear()
+    return results
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Check SQL query budgets per endpoint")
+    parser.add_argument("--box-id", type=str, default=None, help="Box UUID for the detail / time-series routes")
+    parser.add_argument("--set-code", type=str, default=None, help="Set code for the extension routes (e.g. OP-01)")
+    parser.add_argument("--set-code-2", type=str, default=None, help="Second set code for /extension/compare")
+    parser.add_argument("--verbose", action="store_true", help="Print every statement")
+    args = parser.parse_args()
+
+    codes = [c for c in (args.set_code, args.set_code_2) if c] or None
+    results = check_query_budgets(args.box_id, codes, verbose=args.verbose)
+
+    failed = 0
+    for r in results:
+        mark = "OK  " if r["ok"] else "FAIL"
+        print(f"{mark} {r['endpoint']:<45} {r['queries']:>3} / {r['budget']:<3} (HTTP {r['status']})")
+        if r["error"]:
+            print(r["error"])
+        elif r["report"]:
+            print(r["report"])
+        failed += not r["ok"]
+    print(f"\n{len(results) - failed}/{len(results)} endpoints within budget")
+    sys.exit(1 if failed else 0)
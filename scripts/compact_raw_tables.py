@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Compact Raw Tables
+------------------
+Retention job for tcg_listings_raw, ebay_sales_raw and ebay_active_listings_raw.
+Rows older than the retention horizon (settings.raw_retention_days, default 90) are:
+
+  1. written to Parquet under settings.raw_archive_dir, one part per (box, month)
+  2. summarised into tcg_listings_daily_agg / ebay_sales_daily_agg /
+     ebay_active_listings_daily_agg
+  3. deleted from the hot table
+
+Steps 2 and 3 share one transaction per partition; the Parquet part is removed
+again if that transaction fails, so a partition is never archived twice.
+Days that already have an aggregate row (e.g. rows rehydrated for a backfill)
+are deleted without being re-archived.
+
+RAW_ARCHIVE_DIR must point at durable storage (not an ephemeral CI runner disk).
+
+Run standalone:
+    python scripts/compact_raw_tables.py --dry-run
+    python scripts/compact_raw_tables.py --horizon-days 90 --vacuum
+"""
+from __future__ import annotations
+
+import json
+import logging
+import sys
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(levelname)s - %(message)s",
+    handlers=[logging.StreamHandler()],
+)
+logger = logging.getLogger(__name__)
+
+
+def _next_month(d: date) -> date:
+    return date(d.year + 1, 1, 1) if d.month == 12 else date(d.year, d.month + 1, 1)
+
+
+def _get_partitions(conn, table: str, date_col: str, cutoff: date) -> List[Dict[str, Any]]:
+    """(box, month) partitions that still hold rows older than the cutoff."""
+    from sqlalchemy import text
+    rows = conn.execute(text(f"""
+        SELECT booster_box_id, CAST(date_trunc('month', {date_col}) AS date) AS month_start, COUNT(*) AS n
+        FROM {table}
+        WHERE {date_col} < :cutoff
+        GROUP BY booster_box_id, month_start
+        ORDER BY booster_box_id, month_start
+    """), {"cutoff": cutoff}).fetchall()
+    out = []
+    for r in rows:
+        d = r._mapping if hasattr(r, "_mapping") else dict(r)
+        out.append({"box_id": str(d["booster_box_id"]), "month_start": d["month_start"], "rows": int(d["n"])})
+    return out
+
+
+def compact_table(table: str, cutoff: date, dry_run: bool = False) -> Dict[str, Any]:
+    """Archive + aggregate + delete every partition of `table` older than `cutoff`."""
+    from sqlalchemy import text
+    from app.services.db_historical_reader import _get_sync_engine
+    from app.services.raw_archive import RAW_TABLES, write_partition
+
+    spec = RAW_TABLES[table]
+    date_col = spec["date_col"]
+    agg_table = spec["agg_table"]
+    columns = [name for name, _ in spec["columns"]]
+    # Rows in the partition range whose day has not been compacted before
+    range_where = f"t.booster_box_id = CAST(:bid AS uuid) AND t.{date_col} >= :start AND t.{date_col} < :end"
+    new_where = range_where + (
+        f" AND NOT EXISTS (SELECT 1 FROM {agg_table} a"
+        f" WHERE a.booster_box_id = t.booster_box_id AND a.{date_col} = t.{date_col})"
+    )
+    select_sql = text(f"SELECT {', '.join('t.' + c for c in columns)} FROM {table} t WHERE {new_where}")
+    agg_sql = text(spec["agg_sql"].format(where=new_where))
+    delete_sql = text(f"DELETE FROM {table} t WHERE {range_where}")
+
+    result = {"table": table, "partitions": 0, "rows_archived": 0, "rows_deleted": 0, "files": [], "errors": []}
+    engine = _get_sync_engine()
+    with engine.connect() as conn:
+        partitions = _get_partitions(conn, table, date_col, cutoff)
+    logger.info(f"{table}: {len(partitions)} partitions older than {cutoff}")
+
+    for p in partitions:
+        month_start = p["month_start"]
+        params = {"bid": p["box_id"], "start": month_start, "end": min(_next_month(month_start), cutoff)}
+        month = month_start.strftime("%Y-%m")
+        result["partitions"] += 1
+        if dry_run:
+            result["rows_deleted"] += p["rows"]
+            continue
+        written: Optional[Path] = None
+        try:
+            with engine.connect() as conn:
+                with conn.begin():
+                    rows = [dict(r._mapping) for r in conn.execute(select_sql, params).fetchall()]
+                    if rows:
+                        written = write_partition(table, p["box_id"], month, rows)
+                        conn.execute(agg_sql, {**params, "path": str(written.parent)})
+                    deleted = conn.execute(delete_sql, params).rowcount
+            result["rows_archived"] += len(rows)
+            result["rows_deleted"] += deleted
+            if written:
+                result["files"].append(str(written))
+            logger.info(f"  {p['box_id'][:8]} {month}: archived {len(rows)}, deleted {deleted}")
+        except Exception as e:
+            if written is not None and written.exists():
+                written.unlink()
+            result["errors"].append(f"{p['box_id']} {month}: {e}")
+            logger.error(f"  {p['box_id'][:8]} {month}: compaction failed, partition left in place: {e}")
+    return result
+
+
+def vacuum_tables(tables: List[str], reindex: bool = False) -> None:
+    """VACUUM (ANALYZE) — and optionally REINDEX CONCURRENTLY — so deleted rows are reclaimed."""
+    from sqlalchemy import text
+    from app.services.db_historical_reader import _get_sync_engine
+
+    engine = _get_sync_engine()
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        for table in tables:
+            logger.info(f"VACUUM (ANALYZE) {table}")
+            conn.execute(text(f"VACUUM (ANALYZE) {table}"))
+            if reindex:
+                logger.info(f"REINDEX TABLE CONCURRENTLY {table}")
+                conn.execute(text(f"REINDEX TABLE CONCURRENTLY {table}"))
+
+
+def compact_raw_tables(
+    horizon_days: Optional[int] = None,
+    tables: Optional[List[str]] = None,
+    dry_run: bool = False,
+    vacuum: bool = False,
+    reindex: bool = False,
+) -> Dict[str, Any]:
+    from app.config import settings
+    from app.services.raw_archive import PARQUET_AVAILABLE, RAW_TABLES
+
+    if not PARQUET_AVAILABLE and not dry_run:
+        raise RuntimeError("pyarrow is required for compaction (pip install pyarrow)")
+    horizon = horizon_days if horizon_days is not None else settings.raw_retention_days
+    cutoff = date.today() - timedelta(days=horizon)
+    tables = tables or list(RAW_TABLES)
+
+    results = [compact_table(t, cutoff, dry_run=dry_run) for t in tables]
+    if vacuum and not dry_run:
+        vacuum_tables(tables, reindex=reindex)
+    return {
+        "cutoff": cutoff.isoformat(),
+        "dry_run": dry_run,
+        "tables": results,
+        "errors": sum(len(r["errors"]) for r in results),
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Archive and compact old raw listing/sales rows")
+    parser.add_argument("--horizon-days", type=int, default=None, help="Keep this many days hot (default RAW_RETENTION_DAYS)")
+    parser.add_argument("--table", action="append", choices=["tcg_listings_raw", "ebay_sales_raw", "ebay_active_listings_raw"], help="Limit to one table (repeatable)")
+    parser.add_argument("--dry-run", action="store_true", help="Only report what would be compacted")
+    parser.add_argument("--vacuum", action="store_true", help="VACUUM (ANALYZE) compacted tables afterwards")
+    parser.add_argument("--reindex", action="store_true", help="With --vacuum, also REINDEX TABLE CONCURRENTLY")
+    args = parser.parse_args()
+
+    result = compact_raw_tables(
+        horizon_days=args.horizon_days,
+        tables=args.table,
+        dry_run=args.dry_run,
+        vacuum=args.vacuum,
+        reindex=args.reindex,
+    )
+    for r in result["tables"]:
+        r["files"] = len(r["files"])
+    print(json.dumps(result, indent=2))
+    sys.exit(1 if result["errors"] else 0)
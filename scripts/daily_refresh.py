@@ -7,10 +7,35 @@ Runs in multiple phases:
 1b. eBay SerpApi - Fetches eBay sold + active listings via SerpApi ($25/mo)
 2. Listings Scraper - Scrapes active listings count from TCGplayer
 3. Rolling Metrics - Computes derived metrics and upserts to DB
+3b. Market Index - Aggregate market stats
+
+Phases run as a dependency graph (scripts/pipeline_runner.py): 1 and 2 overlap,
+1b starts once 1 is done, 3 waits for 1/1b/2. The per-phase timeline is logged and
+saved under "pipeline" in logs/daily_refresh_status.json.
+
+Every run gets a run_id; each box of phases 1/1b/2 and phases 3/3b as a whole are
+checkpointed in pipeline_tasks (app/services/pipeline_checkpoint.py). A run that
+crashed or left failed boxes can be finished the same day with
+    python scripts/daily_refresh.py --resume <run_id>
+which re-executes only the failed/missing units (no repeat Apify/SerpApi spend).
+Phase 3 re-runs if any upstream unit was re-executed; 3b if phase 3 was.
+
+Each phase's duration, units, retries, provider calls / cost units, rows written
+and peak memory go to pipeline_phase_runs (app/services/pipeline_telemetry.py),
+which /health/cron and /admin/pipeline-runs read. A phase's row is written when
+its node finishes (so a crashed run still leaves the finished phases) and
+upserted again with the final figures at the end of the run.
 
 Schedule: cron at 05:05 UTC (12:05 AM EST / 1:05 AM EDT). Script adds a random 0–15 min
 delay so the actual run varies slightly (captures full day's sales).
 
+Memory: every phase (and every box of phase 2) records its peak RSS, browser
+included, under "memory" in the status file. --memory-profile (or
+CRON_MEMORY_PROFILE=1) adds tracemalloc top allocators. Over the soft budget
+(CRON_MEMORY_BUDGET_MB, 400 with CRON_LOW_MEMORY) the run frees memory between
+phases and the scraper recycles its browser context between boxes
+(app/services/memory_profile.py).
+
 Run manually (immediate): python scripts/daily_refresh.py --no-delay
 Run via GitHub Actions: "5 5 * * *" (05:05 UTC daily)
 """
@@ -30,6 +55,8 @@ from datetime import datetime, timedelta
 import json
 import logging
 
+from scripts.pipeline_runner import PipelineNode, PipelineRunner
+
 # Setup logging
 log_dir = project_root / "logs"
 log_dir.mkdir(exist_ok=True)
@@ -46,7 +73,7 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
-async def run_listings_scraper(debug_box_id: str = None):
+async def run_listings_scraper(debug_box_id: str = None, box_ids=None, on_box_done=None):
     """Run the listings scraper to get active listings count"""
     logger.info("=" * 50)
     logger.info("Starting Phase 2: Listings Scraper...")
@@ -55,7 +82,7 @@ async def run_listings_scraper(debug_box_id: str = None):
     try:
         from scripts.listings_scraper import run_scraper
 
-        results, errors = await run_scraper(debug_box_id=debug_box_id)
+        results, errors = await run_scraper(debug_box_id=debug_box_id, box_ids=box_ids, on_box_done=on_box_done)
         
         logger.info(f"✅ Scraper Success: {len(results)} boxes")
         logger.info(f"❌ Scraper Errors: {len(errors)} boxes")
@@ -80,65 +107,125 @@ def save_completion_status(status_data: dict):
     logger.info(f"📊 Status saved to: {status_file}")
 
 
-def main():
-    start_time = datetime.now()
-    logger.info("=" * 70)
-    logger.info("Starting daily TCGplayer refresh (Apify + Scraper)")
-    logger.info(f"⏰ Start time: {start_time.strftime('%Y-%m-%d %H:%M:%S')}")
-    logger.info("=" * 70)
+# Per-phase timeouts (seconds). The GitHub Actions job itself is capped at 120 min.
+PHASE_TIMEOUTS = {
+    "apify": 40 * 60,
+    "ebay": 25 * 60,
+    "scraper": 75 * 60,
+    "rolling_metrics": 20 * 60,
+    "market_index": 10 * 60,
+}
+# Fatal pipeline nodes -> label used in failure alerts
+FATAL_PHASE_LABELS = {"apify": "Apify", "scraper": "Scraper", "rolling_metrics": "Rolling Metrics"}
 
-    # Parse --debug <box_id> if present
-    debug_box_id = None
-    if "--debug" in sys.argv:
-        idx = sys.argv.index("--debug")
-        if idx + 1 < len(sys.argv):
-            debug_box_id = sys.argv[idx + 1]
-            logger.info(f"Debug mode: will only scrape box {debug_box_id}")
 
-    # Random delay (0–45 min) when run by cron so actual work happens at a random time
-    # Combined with ebay_playwright's 0-15 min internal jitter = 0-60 min total variance
-    # This makes it nearly impossible to predict when scraping actually happens
-    skip_delay = "--no-delay" in sys.argv
-    if not skip_delay:
-        delay_min, delay_max = 0, 15  # minutes (jitter keeps hit time variable; kept short to save GHA minutes)
-        delay_sec = random.randint(delay_min * 60, delay_max * 60)
-        eta = datetime.now() + timedelta(seconds=delay_sec)
-        logger.info(f"🎲 Random delay: sleeping {delay_sec // 60} min (work will start ~{eta.strftime('%H:%M')} local)")
-        time.sleep(delay_sec)
-        logger.info("✅ Delay complete, starting Apify + Scraper now.")
-        start_time = datetime.now()  # treat real work start as start_time for duration
+def _alert_phase_failure(error: str, phase_label: str):
+    try:
+        from app.services.alert_service import alert_cron_failure
+        alert_cron_failure("daily-refresh", error, phase_label)
+    except Exception as alert_err:
+        logger.warning(f"Failed to send alert: {alert_err}")
 
-    status = {
-        "status": "running",
-        "start_time": start_time.isoformat(),
-        "end_time": None,
-        "duration_seconds": None,
-        "apify": {
-            "success_count": 0,
-            "error_count": 0,
-            "completed": False,
-            "error": None
-        },
-        "scraper": {
-            "success_count": 0,
-            "error_count": 0,
-            "completed": False,
-            "error": None
-        },
-        "overall_success": False
-    }
-    
-    # Phase 1: Apify API
+
+def _in_phase(name: str, fn):
+    """Pipeline node fn under memory_profiler.phase(name); frees memory afterwards if over budget."""
+    from app.services.memory_profile import memory_profiler
+
+    def run(inputs):
+        with memory_profiler.phase(name):
+            result = fn(inputs)
+        if memory_profiler.over_budget():
+            memory_profiler.mitigate(f"after {name}")
+        return result
+    return run
+
+
+# Provider whose calls (app/services/pipeline_telemetry.count_call) each phase makes
+PHASE_PROVIDERS = {"apify": "apify", "ebay": "serpapi", "scraper": "tcgplayer"}
+# Status key holding the DB rows each phase wrote
+PHASE_ROWS_KEY = {"apify": "success_count", "ebay": "success_count", "scraper": "success_count",
+                  "rolling_metrics": "db_updated"}
+
+
+def _overall_success(status: dict) -> bool:
+    return bool(
+        status["apify"]["completed"] and
+        status["scraper"]["completed"] and
+        status["apify"]["error_count"] == 0
+    )
+
+
+def _phase_telemetry(pipeline_summary: dict, status: dict, tasks: dict) -> list:
+    """pipeline_phase_runs rows for this run: timeline + checkpoint units + provider calls + memory."""
+    from app.services.pipeline_telemetry import provider_calls
+
+    t0 = datetime.fromisoformat(pipeline_summary["started_at"])
+    calls = provider_calls()
+    memory = status.get("memory") or {}
+    rows = []
+    for node in pipeline_summary["timeline"]:
+        name = node["node"]
+        phase_status = status.get(name) or {}
+        units = tasks.get(name, {})
+        provider = calls.get(PHASE_PROVIDERS.get(name), {})
+        boxes = {unit: dict(u) for unit, u in units.get("units", {}).items()}
+        for box_id, m in memory.get("boxes", {}).get(name, {}).items():
+            boxes.setdefault(box_id, {})["peak_mb"] = m.get("peak_mb")
+        if name == "market_index":
+            rows_written = int(phase_status.get("index_value") is not None and not phase_status.get("resumed"))
+        else:
+            rows_written = int(phase_status.get(PHASE_ROWS_KEY.get(name), 0) or 0)
+        rows.append({
+            "phase": name,
+            "status": node["status"],
+            "started_at": t0 + timedelta(seconds=node["start_offset_s"]) if node["start_offset_s"] is not None else None,
+            "finished_at": t0 + timedelta(seconds=node["end_offset_s"]) if node["end_offset_s"] is not None else None,
+            "duration_seconds": node["duration_s"],
+            "units_ok": units.get("units_ok", 0),
+            "units_failed": units.get("units_failed", 0),
+            "retries": units.get("retries", 0),
+            "api_calls": int(provider.get("calls", 0)),
+            "cost_units": round(provider.get("cost_units", 0.0), 4),
+            "rows_written": rows_written,
+            "peak_mb": (memory.get("phases", {}).get(name) or {}).get("peak_mb"),
+            "details": {
+                "error": node["error"] or phase_status.get("error"),
+                "counters": {k: v for k, v in phase_status.items()
+                             if k not in ("completed", "error") and isinstance(v, (int, float, bool, str))},
+                "boxes": boxes,
+            },
+        })
+    return rows
+
+
+def _all_units_done(checkpoint, phase: str, box_ids) -> bool:
+    """On a resume, True (and logged) when every unit of the phase already succeeded."""
+    if checkpoint is None or not checkpoint.resumed or box_ids:
+        return False
+    logger.info(f"⏭️  {phase}: all units already succeeded in run {checkpoint.run_id[:8]}, nothing to re-run")
+    return True
+
+
+def phase_apify(status: dict, checkpoint=None) -> dict:
+    """Phase 1: Apify API - sales data for every box (FATAL)."""
     logger.info("")
     logger.info("=" * 50)
     logger.info("Phase 1: Apify API - Fetching Sales Data")
     logger.info("=" * 50)
-    
-    apify_result = None
     try:
-        from app.services.tcgplayer_apify import refresh_all_boxes_sales_data
-        
-        apify_result = refresh_all_boxes_sales_data()
+        from app.services.tcgplayer_apify import TCGPLAYER_URLS, refresh_all_boxes_sales_data
+
+        box_ids, on_box_done = None, None
+        if checkpoint is not None:
+            box_ids = checkpoint.pending("apify", [bid for bid, cfg in TCGPLAYER_URLS.items() if cfg.get("url")])
+            on_box_done = checkpoint.unit_callback("apify")
+        if _all_units_done(checkpoint, "apify", box_ids):
+            status["apify"]["completed"] = True
+            status["apify"]["resumed"] = True
+            return {"success_count": 0, "error_count": 0, "date": datetime.now().strftime("%Y-%m-%d"),
+                    "top_5_by_volume": [], "alerts": [], "resumed": True}
+
+        apify_result = refresh_all_boxes_sales_data(box_ids=box_ids, on_box_done=on_box_done)
         
         status["apify"]["success_count"] = apify_result['success_count']
         status["apify"]["error_count"] = apify_result['error_count']
@@ -163,149 +250,332 @@ def main():
         
         logger.info("")
         logger.info("✅ Phase 1 (Apify) complete!")
+        return apify_result
         
     except Exception as e:
         status["apify"]["error"] = str(e)
         logger.error(f"Apify phase failed: {str(e)}")
-        import traceback
-        logger.error(traceback.format_exc())
-        
-        # Send alert
-        try:
-            from app.services.alert_service import alert_cron_failure
-            alert_cron_failure("daily-refresh", str(e), "Apify")
-        except Exception as alert_err:
-            logger.warning(f"Failed to send alert: {alert_err}")
-        
-        save_completion_status(status)
-        return 1
-    
-    # Phase 1b: eBay sold + active listings via SerpApi (non-fatal)
-    # Single phase replaces old Apify (sold) + 130point (active) scrapers
-    # Budget: $25/month SerpApi Starter (1,000 searches/month)
-    skip_ebay = os.environ.get("SKIP_EBAY", "").lower() in ("1", "true", "yes")
-    status["ebay"] = {"completed": False, "error": None, "skipped": False}
-    if skip_ebay:
-        logger.info("")
-        logger.info("=" * 50)
-        logger.info("Phase 1b: eBay SerpApi SKIPPED (SKIP_EBAY=1)")
-        logger.info("=" * 50)
-        status["ebay"]["skipped"] = True
-        status["ebay"]["completed"] = True
-    else:
-        logger.info("")
-        logger.info("=" * 50)
-        logger.info("Phase 1b: eBay Sold + Active Listings via SerpApi")
-        logger.info("=" * 50)
-        try:
-            from scripts.ebay_serpapi import run_ebay_serpapi_scraper
-            ebay_result = run_ebay_serpapi_scraper()
-            status["ebay"]["success_count"] = ebay_result.get("results", 0)
-            status["ebay"]["error_count"] = len(ebay_result.get("errors", []))
-            status["ebay"]["searches_used"] = ebay_result.get("searches_used", 0)
+        _alert_phase_failure(str(e), "Apify")
+        raise
+
+
+def phase_ebay(status: dict, checkpoint=None) -> dict:
+    """
+    Phase 1b: eBay sold + active listings via SerpApi (non-fatal).
+    Single phase replaces old Apify (sold) + 130point (active) scrapers.
+    Budget: $25/month SerpApi Starter (1,000 searches/month)
+    """
+    logger.info("")
+    logger.info("=" * 50)
+    logger.info("Phase 1b: eBay Sold + Active Listings via SerpApi")
+    logger.info("=" * 50)
+    try:
+        from scripts.ebay_serpapi import SERPAPI_BOX_CONFIG, run_ebay_serpapi_scraper
+
+        box_ids, on_box_done = None, None
+        if checkpoint is not None:
+            box_ids = checkpoint.pending("ebay", SERPAPI_BOX_CONFIG.keys())
+            on_box_done = checkpoint.unit_callback("ebay")
+        if _all_units_done(checkpoint, "ebay", box_ids):
             status["ebay"]["completed"] = True
-            logger.info(f"✅ Phase 1b complete: {ebay_result.get('results', 0)} boxes, "
-                        f"{len(ebay_result.get('errors', []))} errors, "
-                        f"{ebay_result.get('searches_used', 0)} SerpApi searches used")
-        except Exception as e:
-            status["ebay"]["error"] = str(e)
-            logger.warning(f"⚠️  Phase 1b (eBay SerpApi) failed (non-fatal): {e}")
-            import traceback
-            logger.warning(traceback.format_exc())
-
-    # Phase 2: Listings Scraper (skip if SKIP_SCRAPER=1 to stay under 512Mi on Render free cron)
-    skip_scraper = os.environ.get("SKIP_SCRAPER", "").lower() in ("1", "true", "yes")
-    if skip_scraper:
-        logger.info("")
-        logger.info("=" * 50)
-        logger.info("Phase 2: Listings Scraper SKIPPED (SKIP_SCRAPER=1)")
-        logger.info("=" * 50)
-        scraper_success = 0
-        scraper_errors = 0
+            status["ebay"]["resumed"] = True
+            return {"results": 0, "errors": [], "searches_used": 0, "resumed": True}
+
+        ebay_result = run_ebay_serpapi_scraper(box_ids=box_ids, on_box_done=on_box_done)
+        status["ebay"]["success_count"] = ebay_result.get("results", 0)
+        status["ebay"]["error_count"] = len(ebay_result.get("errors", []))
+        status["ebay"]["searches_used"] = ebay_result.get("searches_used", 0)
+        status["ebay"]["budget"] = ebay_result.get("budget")
+        status["ebay"]["completed"] = True
+        logger.info(f"✅ Phase 1b complete: {ebay_result.get('results', 0)} boxes, "
+                    f"{len(ebay_result.get('errors', []))} errors, "
+                    f"{ebay_result.get('searches_used', 0)} SerpApi searches used")
+        return ebay_result
+    except Exception as e:
+        status["ebay"]["error"] = str(e)
+        logger.warning(f"⚠️  Phase 1b (eBay SerpApi) failed (non-fatal): {e}")
+        raise
+
+
+def phase_scraper(status: dict, debug_box_id: str = None, checkpoint=None) -> tuple:
+    """Phase 2: Listings Scraper - active listings from TCGplayer (FATAL)."""
+    logger.info("")
+    logger.info("=" * 50)
+    logger.info("Phase 2: Listings Scraper - Fetching Active Listings")
+    logger.info("=" * 50)
+    try:
+        box_ids, on_box_done = None, None
+        if checkpoint is not None and not debug_box_id:
+            from scripts.listings_scraper import TCGPLAYER_URLS as SCRAPER_URLS
+            box_ids = checkpoint.pending("scraper", SCRAPER_URLS.keys())
+            on_box_done = checkpoint.unit_callback("scraper")
+            if _all_units_done(checkpoint, "scraper", box_ids):
+                status["scraper"]["completed"] = True
+                status["scraper"]["resumed"] = True
+                return 0, 0
+
+        # Runs in a pipeline worker thread; asyncio.run gives it its own event loop
+        scraper_success, scraper_errors = asyncio.run(run_listings_scraper(
+            debug_box_id=debug_box_id, box_ids=box_ids, on_box_done=on_box_done,
+        ))
+        status["scraper"]["success_count"] = scraper_success
+        status["scraper"]["error_count"] = scraper_errors
         status["scraper"]["completed"] = True
-        status["scraper"]["skipped"] = True
-    else:
+        
         logger.info("")
-        logger.info("=" * 50)
-        logger.info("Phase 2: Listings Scraper - Fetching Active Listings")
-        logger.info("=" * 50)
+        logger.info("✅ Phase 2 (Scraper) complete!")
+        return scraper_success, scraper_errors
         
-        scraper_success = 0
-        scraper_errors = 0
-        try:
-            scraper_success, scraper_errors = asyncio.run(run_listings_scraper(debug_box_id=debug_box_id))
-            status["scraper"]["success_count"] = scraper_success
-            status["scraper"]["error_count"] = scraper_errors
-            status["scraper"]["completed"] = True
-            
-            logger.info("")
-            logger.info("✅ Phase 2 (Scraper) complete!")
-            
-        except Exception as e:
-            status["scraper"]["error"] = str(e)
-            logger.error(f"Scraper phase failed: {str(e)}")
-            import traceback
-            logger.error(traceback.format_exc())
-            
-            # Send alert
-            try:
-                from app.services.alert_service import alert_cron_failure
-                alert_cron_failure("daily-refresh", str(e), "Scraper")
-            except Exception as alert_err:
-                logger.warning(f"Failed to send alert: {alert_err}")
-            
-            save_completion_status(status)
-            return 1
-    
-    # Phase 3: Rolling Metrics (FATAL — derived metrics must be computed for API to serve correct data)
+    except Exception as e:
+        status["scraper"]["error"] = str(e)
+        logger.error(f"Scraper phase failed: {str(e)}")
+        _alert_phase_failure(str(e), "Scraper")
+        raise
+
+
+def phase_rolling_metrics(status: dict, today_str: str, checkpoint=None) -> dict:
+    """Phase 3: Rolling Metrics (FATAL — derived metrics must be computed for API to serve correct data)."""
     logger.info("")
     logger.info("=" * 50)
     logger.info("Phase 3: Rolling Metrics — Computing Derived Metrics")
     logger.info("=" * 50)
-    status["rolling_metrics"] = {"completed": False, "error": None}
+    if (checkpoint is not None and checkpoint.phase_done("rolling_metrics")
+            and not checkpoint.executed_any("apify", "ebay", "scraper")):
+        logger.info(f"⏭️  rolling_metrics: already succeeded in run {checkpoint.run_id[:8]} and no upstream box re-ran")
+        status["rolling_metrics"]["completed"] = True
+        status["rolling_metrics"]["resumed"] = True
+        return {"target_date": today_str, "boxes_updated": 0, "db_updated": 0, "resumed": True}
     try:
         from scripts.rolling_metrics import compute_rolling_metrics
 
-        today_str = datetime.now().strftime("%Y-%m-%d")
         rm_result = compute_rolling_metrics(target_date=today_str)
+        if checkpoint is not None:
+            checkpoint.record_phase("rolling_metrics", True, output=rm_result)
         status["rolling_metrics"]["completed"] = True
         status["rolling_metrics"]["boxes_updated"] = rm_result.get("boxes_updated", 0)
         status["rolling_metrics"]["db_updated"] = rm_result.get("db_updated", 0)
         logger.info(f"✅ Phase 3 complete: {rm_result.get('boxes_updated', 0)} boxes, {rm_result.get('db_updated', 0)} DB rows")
+        return rm_result
     except Exception as e:
         status["rolling_metrics"]["error"] = str(e)
+        if checkpoint is not None:
+            checkpoint.record_phase("rolling_metrics", False, error=str(e))
         logger.error(f"Phase 3 (Rolling Metrics) failed: {e}")
-        import traceback
-        logger.error(traceback.format_exc())
+        _alert_phase_failure(str(e), "Rolling Metrics")
+        raise
 
-        try:
-            from app.services.alert_service import alert_cron_failure
-            alert_cron_failure("daily-refresh", str(e), "Rolling Metrics")
-        except Exception as alert_err:
-            logger.warning(f"Failed to send alert: {alert_err}")
 
-        save_completion_status(status)
-        return 1
-
-    # Phase 3b: Market Index (NON-FATAL — aggregate stats for macro panel)
+def phase_market_index(status: dict, today_str: str, checkpoint=None) -> dict:
+    """Phase 3b: Market Index (NON-FATAL — aggregate stats for macro panel)."""
     logger.info("")
     logger.info("=" * 50)
     logger.info("Phase 3b: Market Index — Computing Aggregate Stats")
     logger.info("=" * 50)
-    status["market_index"] = {"completed": False, "error": None}
+    if (checkpoint is not None and checkpoint.phase_done("market_index")
+            and not checkpoint.executed_any("rolling_metrics")):
+        logger.info(f"⏭️  market_index: already succeeded in run {checkpoint.run_id[:8]}")
+        status["market_index"]["completed"] = True
+        status["market_index"]["resumed"] = True
+        return {"resumed": True}
     try:
         from scripts.market_index import compute_market_index
 
         mi_result = compute_market_index(target_date=today_str)
+        if checkpoint is not None:
+            checkpoint.record_phase("market_index", True, output=mi_result)
         status["market_index"]["completed"] = True
         status["market_index"]["index_value"] = mi_result.get("index_value")
         status["market_index"]["sentiment"] = mi_result.get("sentiment")
         logger.info(f"✅ Phase 3b complete: index={mi_result.get('index_value')}, sentiment={mi_result.get('sentiment')}")
+        return mi_result
     except Exception as e:
         status["market_index"]["error"] = str(e)
+        if checkpoint is not None:
+            checkpoint.record_phase("market_index", False, error=str(e))
         logger.warning(f"⚠️  Phase 3b (Market Index) failed (non-fatal): {e}")
-        import traceback
-        logger.warning(traceback.format_exc())
+        raise
+
+
+def main():
+    start_time = datetime.now()
+    logger.info("=" * 70)
+    logger.info("Starting daily TCGplayer refresh (Apify + Scraper)")
+    logger.info(f"⏰ Start time: {start_time.strftime('%Y-%m-%d %H:%M:%S')}")
+    logger.info("=" * 70)
+
+    # The pipeline reads back what it just wrote; never route those reads to a lagging replica
+    from app.db_engines import force_primary_reads
+    force_primary_reads()
+
+    # Parse --debug <box_id> if present
+    debug_box_id = None
+    if "--debug" in sys.argv:
+        idx = sys.argv.index("--debug")
+        if idx + 1 < len(sys.argv):
+            debug_box_id = sys.argv[idx + 1]
+            logger.info(f"Debug mode: will only scrape box {debug_box_id}")
+
+    from app.services.memory_profile import memory_profiler
+    memory_profiler.configure_from_env(profile="--memory-profile" in sys.argv).start()
+
+    # Parse --resume <run_id>: finish a checkpointed run instead of starting a new one
+    from app.services.pipeline_checkpoint import RunCheckpoint, finish_run, get_run, new_run_id, start_run
+    today_str = datetime.now().strftime("%Y-%m-%d")
+    resume_run_id = None
+    run_attempt = 1
+    if "--resume" in sys.argv:
+        idx = sys.argv.index("--resume")
+        if idx + 1 >= len(sys.argv):
+            logger.error("--resume needs a run_id")
+            return 2
+        resume_run_id = sys.argv[idx + 1]
+        prior = get_run(resume_run_id)
+        if prior is None:
+            logger.error(f"Unknown pipeline run {resume_run_id}")
+            return 2
+        if prior["run_date"] != today_str:
+            # Phases 1/1b/2 always write today's date; a stale run cannot be resumed in place
+            logger.error(
+                f"Run {resume_run_id} is for {prior['run_date']}, not today ({today_str}); "
+                f"use scripts/refresh_for_date.py for past dates"
+            )
+            return 2
+        run_attempt = prior["attempts"] + 1
+        logger.info(f"🔁 Resuming run {resume_run_id} (status {prior['status']}, attempt {run_attempt})")
+
+    # Random delay (0–45 min) when run by cron so actual work happens at a random time
+    # Combined with ebay_playwright's 0-15 min internal jitter = 0-60 min total variance
+    # This makes it nearly impossible to predict when scraping actually happens
+    skip_delay = "--no-delay" in sys.argv or resume_run_id is not None
+    if not skip_delay:
+        delay_min, delay_max = 0, 15  # minutes (jitter keeps hit time variable; kept short to save GHA minutes)
+        delay_sec = random.randint(delay_min * 60, delay_max * 60)
+        eta = datetime.now() + timedelta(seconds=delay_sec)
+        logger.info(f"🎲 Random delay: sleeping {delay_sec // 60} min (work will start ~{eta.strftime('%H:%M')} local)")
+        time.sleep(delay_sec)
+        logger.info("✅ Delay complete, starting Apify + Scraper now.")
+        start_time = datetime.now()  # treat real work start as start_time for duration
+
+    run_id = resume_run_id or new_run_id()
+    checkpoint = RunCheckpoint(run_id, resumed=resume_run_id is not None)
+    start_run(run_id, "daily_refresh", today_str)
+    logger.info(f"🆔 Pipeline run_id: {run_id}")
+
+    status = {
+        "status": "running",
+        "run_id": run_id,
+        "resumed": checkpoint.resumed,
+        "start_time": start_time.isoformat(),
+        "end_time": None,
+        "duration_seconds": None,
+        "apify": {
+            "success_count": 0,
+            "error_count": 0,
+            "completed": False,
+            "error": None
+        },
+        "scraper": {
+            "success_count": 0,
+            "error_count": 0,
+            "completed": False,
+            "error": None
+        },
+        "overall_success": False
+    }
+    
+    skip_ebay = os.environ.get("SKIP_EBAY", "").lower() in ("1", "true", "yes")
+    status["ebay"] = {"completed": False, "error": None, "skipped": skip_ebay}
+    if skip_ebay:
+        logger.info("Phase 1b: eBay SerpApi SKIPPED (SKIP_EBAY=1)")
+        status["ebay"]["completed"] = True
+    # Phase 2 can be skipped with SKIP_SCRAPER=1 to stay under 512Mi on Render free cron
+    skip_scraper = os.environ.get("SKIP_SCRAPER", "").lower() in ("1", "true", "yes")
+    if skip_scraper:
+        logger.info("Phase 2: Listings Scraper SKIPPED (SKIP_SCRAPER=1)")
+        status["scraper"]["completed"] = True
+        status["scraper"]["skipped"] = True
+    status["rolling_metrics"] = {"completed": False, "error": None}
+    status["market_index"] = {"completed": False, "error": None}
+
+    # Phases as a dependency graph: Apify (1) and the listings scraper (2) share no
+    # inputs, so they overlap; SerpApi (1b) needs today's floors from Apify; rolling
+    # metrics (3) needs all three; market index (3b) needs rolling metrics.
+    # CRON_LOW_MEMORY (Render 512Mi) runs one phase at a time, as before.
+    low_mem = os.environ.get("CRON_LOW_MEMORY", "").lower() in ("1", "true", "yes")
+    from app.services.pipeline_telemetry import record_phase_runs, task_stats
+
+    def record_phase_row(node: dict, started_at: datetime) -> None:
+        # Each phase's telemetry row as soon as its node finishes, so a crash later in
+        # the run keeps it; the end of the run upserts every row with final numbers
+        record_phase_runs(run_id, run_attempt, _phase_telemetry(
+            {"started_at": started_at.isoformat(), "timeline": [node]},
+            {**status, "memory": memory_profiler.summary()},
+            task_stats(run_id, checkpoint.executed_units(), phase=node["node"]),
+        ))
+
+    runner = PipelineRunner(
+        [
+            PipelineNode("apify", _in_phase("apify", lambda _: phase_apify(status, checkpoint)),
+                         timeout=PHASE_TIMEOUTS["apify"], resources=("apify",)),
+            PipelineNode("ebay", _in_phase("ebay", lambda _: phase_ebay(status, checkpoint)), deps=("apify",),
+                         timeout=PHASE_TIMEOUTS["ebay"], fatal=False, skip=skip_ebay, resources=("serpapi",)),
+            PipelineNode("scraper", _in_phase("scraper", lambda _: phase_scraper(status, debug_box_id, checkpoint)),
+                         timeout=PHASE_TIMEOUTS["scraper"], skip=skip_scraper, resources=("browser",)),
+            PipelineNode("rolling_metrics", _in_phase("rolling_metrics", lambda _: phase_rolling_metrics(status, today_str, checkpoint)),
+                         deps=("apify", "ebay", "scraper"), timeout=PHASE_TIMEOUTS["rolling_metrics"]),
+            PipelineNode("market_index", _in_phase("market_index", lambda _: phase_market_index(status, today_str, checkpoint)),
+                         deps=("rolling_metrics",), timeout=PHASE_TIMEOUTS["market_index"], fatal=False),
+        ],
+        max_parallel=1 if low_mem else 3,
+        resource_limits={"browser": 1},
+        on_node_done=record_phase_row,
+    )
+    pipeline_summary = runner.run()
+    runner.log_timeline()
+    status["pipeline"] = pipeline_summary
+    status["memory"] = memory_profiler.summary()
+    memory_profiler.stop()
+    logger.info(
+        f"Memory peak {status['memory']['peak_mb']} MB (budget {memory_profiler.budget_mb}), "
+        f"{len(status['memory']['mitigations'])} mitigation(s)"
+    )
+    failed_units = checkpoint.failed_units()
+    status["failed_units"] = failed_units
+    run_status = "failed" if not pipeline_summary["success"] else ("partial" if failed_units else "succeeded")
+    finish_run(run_id, run_status, {
+        "wall_seconds": pipeline_summary["wall_seconds"],
+        "nodes": {n["node"]: n["status"] for n in pipeline_summary["timeline"]},
+        "failed_units": failed_units,
+        "overall_success": pipeline_summary["success"] and _overall_success(status),
+        "counts": {phase: {k: status[phase].get(k, 0) for k in ("success_count", "error_count")}
+                   for phase in ("apify", "ebay", "scraper")},
+        "errors": {n["node"]: n["error"] for n in pipeline_summary["timeline"] if n["error"]},
+        "peak_mb": status["memory"]["peak_mb"],
+    })
+    # Per-phase telemetry for /health/cron and /admin/pipeline-runs (the web service
+    # cannot read this instance's status file); final upsert of the rows written per phase
+    record_phase_runs(run_id, run_attempt, _phase_telemetry(pipeline_summary, status, task_stats(run_id, checkpoint.executed_units())))
+    if run_status != "succeeded":
+        logger.warning(f"Run {run_status}; re-run only the failed units with: "
+                       f"python scripts/daily_refresh.py --resume {run_id}")
+    logger.info(
+        f"Pipeline wall time {pipeline_summary['wall_seconds']:.1f}s "
+        f"(sum of phases {pipeline_summary['sum_of_phases_seconds']:.1f}s)"
+    )
+
+    if not pipeline_summary["success"]:
+        # Fatal phase failed or timed out. Failures already alerted from inside the phase;
+        # timeouts never reach the phase's except block, so alert for those here.
+        for node in pipeline_summary["timeline"]:
+            if node["status"] == "timed_out" and node["node"] in FATAL_PHASE_LABELS:
+                status[node["node"]]["error"] = node["error"]
+                _alert_phase_failure(node["error"], FATAL_PHASE_LABELS[node["node"]])
+        save_completion_status(status)
+        return 1
+
+    results = runner.results()
+    apify_result = results["apify"]
+    scraper_success, scraper_errors = results["scraper"] or (0, 0)
 
     # Calculate duration
     end_time = datetime.now()
@@ -327,11 +597,21 @@ def main():
     status["status"] = "completed"
     status["end_time"] = end_time.isoformat()
     status["duration_seconds"] = duration
-    status["overall_success"] = (
-        status["apify"]["completed"] and 
-        status["scraper"]["completed"] and
-        status["apify"]["error_count"] == 0
-    )
+    try:
+        from app.db_engines import pool_stats
+        status["db_pool"] = pool_stats()
+        for name, ps in status["db_pool"].items():
+            logger.info(
+                f"DB pool {name}: {ps['checkouts']} checkouts, wait avg {ps['checkout_wait_avg_ms']}ms / "
+                f"max {ps['checkout_wait_max_ms']}ms, timeouts {ps['checkout_timeouts']}"
+            )
+    except Exception as e:
+        logger.warning(f"Could not collect DB pool stats: {e}")
+    from app.services.response_cache import response_cache
+    status["response_cache"] = response_cache.info()
+    from app.services.classification_memo import classification_memo
+    status["classification_memo"] = classification_memo.info()
+    status["overall_success"] = _overall_success(status)
     
     save_completion_status(status)
 
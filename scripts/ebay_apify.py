@@ -21,7 +21,7 @@ import statistics
 import time
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
 from urllib.parse import quote_plus, urlencode
 
 from apify_client import ApifyClient
@@ -31,10 +31,11 @@ project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
 from app.config import settings
+from app.services.apify_stream import StreamCounts, batched, iter_dataset_items, page_size, unique_by
+from app.services.title_classifier import TitleClassifier, classify_many
 
 logger = logging.getLogger(__name__)
 
-HISTORICAL_FILE = project_root / "data" / "historical_entries.json"
 PASS_RATE_FILE = project_root / "data" / "ebay_pass_rates.json"
 
 # Price floor as fraction of TCG market price (65% = reject below 35% discount)
@@ -384,27 +385,78 @@ def extract_item_id(url: str) -> Optional[str]:
     return match.group(1) if match else None
 
 
+_LOT_X_N_RE = re.compile(r'\bx\s*(\d+)\b')
+_LOT_N_X_RE = re.compile(r'\b(\d+)\s*x\b')
+_LOT_OF_RE = re.compile(r'\blot\s+of\s+\(?(\d+)\)?\b')
+_LOT_QTY_RE = re.compile(r'\b(?:qty|quantity)\s*(\d+)\b')
+_24_PACKS_RE = re.compile(r'\b24\s*packs?\b')
+
+
+def _lot_quantity(t: str) -> int:
+    """Lot quantity from a lowercased title (see detect_lot_quantity)."""
+    # "x2", "x 2" / "2x", "2 x" / "lot of 2", "lot of (4)" / "qty 2", "quantity 2"
+    for pattern in (_LOT_X_N_RE, _LOT_N_X_RE, _LOT_OF_RE, _LOT_QTY_RE):
+        match = pattern.search(t)
+        if match:
+            return int(match.group(1))
+    return 1
+
+
+TITLE_RULES = TitleClassifier({
+    "excluded": TITLE_EXCLUSIONS,
+    "non_us": NON_US_KEYWORDS,
+    "case_fresh": ["case fresh", "from case"],
+}, quantity=_lot_quantity, version="1")  # bump version when helpers called by classify_title() change
+
+
+def classify_title(title: str) -> Dict[str, Any]:
+    """
+    All title flags plus the lot quantity, from one scan of the title.
+
+    excluded   TITLE_EXCLUSIONS keyword
+    non_us     non-US/non-English (standalone "uk" or NON_US_KEYWORDS)
+    case       case (12+ boxes); "case fresh" / "fresh from case" = single box
+               pulled from a sealed case
+    pack       packs, not a sealed box ("24 packs" describes a booster box)
+    break      break/rip/live (not a sealed box)
+    quantity   lot size (1 for a single box)
+    """
+    m = TITLE_RULES.match(title)
+    words = m.words
+    pack = ("pack" in words or "packs" in words) and not _24_PACKS_RE.search(m.text)
+    return {
+        "excluded": m.flags["excluded"],
+        "non_us": "uk" in words or m.flags["non_us"],
+        "case": "case" in words and not m.flags["case_fresh"],
+        "pack": pack,
+        "break": not words.isdisjoint(("break", "rip", "live")),
+        "quantity": m.quantity,
+    }
+
+
+def classify_titles(titles: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+    """classify_title() for a batch, served from the cross-day classification memo."""
+    return classify_many("ebay_apify", TITLE_RULES, titles, classify_title)
+
+
+def is_rejected_title(flags: Dict[str, Any]) -> bool:
+    """True if any title check in classify_title() rejects the listing."""
+    return flags["excluded"] or flags["non_us"] or flags["case"] or flags["pack"] or flags["break"]
+
+
 def is_excluded_title(title: str) -> bool:
     """Check if title contains exclusion keywords."""
-    t = title.lower()
-    return any(excl in t for excl in TITLE_EXCLUSIONS)
+    return classify_title(title)["excluded"]
 
 
 def is_non_us(title: str) -> bool:
     """Check if listing is non-US/non-English."""
-    t = title.lower()
-    if re.search(r'\buk\b', t):
-        return True
-    return any(kw in t for kw in NON_US_KEYWORDS)
+    return classify_title(title)["non_us"]
 
 
 def is_case_listing(title: str) -> bool:
     """Check if listing is a case (12+ boxes), not a single box."""
-    t = title.lower()
-    # "case fresh" or "fresh from case" = single box pulled from a sealed case
-    if "case fresh" in t or "from case" in t:
-        return False
-    return bool(re.search(r'\bcase\b', t))
+    return classify_title(title)["case"]
 
 
 def is_pack_listing(title: str) -> bool:
@@ -412,18 +464,12 @@ def is_pack_listing(title: str) -> bool:
     Check if listing is packs (not a sealed box).
     Exception: "24 packs" is valid because a booster box contains 24 packs.
     """
-    t = title.lower()
-    # Exception: "24 packs" is a valid booster box description
-    if re.search(r'\b24\s*packs?\b', t):
-        return False
-    # Any other pack reference is likely loose packs
-    return bool(re.search(r'\bpacks?\b', t))
+    return classify_title(title)["pack"]
 
 
 def is_break_listing(title: str) -> bool:
     """Check if listing is a break/rip (not a sealed box)."""
-    t = title.lower()
-    return bool(re.search(r'\b(break|rip|live)\b', t))
+    return classify_title(title)["break"]
 
 
 def detect_lot_quantity(title: str) -> int:
@@ -433,29 +479,7 @@ def detect_lot_quantity(title: str) -> int:
 
     Patterns: "x2", "x 2", "lot of 2", "2x", "2 x", "qty 2", "quantity 2"
     """
-    t = title.lower()
-
-    # Pattern: "x2", "x 2", "x3" etc at end or with space
-    match = re.search(r'\bx\s*(\d+)\b', t)
-    if match:
-        return int(match.group(1))
-
-    # Pattern: "2x", "2 x", "3x" etc
-    match = re.search(r'\b(\d+)\s*x\b', t)
-    if match:
-        return int(match.group(1))
-
-    # Pattern: "lot of 2", "lot of 3", "lot of (4)"
-    match = re.search(r'\blot\s+of\s+\(?(\d+)\)?\b', t)
-    if match:
-        return int(match.group(1))
-
-    # Pattern: "qty 2", "quantity 2"
-    match = re.search(r'\b(?:qty|quantity)\s*(\d+)\b', t)
-    if match:
-        return int(match.group(1))
-
-    return 1
+    return _lot_quantity(title.lower())
 
 
 def parse_ended_at(date_str: str) -> Optional[datetime]:
@@ -491,7 +515,7 @@ def parse_ended_at(date_str: str) -> Optional[datetime]:
 
 
 def filter_to_yesterday(
-    items: List[Dict[str, Any]],
+    items: Iterable[Dict[str, Any]],
     target_date: str
 ) -> Tuple[List[Dict[str, Any]], int]:
     """
@@ -502,7 +526,8 @@ def filter_to_yesterday(
     so we compare by date string only.
 
     Args:
-        items: List of normalized items with 'sold_date' field (YYYY-MM-DD)
+        items: Normalized items with 'sold_date' field (YYYY-MM-DD); may be a
+               stream — only the matching items are kept
         target_date: The date to match (usually yesterday), format YYYY-MM-DD
 
     Returns:
@@ -553,9 +578,14 @@ def log_pass_rate(
     }
 
 
-def filter_listing(item: Dict[str, Any], min_price: float) -> Tuple[bool, int]:
+def filter_listing(
+    item: Dict[str, Any],
+    min_price: float,
+    flags: Optional[Dict[str, Any]] = None,
+) -> Tuple[bool, int]:
     """
-    Filter a single listing.
+    Filter a single listing. flags: classify_title() result for the title if the
+    caller already has it (e.g. from classify_titles()).
 
     Returns:
         tuple: (keep: bool, quantity: int)
@@ -568,28 +598,14 @@ def filter_listing(item: Dict[str, Any], min_price: float) -> Tuple[bool, int]:
     if not title or price is None:
         return False, 1
 
-    # Title exclusions (general keywords)
-    if is_excluded_title(title):
-        return False, 1
-
-    # Non-US check
-    if is_non_us(title):
-        return False, 1
-
-    # Case check (with "case fresh" exception)
-    if is_case_listing(title):
-        return False, 1
-
-    # Pack check (with "24 packs" exception)
-    if is_pack_listing(title):
-        return False, 1
-
-    # Break/rip check (backup for URL negatives)
-    if is_break_listing(title):
+    # Title exclusions, non-US, case ("case fresh" ok), packs ("24 packs" ok),
+    # break/rip (backup for URL negatives) — one scan of the title
+    flags = flags or classify_title(title)
+    if is_rejected_title(flags):
         return False, 1
 
     # Detect lot quantity for price normalization
-    quantity = detect_lot_quantity(title)
+    quantity = flags["quantity"]
 
     # Price check (dynamic minimum) - check per-unit price for lots
     unit_price = price / quantity if quantity > 1 else price
@@ -671,6 +687,128 @@ def _write_ebay_to_db(
     return True
 
 
+def normalize_item(item: Dict[str, Any]) -> Dict[str, Any]:
+    """Actor item -> {title, price, sold_date, ended_at_dt, item_id, url} (price None if unparseable)."""
+    normalized = {
+        "title": item.get("title", ""),
+        "price": None,
+        "sold_date": None,
+        "item_id": None,
+        "url": item.get("url", ""),
+    }
+
+    # Extract price (caffein.dev uses soldPrice, others use price)
+    price_str = item.get("soldPrice") or item.get("price", "")
+    if isinstance(price_str, (int, float)):
+        normalized["price"] = float(price_str)
+    elif isinstance(price_str, str):
+        # Parse price string like "$450.00" or "450.00 USD"
+        match = re.search(r'[\d,]+\.?\d*', price_str.replace(",", ""))
+        if match:
+            normalized["price"] = float(match.group())
+
+    # Extract date (caffein.dev uses endedAt, others use soldDate/endDate)
+    date_str = item.get("endedAt") or item.get("soldDate") or item.get("endDate") or item.get("date")
+    normalized["sold_date"] = parse_date(str(date_str)) if date_str else None
+    # Also store as datetime for 24-hour filtering
+    normalized["ended_at_dt"] = parse_ended_at(str(date_str)) if date_str else None
+
+    # Extract item ID (caffein.dev uses itemId, fallback to URL extraction)
+    normalized["item_id"] = item.get("itemId") or extract_item_id(item.get("url", ""))
+    return normalized
+
+
+def filter_items(
+    items: Iterable[Dict[str, Any]],
+    min_price: float,
+    counts: StreamCounts,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Normalized items that pass filter_listing, lot prices divided by quantity.
+    Titles are classified one dataset page at a time; rejections are counted
+    in counts["rejected"].
+    """
+    for page in batched(items, page_size()):
+        classified = classify_titles(item.get("title", "") for item in page)
+        for item in page:
+            normalized = normalize_item(item)
+
+            # Skip items without price
+            if normalized["price"] is None:
+                counts.add("rejected")
+                continue
+
+            # Apply filters
+            keep, quantity = filter_listing(normalized, min_price, classified.get(normalized["title"]))
+            if not keep:
+                counts.add("rejected")
+                continue
+
+            # Normalize price for multi-box lots (divide by quantity)
+            if quantity > 1 and normalized["price"]:
+                original_price = normalized["price"]
+                normalized["price"] = round(original_price / quantity, 2)
+                normalized["lot_quantity"] = quantity
+                normalized["lot_total_price"] = original_price
+                logger.debug(f"    Lot detected: '{normalized['title'][:50]}...' - ${original_price} / {quantity} = ${normalized['price']}")
+            yield normalized
+
+
+def _run_actor(client: ApifyClient, run_input: Dict[str, Any], name: str, search_idx: int) -> Dict[str, Any]:
+    """Start one actor run, retrying with backoff. Returns the run."""
+    last_error = None
+    for attempt in range(MAX_RETRIES + 1):
+        try:
+            return client.actor(APIFY_ACTOR).call(run_input=run_input)
+        except Exception as retry_err:
+            last_error = retry_err
+            err_str = str(retry_err).lower()
+
+            # Classify error for smarter retry
+            is_rate_limit = "429" in err_str or "rate limit" in err_str
+            is_blocked = "403" in err_str or "forbidden" in err_str
+            is_timeout = "timeout" in err_str
+
+            if attempt < MAX_RETRIES:
+                base_wait = RETRY_BACKOFF_SECONDS[attempt]
+                if is_rate_limit or is_blocked:
+                    wait_time = base_wait * 2
+                else:
+                    wait_time = base_wait
+
+                error_type = "RATE_LIMIT" if is_rate_limit else "BLOCKED" if is_blocked else "TIMEOUT" if is_timeout else "ERROR"
+                logger.warning(f"  ⚠️ Attempt {attempt + 1} [{error_type}]: {retry_err}. Retrying in {wait_time}s...")
+                time.sleep(wait_time)
+    logger.error(f"  ❌ All {MAX_RETRIES + 1} attempts failed for {name} search {search_idx + 1}")
+    raise last_error
+
+
+def iter_search_results(
+    client: ApifyClient,
+    searches: List[str],
+    results_per_search: int,
+    min_price: float,
+    max_price: float,
+    name: str,
+) -> Iterator[Dict[str, Any]]:
+    """Raw actor items of every search, streamed from each run's dataset page by page."""
+    for search_idx, search in enumerate(searches):
+        logger.debug(f"  Search {search_idx + 1}/{len(searches)}: {search}")
+
+        run_input = {
+            "keyword": search,
+            "count": results_per_search,
+            "minPrice": min_price,
+            "maxPrice": max_price,
+        }
+        run = _run_actor(client, run_input, name, search_idx)
+        yield from iter_dataset_items(client, run["defaultDatasetId"])
+
+        # Small delay between searches to avoid rate limits
+        if search_idx < len(searches) - 1:
+            time.sleep(random.uniform(1, 3))
+
+
 def run_ebay_apify_scraper(
     debug_box_id: Optional[str] = None,
 ) -> Dict[str, Any]:
@@ -770,132 +908,31 @@ def run_ebay_apify_scraper(
         logger.info(f"Scraping {name} [{tier}/{allocation_type}] (min=${min_price}, max=${max_price}, limit={max_results})")
 
         try:
-            # Run multiple searches and dedupe by item URL
-            all_items_by_url: Dict[str, Dict] = {}
+            # Stream every search's dataset through dedupe (by item URL) -> normalize
+            # -> quality filters -> date filter; only yesterday's sales are kept
             results_per_search = max(10, max_results // len(searches))  # Split limit between searches
+            counts = StreamCounts(fetched=0, filtered=0, rejected=0)
+            raw_items = iter_search_results(client, searches, results_per_search, min_price, max_price, name)
+            unique_items = counts.count("fetched", unique_by(raw_items, lambda item: item.get("url", "")))
+            filtered = counts.count("filtered", filter_items(unique_items, min_price, counts))
 
-            for search_idx, search in enumerate(searches):
-                logger.debug(f"  Search {search_idx + 1}/{len(searches)}: {search}")
-
-                run_input = {
-                    "keyword": search,
-                    "count": results_per_search,
-                    "minPrice": min_price,
-                    "maxPrice": max_price,
-                }
-
-                search_items = None
-                last_error = None
-                for attempt in range(MAX_RETRIES + 1):
-                    try:
-                        run = client.actor(APIFY_ACTOR).call(run_input=run_input)
-                        search_items = list(client.dataset(run["defaultDatasetId"]).iterate_items())
-                        break  # Success, exit retry loop
-                    except Exception as retry_err:
-                        last_error = retry_err
-                        err_str = str(retry_err).lower()
-
-                        # Classify error for smarter retry
-                        is_rate_limit = "429" in err_str or "rate limit" in err_str
-                        is_blocked = "403" in err_str or "forbidden" in err_str
-                        is_timeout = "timeout" in err_str
-
-                        if attempt < MAX_RETRIES:
-                            base_wait = RETRY_BACKOFF_SECONDS[attempt]
-                            if is_rate_limit or is_blocked:
-                                wait_time = base_wait * 2
-                            else:
-                                wait_time = base_wait
-
-                            error_type = "RATE_LIMIT" if is_rate_limit else "BLOCKED" if is_blocked else "TIMEOUT" if is_timeout else "ERROR"
-                            logger.warning(f"  ⚠️ Attempt {attempt + 1} [{error_type}]: {retry_err}. Retrying in {wait_time}s...")
-                            time.sleep(wait_time)
-                        else:
-                            logger.error(f"  ❌ All {MAX_RETRIES + 1} attempts failed for {name} search {search_idx + 1}")
-                            raise last_error
-
-                if search_items:
-                    # Dedupe by URL (unique per listing)
-                    for item in search_items:
-                        url = item.get("url", "")
-                        if url and url not in all_items_by_url:
-                            all_items_by_url[url] = item
-
-                # Small delay between searches to avoid rate limits
-                if search_idx < len(searches) - 1:
-                    time.sleep(random.uniform(1, 3))
-
-            items = list(all_items_by_url.values())
-            if not items:
-                raise last_error or Exception("No items returned from any search")
-
-            logger.info(f"  Apify returned {len(items)} unique items from {len(searches)} searches")
-
-            # Filter items
-            filtered = []
-            rejected_count = 0
-            for item in items:
-                # Normalize item structure
-                normalized = {
-                    "title": item.get("title", ""),
-                    "price": None,
-                    "sold_date": None,
-                    "item_id": None,
-                    "url": item.get("url", ""),
-                }
+            # Apply date filter - only count sales from yesterday
+            items_yesterday, rejected_date = filter_to_yesterday(filtered, yesterday)
+            if not counts["fetched"]:
+                raise Exception("No items returned from any search")
 
-                # Extract price (caffein.dev uses soldPrice, others use price)
-                price_str = item.get("soldPrice") or item.get("price", "")
-                if isinstance(price_str, (int, float)):
-                    normalized["price"] = float(price_str)
-                elif isinstance(price_str, str):
-                    # Parse price string like "$450.00" or "450.00 USD"
-                    match = re.search(r'[\d,]+\.?\d*', price_str.replace(",", ""))
-                    if match:
-                        normalized["price"] = float(match.group())
-
-                # Extract date (caffein.dev uses endedAt, others use soldDate/endDate)
-                date_str = item.get("endedAt") or item.get("soldDate") or item.get("endDate") or item.get("date")
-                normalized["sold_date"] = parse_date(str(date_str)) if date_str else None
-                # Also store as datetime for 24-hour filtering
-                normalized["ended_at_dt"] = parse_ended_at(str(date_str)) if date_str else None
-
-                # Extract item ID (caffein.dev uses itemId, fallback to URL extraction)
-                normalized["item_id"] = item.get("itemId") or extract_item_id(item.get("url", ""))
-
-                # Skip items without price
-                if normalized["price"] is None:
-                    rejected_count += 1
-                    continue
-
-                # Apply filters
-                keep, quantity = filter_listing(normalized, min_price)
-                if not keep:
-                    rejected_count += 1
-                    continue
-
-                # Normalize price for multi-box lots (divide by quantity)
-                if quantity > 1 and normalized["price"]:
-                    original_price = normalized["price"]
-                    normalized["price"] = round(original_price / quantity, 2)
-                    normalized["lot_quantity"] = quantity
-                    normalized["lot_total_price"] = original_price
-                    logger.debug(f"    Lot detected: '{normalized['title'][:50]}...' - ${original_price} / {quantity} = ${normalized['price']}")
-                filtered.append(normalized)
-
-            logger.info(f"  Quality filtered to {len(filtered)} items ({rejected_count} rejected)")
+            logger.info(f"  Apify returned {counts['fetched']} unique items from {len(searches)} searches")
+            logger.info(f"  Quality filtered to {counts['filtered']} items ({counts['rejected']} rejected)")
 
             # Track total fetched for cost logging
-            total_fetched += len(items)
+            total_fetched += counts["fetched"]
 
-            # Apply date filter - only count sales from yesterday
-            items_yesterday, rejected_date = filter_to_yesterday(filtered, yesterday)
-            pass_rate = len(items_yesterday) / len(items) if items else 0
+            pass_rate = len(items_yesterday) / counts["fetched"]
 
             logger.info(f"  Date filter: {len(items_yesterday)} from {yesterday}, {rejected_date} other dates (pass rate: {pass_rate:.1%})")
 
             # Log pass rate for future optimization
-            log_pass_rate(pass_rates, yesterday, box_id, len(items), len(items_yesterday))
+            log_pass_rate(pass_rates, yesterday, box_id, counts["fetched"], len(items_yesterday))
 
             # Calculate metrics from yesterday's sales only
             if items_yesterday:
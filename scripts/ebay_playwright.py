@@ -27,16 +27,17 @@ import statistics
 import sys
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterable, List, Optional
 from urllib.parse import quote_plus
 
 # Add project root to path
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
+from app.services.title_classifier import TitleClassifier, classify_many, lot_quantity
+
 logger = logging.getLogger(__name__)
 
-HISTORICAL_FILE = project_root / "data" / "historical_entries.json"
 DEBUG_HTML_DIR = project_root / "data" / "debug_html"
 
 # ============================================================================
@@ -442,43 +443,26 @@ COUNTRY_EXCLUSIONS = [
 MIN_PRICE_RATIO = 0.75
 
 
-def _extract_quantity(title: str) -> int:
-    """
-    Extract multi-box quantity from listing title.
-    Detects: "lot of 2", "2x", "x2", "2 boxes", "set of 2", "bundle of 2"
-    Returns 1 if no multi-box pattern found. Capped at 6.
-    """
-    t = title.lower()
-
-    # Pattern 1: "lot of N", "set of N", "bundle of N"
-    m = re.search(r'(?:lot|set|bundle)\s+of\s+(\d+)', t)
-    if m:
-        qty = int(m.group(1))
-        if 2 <= qty <= 6:
-            return qty
-
-    # Pattern 2: "Nx" multiplier (e.g., "2x booster box")
-    m = re.search(r'(?:^|\s)(\d+)\s*x\s+', t)
-    if m:
-        qty = int(m.group(1))
-        if 2 <= qty <= 6:
-            return qty
-
-    # Pattern 3: "xN" suffix (e.g., "booster box x2")
-    m = re.search(r'\bx\s*(\d+)(?:\s|$)', t)
-    if m:
-        qty = int(m.group(1))
-        if 2 <= qty <= 6:
-            return qty
-
-    # Pattern 4: "N boxes" or "N booster boxes"
-    m = re.search(r'(?:^|\s)(\d+)\s+(?:booster\s+)?box(?:es)?(?:\s+lot)?', t)
-    if m:
-        qty = int(m.group(1))
-        if 2 <= qty <= 6:
-            return qty
-
-    return 1
+TITLE_RULES = TitleClassifier({
+    "excluded": TITLE_EXCLUSIONS,
+    # "uk" must be a standalone word — checked against whitespace tokens
+    "country": [kw for kw in COUNTRY_EXCLUSIONS if kw != "uk"],
+}, quantity=lot_quantity, version="1")  # bump version when helpers called by classify_title() change
+
+
+def classify_title(title: str) -> Dict[str, Any]:
+    """Title-exclusion and non-US flags plus multi-box quantity (capped at 6), one scan."""
+    m = TITLE_RULES.match(title)
+    return {
+        "excluded": m.flags["excluded"],
+        "non_us": m.flags["country"] or "uk" in m.tokens,
+        "quantity": m.quantity,
+    }
+
+
+def classify_titles(titles: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+    """classify_title() for a batch, served from the cross-day classification memo."""
+    return classify_many("ebay_playwright", TITLE_RULES, titles, classify_title)
 
 # Stealth browser args
 STEALTH_ARGS = [
@@ -557,25 +541,6 @@ def _parse_end_date(date_str: str, reference_date: datetime) -> Optional[str]:
     return None
 
 
-def _is_excluded_title(title: str) -> bool:
-    """Check if title contains exclusion keywords."""
-    title_lower = title.lower()
-    return any(excl in title_lower for excl in TITLE_EXCLUSIONS)
-
-
-def _is_non_us_listing(title: str) -> bool:
-    """Check if title indicates non-US seller/region."""
-    title_lower = title.lower()
-    # Check for country exclusions
-    for excl in COUNTRY_EXCLUSIONS:
-        if excl in title_lower:
-            # Exception: "case fresh" is fine (not "case")
-            if excl == "uk" and "uk" not in title_lower.split():
-                continue  # "uk" must be standalone word
-            return True
-    return False
-
-
 def _humanize_query(query: str) -> str:
     """
     Randomly vary the query structure to avoid fingerprinting.
@@ -976,12 +941,8 @@ async def run_ebay_scraper(
     today_str = today.strftime("%Y-%m-%d")
     logger.info(f"Phase 1b (Playwright): eBay scraper starting for {today_str}")
 
-    # Load historical entries
-    try:
-        with open(HISTORICAL_FILE, "r") as f:
-            hist = json.load(f)
-    except FileNotFoundError:
-        hist = {}
+    # Historical entries (local store, app/services/history_store.py)
+    from app.services.history_store import history_store
 
     # Determine which boxes to scrape
     if debug_box_id:
@@ -1090,7 +1051,7 @@ async def run_ebay_scraper(
 
                 # Get TCGplayer market price for dynamic price floor
                 tcg_market_price = None
-                box_entries = hist.get(box_id, [])
+                box_entries = history_store.entries(box_id)
                 if box_entries:
                     for entry in sorted(box_entries, key=lambda e: e.get("date", ""), reverse=True):
                         if entry.get("market_price_usd"):
@@ -1204,16 +1165,18 @@ async def run_ebay_scraper(
                     filtered_items = []
                     excluded_counts = {"title": 0, "country": 0, "price": 0}
 
+                    classified = classify_titles(item.get("title", "") for item in raw_items)
                     for item in raw_items:
                         title = item.get("title", "")
+                        flags = classified[title]
 
                         # Filter 1: Title exclusion keywords
-                        if _is_excluded_title(title):
+                        if flags["excluded"]:
                             excluded_counts["title"] += 1
                             continue
 
                         # Filter 2: Non-US seller/region
-                        if _is_non_us_listing(title):
+                        if flags["non_us"]:
                             excluded_counts["country"] += 1
                             continue
 
@@ -1223,7 +1186,7 @@ async def run_ebay_scraper(
                             continue
 
                         # Handle multi-box lots (divide price by quantity)
-                        quantity = _extract_quantity(title)
+                        quantity = flags["quantity"]
                         if quantity > 1:
                             price = round(price / quantity, 2)
 
@@ -1258,7 +1221,7 @@ async def run_ebay_scraper(
                     # Cross-day deduplication
                     prev_item_ids = set()
                     has_prev_tracking = False
-                    for prev_entry in hist.get(box_id, []):
+                    for prev_entry in history_store.entries(box_id):
                         if prev_entry.get("date") != today_str:
                             prev_ids = prev_entry.get("_ebay_sold_item_ids", [])
                             if prev_ids:
@@ -1333,18 +1296,9 @@ async def run_ebay_scraper(
                         ],
                     }
 
-                    # Update historical entries
-                    if box_id not in hist:
-                        hist[box_id] = []
-
-                    existing_today = next(
-                        (e for e in hist[box_id] if e.get("date") == today_str), None
-                    )
-                    if existing_today:
-                        for key, val in ebay_fields.items():
-                            existing_today[key] = val
-                    else:
-                        hist[box_id].append({"date": today_str, **ebay_fields})
+                    # Update historical entries (written by flush() below)
+                    entry, _ = history_store.checkout(box_id, today_str)
+                    entry.update(ebay_fields)
 
                     # Write to database
                     write_ebay_to_db(box_id, today_str, ebay_fields, filtered_items)
@@ -1490,7 +1444,7 @@ async def run_ebay_scraper(
 
                         # Dynamic min price
                         tcg_market_price = None
-                        box_entries = hist.get(retry_box_id, [])
+                        box_entries = history_store.entries(retry_box_id)
                         if box_entries:
                             for entry in sorted(box_entries, key=lambda e: e.get("date", ""), reverse=True):
                                 if entry.get("market_price_usd"):
@@ -1522,14 +1476,16 @@ async def run_ebay_scraper(
 
                         # Same filtering logic as main loop
                         filtered_items = []
+                        classified = classify_titles(item.get("title", "") for item in raw_items)
                         for item in raw_items:
                             title = item.get("title", "")
-                            if _is_excluded_title(title) or _is_non_us_listing(title):
+                            flags = classified[title]
+                            if flags["excluded"] or flags["non_us"]:
                                 continue
                             price = _parse_price(item.get("price_text", ""))
                             if price is None:
                                 continue
-                            quantity = _extract_quantity(title)
+                            quantity = flags["quantity"]
                             if quantity > 1:
                                 price = round(price / quantity, 2)
                             if price < min_price or price > max_price_config:
@@ -1576,17 +1532,9 @@ async def run_ebay_scraper(
                             "_ebay_sold_item_ids": current_item_ids,
                         }
 
-                        # Update historical entries
-                        if retry_box_id not in hist:
-                            hist[retry_box_id] = []
-                        existing_today = next(
-                            (e for e in hist[retry_box_id] if e.get("date") == today_str), None
-                        )
-                        if existing_today:
-                            for key, val in ebay_fields.items():
-                                existing_today[key] = val
-                        else:
-                            hist[retry_box_id].append({"date": today_str, **ebay_fields})
+                        # Update historical entries (written by flush() below)
+                        entry, _ = history_store.checkout(retry_box_id, today_str)
+                        entry.update(ebay_fields)
 
                         # Write to database
                         write_ebay_to_db(retry_box_id, today_str, ebay_fields, filtered_items)
@@ -1605,9 +1553,8 @@ async def run_ebay_scraper(
             await browser.close()
 
     # Save updated historical entries
-    with open(HISTORICAL_FILE, "w") as f:
-        json.dump(hist, f, indent=2)
-    logger.info(f"Saved eBay data to {HISTORICAL_FILE}")
+    written = history_store.flush()
+    logger.info(f"Saved eBay data for {written} entries to {history_store.path}")
 
     # Check for too many failures
     failure_rate = len(errors) / len(box_items) if box_items else 0
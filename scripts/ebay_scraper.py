@@ -21,8 +21,10 @@ We pace at ~1 request per gaussian(8s, 2.5s) with distraction pauses mixed in.
 from __future__ import annotations
 
 import asyncio
+import io
 import json
 import logging
+import os
 import random
 import re
 import statistics
@@ -30,15 +32,35 @@ import sys
 import time
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterable, List, Optional
 
 # Add project root to path
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
+from app.services.title_classifier import TitleClassifier, classify_many, lot_quantity
+
 logger = logging.getLogger(__name__)
 
-HISTORICAL_FILE = project_root / "data" / "historical_entries.json"
+# HTML parsers for parse_sold_listings_html (fastest installed one is used)
+try:
+    from selectolax.lexbor import LexborHTMLParser as SelectolaxHTMLParser
+    SELECTOLAX_AVAILABLE = True
+except ImportError:
+    SELECTOLAX_AVAILABLE = False
+
+try:
+    from lxml import etree as lxml_etree
+    LXML_AVAILABLE = True
+except ImportError:
+    LXML_AVAILABLE = False
+
+try:
+    from bs4 import BeautifulSoup
+    BS4_AVAILABLE = True
+except ImportError:
+    BS4_AVAILABLE = False
+
 DEBUG_HTML_DIR = project_root / "data" / "debug_html"
 
 # ============================================================================
@@ -363,27 +385,6 @@ EBAY_SEARCH_CONFIG: Dict[str, Dict[str, Any]] = {
 # HELPERS
 # ============================================================================
 
-def _is_excluded_title(title: str) -> bool:
-    """Check if a listing title indicates a non-booster-box item."""
-    title_lower = title.lower()
-    return any(excl in title_lower for excl in TITLE_EXCLUSIONS)
-
-
-def _is_case_listing(title: str) -> bool:
-    """Check if listing is for a case (wholesale multi-box unit), not a single box.
-
-    Cases contain 12+ booster boxes and are priced far above single-box range.
-    "Case fresh" is a condition descriptor for single boxes (pulled straight
-    from a sealed case) and should NOT be excluded.
-    """
-    t = title.lower()
-    # "case fresh" describes a single box's condition — allow it
-    if "case fresh" in t:
-        return False
-    # Match "case" as a whole word (avoids "showcase", "suitcase", etc.)
-    return bool(re.search(r'\bcase\b', t))
-
-
 def _parse_price(price_str: str) -> Optional[int]:
     """Parse a price string like '$89.99' or 'US $89.99' to cents (int)."""
     if not price_str:
@@ -553,7 +554,175 @@ class BrowserSession:
 # HTML PARSING
 # ============================================================================
 
-def parse_sold_listings_html(html: str) -> List[Dict[str, Any]]:
+# ============================================================================
+# SOLD LISTINGS HTML PARSING — pluggable backends, one output contract
+# ============================================================================
+#
+# Each backend yields the sold rows (<tr data-price=...>) of a 130point response
+# and extracts the same raw fields from them; _build_sold_row() turns those into
+# the output dict, so every backend returns identical results.
+#
+#   selectolax  C (lexbor) DOM + CSS selectors — fastest
+#   lxml        iterparse over <tr> elements, each row cleared once read, so the
+#               full document is never held in memory
+#   bs4         BeautifulSoup html.parser — pure-Python fallback
+#
+# Default order is selectolax → lxml → bs4 (first one installed). Force one with
+# SOLD_HTML_PARSER=<backend> or parse_sold_listings_html(html, backend=...).
+# benchmarks/bench_sold_html_parser.py compares speed and output parity.
+
+SOLD_HTML_BACKENDS = ("selectolax", "lxml", "bs4")
+
+
+def _available_sold_html_backends() -> List[str]:
+    available = {"selectolax": SELECTOLAX_AVAILABLE, "lxml": LXML_AVAILABLE, "bs4": BS4_AVAILABLE}
+    return [b for b in SOLD_HTML_BACKENDS if available[b]]
+
+
+def _resolve_sold_html_backend(backend: Optional[str] = None) -> Optional[str]:
+    available = _available_sold_html_backends()
+    requested = (backend or os.environ.get("SOLD_HTML_PARSER") or "auto").lower()
+    if requested in available:
+        return requested
+    if requested != "auto":
+        logger.warning(f"Sold HTML parser '{requested}' not available — using {available[0] if available else 'none'}")
+    return available[0] if available else None
+
+
+def _build_sold_row(
+    data_price: Optional[str],
+    data_currency: Optional[str],
+    title: Optional[str],
+    item_url: str,
+    sale_type: Optional[str],
+    date_text: Optional[str],
+) -> Optional[Dict[str, Any]]:
+    """Output dict for one sold row, or None if the row is unusable."""
+    # ── Price from data-price attribute (most reliable) ──
+    if not data_price:
+        return None
+    try:
+        price_dollars = float(data_price)
+        price_cents = int(round(price_dollars * 100))
+    except (ValueError, TypeError):
+        return None
+
+    # Skip non-USD for now
+    if data_currency and data_currency.upper() != "USD":
+        return None
+
+    # ── Title + eBay URL from #titleText a ──
+    if not title:
+        return None
+
+    # ── Date from #dateText ──
+    sold_date = None
+    if date_text is not None:
+        # Strip the "Date:" label prefix
+        sold_date = _parse_date(re.sub(r'^Date:\s*', '', date_text))
+
+    return {
+        "title": title,
+        "sold_price_cents": price_cents,
+        "sold_date": sold_date,
+        "item_url": item_url,
+        "ebay_item_id": _extract_ebay_item_id(item_url),
+        "sale_type": sale_type,
+    }
+
+
+# ── bs4 ─────────────────────────────────────────────────────────────────────
+
+def _iter_sold_rows_bs4(html: str):
+    soup = BeautifulSoup(html, "html.parser")
+    # Find rows with data-price attribute (the real sold listing rows)
+    rows = soup.find_all("tr", attrs={"data-price": True})
+    if not rows:
+        # Fallback: try the table directly
+        table = soup.find("table", id=re.compile(r"salesDataTable"))
+        if table:
+            rows = table.find_all("tr", attrs={"data-price": True})
+    yield from rows
+
+
+def _sold_fields_bs4(row) -> tuple:
+    title_span = row.find("span", id="titleText")
+    title_link = title_span.find("a") if title_span else None
+    sale_type_el = row.find("span", id="auctionLabel")
+    date_el = row.find("span", id="dateText")
+    return (
+        row.get("data-price"),
+        row.get("data-currency", "USD"),
+        title_link.get_text(strip=True) if title_link else None,
+        title_link.get("href", "") if title_link else "",
+        sale_type_el.get_text(strip=True) if sale_type_el else None,
+        date_el.get_text(strip=True) if date_el else None,
+    )
+
+
+# ── selectolax ──────────────────────────────────────────────────────────────
+
+def _iter_sold_rows_selectolax(html: str):
+    yield from SelectolaxHTMLParser(html).css("tr[data-price]")
+
+
+def _sold_fields_selectolax(row) -> tuple:
+    title_link = row.css_first("span#titleText a")
+    sale_type_el = row.css_first("span#auctionLabel")
+    date_el = row.css_first("span#dateText")
+    attrs = row.attributes
+    return (
+        attrs.get("data-price"),
+        attrs.get("data-currency", "USD"),
+        title_link.text(deep=True, separator="", strip=True) if title_link else None,
+        (title_link.attributes.get("href") or "") if title_link else "",
+        sale_type_el.text(deep=True, separator="", strip=True) if sale_type_el else None,
+        date_el.text(deep=True, separator="", strip=True) if date_el else None,
+    )
+
+
+# ── lxml ────────────────────────────────────────────────────────────────────
+
+def _lxml_text(el) -> str:
+    return "".join(t.strip() for t in el.itertext())
+
+
+def _iter_sold_rows_lxml(html: str):
+    source = io.BytesIO(html.encode("utf-8"))
+    for _, row in lxml_etree.iterparse(source, events=("end",), tag="tr", html=True, encoding="utf-8"):
+        if row.get("data-price") is not None:
+            yield row
+        # Free the row and everything parsed before it
+        row.clear()
+        parent = row.getparent()
+        if parent is not None:
+            while row.getprevious() is not None:
+                del parent[0]
+
+
+def _sold_fields_lxml(row) -> tuple:
+    title_span = row.find(".//span[@id='titleText']")
+    title_link = title_span.find(".//a") if title_span is not None else None
+    sale_type_el = row.find(".//span[@id='auctionLabel']")
+    date_el = row.find(".//span[@id='dateText']")
+    return (
+        row.get("data-price"),
+        row.get("data-currency", "USD"),
+        _lxml_text(title_link) if title_link is not None else None,
+        title_link.get("href", "") if title_link is not None else "",
+        _lxml_text(sale_type_el) if sale_type_el is not None else None,
+        _lxml_text(date_el) if date_el is not None else None,
+    )
+
+
+_SOLD_HTML_PARSERS = {
+    "selectolax": (_iter_sold_rows_selectolax, _sold_fields_selectolax),
+    "lxml": (_iter_sold_rows_lxml, _sold_fields_lxml),
+    "bs4": (_iter_sold_rows_bs4, _sold_fields_bs4),
+}
+
+
+def parse_sold_listings_html(html: str, backend: Optional[str] = None) -> List[Dict[str, Any]]:
     """
     Parse sold listings HTML from 130point.com backend.
 
@@ -571,86 +740,30 @@ def parse_sold_listings_html(html: str) -> List[Dict[str, Any]]:
           </td>
         </tr>
 
+    backend: "selectolax", "lxml" or "bs4" (default: fastest installed, see above).
+
     Returns list of dicts with: title, sold_price_cents, sold_date, item_url,
     ebay_item_id, sale_type
     """
-    try:
-        from bs4 import BeautifulSoup
-    except ImportError:
-        logger.error("BeautifulSoup not installed. Run: pip install beautifulsoup4")
+    name = _resolve_sold_html_backend(backend)
+    if name is None:
+        logger.error("No HTML parser installed. Run: pip install selectolax (or lxml / beautifulsoup4)")
         return []
+    iter_rows, extract = _SOLD_HTML_PARSERS[name]
 
-    soup = BeautifulSoup(html, "html.parser")
     results = []
-
-    # Find rows with data-price attribute (the real sold listing rows)
-    rows = soup.find_all("tr", attrs={"data-price": True})
-    if not rows:
-        # Fallback: try the table directly
-        table = soup.find("table", id=re.compile(r"salesDataTable"))
-        if table:
-            rows = table.find_all("tr", attrs={"data-price": True})
-
-    logger.debug(f"Found {len(rows)} sold listing rows with data-price attr")
-
-    for row in rows:
+    seen = 0
+    for row in iter_rows(html):
+        seen += 1
         try:
-            # ── Price from data-price attribute (most reliable) ──
-            data_price = row.get("data-price")
-            data_currency = row.get("data-currency", "USD")
-            if not data_price:
-                continue
-
-            try:
-                price_dollars = float(data_price)
-                price_cents = int(round(price_dollars * 100))
-            except (ValueError, TypeError):
-                continue
-
-            # Skip non-USD for now
-            if data_currency and data_currency.upper() != "USD":
-                continue
-
-            # ── Title + eBay URL from #titleText a ──
-            title_span = row.find("span", id="titleText")
-            if not title_span:
-                continue
-            title_link = title_span.find("a")
-            if not title_link:
-                continue
-
-            title = title_link.get_text(strip=True)
-            if not title:
-                continue
-            item_url = title_link.get("href", "")
-
-            # ── Sale type from #auctionLabel ──
-            sale_type_el = row.find("span", id="auctionLabel")
-            sale_type = sale_type_el.get_text(strip=True) if sale_type_el else None
-
-            # ── Date from #dateText ──
-            date_el = row.find("span", id="dateText")
-            sold_date = None
-            if date_el:
-                date_text = date_el.get_text(strip=True)
-                # Strip the "Date:" label prefix
-                date_text = re.sub(r'^Date:\s*', '', date_text)
-                sold_date = _parse_date(date_text)
-
-            ebay_item_id = _extract_ebay_item_id(item_url)
-
-            results.append({
-                "title": title,
-                "sold_price_cents": price_cents,
-                "sold_date": sold_date,
-                "item_url": item_url,
-                "ebay_item_id": ebay_item_id,
-                "sale_type": sale_type,
-            })
+            parsed = _build_sold_row(*extract(row))
+            if parsed:
+                results.append(parsed)
         except Exception as e:
             logger.debug(f"Error parsing sold listing row: {e}")
             continue
 
+    logger.debug(f"Found {seen} sold listing rows with data-price attr ({name})")
     return results
 
 
@@ -658,47 +771,56 @@ def parse_sold_listings_html(html: str) -> List[Dict[str, Any]]:
 # ACTIVE LISTINGS QUALITY CHECKS (mirrors TCGplayer scraper filters)
 # ============================================================================
 
-def _is_japanese(title: str) -> bool:
-    """Check if listing is Japanese/Asian/non-English product."""
-    t = title.lower()
-    return any(excl in t for excl in JAPANESE_EXCLUSIONS)
-
-
-def _is_non_us(title: str) -> bool:
-    """Check if listing is from a non-US seller/region."""
-    t = title.lower()
-    # Match " uk " as a standalone word (avoid matching inside words)
-    if re.search(r'\buk\b', t):
-        return True
-    return any(kw in t for kw in NON_US_KEYWORDS)
-
-
-def _is_suspicious(title: str) -> bool:
-    """Check for damaged/opened/resealed indicators."""
-    t = title.lower()
-    # Hard excludes are never overridden by positive indicators
-    if any(kw in t for kw in HARD_EXCLUDE_KEYWORDS):
-        return True
-    # Check regular suspicious keywords
-    if any(kw in t for kw in SUSPICIOUS_KEYWORDS):
-        # Exception: "booster box" + "sealed" (but NOT "unsealed") overrides ambiguous keywords
-        has_positive = any(pos in t for pos in POSITIVE_INDICATORS)
-        # Use word boundary check: "sealed" but not "unsealed", "resealed", etc.
-        has_sealed = bool(re.search(r'\bsealed\b', t)) and not re.search(r'\b(un|re)sealed\b', t)
-        if has_positive and has_sealed:
-            return False
-        return True
-    return False
-
-
-def _is_valid_sealed_box(title: str) -> bool:
-    """Title must contain 'sealed' AND 'box' (in any variation).
-
-    This is the core inclusion filter per user spec — only count listings
-    that explicitly mention both 'sealed' and 'box'/'booster box'.
+TITLE_RULES = TitleClassifier({
+    "excluded": TITLE_EXCLUSIONS,
+    "japanese": JAPANESE_EXCLUSIONS,
+    "non_us": NON_US_KEYWORDS,
+    "suspicious": SUSPICIOUS_KEYWORDS,
+    "hard_exclude": HARD_EXCLUDE_KEYWORDS,
+    "positive": POSITIVE_INDICATORS,
+    "case_fresh": ["case fresh"],
+    "sealed": ["sealed"],
+    "box": ["box"],
+}, quantity=lot_quantity, version="1")  # bump version when helpers called by classify_title() change
+
+
+def classify_title(title: str) -> Dict[str, Any]:
+    """All quality flags for a listing title plus its multi-box quantity (one scan).
+
+    excluded          TITLE_EXCLUSIONS keyword (sold listings)
+    valid_sealed_box  contains 'sealed' AND 'box' — core inclusion filter for
+                      active listings, per user spec
+    case              wholesale case (whole word "case"); "case fresh" describes a
+                      single box pulled from a sealed case and is allowed
+    japanese          Japanese/Asian/non-English product
+    non_us            non-US seller/region (standalone "uk" or NON_US_KEYWORDS)
+    suspicious        damaged/opened/resealed; "booster box" + "sealed" (but not
+                      un/resealed) overrides ambiguous keywords, hard excludes never
+    quantity          multi-box lot size (1 for a single box)
+    normalized_title  grouping key for the title+price dedup (_normalize_title)
     """
-    t = title.lower()
-    return "sealed" in t and "box" in t
+    m = TITLE_RULES.match(title)
+    flags = m.flags
+    words = m.words
+    suspicious = flags["hard_exclude"]
+    if not suspicious and flags["suspicious"]:
+        has_sealed = "sealed" in words and "unsealed" not in words and "resealed" not in words
+        suspicious = not (flags["positive"] and has_sealed)
+    return {
+        "excluded": flags["excluded"],
+        "valid_sealed_box": flags["sealed"] and flags["box"],
+        "case": "case" in words and not flags["case_fresh"],
+        "japanese": flags["japanese"],
+        "non_us": "uk" in words or flags["non_us"],
+        "suspicious": suspicious,
+        "quantity": m.quantity,
+        "normalized_title": _normalize_title(title),
+    }
+
+
+def classify_titles(titles: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+    """classify_title() for a batch, served from the cross-day classification memo."""
+    return classify_many("ebay_130point", TITLE_RULES, titles, classify_title)
 
 
 def _normalize_title(title: str) -> str:
@@ -718,49 +840,6 @@ def _normalize_title(title: str) -> str:
     return t
 
 
-def _extract_quantity(title: str) -> int:
-    """Extract multi-box quantity from listing title.
-
-    Detects patterns like "lot of 2", "2x", "x2", "2 boxes", "set of 2",
-    "bundle of 2", "2 box lot". Returns 1 if no multi-box pattern found.
-    Capped at 6 to avoid false positives from product codes (OP-01, EB-02).
-    """
-    t = title.lower()
-
-    # Pattern 1: "lot of N", "set of N", "bundle of N"
-    m = re.search(r'(?:lot|set|bundle)\s+of\s+(\d+)', t)
-    if m:
-        qty = int(m.group(1))
-        if 2 <= qty <= 6:
-            return qty
-
-    # Pattern 2: "Nx" multiplier (e.g., "2x booster box sealed")
-    # (?:^|\s) ensures not part of product code like OP-02
-    m = re.search(r'(?:^|\s)(\d+)\s*x\s+', t)
-    if m:
-        qty = int(m.group(1))
-        if 2 <= qty <= 6:
-            return qty
-
-    # Pattern 3: "xN" suffix (e.g., "booster box x2")
-    # \b ensures word boundary before x (won't match inside "10x15")
-    m = re.search(r'\bx\s*(\d+)(?:\s|$)', t)
-    if m:
-        qty = int(m.group(1))
-        if 2 <= qty <= 6:
-            return qty
-
-    # Pattern 4: "N boxes" or "N booster boxes" or "N box lot"
-    # (?:^|\s) before digit avoids product codes (OP-02 has "-" before "02")
-    m = re.search(r'(?:^|\s)(\d+)\s+(?:booster\s+)?box(?:es)?(?:\s+lot)?', t)
-    if m:
-        qty = int(m.group(1))
-        if 2 <= qty <= 6:
-            return qty
-
-    return 1
-
-
 def filter_active_listings(
     raw: List[Dict[str, Any]],
     min_price_usd: float,
@@ -786,38 +865,41 @@ def filter_active_listings(
                 "suspicious": 0, "price_range": 0, "price_floor": 0, "dedup": 0,
                 "title_price_dedup": 0}
 
+    classified = classify_titles(item.get("title", "") for item in raw)
     for item in raw:
         title = item.get("title", "")
         price_usd = item.get("price_usd")
         ebay_id = item.get("ebay_item_id")
 
+        flags = classified[title]
+
         # 1. Must contain "sealed" AND "box"
-        if not _is_valid_sealed_box(title):
+        if not flags["valid_sealed_box"]:
             excluded["no_sealed_box"] += 1
             continue
 
         # 2. Case exclusion (allows "case fresh" single-box listings)
-        if _is_case_listing(title):
+        if flags["case"]:
             excluded["case"] += 1
             continue
 
         # 3. Japanese/non-English exclusion
-        if _is_japanese(title):
+        if flags["japanese"]:
             excluded["japanese"] += 1
             continue
 
         # 3b. Non-US seller/region exclusion
-        if _is_non_us(title):
+        if flags["non_us"]:
             excluded["non_us"] += 1
             continue
 
         # 4. Suspicious keywords
-        if _is_suspicious(title):
+        if flags["suspicious"]:
             excluded["suspicious"] += 1
             continue
 
         # 3b. Detect multi-box quantity and compute per-box price
-        qty = _extract_quantity(title)
+        qty = flags["quantity"]
         if qty > 1:
             item = item.copy()
             shipping_usd = item.get("shipping_usd") or 0
@@ -847,7 +929,7 @@ def filter_active_listings(
             seen_ids.add(ebay_id)
 
         # 7. Secondary dedup by price + normalized title (seller proxy)
-        norm_title = _normalize_title(title)
+        norm_title = flags["normalized_title"]
         tp_key = f"{price_usd:.2f}|{norm_title}" if price_usd else None
         if tp_key:
             if tp_key in seen_title_price:
@@ -1093,29 +1175,31 @@ def filter_sold_listings(
     excluded = {"title_exclusion": 0, "case": 0, "japanese": 0, "non_us": 0,
                 "suspicious": 0, "price_range": 0, "dedup": 0, "title_price_dedup": 0}
 
+    classified = classify_titles(item.get("title", "") for item in raw)
     for item in raw:
         title = item.get("title", "")
         price_cents = item.get("sold_price_cents")
         ebay_id = item.get("ebay_item_id")
 
-        if _is_excluded_title(title):
+        flags = classified[title]
+        if flags["excluded"]:
             excluded["title_exclusion"] += 1
             continue
-        if _is_case_listing(title):
+        if flags["case"]:
             excluded["case"] += 1
             continue
-        if _is_japanese(title):
+        if flags["japanese"]:
             excluded["japanese"] += 1
             continue
-        if _is_non_us(title):
+        if flags["non_us"]:
             excluded["non_us"] += 1
             continue
-        if _is_suspicious(title):
+        if flags["suspicious"]:
             excluded["suspicious"] += 1
             continue
 
         # 3b. Detect multi-box quantity and compute per-box price
-        qty = _extract_quantity(title)
+        qty = flags["quantity"]
         if qty > 1:
             item = item.copy()
             shipping_cents = item.get("shipping_cents") or 0
@@ -1139,7 +1223,7 @@ def filter_sold_listings(
             seen_ids.add(ebay_id)
         # Secondary dedup: price + normalized title (seller proxy)
         price_usd = (price_cents / 100.0) if price_cents else 0
-        norm_title = _normalize_title(title)
+        norm_title = flags["normalized_title"]
         tp_key = f"{price_usd:.2f}|{norm_title}"
         if tp_key in seen_title_price:
             excluded["title_price_dedup"] += 1
@@ -1258,6 +1342,65 @@ def compute_ebay_fields(
     }
 
 
+def _active_snapshot_rows(active: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Every priced active listing, as listing snapshot rows."""
+    from app.services.listing_snapshots import ebay_listing_id
+
+    return [
+        {
+            "listing_id": ebay_listing_id(item),
+            "price": item["price_usd"],
+            "quantity": item.get("quantity", 1),
+            "raw": {"title": item.get("title"), "item_url": item.get("item_url")},
+        }
+        for item in active
+        if item.get("price_usd") is not None
+    ]
+
+
+def _active_diff_cap(
+    active: List[Dict[str, Any]],
+    tcg_floor_price: Optional[float] = None,
+    yesterday_tcg_floor: Optional[float] = None,
+) -> Optional[float]:
+    """Fixed cap for the listing diff: the 20% window (same reference floor as
+    compute_ebay_fields), widened to yesterday's window when the floor dropped."""
+    prices = [item["price_usd"] for item in active if item.get("price_usd") is not None]
+    if not prices:
+        return None
+    ref_floor = tcg_floor_price if tcg_floor_price and tcg_floor_price > 0 else min(prices)
+    return round(max(ref_floor, yesterday_tcg_floor or 0) * 1.20, 2)
+
+
+def snapshot_active_listings(
+    today: str,
+    active_by_box: Dict[str, List[Dict[str, Any]]],
+    tcg_floors: Dict[str, float],
+    yesterday_tcg_floors: Optional[Dict[str, Optional[float]]] = None,
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Write today's active listings per box to ebay_active_listings_raw and diff
+    against yesterday's by item id under one fixed 20% cap, in one query
+    (app/services/listing_snapshots.py). Returns {box_id: diff}; boxes with no
+    active listings today are not snapshotted (a failed scrape must not read as
+    every listing removed).
+    """
+    try:
+        from app.services.listing_snapshots import diff_snapshots, write_snapshot
+    except ImportError:
+        return {}
+    yesterday_tcg_floors = yesterday_tcg_floors or {}
+    written = [
+        box_id for box_id, active in active_by_box.items()
+        if active and write_snapshot("ebay", box_id, today, _active_snapshot_rows(active)) >= 0
+    ]
+    caps = {
+        box_id: _active_diff_cap(active_by_box[box_id], tcg_floors.get(box_id), yesterday_tcg_floors.get(box_id))
+        for box_id in written
+    }
+    return diff_snapshots("ebay", today, box_ids=written, max_prices=caps) if written else {}
+
+
 # ============================================================================
 # DB WRITING
 # ============================================================================
@@ -1324,7 +1467,6 @@ async def run_ebay_scraper(
     Returns:
         Summary dict: {results: int, errors: list, date: str}
     """
-    import os
     skip_active = skip_active or os.environ.get("SKIP_EBAY_ACTIVE", "").lower() in ("1", "true", "yes")
 
     today = datetime.now().strftime("%Y-%m-%d")
@@ -1484,6 +1626,12 @@ async def run_ebay_scraper(
             logger.warning(f"Phase 1b-B (active listings) failed (non-fatal): {e}")
             errors.append(f"Active listings: {e}")
 
+    # Listing-identity diff of today's active listings vs yesterday's (one query)
+    active_diff = snapshot_active_listings(
+        today, active_data, today_tcg_floors,
+        {bid: yd.get("floor_price_usd") for bid, yd in yesterday_ebay.items()},
+    )
+
     # ── Merge sold + active into JSON and DB ───────────────────────
     for box_id, config in box_items:
         filtered_sold = sold_data.get(box_id, [])
@@ -1504,13 +1652,24 @@ async def run_ebay_scraper(
         ebay_fields["_ebay_sold_item_ids"] = current_item_ids
 
         # Compute eBay active listing delta (mirrors TCGplayer boxes_added_today)
-        # Includes: floor-drop compensation, inflated count guard
+        # Exact from the listing diff when yesterday has a snapshot; otherwise
+        # count delta with floor-drop compensation and inflated count guard
         ebay_active_count = ebay_fields.get("ebay_active_listings")
         yd = yesterday_ebay.get(box_id, {})
         yesterday_ebay_active = yd.get("ebay_active_listings")
         yesterday_tcg_floor = yd.get("floor_price_usd")
+        diff = active_diff.get(box_id)
 
-        if yesterday_ebay_active is None:
+        if diff and diff["has_previous"]:
+            # Net, like the count delta below: added = net change, removed = net decrease
+            net = diff["net_units"]
+            ebay_fields["ebay_boxes_added_today"] = net
+            ebay_fields["ebay_boxes_removed_today"] = max(0, -net)
+            logger.info(
+                f"  Listing diff for {config['name']}: +{diff['added_units']} / -{diff['removed_units']} boxes, "
+                f"{diff['repriced']} repriced"
+            )
+        elif yesterday_ebay_active is None:
             # No yesterday data — can't compute delta
             ebay_fields["ebay_boxes_added_today"] = None
             ebay_fields["ebay_boxes_removed_today"] = None
@@ -1654,7 +1813,8 @@ async def run_ebay_active_scraper(
             box_items, dump_html=dump_html,
         )
 
-        # Apply quality filters and update JSON/DB for each box
+        # Apply quality filters to each box's active listings
+        filtered_by_box: Dict[str, List[Dict[str, Any]]] = {}
         for box_id, config in box_items:
             raw = raw_active.get(box_id, [])
             name = config["name"]
@@ -1677,6 +1837,16 @@ async def run_ebay_active_scraper(
                 tcg_floor_price=tcg_floor,
             )
             logger.info(f"  {name}: {len(raw)} raw -> {len(filtered)} filtered active listings")
+            filtered_by_box[box_id] = filtered
+
+        # Listing-identity diff of today's active listings vs yesterday's (one query)
+        active_diff = snapshot_active_listings(today, filtered_by_box, _active_tcg_floors)
+
+        # Update DB for each box
+        for box_id, config in box_items:
+            filtered = filtered_by_box.get(box_id)
+            name = config["name"]
+            tcg_floor = _active_tcg_floors.get(box_id)
 
             if not filtered:
                 continue
@@ -1723,10 +1893,16 @@ async def run_ebay_active_scraper(
                 "ebay_active_low_price": round(min(active_prices), 2) if active_prices else None,
             }
 
-            # Calculate delta from yesterday (DB-backed)
+            # Calculate delta from yesterday: exact from the listing diff when
+            # yesterday has a snapshot, else from yesterday's count (DB-backed)
             yesterday_ebay_active = _active_yesterday_ebay.get(box_id)
+            diff = active_diff.get(box_id)
 
-            if yesterday_ebay_active is not None and within_20pct is not None:
+            if diff and diff["has_previous"]:
+                net = diff["net_units"]
+                active_fields["ebay_boxes_added_today"] = net
+                active_fields["ebay_boxes_removed_today"] = max(0, -net)
+            elif yesterday_ebay_active is not None and within_20pct is not None:
                 delta = within_20pct - yesterday_ebay_active
                 active_fields["ebay_boxes_added_today"] = delta
                 active_fields["ebay_boxes_removed_today"] = max(0, -delta)
@@ -10,20 +10,25 @@ Cost: $25/month SerpApi Starter plan (1,000 searches/month)
   - 14 high-volume × sold daily = 420/month
   - 4 low-volume × sold every 3rd day = 40/month
   - Total: ~1,000/month
+Usage is metered in api_budget_ledger (app/services/api_budget.py); searches
+beyond SERPAPI_MONTHLY_BUDGET are refused rather than billed.
+
+Searches run concurrently (SERPAPI_CONCURRENCY in flight over one AsyncClient),
+so the phase takes a few round trips instead of the sum of ~36.
 
 Run standalone: python scripts/ebay_serpapi.py [--debug <box_id>]
 Called by daily_refresh.py as Phase 1b-SerpApi.
 """
 
+import asyncio
 import json
 import logging
 import re
 import statistics
 import sys
-import time
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, Iterable, List, Optional
 
 import httpx
 
@@ -34,12 +39,8 @@ from app.config import settings
 from scripts.ebay_apify import (
     TITLE_EXCLUSIONS,
     NON_US_KEYWORDS,
-    detect_lot_quantity,
-    is_excluded_title,
-    is_non_us,
-    is_case_listing,
-    is_pack_listing,
-    is_break_listing,
+    classify_titles,
+    is_rejected_title,
     extract_item_id,
     parse_date,
 )
@@ -173,6 +174,38 @@ SERPAPI_BOX_CONFIG: Dict[str, Dict[str, Any]] = {
 # Track total searches for budget logging
 _searches_used = 0
 
+# Provider key in api_budget_ledger
+SERPAPI_PROVIDER = "serpapi"
+
+
+def _is_list(results: Any) -> bool:
+    """Cache every successful search, including ones with zero results."""
+    return isinstance(results, list)
+
+
+def _search_params(
+    query: str,
+    search_type: str,
+    min_price: int,
+    max_price: int,
+    api_key: str,
+) -> Dict[str, Any]:
+    params: Dict[str, Any] = {
+        "engine": "ebay",
+        "api_key": api_key,
+        "_nkw": query,
+        "LH_ItemCondition": "1000",    # New condition
+        "LH_PrefLoc": "1",             # US sellers only (1=Domestic)
+        "_udlo": str(min_price),
+        "_udhi": str(max_price),
+        "_ipg": "200",                 # 200 results per page
+    }
+
+    if search_type == "sold":
+        params["show_only"] = "Sold"
+        params["_sop"] = "10"  # Time: newly listed (most recent sales first)
+    return params
+
 
 def serpapi_search(
     query: str,
@@ -182,7 +215,8 @@ def serpapi_search(
     api_key: str,
 ) -> List[Dict[str, Any]]:
     """
-    Execute a SerpApi eBay search.
+    Execute a single blocking SerpApi eBay search (one-off use; Phase 1b uses
+    AsyncSerpApiClient). Draws from the same monthly budget ledger.
 
     Args:
         query: eBay search terms
@@ -195,40 +229,114 @@ def serpapi_search(
         List of organic_results from SerpApi response
     """
     global _searches_used
+    from app.services.api_budget import refund_call, reserve_call
+    from app.services.pipeline_telemetry import count_call
+    from app.services.response_cache import response_cache
 
-    params: Dict[str, Any] = {
-        "engine": "ebay",
-        "api_key": api_key,
-        "_nkw": query,
-        "LH_ItemCondition": "1000",    # New condition
-        "LH_PrefLoc": "1",             # US sellers only (1=Domestic)
-        "_udlo": str(min_price),
-        "_udhi": str(max_price),
-        "_ipg": "200",                 # 200 results per page
-    }
-
-    if search_type == "sold":
-        params["show_only"] = "Sold"
-        params["_sop"] = "10"  # Time: newly listed (most recent sales first)
+    params = _search_params(query, search_type, min_price, max_price, api_key)
+    cached = response_cache.lookup(SERPAPI_PROVIDER, params)
+    if cached is not None:
+        return cached
 
+    reserve_call(SERPAPI_PROVIDER, settings.serpapi_monthly_budget)
     try:
         resp = httpx.get(SERPAPI_URL, params=params, timeout=30.0)
         resp.raise_for_status()
         data = resp.json()
         _searches_used += 1
+        count_call(SERPAPI_PROVIDER, cost_units=1)
 
         results = data.get("organic_results", [])
         logger.debug(f"  SerpApi returned {len(results)} results for '{query}' ({search_type})")
+        response_cache.store(SERPAPI_PROVIDER, params, results, store_if=_is_list)
         return results
 
     except httpx.HTTPStatusError as e:
+        refund_call(SERPAPI_PROVIDER)
         logger.error(f"  SerpApi HTTP error: {e.response.status_code} - {e.response.text[:200]}")
         raise
     except Exception as e:
+        refund_call(SERPAPI_PROVIDER)
         logger.error(f"  SerpApi request failed: {e}")
         raise
 
 
+class AsyncSerpApiClient:
+    """
+    Concurrent SerpApi searches over one shared httpx.AsyncClient (connection
+    reuse) with at most `concurrency` requests in flight. Every search reserves
+    a call in the monthly budget ledger first and is refused (BudgetExceededError)
+    once the cap is reached; failed requests are refunded.
+
+        async with AsyncSerpApiClient(api_key) as client:
+            results = await client.search(query, "active", 20, 500)
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        concurrency: Optional[int] = None,
+        monthly_budget: Optional[int] = None,
+        timeout: float = 30.0,
+    ):
+        self.api_key = api_key
+        self.concurrency = max(1, concurrency or settings.serpapi_concurrency)
+        self.monthly_budget = monthly_budget if monthly_budget is not None else settings.serpapi_monthly_budget
+        self.timeout = timeout
+        self.searches_used = 0
+        self.cache_hits = 0
+        self._sem = asyncio.Semaphore(self.concurrency)
+        self._client: Optional[httpx.AsyncClient] = None
+
+    async def __aenter__(self) -> "AsyncSerpApiClient":
+        self._client = httpx.AsyncClient(
+            timeout=self.timeout,
+            limits=httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency),
+        )
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def search(self, query: str, search_type: str, min_price: int, max_price: int) -> List[Dict[str, Any]]:
+        global _searches_used
+        from app.services.api_budget import refund_call, reserve_call
+        from app.services.pipeline_telemetry import count_call
+        from app.services.response_cache import response_cache
+
+        params = _search_params(query, search_type, min_price, max_price, self.api_key)
+        # Replayed searches cost nothing and skip the budget ledger
+        cached = response_cache.lookup(SERPAPI_PROVIDER, params)
+        if cached is not None:
+            self.cache_hits += 1
+            return cached
+
+        async with self._sem:
+            # Ledger calls are sync DB round trips; keep them off the event loop
+            await asyncio.to_thread(reserve_call, SERPAPI_PROVIDER, self.monthly_budget)
+            try:
+                resp = await self._client.get(SERPAPI_URL, params=params)
+                resp.raise_for_status()
+                data = resp.json()
+            except httpx.HTTPStatusError as e:
+                await asyncio.to_thread(refund_call, SERPAPI_PROVIDER)
+                logger.error(f"  SerpApi HTTP error: {e.response.status_code} - {e.response.text[:200]}")
+                raise
+            except Exception as e:
+                await asyncio.to_thread(refund_call, SERPAPI_PROVIDER)
+                logger.error(f"  SerpApi request failed: {e}")
+                raise
+        self.searches_used += 1
+        _searches_used += 1
+        count_call(SERPAPI_PROVIDER, cost_units=1)
+        results = data.get("organic_results", [])
+        logger.debug(f"  SerpApi returned {len(results)} results for '{query}' ({search_type})")
+        response_cache.store(SERPAPI_PROVIDER, params, results, store_if=_is_list)
+        return results
+
+
 def filter_serpapi_results(
     results: List[Dict[str, Any]],
     search_type: str,
@@ -253,6 +361,7 @@ def filter_serpapi_results(
     seen_ids: set = set()
     filtered: List[Dict[str, Any]] = []
     rejected = 0
+    classified = classify_titles(item.get("title", "") for item in results)
 
     for item in results:
         title = item.get("title", "")
@@ -281,33 +390,14 @@ def filter_serpapi_results(
             rejected += 1
             continue
 
-        # Title exclusions
-        if is_excluded_title(title):
-            rejected += 1
-            continue
-
-        # Non-US check
-        if is_non_us(title):
-            rejected += 1
-            continue
-
-        # Case check
-        if is_case_listing(title):
-            rejected += 1
-            continue
-
-        # Pack check
-        if is_pack_listing(title):
-            rejected += 1
-            continue
-
-        # Break/rip check
-        if is_break_listing(title):
+        # Title exclusions, non-US, case, pack and break/rip checks (one scan)
+        flags = classified[title]
+        if is_rejected_title(flags):
             rejected += 1
             continue
 
         # Lot quantity detection and price normalization
-        quantity = detect_lot_quantity(title)
+        quantity = flags["quantity"]
         unit_price = price / quantity if quantity > 1 else price
 
         # Price floor check
@@ -414,6 +504,40 @@ def load_yesterday_ebay_active() -> Dict[str, Optional[int]]:
     return counts
 
 
+def snapshot_active_listings(
+    box_id: str,
+    filtered: List[Dict[str, Any]],
+    max_price: Optional[float],
+    today: str,
+) -> Optional[Dict[str, Any]]:
+    """
+    Write today's filtered active listings to ebay_active_listings_raw and diff
+    them against yesterday's by item id under max_price (app/services/listing_snapshots.py).
+    Returns the box's diff; None with no listings today (a failed search must
+    not read as every listing removed) or when the snapshot could not be written.
+    """
+    if not filtered:
+        return None
+    try:
+        from app.services.listing_snapshots import diff_snapshots, ebay_listing_id, write_snapshot
+    except ImportError:
+        return None
+    rows = [
+        {
+            "listing_id": ebay_listing_id(item),
+            "price": item["price"],
+            "quantity": item.get("lot_quantity", 1),
+            "seller": item.get("seller"),
+            "raw": {"title": item.get("title"), "item_url": item.get("item_url")},
+        }
+        for item in filtered
+        if item.get("price")
+    ]
+    if write_snapshot("ebay", box_id, today, rows) < 0:
+        return None
+    return diff_snapshots("ebay", today, box_ids=[box_id], max_prices={box_id: max_price}).get(box_id)
+
+
 def process_active_results(
     box_id: str,
     filtered: List[Dict[str, Any]],
@@ -424,6 +548,9 @@ def process_active_results(
     """
     Process filtered active listings and write metrics to DB.
 
+    Added / removed come from the listing-identity diff against yesterday's
+    snapshot; boxes without one fall back to the count delta.
+
     Returns dict of computed metrics.
     """
     from app.services.ebay_metrics_writer import upsert_ebay_daily_metrics
@@ -432,6 +559,7 @@ def process_active_results(
 
     # Count within 20% of TCG floor (for active_listings_count)
     ref_floor = tcg_floor_price if tcg_floor_price and tcg_floor_price > 0 else (min(prices) if prices else None)
+    threshold = None
     if ref_floor and ref_floor > 0:
         threshold = ref_floor * 1.20
         within_20pct = sum(1 for p in prices if p <= threshold)
@@ -441,10 +569,16 @@ def process_active_results(
     median_price = round(statistics.median(prices), 2) if prices else None
     low_price = round(min(prices), 2) if prices else None
 
-    # Delta from yesterday
+    # Delta from yesterday: exact from the listing diff (same 20% cap on both
+    # days) when yesterday has a snapshot, else from yesterday's count
     listings_added = None
     listings_removed = None
-    if yesterday_active_count is not None and within_20pct is not None:
+    diff = snapshot_active_listings(box_id, filtered, threshold, today)
+    if diff and diff["has_previous"]:
+        # Net, like the count delta below: added = net change, removed = net decrease
+        listings_added = diff["net_units"]
+        listings_removed = max(0, -listings_added)
+    elif yesterday_active_count is not None and within_20pct is not None:
         delta = within_20pct - yesterday_active_count
         listings_added = delta
         listings_removed = max(0, -delta)
@@ -532,22 +666,45 @@ def process_sold_results(
     }
 
 
+def _box_price_range(config: Dict[str, Any], tcg_floor: Optional[float]) -> tuple:
+    """Dynamic price range based on TCG floor (2x ceiling, 0.5x floor); config values as fallback."""
+    if tcg_floor and tcg_floor > 0:
+        return max(config["min_price"], int(tcg_floor * 0.5)), max(config["max_price"], int(tcg_floor * 2.0))
+    return config["min_price"], config["max_price"]
+
+
 def run_ebay_serpapi_scraper(
     debug_box_id: Optional[str] = None,
+    box_ids: Optional[Iterable[str]] = None,
+    on_box_done: Optional[Callable[..., None]] = None,
 ) -> Dict[str, Any]:
     """
     Main entry point: scrape eBay via SerpApi for all 18 boxes.
 
-    For each box:
-    1. Search active listings (always) → process and write to DB
-    2. If should_scrape_sold_today: search sold listings → process and write to DB
+    All searches (active for every box, sold where should_scrape_sold_today) are
+    issued concurrently through AsyncSerpApiClient; responses go onto a queue and
+    are filtered + written to DB as they arrive:
+    1. Active listings (always) → process_active_results
+    2. Sold listings (tiered frequency) → process_sold_results
 
     Args:
         debug_box_id: If set, only scrape this box (for testing).
+        box_ids: Only scrape these boxes (resume of a checkpointed run).
+        on_box_done: Called as on_box_done(box_id, ok, output=..., error=..., started_at=...)
+                     after each box, for pipeline checkpoints.
 
     Returns:
-        Summary dict with results, errors, date, searches_used.
+        Summary dict with results, errors, date, searches_used, budget.
     """
+    # Runs in a pipeline worker thread; asyncio.run gives it its own event loop
+    return asyncio.run(_run_ebay_serpapi_scraper(debug_box_id, box_ids, on_box_done))
+
+
+async def _run_ebay_serpapi_scraper(
+    debug_box_id: Optional[str],
+    box_ids: Optional[Iterable[str]],
+    on_box_done: Optional[Callable[..., None]],
+) -> Dict[str, Any]:
     global _searches_used
     _searches_used = 0
 
@@ -576,74 +733,99 @@ def run_ebay_serpapi_scraper(
         box_items = [(debug_box_id, SERPAPI_BOX_CONFIG[debug_box_id])]
     else:
         box_items = list(SERPAPI_BOX_CONFIG.items())
+    if box_ids is not None:
+        only = set(box_ids)
+        box_items = [(bid, cfg) for bid, cfg in box_items if bid in only]
 
-    results_count = 0
-    errors: List[str] = []
-
+    # One search job per (box, active|sold)
+    jobs: List[tuple] = []
+    boxes: Dict[str, Dict[str, Any]] = {}
     for box_id, config in box_items:
-        name = config["name"]
-        query = config["search_query"]
         tcg_floor = tcg_floors.get(box_id)
+        min_price, max_price = _box_price_range(config, tcg_floor)
+        kinds = ["active"]
+        if should_scrape_sold_today(box_id):
+            kinds.append("sold")
+        else:
+            logger.info(f"{config['name']} sold: skipped (low-volume, next scrape in {3 - datetime.now().timetuple().tm_yday % 3} days)")
+        boxes[box_id] = {
+            "name": config["name"], "tcg_floor": tcg_floor, "min_price": min_price, "max_price": max_price,
+            "remaining": len(kinds), "errors": [], "output": {},
+        }
+        jobs.extend((box_id, kind, config["search_query"]) for kind in kinds)
 
-        # Dynamic price range based on TCG floor (2x ceiling, 0.5x floor)
-        # Falls back to hardcoded config values if no TCG floor available
-        if tcg_floor and tcg_floor > 0:
-            min_price = max(config["min_price"], int(tcg_floor * 0.5))
-            max_price = max(config["max_price"], int(tcg_floor * 2.0))
+    results_count = 0
+    errors: List[str] = []
+    queue: asyncio.Queue = asyncio.Queue()
+
+    def _process(box_id: str, kind: str, raw: List[Dict[str, Any]]) -> Dict[str, Any]:
+        b = boxes[box_id]
+        filtered = filter_serpapi_results(raw, kind, b["tcg_floor"], b["min_price"], b["max_price"])
+        if kind == "active":
+            m = process_active_results(box_id, filtered, b["tcg_floor"], yesterday_active.get(box_id), today)
+            logger.info(f"  {b['name']} active: {m['active_count']} listings, floor=${m['low_price']}, delta={m['added']}")
         else:
-            min_price = config["min_price"]
-            max_price = config["max_price"]
-
-        logger.info(f"Scraping {name}" + (f" (TCG floor: ${tcg_floor:.2f})" if tcg_floor else ""))
-
-        # --- Active listings (always) ---
-        try:
-            active_raw = serpapi_search(query, "active", min_price, max_price, api_key)
-            active_filtered = filter_serpapi_results(active_raw, "active", tcg_floor, min_price, max_price)
-            active_metrics = process_active_results(
-                box_id, active_filtered, tcg_floor,
-                yesterday_active.get(box_id), today,
-            )
+            m = process_sold_results(box_id, filtered, yesterday)
             logger.info(
-                f"  Active: {active_metrics['active_count']} listings, "
-                f"floor=${active_metrics['low_price']}, "
-                f"delta={active_metrics['added']}"
+                f"  {b['name']} sold: {m['sold_count']} on {yesterday}, "
+                f"${m['volume']:.2f} volume, median=${m['median_price']}"
             )
-        except Exception as e:
-            logger.warning(f"  Active search failed for {name}: {e}")
-            errors.append(f"{name} active: {e}")
+        return m
 
-        # --- Sold listings (tiered frequency) ---
-        if should_scrape_sold_today(box_id):
+    async with AsyncSerpApiClient(api_key) as client:
+        async def fetch(box_id: str, kind: str, query: str) -> None:
+            b = boxes[box_id]
+            b.setdefault("started_at", datetime.now())
             try:
-                sold_raw = serpapi_search(query, "sold", min_price, max_price, api_key)
-                sold_filtered = filter_serpapi_results(sold_raw, "sold", tcg_floor, min_price, max_price)
-                sold_metrics = process_sold_results(box_id, sold_filtered, yesterday)
-                logger.info(
-                    f"  Sold: {sold_metrics['sold_count']} on {yesterday}, "
-                    f"${sold_metrics['volume']:.2f} volume, "
-                    f"median=${sold_metrics['median_price']}"
-                )
+                raw = await client.search(query, kind, b["min_price"], b["max_price"])
+                await queue.put((box_id, kind, raw, None))
             except Exception as e:
-                logger.warning(f"  Sold search failed for {name}: {e}")
-                errors.append(f"{name} sold: {e}")
-        else:
-            logger.info(f"  Sold: skipped (low-volume, next scrape in {3 - datetime.now().timetuple().tm_yday % 3} days)")
-
-        results_count += 1
-
-        # Small delay between boxes to be respectful to API
-        if len(box_items) > 1 and box_id != box_items[-1][0]:
-            time.sleep(0.5)
-
+                await queue.put((box_id, kind, None, e))
+
+        logger.info(f"Issuing {len(jobs)} searches for {len(boxes)} boxes ({client.concurrency} concurrent)")
+        fetchers = [asyncio.create_task(fetch(*job)) for job in jobs]
+
+        # Consume responses in arrival order; DB writes run in a worker thread so
+        # searches keep flowing while a box is processed
+        for _ in range(len(jobs)):
+            box_id, kind, raw, exc = await queue.get()
+            b = boxes[box_id]
+            if exc is None:
+                try:
+                    b["output"][kind] = await asyncio.to_thread(_process, box_id, kind, raw)
+                except Exception as e:
+                    exc = e
+            if exc is not None:
+                logger.warning(f"  {kind.capitalize()} search failed for {b['name']}: {exc}")
+                msg = f"{b['name']} {kind}: {exc}"
+                b["errors"].append(msg)
+                errors.append(msg)
+            b["remaining"] -= 1
+            if b["remaining"] == 0:
+                results_count += 1
+                if on_box_done:
+                    on_box_done(box_id, not b["errors"], output=b["output"], error="; ".join(b["errors"]) or None,
+                                started_at=b.get("started_at"))
+        await asyncio.gather(*fetchers)
+
+    from app.services.api_budget import budget_status
+    budget = budget_status(SERPAPI_PROVIDER)
     logger.info(f"Phase 1b-SerpApi complete: {results_count}/{len(box_items)} boxes, {len(errors)} errors")
-    logger.info(f"  Searches used: {_searches_used}/1000 monthly budget")
+    if client.cache_hits:
+        logger.info(f"  Replayed {client.cache_hits} searches from the response cache")
+    logger.info(
+        f"  Searches used: {_searches_used} this run, "
+        f"{budget['calls_used']}/{settings.serpapi_monthly_budget} this month"
+        + (f" ({budget['calls_refused']} refused over budget)" if budget["calls_refused"] else "")
+    )
 
     return {
         "results": results_count,
         "errors": errors,
         "date": today,
         "searches_used": _searches_used,
+        "cache_hits": client.cache_hits,
+        "budget": budget,
     }
 
 
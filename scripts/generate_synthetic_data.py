@@ -0,0 +1,574 @@
+#!/usr/bin/env python3
+"""
+Synthetic Market Data
+---------------------
+Fills a local database with a seeded, synthetic catalog for scale testing:
+
+  booster_boxes            boxes across games (game_type), staggered release dates
+  box_metrics_unified      one row per tracked day, the fields rolling_metrics writes
+  ebay_box_metrics_daily   daily eBay aggregates
+  ebay_sales_raw           individual eBay sales, last --raw-days only
+  tcg_listings_raw         daily TCGplayer listing snapshots, last --raw-days only
+  market_index_daily       computed from the generated rows (market_index_range)
+
+Per box: a log-normal floor price random walk with drift, volatility and rare
+jumps; Poisson sales driven by a per-box popularity (most days sell nothing or
+one box); listings that mean-revert around a popularity-scaled level; missing
+days (single days and multi-day scraper gaps) and a few boxes that stop being
+tracked. TCG listing snapshots come from a persistent seller pool, so
+listing_snapshots.diff_snapshots() sees realistic adds / removes / reprices.
+
+A share of boxes (--alias-rate) get a legacy alias id, like the old leaderboard
+UUIDs in app/services/historical_data.py. The pairs go to the manifest; call
+register_aliases() in-process to route them through DB_TO_LEADERBOARD_UUID_MAP.
+History stays under the DB id (box_metrics_unified has an FK to booster_boxes).
+
+Same --seed and arguments give the same data. Synthetic boxes have
+external_product_id "synthetic:<seed>:<n>" and --reset removes them (rows in
+the other tables cascade). market_index_daily is only computed for dates that
+had no row before the synthetic data; the manifest lists those dates and
+--reset deletes exactly them, so index rows that predate the synthetic data
+are never recomputed or deleted.
+
+Writes only to a local database (DATABASE_URL on localhost / a Unix socket)
+unless --i-know-this-is-local is passed, and never with ENVIRONMENT=production.
+
+Run standalone:
+    python scripts/generate_synthetic_data.py --boxes 180 --years 2 [--seed 42] [--reset]
+    python scripts/generate_synthetic_data.py --boxes 1800 --years 3 --dry-run
+    python scripts/generate_synthetic_data.py --boxes 180 --i-know-this-is-local  # e.g. a docker host name
+"""
+from __future__ import annotations
+
+import json
+import logging
+import math
+import sys
+import uuid
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+import numpy as np
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+logger = logging.getLogger(__name__)
+
+EXTERNAL_ID_PREFIX = "synthetic:"
+DEFAULT_MANIFEST = project_root / "data" / "synthetic_manifest.json"
+LOCAL_DB_HOSTS = {"localhost", "127.0.0.1", "::1"}
+
+# game_type, set code prefixes, product name template, typical floor price, share of boxes
+GAMES = [
+    ("One Piece", ("OP", "EB", "PRB"), "One Piece Card Game {code} Booster Box", 110.0, 0.40),
+    ("Pokemon", ("SV", "SWSH"), "Pokemon TCG {code} Booster Box", 140.0, 0.25),
+    ("Magic: The Gathering", ("MKM", "OTJ", "BLB", "DSK"), "Magic: The Gathering {code} Play Booster Box", 130.0, 0.15),
+    ("Lorcana", ("LOR",), "Disney Lorcana {code} Booster Box", 120.0, 0.10),
+    ("Dragon Ball Super", ("FB",), "Dragon Ball Super Fusion World {code} Booster Box", 80.0, 0.10),
+]
+
+_BOX_SQL = """
+    INSERT INTO booster_boxes (
+        id, external_product_id, product_name, set_name, game_type,
+        release_date, estimated_total_supply, reprint_risk
+    ) VALUES (
+        CAST(:id AS uuid), :ext, :name, :set_name, :game, CAST(:release AS date), :supply, :risk
+    )
+"""
+
+_METRICS_SQL = """
+    INSERT INTO box_metrics_unified (
+        booster_box_id, metric_date, floor_price_usd, floor_price_1d_change_pct,
+        daily_volume_usd, tcg_daily_volume_usd, ebay_daily_volume_usd,
+        unified_volume_usd, unified_volume_7d_ema,
+        boxes_sold_per_day, ebay_units_sold_count, boxes_sold_30d_avg,
+        active_listings_count, ebay_active_listings_count,
+        boxes_added_today, avg_boxes_added_per_day,
+        liquidity_score, days_to_20pct_increase, expected_days_to_sell
+    ) VALUES (
+        CAST(:bid AS uuid), CAST(:md AS date), :fp, :fp1d,
+        :dv, :tdv, :edv, :uv, :uv7, :sold, :esold, :sold30,
+        :active, :eactive, :added, :added30, :liq, :d20, :eds
+    )
+"""
+
+_EBAY_DAILY_SQL = """
+    INSERT INTO ebay_box_metrics_daily (
+        booster_box_id, metric_date, ebay_sales_count, ebay_volume_usd,
+        ebay_median_sold_price_usd, ebay_units_sold_count,
+        ebay_active_listings_count, ebay_active_median_price_usd,
+        ebay_active_low_price_usd, ebay_listings_added_today
+    ) VALUES (
+        CAST(:bid AS uuid), CAST(:md AS date), :esc, :evu, :emsp, :eusc, :ealc, :eamp, :ealp, :elat
+    )
+"""
+
+_EBAY_SALES_SQL = """
+    INSERT INTO ebay_sales_raw (
+        booster_box_id, sale_date, sale_timestamp, ebay_item_id,
+        sold_price_usd, quantity, listing_type, raw_data
+    ) VALUES (
+        CAST(:bid AS uuid), CAST(:sd AS date), :st, :eid, :sp, 1, :lt, CAST(:rd AS jsonb)
+    )
+"""
+
+_TCG_LISTINGS_SQL = """
+    INSERT INTO tcg_listings_raw (
+        booster_box_id, snapshot_date, listing_id, seller_id,
+        listed_price_usd, quantity, snapshot_timestamp
+    ) VALUES (
+        CAST(:bid AS uuid), CAST(:sd AS date), :lid, :sid, :price, :qty, :ts
+    )
+"""
+
+
+def _uuid(rng: np.random.Generator) -> str:
+    return str(uuid.UUID(bytes=rng.bytes(16), version=4))
+
+
+def _opt(v: float, digits: int = 2) -> Optional[float]:
+    return None if v is None or not math.isfinite(v) else round(float(v), digits)
+
+
+def _rolling_sum(values: np.ndarray, window: int) -> np.ndarray:
+    """Sum over the last `window` calendar days (fewer at the start)."""
+    c = np.concatenate(([0.0], np.cumsum(values, dtype=float)))
+    idx = np.arange(1, len(values) + 1)
+    return c[idx] - c[np.maximum(idx - window, 0)]
+
+
+def _ema_positive(values: np.ndarray, present: np.ndarray, alpha: float) -> np.ndarray:
+    """EMA over the positive values of present days (rolling_metrics' unified_volume_7d_ema)."""
+    out = np.full(len(values), np.nan)
+    ema = np.nan
+    for i, v in enumerate(values):
+        if present[i] and v > 0:
+            ema = v if np.isnan(ema) else alpha * v + (1 - alpha) * ema
+        out[i] = ema
+    return out
+
+
+def _mean_reverting(rng: np.random.Generator, n: int, theta: float, sigma: float) -> np.ndarray:
+    x = np.empty(n)
+    shocks = rng.normal(0.0, sigma, n)
+    prev = 0.0
+    for i in range(n):
+        prev = prev - theta * prev + shocks[i]
+        x[i] = prev
+    return x
+
+
+def generate_box(
+    rng: np.random.Generator,
+    seed: int,
+    index: int,
+    set_code: str,
+    game: tuple,
+    start: date,
+    end: date,
+    raw_days: int,
+    missing_rate: float,
+    alias: bool,
+) -> Dict[str, Any]:
+    """One synthetic box: its booster_boxes row and its rows for the per-box tables."""
+    game_type, _, template, base_price, _ = game
+    box_id = _uuid(rng)
+    span = (end - start).days
+    release = start + timedelta(days=int(rng.integers(-730, max(span - 14, 1))))
+    first = max(start, release)
+    n = (end - first).days + 1
+    days = [first + timedelta(days=i) for i in range(n)]
+
+    # Tracking: single missing days, multi-day scraper gaps, a few boxes dropped early
+    present = rng.random(n) >= missing_rate
+    for s in np.flatnonzero(rng.random(n) < 0.003):
+        present[s:s + int(rng.integers(3, 15))] = False
+    if rng.random() < 0.05 and n > 60:
+        present[int(rng.integers(n // 2, n)):] = False
+    present[0] = True
+
+    # Floor price: log random walk with drift and rare jumps, kept within [p0/10, p0*20]
+    p0 = base_price * rng.lognormal(0.0, 0.35)
+    steps = rng.normal(rng.normal(0.0005, 0.001), rng.uniform(0.01, 0.03), n)
+    steps += np.where(rng.random(n) < 0.01, rng.normal(0.0, 0.1, n), 0.0)
+    steps[0] = 0.0
+    log_p = np.clip(np.log(p0) + np.cumsum(steps), np.log(p0 / 10), np.log(p0 * 20))
+    floor = np.maximum(np.round(np.exp(log_p), 2), 5.0)
+
+    # Demand and supply scale with popularity; most days sell nothing or one box
+    pop = rng.lognormal(0.0, 0.8)
+    tcg_sold = rng.poisson(0.6 * pop, n).astype(float)
+    ebay_sold = rng.poisson(0.3 * pop, n)
+    added = rng.poisson(0.8 * pop, n).astype(float)
+    level = max(2.0, 12.0 * pop)
+    tcg_active = np.maximum(np.round(level * np.exp(_mean_reverting(rng, n, 0.1, 0.15))), 0)
+    ebay_active = rng.poisson(6.0 * pop, n)
+
+    # eBay sales: one price per unit around the floor, in day order
+    sale_day = np.repeat(np.arange(n), ebay_sold)
+    sale_price = np.round(floor[sale_day] * np.exp(rng.normal(0.02, 0.06, len(sale_day))), 2)
+    ebay_vol = np.bincount(sale_day, weights=sale_price, minlength=n)
+    tcg_vol = tcg_sold * floor
+
+    p = present.astype(float)
+    daily_vol = (tcg_vol + ebay_vol) * p
+    sold = (tcg_sold + ebay_sold) * p
+    tracked_30 = np.maximum(_rolling_sum(p, 30), 1)
+    vol_30 = _rolling_sum(daily_vol, 30)
+    sold_30 = _rolling_sum(sold, 30) / tracked_30
+    added_30 = _rolling_sum(added * p, 30) / tracked_30
+    vol_ema = _ema_positive(daily_vol, present, 0.3)
+    active = tcg_active + ebay_active
+    net = sold_30 - added_30
+
+    metrics, ebay_daily = [], []
+    sale_bounds = np.concatenate(([0], np.cumsum(ebay_sold)))
+    prev_floor = None
+    for i in np.flatnonzero(present):
+        md = days[i].isoformat()
+        change = (floor[i] - prev_floor) / prev_floor * 100 if prev_floor else None
+        prev_floor = floor[i]
+        liq = min(10.0, sold_30[i] / active[i] * 100) if active[i] > 0 else None
+        d20 = min(180.0, active[i] / net[i]) if net[i] > 0 else None
+        eds = min(365.0, max(1.0, active[i] * 0.1 / net[i])) if net[i] > 0 else None
+        metrics.append({
+            "bid": box_id, "md": md,
+            "fp": float(floor[i]), "fp1d": _opt(change),
+            "dv": _opt(daily_vol[i]), "tdv": _opt(tcg_vol[i]), "edv": _opt(ebay_vol[i]),
+            "uv": _opt(vol_30[i]) if vol_30[i] > 0 else None, "uv7": _opt(vol_ema[i]),
+            "sold": float(sold[i]), "esold": float(ebay_sold[i]), "sold30": _opt(sold_30[i]),
+            "active": int(active[i]), "eactive": int(ebay_active[i]),
+            "added": int(added[i]), "added30": _opt(added_30[i]),
+            "liq": _opt(liq), "d20": _opt(d20), "eds": _opt(eds),
+        })
+        day_prices = sale_price[sale_bounds[i]:sale_bounds[i + 1]]
+        ebay_daily.append({
+            "bid": box_id, "md": md,
+            "esc": int(ebay_sold[i]), "evu": _opt(ebay_vol[i]),
+            "emsp": _opt(np.median(day_prices)) if len(day_prices) else None,
+            "eusc": int(ebay_sold[i]), "ealc": int(ebay_active[i]),
+            "eamp": _opt(floor[i] * 1.08) if ebay_active[i] else None,
+            "ealp": _opt(floor[i] * 0.97) if ebay_active[i] else None,
+            "elat": int(rng.poisson(0.5 * pop)),
+        })
+
+    # Raw tables: only the retention window, like after compact_raw_tables
+    raw_from = max(0, n - raw_days)
+    ebay_sales = []
+    for k in range(sale_bounds[raw_from], len(sale_day)):
+        i = sale_day[k]
+        if not present[i]:
+            continue
+        ebay_sales.append({
+            "bid": box_id, "sd": days[i].isoformat(),
+            "st": datetime.combine(days[i], datetime.min.time()) + timedelta(seconds=int(rng.integers(0, 86400))),
+            "eid": f"syn{seed}-{index}-{k}", "sp": float(sale_price[k]),
+            "lt": "Auction" if rng.random() < 0.3 else "Buy It Now",
+            "rd": json.dumps({"title": f"{template.format(code=set_code)} Sealed", "synthetic": True}),
+        })
+
+    tcg_listings = _listing_snapshots(rng, box_id, days, floor, present, raw_from, level)
+    return {
+        "box": {
+            "id": box_id,
+            "ext": f"{EXTERNAL_ID_PREFIX}{seed}:{index}",
+            "name": template.format(code=set_code),
+            "set_name": f"{set_code} Synthetic Set",
+            "game": game_type,
+            "release": release.isoformat(),
+            "supply": int(rng.integers(20_000, 400_000)),
+            "risk": str(rng.choice(["LOW", "MEDIUM", "HIGH"], p=[0.7, 0.2, 0.1])),
+        },
+        "legacy_id": _uuid(rng) if alias else None,
+        "metrics": metrics,
+        "ebay_daily": ebay_daily,
+        "ebay_sales": ebay_sales,
+        "tcg_listings": tcg_listings,
+    }
+
+
+def _listing_snapshots(
+    rng: np.random.Generator,
+    box_id: str,
+    days: List[date],
+    floor: np.ndarray,
+    present: np.ndarray,
+    raw_from: int,
+    level: float,
+) -> List[Dict[str, Any]]:
+    """Daily snapshots from a persistent seller pool (sellers stay, leave, return, reprice)."""
+    from app.services.listing_snapshots import tcg_listing_id
+
+    pool = max(5, int(level * 2))
+    sellers = [f"seller_{int(s):06d}" for s in rng.integers(0, 1_000_000, pool)]
+    ids = [tcg_listing_id({"seller": s, "condition": "Near Mint", "variant": "Unopened"}) for s in sellers]
+    listed = rng.random(pool) < level / pool
+    markup = rng.uniform(0.0, 0.2, pool)
+    qty = rng.integers(1, 4, pool)
+    rows = []
+    for i in range(raw_from, len(days)):
+        stay = rng.random(pool) < 0.9
+        join = rng.random(pool) < 0.5 * level / pool
+        listed = np.where(listed, stay, join)
+        reprice = rng.random(pool) < 0.1
+        markup = np.where(reprice, rng.uniform(0.0, 0.2, pool), markup)
+        if not present[i]:
+            continue
+        ts = datetime.combine(days[i], datetime.min.time()) + timedelta(hours=6)
+        for j in np.flatnonzero(listed):
+            rows.append({
+                "bid": box_id, "sd": days[i].isoformat(), "lid": ids[j], "sid": sellers[j],
+                "price": round(float(floor[i] * (1 + markup[j])), 2), "qty": int(qty[j]), "ts": ts,
+            })
+    return rows
+
+
+def _set_codes(rng: np.random.Generator, boxes: int) -> Iterator[tuple]:
+    shares = np.array([g[4] for g in GAMES])
+    picks = rng.choice(len(GAMES), size=boxes, p=shares / shares.sum())
+    numbers: Dict[str, int] = {}
+    for g in picks:
+        game = GAMES[g]
+        prefix = game[1][int(rng.integers(0, len(game[1])))]
+        numbers[prefix] = numbers.get(prefix, 0) + 1
+        yield f"{prefix}-{numbers[prefix]:02d}", game
+
+
+def generate_boxes(
+    boxes: int,
+    start: date,
+    end: date,
+    seed: int = 42,
+    raw_days: int = 90,
+    missing_rate: float = 0.05,
+    alias_rate: float = 0.1,
+) -> Iterator[Dict[str, Any]]:
+    """Synthetic boxes one at a time (generate_box() dicts); nothing touches the DB."""
+    rng = np.random.default_rng(seed)
+    for index, (set_code, game) in enumerate(_set_codes(rng, boxes)):
+        yield generate_box(
+            rng, seed, index, set_code, game, start, end, raw_days, missing_rate,
+            alias=rng.random() < alias_rate,
+        )
+
+
+def register_aliases(aliases: Dict[str, str]) -> None:
+    """Route {db id: legacy id} pairs through historical_data's alias maps (this process only)."""
+    from app.services import historical_data
+
+    historical_data.DB_TO_LEADERBOARD_UUID_MAP.update(aliases)
+    historical_data.LEADERBOARD_TO_DB_UUID_MAP.update({v: k for k, v in aliases.items()})
+
+
+def is_local_database(database_url: str) -> bool:
+    """True when DATABASE_URL points at this machine (localhost, loopback or a Unix socket)."""
+    from sqlalchemy.engine import make_url
+
+    try:
+        host = make_url(database_url).host
+    except Exception:
+        return False
+    return not host or host.lower() in LOCAL_DB_HOSTS
+
+
+def synthetic_index_dates(manifest: Optional[Path]) -> List[str]:
+    """market_index_daily dates an earlier run computed (from its manifest); [] without one."""
+    if manifest is None or not Path(manifest).exists():
+        return []
+    try:
+        with open(manifest) as f:
+            return list(json.load(f).get("market_index_dates") or [])
+    except (OSError, ValueError) as e:
+        logger.warning(f"Could not read synthetic manifest {manifest}: {e}")
+        return []
+
+
+def reset_synthetic(index_dates: List[str]) -> int:
+    """Delete synthetic boxes (per-box tables cascade) and the market_index_daily rows of index_dates."""
+    from sqlalchemy import text
+    from app.services.db_historical_reader import _get_sync_engine
+
+    engine = _get_sync_engine()
+    with engine.begin() as conn:
+        deleted = conn.execute(
+            text("DELETE FROM booster_boxes WHERE external_product_id LIKE :p"),
+            {"p": EXTERNAL_ID_PREFIX + "%"},
+        ).rowcount
+        if index_dates:
+            conn.execute(
+                text("DELETE FROM market_index_daily WHERE metric_date = ANY(CAST(:d AS date[]))"),
+                {"d": index_dates},
+            )
+    return deleted
+
+
+def existing_index_dates(engine: Any, start: date, end: date) -> set:
+    """Dates in [start, end] that already have a market_index_daily row."""
+    from sqlalchemy import text
+
+    with engine.connect() as conn:
+        rows = conn.execute(
+            text("SELECT metric_date FROM market_index_daily WHERE metric_date BETWEEN CAST(:s AS date) AND CAST(:e AS date)"),
+            {"s": start.isoformat(), "e": end.isoformat()},
+        ).fetchall()
+    return {r[0].isoformat() for r in rows}
+
+
+def write_box(conn: Any, generated: Dict[str, Any]) -> None:
+    from sqlalchemy import text
+
+    conn.execute(text(_BOX_SQL), generated["box"])
+    for sql, key in (
+        (_METRICS_SQL, "metrics"),
+        (_EBAY_DAILY_SQL, "ebay_daily"),
+        (_EBAY_SALES_SQL, "ebay_sales"),
+        (_TCG_LISTINGS_SQL, "tcg_listings"),
+    ):
+        if generated[key]:
+            conn.execute(text(sql), generated[key])
+
+
+def generate_synthetic_data(
+    boxes: int,
+    years: float,
+    end: Optional[date] = None,
+    seed: int = 42,
+    raw_days: Optional[int] = None,
+    missing_rate: float = 0.05,
+    alias_rate: float = 0.1,
+    reset: bool = False,
+    market_index: bool = True,
+    dry_run: bool = False,
+    manifest: Optional[Path] = DEFAULT_MANIFEST,
+    allow_remote: bool = False,
+) -> dict:
+    """
+    Generate and load the synthetic catalog. Returns a summary (also written to manifest).
+    allow_remote (--i-know-this-is-local) permits a DATABASE_URL that is not localhost.
+    """
+    from app.config import settings
+
+    if not dry_run:
+        if settings.environment == "production":
+            raise SystemExit("Refusing to write synthetic data with ENVIRONMENT=production")
+        if not allow_remote and not is_local_database(settings.database_url):
+            raise SystemExit(
+                "Refusing to write synthetic data: DATABASE_URL is not localhost. "
+                "Pass --i-know-this-is-local if it is a local database under another name."
+            )
+
+    end = end or date.today()
+    start = end - timedelta(days=int(years * 365) - 1)
+    raw_days = raw_days if raw_days is not None else settings.raw_retention_days
+    started = datetime.now()
+
+    engine = None
+    previous_index_dates = synthetic_index_dates(manifest)
+    index_dates: List[str] = []
+    if not dry_run:
+        from app.services.db_historical_reader import _get_sync_engine
+        engine = _get_sync_engine()
+        if reset:
+            removed = reset_synthetic(previous_index_dates)
+            logger.info(f"Reset: removed {removed} synthetic boxes and {len(previous_index_dates)} market index dates")
+            previous_index_dates = []
+        # Index rows from before the synthetic data are left alone; an earlier
+        # synthetic run's rows (per its manifest) are recomputed
+        keep = existing_index_dates(engine, start, end) - set(previous_index_dates)
+        index_dates = [
+            d for d in ((start + timedelta(days=i)).isoformat() for i in range((end - start).days + 1))
+            if d not in keep
+        ]
+        if keep:
+            logger.info(f"Market index: keeping {len(keep)} existing rows in the range")
+
+    counts = {"booster_boxes": 0, "box_metrics_unified": 0, "ebay_box_metrics_daily": 0,
+              "ebay_sales_raw": 0, "tcg_listings_raw": 0}
+    aliases: Dict[str, str] = {}
+    games: Dict[str, int] = {}
+    for generated in generate_boxes(boxes, start, end, seed, raw_days, missing_rate, alias_rate):
+        if engine is not None:
+            with engine.begin() as conn:
+                write_box(conn, generated)
+        counts["booster_boxes"] += 1
+        counts["box_metrics_unified"] += len(generated["metrics"])
+        counts["ebay_box_metrics_daily"] += len(generated["ebay_daily"])
+        counts["ebay_sales_raw"] += len(generated["ebay_sales"])
+        counts["tcg_listings_raw"] += len(generated["tcg_listings"])
+        games[generated["box"]["game"]] = games.get(generated["box"]["game"], 0) + 1
+        if generated["legacy_id"]:
+            aliases[generated["box"]["id"]] = generated["legacy_id"]
+        if counts["booster_boxes"] % 100 == 0:
+            logger.info(f"  {counts['booster_boxes']}/{boxes} boxes, {counts['box_metrics_unified']} metric rows")
+
+    if market_index and index_dates:
+        from scripts.market_index_range import compute_market_index_range
+        counts["market_index_daily"] = compute_market_index_range(index_dates)["computed"]
+    else:
+        index_dates = []
+
+    summary = {
+        "seed": seed,
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "boxes": boxes,
+        "raw_days": raw_days,
+        "dry_run": dry_run,
+        "games": games,
+        "rows": counts,
+        "aliases": aliases,
+        # Synthetic market_index_daily rows (this run and earlier ones); --reset deletes these
+        "market_index_dates": sorted(set(index_dates) | set(previous_index_dates)),
+        "elapsed_s": round((datetime.now() - started).total_seconds(), 2),
+    }
+    if manifest is not None:
+        manifest = Path(manifest)
+        manifest.parent.mkdir(parents=True, exist_ok=True)
+        with open(manifest, "w") as f:
+            json.dump(summary, f, indent=2)
+    return summary
+
+
+if __name__ == "__main__":
+    import argparse
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(levelname)s - %(message)s",
+        handlers=[logging.StreamHandler()],
+    )
+
+    parser = argparse.ArgumentParser(description="Load a seeded synthetic catalog for scale testing")
+    parser.add_argument("--boxes", type=int, default=180, help="Number of boxes (production has 18)")
+    parser.add_argument("--years", type=float, default=2.0, help="Years of daily history")
+    parser.add_argument("--end", type=str, default=None, help="Last date (YYYY-MM-DD). Defaults to today.")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--raw-days", type=int, default=None, help="Days of raw sales / listings (default: RAW_RETENTION_DAYS)")
+    parser.add_argument("--missing-rate", type=float, default=0.05, help="Share of untracked days")
+    parser.add_argument("--alias-rate", type=float, default=0.1, help="Share of boxes with a legacy alias id")
+    parser.add_argument("--reset", action="store_true", help="Delete earlier synthetic data first")
+    parser.add_argument("--skip-market-index", action="store_true", help="Do not compute market_index_daily")
+    parser.add_argument("--dry-run", action="store_true", help="Generate and count rows without writing")
+    parser.add_argument("--manifest", type=str, default=str(DEFAULT_MANIFEST), help="Summary JSON path")
+    parser.add_argument("--i-know-this-is-local", action="store_true",
+                        help="Allow a DATABASE_URL that is not localhost (it must still be a local database)")
+    args = parser.parse_args()
+
+    result = generate_synthetic_data(
+        boxes=args.boxes,
+        years=args.years,
+        end=date.fromisoformat(args.end) if args.end else None,
+        seed=args.seed,
+        raw_days=args.raw_days,
+        missing_rate=args.missing_rate,
+        alias_rate=args.alias_rate,
+        reset=args.reset,
+        market_index=not args.skip_market_index,
+        dry_run=args.dry_run,
+        manifest=Path(args.manifest),
+        allow_remote=args.i_know_this_is_local,
+    )
+    print(json.dumps({k: v for k, v in result.items() if k not in ("aliases", "market_index_dates")}, indent=2))
@@ -1,14 +1,21 @@
 """
 Historical Data Manager
-Manages historical data entries for each box, tracking what has been entered and when
+Manages historical data entries for each box, tracking what has been entered and when.
+Entries live in the indexed local store (app/services/history_store.py) instead of
+data/historical_entries.json, so lookups and inserts don't reload the whole file.
 """
 
-import json
 import sys
 from datetime import date, datetime, timedelta
 from pathlib import Path
 from typing import Dict, Any, List, Optional
 
+_root = Path(__file__).resolve().parent.parent
+if str(_root) not in sys.path:
+    sys.path.insert(0, str(_root))
+
+from app.services.history_store import HistoryStore, history_store
+
 
 def _compute_30d_avg_sold(entries: List[Dict[str, Any]]) -> Optional[float]:
     """Compute running 30-day average of boxes_sold_today from entries (last 30 days)."""
@@ -28,40 +35,34 @@ def _compute_30d_avg_sold(entries: List[Dict[str, Any]]) -> Optional[float]:
 class HistoricalDataManager:
     """Manages historical data entries for tracking and duplicate detection"""
     
-    def __init__(self):
-        self.historical_file = Path(__file__).parent.parent / "data" / "historical_entries.json"
-        self.historical_file.parent.mkdir(exist_ok=True)
-    
+    def __init__(self, store: Optional[HistoryStore] = None):
+        self.store = store or history_store
+        self.historical_file = self.store.path
+
     def load_historical_data(self) -> Dict[str, List[Dict[str, Any]]]:
         """Load all historical data entries"""
-        if not self.historical_file.exists():
-            return {}
-        
         try:
-            with open(self.historical_file, 'r') as f:
-                return json.load(f)
-        except:
+            return self.store.load_all()
+        except Exception:
             return {}
-    
+
     def save_historical_data(self, data: Dict[str, List[Dict[str, Any]]]) -> bool:
-        """Save historical data"""
+        """Save historical data (replaces every stored entry)"""
         try:
-            with open(self.historical_file, 'w') as f:
-                json.dump(data, f, indent=2)
+            self.store.replace_all(data)
             return True
         except Exception as e:
             print(f"Error saving historical data: {e}")
             return False
-    
+
     def get_box_history(self, box_id: str) -> List[Dict[str, Any]]:
         """Get historical entries for a specific box"""
-        all_data = self.load_historical_data()
-        return all_data.get(box_id, [])
-    
+        return self.store.entries(box_id)
+
     def add_entry(self, box_id: str, entry_data: Dict[str, Any]) -> bool:
         """
         Add a new historical entry
-        
+
         Args:
             box_id: Box identifier
             entry_data: Dictionary with:
@@ -80,34 +81,24 @@ class HistoricalDataManager:
                 - raw_sales: List of individual sales (optional)
                 - screenshot_metadata: Dict with extraction info (optional)
         """
-        all_data = self.load_historical_data()
-        
-        if box_id not in all_data:
-            all_data[box_id] = []
-        
         # Ensure date is set
         if "date" not in entry_data:
             entry_data["date"] = date.today().isoformat()
-        
+
         # Add timestamp
         entry_data["timestamp"] = datetime.now().isoformat()
-        
-        # Add entry
-        all_data[box_id].append(entry_data)
-
-        # Sort by date
-        all_data[box_id].sort(key=lambda x: x.get("date", ""))
 
-        ok = self.save_historical_data(all_data)
-        if not ok:
+        # Add entry (one append; the store keeps entries ordered by date)
+        try:
+            self.store.append(box_id, entry_data)
+        except Exception as e:
+            print(f"Error saving historical data: {e}")
             return False
 
         # Write to DB so live site updates without commits
         entry_date = entry_data.get("date") or date.today().isoformat()
-        boxes_sold_30d_avg = _compute_30d_avg_sold(all_data[box_id])
-        _root = Path(__file__).resolve().parent.parent
-        if str(_root) not in sys.path:
-            sys.path.insert(0, str(_root))
+        cutoff = (datetime.now() - timedelta(days=30)).strftime("%Y-%m-%d")
+        boxes_sold_30d_avg = _compute_30d_avg_sold(self.store.entries(box_id, since=cutoff))
         try:
             from app.services.box_metrics_writer import upsert_daily_metrics
             from app.services.historical_data import LEADERBOARD_TO_DB_UUID_MAP
@@ -124,46 +115,24 @@ class HistoricalDataManager:
                 boxes_added_today=entry_data.get("boxes_added_today"),
             )
         except Exception:
-            pass  # DB write is best-effort; JSON save already succeeded
+            pass  # DB write is best-effort; local save already succeeded
         return True
-    
+
     def entry_exists(self, box_id: str, entry_date: str, data_type: Optional[str] = None) -> bool:
         """Check if an entry exists for a box and date"""
-        history = self.get_box_history(box_id)
-        
-        for entry in history:
-            if entry.get("date") == entry_date:
-                if data_type is None or entry.get("data_type") == data_type:
-                    return True
-        
-        return False
-    
+        return self.store.exists(box_id, entry_date, data_type)
+
     def get_latest_entry(self, box_id: str, data_type: Optional[str] = None) -> Optional[Dict[str, Any]]:
         """Get the most recent entry for a box"""
-        history = self.get_box_history(box_id)
-        
-        if not history:
-            return None
-        
-        # Filter by data_type if specified
-        if data_type:
-            history = [e for e in history if e.get("data_type") == data_type]
-        
-        if not history:
-            return None
-        
-        # Sort by date and return latest
-        sorted_history = sorted(history, key=lambda x: x.get("date", ""), reverse=True)
-        return sorted_history[0]
-    
+        return self.store.latest(box_id, data_type)
+
     def merge_entries(self, box_id: str, date_str: str) -> Dict[str, Any]:
         """
         Merge all entries for a box on a specific date into a single combined entry
         
         This is useful when you have separate sales and listings screenshots for the same day
         """
-        history = self.get_box_history(box_id)
-        day_entries = [e for e in history if e.get("date") == date_str]
+        day_entries = self.store.entries(box_id, entry_date=date_str)
         
         if not day_entries:
             return {}
@@ -11,16 +11,25 @@ import json
 import logging
 import os
 import random
+import re
 import sys
 import time
 import numpy as np
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Dict, List, Optional, Any
+from typing import Callable, Dict, Iterable, List, Optional, Any
 
 from playwright.async_api import async_playwright, Page, Browser
 from playwright_stealth import Stealth
 
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from app.services.memory_profile import memory_profiler
+from app.services.pipeline_telemetry import count_call
+from app.services.title_classifier import TitleClassifier, TitleMatch, classify_many
+
 # Setup logging
 logging.basicConfig(
     level=logging.INFO,
@@ -165,6 +174,23 @@ SUSPICIOUS_KEYWORDS = [
     'packs only', 'pack only', 'unsealed or no box', 'no box.',
 ]
 
+# Indicators of a legitimate booster box listing (relax ambiguous suspicious keywords)
+LEGITIMATE_INDICATORS = [
+    'booster box', 'premium booster', 'extra booster', 'premium box',
+    'factory sealed', 'sealed', 'mint', 'near mint', 'new'
+]
+
+DISPLAY_ONLY_RE = re.compile(r'\b(for\s+)?display\s+(only|purposes?)\b')
+EMPTY_BOX_RE = re.compile(r'\bempty\s+box\b')
+
+# All listing rules compiled into one matcher (see app/services/title_classifier.py)
+LISTING_RULES = TitleClassifier({
+    'japanese': JAPANESE_INDICATORS,
+    'suspicious': SUSPICIOUS_KEYWORDS,
+    'legitimate': LEGITIMATE_INDICATORS,
+    'context': ['display case'],
+}, version="1")  # bump version when _suspicious_keyword() logic changes
+
 # Thresholds
 OUTLIER_THRESHOLD_PCT = 0.75  # 75% of market price
 MIN_CLUSTER_SIZE = 5  # Need 5+ clean low-priced to confirm pullback
@@ -230,45 +256,55 @@ def get_daily_products() -> List[tuple]:
     return all_products
 
 
-def is_japanese_listing(listing: Dict) -> bool:
+def _listing_text(listing: Dict) -> str:
+    return ' '.join(
+        listing.get(field, '') or '' for field in ('title', 'description', 'condition', 'variant')
+    )
+
+
+def classify_listing(listing: Dict) -> TitleMatch:
+    """One scan of title + description + condition + variant for every listing rule."""
+    return LISTING_RULES.match(_listing_text(listing))
+
+
+def _listing_flags(full_text: str) -> Dict[str, Any]:
+    m = LISTING_RULES.match(full_text)
+    return {'japanese': m.flags['japanese'], 'suspicious_keyword': _suspicious_keyword(m)}
+
+
+def classify_listings(listings: List[Dict]) -> List[Dict[str, Any]]:
+    """Japanese / suspicious-keyword flags per listing (in order), via the cross-day memo."""
+    texts = [_listing_text(l) for l in listings]
+    classified = classify_many("tcgplayer_listings", LISTING_RULES, texts, _listing_flags)
+    return [classified[t] for t in texts]
+
+
+def is_japanese_listing(listing: Dict, match: Optional[TitleMatch] = None) -> bool:
     """Check if listing is Japanese version"""
-    text = (
-        listing.get('title', '') +
-        listing.get('description', '') +
-        listing.get('condition', '') +
-        listing.get('variant', '')
-    ).lower()
-    return any(indicator in text for indicator in JAPANESE_INDICATORS)
+    m = match or classify_listing(listing)
+    return m.flags['japanese']
 
 
-def get_suspicious_keyword(listing: Dict) -> Optional[str]:
+def get_suspicious_keyword(listing: Dict, match: Optional[TitleMatch] = None) -> Optional[str]:
     """Return the first matching suspicious keyword, or None if listing is clean."""
-    import re
-    title = (listing.get('title', '') or '').lower()
-    description = (listing.get('description', '') or '').lower()
-    condition = (listing.get('condition', '') or '').lower()
-    variant = (listing.get('variant', '') or '').lower()
-    full_text = title + ' ' + description + ' ' + condition + ' ' + variant
-    
+    return _suspicious_keyword(match or classify_listing(listing))
+
+
+def _suspicious_keyword(m: TitleMatch) -> Optional[str]:
+    if not m.flags['suspicious']:
+        return None
+
     # Skip if this is clearly a legitimate booster box listing
     # Check for legitimate booster box indicators first
-    legitimate_indicators = [
-        'booster box', 'premium booster', 'extra booster', 'premium box',
-        'factory sealed', 'sealed', 'mint', 'near mint', 'new'
-    ]
-    has_legitimate_indicator = any(indicator in full_text for indicator in legitimate_indicators)
-    
+    has_legitimate_indicator = m.flags['legitimate']
+    is_booster_box = m.has('booster box', 'premium box')
+
     # Only apply suspicious filter if we don't have strong legitimate indicators
     # OR if we have both legitimate AND suspicious indicators (then suspicious wins)
-    
+
     for keyword in SUSPICIOUS_KEYWORDS:
-        escaped = re.escape(keyword)
-        if ' ' in keyword:
-            pattern = r'\b' + escaped + r'\b'
-        else:
-            pattern = r'\b' + escaped + r'\b'
-        
-        if re.search(pattern, full_text):
+        # Whole-word / whole-phrase match
+        if m.bounded(keyword):
             # Skip ambiguous matches if we have legitimate indicators
             if has_legitimate_indicator:
                 # These keywords are too ambiguous when we have legitimate indicators
@@ -277,34 +313,34 @@ def get_suspicious_keyword(listing: Dict) -> Optional[str]:
                     # Only flag if it's clearly suspicious context
                     if keyword == 'display':
                         # Only flag if it's "for display" or "display only", not "display case"
-                        if not re.search(r'\b(for\s+)?display\s+(only|purposes?)\b', full_text):
+                        if not DISPLAY_ONLY_RE.search(m.text):
                             continue
                     elif keyword == 'empty':
                         # Only flag if it's "empty box" explicitly, not just "empty"
-                        if not re.search(r'\bempty\s+box\b', full_text):
+                        if not EMPTY_BOX_RE.search(m.text):
                             continue
                     elif keyword == 'box only':
                         # Skip if it's part of legitimate booster box text
-                        if 'booster box' in full_text or 'premium box' in full_text:
+                        if is_booster_box:
                             continue
-            
+
             # Additional context checks
             if keyword == 'display':
                 # Skip "display case" (legitimate storage)
-                if 'display case' in full_text:
+                if m.has('display case'):
                     continue
             elif keyword == 'box only':
                 # Skip if it's clearly a booster box listing
-                if 'booster box' in full_text or 'premium box' in full_text:
+                if is_booster_box:
                     continue
-            
+
             return keyword
     return None
 
 
-def is_suspicious_listing(listing: Dict) -> bool:
+def is_suspicious_listing(listing: Dict, match: Optional[TitleMatch] = None) -> bool:
     """Check if listing has suspicious keywords (title, description, condition, variant)"""
-    return get_suspicious_keyword(listing) is not None
+    return get_suspicious_keyword(listing, match) is not None
 
 
 def filter_outlier_prices(listings: List[Dict], market_price: float) -> List[Dict]:
@@ -349,21 +385,23 @@ def process_listings(raw_listings: List[Dict], market_price: float, yesterday_fl
     logger.info(f"  Raw: {raw_rows} listing rows, {raw_boxes} boxes total")
     
     # Step 1: Remove Japanese listings
-    listings = [l for l in raw_listings if not is_japanese_listing(l)]
+    # (each listing's text is classified once, or read from the memo; the flags serve both filters)
+    matched = [(l, f) for l, f in zip(raw_listings, classify_listings(raw_listings)) if not f['japanese']]
+    listings = [l for l, _ in matched]
     jp_removed = len(raw_listings) - len(listings)
     if jp_removed > 0:
         logger.info(f"  After Japanese filter: {len(listings)} ({jp_removed} removed)")
     
     # Step 2: Remove suspicious listings
-    clean_listings = [l for l in listings if not is_suspicious_listing(l)]
+    suspicious_kw = [f['suspicious_keyword'] for _, f in matched]
+    clean_listings = [l for l, kw in zip(listings, suspicious_kw) if kw is None]
     suspicious_removed = len(listings) - len(clean_listings)
     if suspicious_removed > 0:
         logger.info(f"  After suspicious filter: {len(clean_listings)} ({suspicious_removed} removed)")
         # Log examples to debug - show first 3 removed listings and their matching keywords
         removed_count = 0
         keyword_counts = {}
-        for l in listings:
-            kw = get_suspicious_keyword(l)
+        for l, kw in zip(listings, suspicious_kw):
             if kw:
                 if removed_count < 3:
                     snippet = (l.get('title', '') or l.get('condition', '') or l.get('variant', ''))[:100]
@@ -384,6 +422,8 @@ def process_listings(raw_listings: List[Dict], market_price: float, yesterday_fl
             'floor_price': None,
             'listings_within_20pct': 0,
             'listings_within_10pct_floor': 0,
+            'snapshot_listings': [],
+            'diff_max_price': None,
             'filters_applied': {
                 'japanese_removed': jp_removed,
                 'suspicious_removed': suspicious_removed,
@@ -421,6 +461,10 @@ def process_listings(raw_listings: List[Dict], market_price: float, yesterday_fl
         'listings_within_20pct': boxes_within_20pct,
         'listings_within_10pct_floor': boxes_within_10pct,
         'listings_within_20pct_comparable': comparable_20pct,
+        # Identity diffing (save_results): every filtered listing, and one cap for
+        # both days — the wider of today's and yesterday's 20% windows
+        'snapshot_listings': listings,
+        'diff_max_price': round(max(floor_price, yesterday_floor or 0) * WITHIN_20PCT_THRESHOLD, 2),
         'filters_applied': {
             'japanese_removed': jp_removed,
             'suspicious_removed': suspicious_removed,
@@ -874,8 +918,10 @@ async def scrape_box(page: Page, box_id: str, url: str, market_price: float, yes
                 # Establish floor + 20% threshold from existing all_listings so we can stop when we hit listings above it (e.g. halfway through page 2)
                 threshold = None
                 if len(all_listings) >= 3:
-                    filtered = [l for l in all_listings if not is_japanese_listing(l)]
-                    filtered = [l for l in filtered if not is_suspicious_listing(l)]
+                    filtered = [
+                        l for l, f in zip(all_listings, classify_listings(all_listings))
+                        if not f['japanese'] and f['suspicious_keyword'] is None
+                    ]
                     if filtered:
                         floor = min(l['price'] for l in filtered)
                         threshold = floor * WITHIN_20PCT_THRESHOLD
@@ -985,12 +1031,22 @@ async def scrape_box(page: Page, box_id: str, url: str, market_price: float, yes
         return None
 
 
-async def run_scraper(debug_box_id: Optional[str] = None):
+async def run_scraper(
+    debug_box_id: Optional[str] = None,
+    box_ids: Optional[Iterable[str]] = None,
+    on_box_done: Optional[Callable[..., None]] = None,
+):
     """Main scraper entry point.
 
     Args:
         debug_box_id: If set, only scrape this single box in headed mode with
                       screenshots saved to logs/debug_screenshots/.
+        box_ids: Only scrape these boxes (resume of a checkpointed run). Noise
+                 products are still visited.
+        on_box_done: Called as on_box_done(box_id, ok, output=..., error=..., started_at=...)
+                     per box. When set, each box is saved to the DB as soon as it
+                     is scraped instead of all at the end, so a crash mid-run
+                     keeps the boxes already done.
     """
     debug = debug_box_id is not None
 
@@ -1015,6 +1071,10 @@ async def run_scraper(debug_box_id: Optional[str] = None):
         products = [(debug_box_id, TCGPLAYER_URLS[debug_box_id])]
     else:
         products = get_daily_products()
+    if box_ids is not None:
+        only = set(box_ids)
+        products = [(bid, u) for bid, u in products if bid.startswith('noise_') or bid in only]
+    checkpoint = on_box_done is not None and not debug
 
     # Load market prices and yesterday's floor prices from DB (source of truth)
     market_prices = {}
@@ -1093,16 +1153,20 @@ async def run_scraper(debug_box_id: Optional[str] = None):
         if profile.get("sec_ch_ua_platform"):
             extra_headers["sec-ch-ua-platform"] = profile["sec_ch_ua_platform"]
 
-        context = await browser.new_context(
-            user_agent=profile['user_agent'],
-            viewport=viewport,
-            extra_http_headers=extra_headers,
-            locale="en-US",
-        )
-
-        page = await context.new_page()
         stealth = Stealth()
-        await stealth.apply_stealth_async(page)
+
+        async def open_page():
+            ctx = await browser.new_context(
+                user_agent=profile['user_agent'],
+                viewport=viewport,
+                extra_http_headers=extra_headers,
+                locale="en-US",
+            )
+            pg = await ctx.new_page()
+            await stealth.apply_stealth_async(pg)
+            return ctx, pg
+
+        context, page = await open_page()
 
         # Visit homepage first (natural behavior)
         logger.info("Visiting TCGplayer homepage...")
@@ -1114,6 +1178,7 @@ async def run_scraper(debug_box_id: Optional[str] = None):
             if box_id.startswith('noise_'):
                 # Noise product - just visit, don't extract data
                 logger.info(f"Visiting noise product: {url[:50]}...")
+                count_call("tcgplayer")
                 try:
                     await page.goto(url, wait_until='domcontentloaded', timeout=60000)
                     await asyncio.sleep(human_delay())
@@ -1124,20 +1189,40 @@ async def run_scraper(debug_box_id: Optional[str] = None):
             # Real target - scrape data (scrape_box handles navigation + Listings tab click)
             market_price = market_prices.get(box_id, 0)
             yfloor = yesterday_floors.get(box_id)
-            result = await scrape_box(page, box_id, url, market_price, yesterday_floor=yfloor, debug=debug, debug_dir=debug_dir if debug else None)
-
-            # Debug: screenshot after scraping (may fail if browser crashed during scrape)
-            if debug:
-                try:
-                    await page.screenshot(path=str(debug_dir / f"{box_id}_03_after_scrape.png"))
-                    logger.info(f"  [DEBUG] Screenshot saved: {box_id}_03_after_scrape.png")
-                except Exception as e:
-                    logger.warning(f"  [DEBUG] Could not take after-scrape screenshot: {e}")
-
-            if result:
-                results.append(result)
-            else:
-                errors.append(box_id)
+            started_at = datetime.now()
+            with memory_profiler.box("scraper", box_id):
+                result = await scrape_box(page, box_id, url, market_price, yesterday_floor=yfloor, debug=debug, debug_dir=debug_dir if debug else None)
+
+                # Debug: screenshot after scraping (may fail if browser crashed during scrape)
+                if debug:
+                    try:
+                        await page.screenshot(path=str(debug_dir / f"{box_id}_03_after_scrape.png"))
+                        logger.info(f"  [DEBUG] Screenshot saved: {box_id}_03_after_scrape.png")
+                    except Exception as e:
+                        logger.warning(f"  [DEBUG] Could not take after-scrape screenshot: {e}")
+
+                count_call("tcgplayer", calls=result['pages_scraped'] if result else 1)
+                if result:
+                    results.append(result)
+                    if checkpoint:
+                        saved = save_results([result])
+                        on_box_done(box_id, box_id in saved, output=_checkpoint_output(result),
+                                    error=None if box_id in saved else "DB upsert failed", started_at=started_at)
+                        # Already snapshotted to tcg_listings_raw; only the aggregates are kept
+                        result.pop('snapshot_listings', None)
+                else:
+                    errors.append(box_id)
+                    if checkpoint:
+                        on_box_done(box_id, False, error="scrape failed", started_at=started_at)
+
+            # Soft memory budget (Render 512Mi): free Python heap first, then drop the
+            # browser context (page cache, JS heap, renderer) and start a fresh one
+            if memory_profiler.over_budget():
+                if (memory_profiler.mitigate(f"scraper after {box_id}") or 0) >= memory_profiler.budget_mb:
+                    before_mb = memory_profiler.used_mb()
+                    await context.close()
+                    context, page = await open_page()
+                    memory_profiler.mitigate(f"scraper after {box_id}", action="browser context recycled", before_mb=before_mb)
 
             await asyncio.sleep(human_delay())
 
@@ -1161,16 +1246,26 @@ async def run_scraper(debug_box_id: Optional[str] = None):
             logger.info(f"  Screenshots in: logs/debug_screenshots/")
         logger.info("=" * 60)
         logger.info("[DEBUG] Skipping save_results() in debug mode.")
-    elif results:
+    elif results and not checkpoint:
         save_results(results)
 
     return results, errors
 
 
-def save_results(results: List[Dict]):
+def _checkpoint_output(result: Dict) -> Dict:
+    """Scrape result minus per-run noise (timestamps), for the checkpoint output hash."""
+    return {k: v for k, v in result.items() if k != 'scrape_timestamp'}
+
+
+def save_results(results: List[Dict]) -> List[str]:
     """Save scraped data to box_metrics_unified (DB).
-    Computes boxes_added_today = today_count - yesterday_count from yesterday's
-    refresh to today's so the daily cron records how many listings were added since last run.
+    Writes each box's filtered listings to tcg_listings_raw and diffs them
+    against yesterday's snapshot by listing identity under one fixed 20% cap
+    (app/services/listing_snapshots.py), so boxes_added_today is the exact net
+    change (boxes listed minus boxes gone) since the last run, unaffected by
+    floor moves.
+    Boxes without a snapshot yesterday fall back to today_count - yesterday_count.
+    Returns the box ids whose upsert succeeded.
     """
     today = datetime.now().strftime('%Y-%m-%d')
     yesterday = (datetime.now() - timedelta(days=1)).strftime('%Y-%m-%d')
@@ -1184,7 +1279,7 @@ def save_results(results: List[Dict]):
     except ImportError:
         upsert_daily_metrics = None
 
-    # Load yesterday's active_listings_count from DB for delta calculation
+    # Load yesterday's active_listings_count from DB (delta fallback for boxes without a listing snapshot)
     yesterday_counts = {}
     try:
         from app.services.db_historical_reader import _get_sync_engine
@@ -1206,22 +1301,56 @@ def save_results(results: List[Dict]):
     except Exception as e:
         logger.warning(f"Could not load yesterday counts from DB: {e}")
 
+    # Snapshot today's listings, then diff all boxes against yesterday in one query
+    listing_diff = {}
+    try:
+        from app.services.listing_snapshots import diff_snapshots, tcg_listing_id, write_snapshot
+        snapshot_ids = []
+        for result in results:
+            rows = [
+                {
+                    'listing_id': tcg_listing_id(l),
+                    'price': l.get('price'),
+                    'quantity': l.get('quantity', 1),
+                    'seller': l.get('seller'),
+                    'raw': {k: l.get(k) for k in ('base_price', 'condition', 'variant', 'title') if l.get(k) is not None},
+                }
+                for l in result.get('snapshot_listings') or []
+            ]
+            if write_snapshot('tcgplayer', result['box_id'], today, rows) >= 0:
+                snapshot_ids.append(result['box_id'])
+        if snapshot_ids:
+            caps = {r['box_id']: r.get('diff_max_price') for r in results}
+            listing_diff = diff_snapshots('tcgplayer', today, yesterday, box_ids=snapshot_ids, max_prices=caps)
+    except ImportError:
+        pass
+
+    saved = []
     for result in results:
         box_id = result['box_id']
         boxes_within_20pct = result.get('listings_within_20pct') or 0
         comparable_20pct = result.get('listings_within_20pct_comparable')  # Only set when floor dropped
 
-        # Added/removed from yesterday's refresh to today's (daily cron: yesterday count vs today count)
-        yesterday_alc = yesterday_counts.get(box_id)
-
-        # When floor dropped, use the comparable count (today's listings counted against
-        # yesterday's higher 20% threshold) so the delta is apples-to-apples.
-        # When floor rose or stayed same, use today's normal 20% count.
-        count_for_delta = comparable_20pct if comparable_20pct is not None else boxes_within_20pct
-        delta = (count_for_delta - yesterday_alc) if yesterday_alc is not None else None
-        boxes_added_today = delta
-        if comparable_20pct is not None and yesterday_alc is not None:
-            logger.info(f"  Floor dropped for {box_id}: using comparable count {comparable_20pct} (vs today's {boxes_within_20pct}) for delta against yesterday's {yesterday_alc}")
+        diff = listing_diff.get(box_id)
+        if diff and diff['has_previous']:
+            # Exact, net: boxes newly listed minus boxes gone since yesterday, under the fixed cap
+            boxes_added_today = diff['net_units']
+            logger.info(
+                f"  Listing diff for {box_id}: +{diff['added_units']} / -{diff['removed_units']} boxes "
+                f"({diff['added']} new, {diff['removed']} gone, {diff['repriced']} repriced listings)"
+            )
+        else:
+            # No snapshot yesterday: added/removed from yesterday's count to today's.
+            yesterday_alc = yesterday_counts.get(box_id)
+
+            # When floor dropped, use the comparable count (today's listings counted against
+            # yesterday's higher 20% threshold) so the delta is apples-to-apples.
+            # When floor rose or stayed same, use today's normal 20% count.
+            count_for_delta = comparable_20pct if comparable_20pct is not None else boxes_within_20pct
+            delta = (count_for_delta - yesterday_alc) if yesterday_alc is not None else None
+            boxes_added_today = delta
+            if comparable_20pct is not None and yesterday_alc is not None:
+                logger.info(f"  Floor dropped for {box_id}: using comparable count {comparable_20pct} (vs today's {boxes_within_20pct}) for delta against yesterday's {yesterday_alc}")
 
         # Write to DB using box_id directly (these ARE the DB UUIDs)
         # NOTE: Do NOT write floor_price_usd here — that comes from Apify (sales data).
@@ -1240,6 +1369,7 @@ def save_results(results: List[Dict]):
                 ebay_active_listings_count=0,
             )
             if ok:
+                saved.append(box_id)
                 logger.debug(f"DB upsert ok for {box_id}")
             else:
                 logger.warning(f"DB upsert failed for {box_id} (e.g. missing FK)")
@@ -1250,6 +1380,7 @@ def save_results(results: List[Dict]):
         logger.info(f"Saved {box_id}: {boxes_within_20pct} boxes (total quantity within 20% of floor) @ ${result.get('floor_price', 0):.2f}{add_remove}")
 
     logger.info(f"Saved {len(results)} entries to DB")
+    return saved
 
 
 # ============================================================================
@@ -6,8 +6,16 @@ After Phase 3 (rolling_metrics) completes, this module computes the aggregate
 BoosterBox Index and market-wide stats from box_metrics_unified.
 
 Run standalone:  python scripts/market_index.py [--date 2026-02-10]
+                 python scripts/market_index.py --verify [--start 2026-01-01] [--end 2026-02-10]
 Called by daily_refresh.py after Phase 3.
 
+One SQL statement (_SNAPSHOT_SQL) reads everything a date needs: each box's
+latest box_metrics_unified row on or before the date (DISTINCT ON), the stored
+index values 1/7/30 days back, the previous day's totals and the two 7-day
+volume sums. The aggregates are computed over that as a [date x box] matrix
+(aggregate_days / assemble_rows), the same code scripts/market_index_range.py
+runs over many dates at once.
+
 Metrics computed:
   1. index_value          – equal-weight avg of all floor prices
   2. index_*_change_pct   – compare to stored values 1/7/30 days ago
@@ -22,10 +30,12 @@ from __future__ import annotations
 import json
 import logging
 import sys
-from datetime import datetime, timedelta
+from datetime import date, datetime
 from pathlib import Path
 from typing import Any, Dict, List, Optional
 
+import numpy as np
+
 # Add project root to path
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
@@ -39,150 +49,297 @@ def _get_sync_engine():
     return _shared_engine()
 
 
-def _clamp(val: float, lo: float, hi: float) -> float:
-    return max(lo, min(hi, val))
+# box_metrics_unified columns the index uses
+_FIELDS = (
+    "floor_price_usd",
+    "floor_price_1d_change_pct",
+    "daily_volume_usd",
+    "unified_volume_usd",
+    "unified_volume_7d_ema",
+    "boxes_sold_per_day",
+    "active_listings_count",
+    "boxes_added_today",
+    "liquidity_score",
+)
+
+_BOX_FILTER = """
+    bb.product_name NOT LIKE '%%(Test)%%'
+    AND bb.product_name NOT LIKE '%%Test Box%%'
+    AND bb.product_name != 'One Piece - OP-01 Romance Dawn Booster Box'
+"""
 
+# One row per box (latest metrics on or before :td), with the date's context
+# (stored index history, previous-day totals, 7d volume sums) on every row.
+_SNAPSHOT_SQL = f"""
+    WITH latest AS (
+        SELECT DISTINCT ON (bmu.booster_box_id)
+            bmu.booster_box_id,
+            bmu.metric_date,
+            {", ".join("bmu." + f for f in _FIELDS)},
+            bb.product_name
+        FROM box_metrics_unified bmu
+        JOIN booster_boxes bb ON bb.id = bmu.booster_box_id
+        WHERE bmu.metric_date <= CAST(:td AS date)
+          AND {_BOX_FILTER}
+        ORDER BY bmu.booster_box_id, bmu.metric_date DESC
+    ), history AS (
+        SELECT
+            MAX(index_value) FILTER (WHERE metric_date = CAST(:td AS date) - 1) AS index_1d_ago,
+            MAX(index_value) FILTER (WHERE metric_date = CAST(:td AS date) - 7) AS index_7d_ago,
+            MAX(index_value) FILTER (WHERE metric_date = CAST(:td AS date) - 30) AS index_30d_ago,
+            MAX(total_daily_volume_usd) FILTER (WHERE metric_date = CAST(:td AS date) - 1) AS previous_daily_volume,
+            MAX(total_active_listings) FILTER (WHERE metric_date = CAST(:td AS date) - 1) AS previous_active_listings
+        FROM market_index_daily
+        WHERE metric_date IN (CAST(:td AS date) - 1, CAST(:td AS date) - 7, CAST(:td AS date) - 30)
+    ), volume AS (
+        SELECT
+            COALESCE(SUM(bmu.daily_volume_usd) FILTER (WHERE bmu.metric_date >= CAST(:td AS date) - 6), 0) AS volume_7d,
+            COALESCE(SUM(bmu.daily_volume_usd) FILTER (WHERE bmu.metric_date <= CAST(:td AS date) - 7), 0) AS volume_prev_7d
+        FROM box_metrics_unified bmu
+        JOIN booster_boxes bb ON bb.id = bmu.booster_box_id
+        WHERE bmu.metric_date >= CAST(:td AS date) - 13
+          AND bmu.metric_date <= CAST(:td AS date)
+          AND {_BOX_FILTER}
+    )
+    SELECT latest.*, history.*, volume.*
+    FROM latest CROSS JOIN history CROSS JOIN volume
+    ORDER BY latest.booster_box_id
+"""
 
-def _get_boxes_for_date(target_date: str) -> List[Dict[str, Any]]:
-    """Get latest metrics for all boxes on or before target_date."""
-    from sqlalchemy import text
-    engine = _get_sync_engine()
-    with engine.connect() as conn:
-        rows = conn.execute(text("""
-            SELECT DISTINCT ON (bmu.booster_box_id)
-                bmu.booster_box_id,
-                bmu.metric_date,
-                bmu.floor_price_usd,
-                bmu.floor_price_1d_change_pct,
-                bmu.floor_price_7d_change_pct,
-                bmu.daily_volume_usd,
-                bmu.unified_volume_usd,
-                bmu.unified_volume_7d_ema,
-                bmu.boxes_sold_per_day,
-                bmu.boxes_sold_30d_avg,
-                bmu.active_listings_count,
-                bmu.boxes_added_today,
-                bmu.liquidity_score,
-                bb.product_name
-            FROM box_metrics_unified bmu
-            JOIN booster_boxes bb ON bb.id = bmu.booster_box_id
-            WHERE bmu.metric_date <= CAST(:td AS date)
-              AND bb.product_name NOT LIKE '%%(Test)%%'
-              AND bb.product_name NOT LIKE '%%Test Box%%'
-              AND bb.product_name != 'One Piece - OP-01 Romance Dawn Booster Box'
-            ORDER BY bmu.booster_box_id, bmu.metric_date DESC
-        """), {"td": target_date}).fetchall()
-
-    result = []
-    for r in rows:
-        d = r._mapping if hasattr(r, "_mapping") else dict(r)
-        result.append({
-            "booster_box_id": str(d["booster_box_id"]),
-            "metric_date": str(d["metric_date"]),
-            "floor_price_usd": float(d["floor_price_usd"]) if d.get("floor_price_usd") is not None else None,
-            "floor_price_1d_change_pct": float(d["floor_price_1d_change_pct"]) if d.get("floor_price_1d_change_pct") is not None else None,
-            "floor_price_7d_change_pct": float(d["floor_price_7d_change_pct"]) if d.get("floor_price_7d_change_pct") is not None else None,
-            "daily_volume_usd": float(d["daily_volume_usd"]) if d.get("daily_volume_usd") is not None else 0,
-            "unified_volume_usd": float(d["unified_volume_usd"]) if d.get("unified_volume_usd") is not None else 0,
-            "unified_volume_7d_ema": float(d["unified_volume_7d_ema"]) if d.get("unified_volume_7d_ema") is not None else 0,
-            "boxes_sold_per_day": float(d["boxes_sold_per_day"]) if d.get("boxes_sold_per_day") is not None else 0,
-            "boxes_sold_30d_avg": float(d["boxes_sold_30d_avg"]) if d.get("boxes_sold_30d_avg") is not None else 0,
-            "active_listings_count": int(d["active_listings_count"]) if d.get("active_listings_count") is not None else 0,
-            "boxes_added_today": int(d["boxes_added_today"]) if d.get("boxes_added_today") is not None else 0,
-            "liquidity_score": float(d["liquidity_score"]) if d.get("liquidity_score") is not None else 0,
-            "product_name": d.get("product_name", ""),
-        })
-    return result
 
+def _nan(v: Any) -> float:
+    return float(v) if v is not None else np.nan
 
-def _get_historical_index(date_str: str) -> Optional[float]:
-    """Get stored index_value from market_index_daily for a past date."""
-    from sqlalchemy import text
-    engine = _get_sync_engine()
-    with engine.connect() as conn:
-        row = conn.execute(text("""
-            SELECT index_value FROM market_index_daily
-            WHERE metric_date = CAST(:d AS date)
-        """), {"d": date_str}).fetchone()
-    if row and row[0] is not None:
-        return float(row[0])
-    return None
 
+def _round2(values: np.ndarray) -> List[Optional[float]]:
+    """Python round(x, 2) per element (NaN -> None)."""
+    return [None if np.isnan(v) else round(float(v), 2) for v in values]
 
-def _get_previous_day_totals(target_date: str):
-    """Get previous day's aggregate totals for change calculations."""
-    from sqlalchemy import text
-    engine = _get_sync_engine()
-    dt = datetime.strptime(target_date, "%Y-%m-%d")
-    prev_str = (dt - timedelta(days=1)).strftime("%Y-%m-%d")
-    with engine.connect() as conn:
-        row = conn.execute(text("""
-            SELECT total_daily_volume_usd, total_active_listings
-            FROM market_index_daily
-            WHERE metric_date = CAST(:d AS date)
-        """), {"d": prev_str}).fetchone()
-    if row:
-        return {
-            "total_daily_volume_usd": float(row[0]) if row[0] is not None else None,
-            "total_active_listings": int(row[1]) if row[1] is not None else None,
-        }
-    return None
-
-
-def _get_actual_7d_volume(target_date: str) -> Optional[float]:
-    """Sum daily_volume_usd across all boxes for the last 7 days from DB."""
-    from sqlalchemy import text
-    engine = _get_sync_engine()
-    dt = datetime.strptime(target_date, "%Y-%m-%d")
-    start_str = (dt - timedelta(days=6)).strftime("%Y-%m-%d")
-    with engine.connect() as conn:
-        row = conn.execute(text("""
-            SELECT COALESCE(SUM(bmu.daily_volume_usd), 0)
-            FROM box_metrics_unified bmu
-            JOIN booster_boxes bb ON bb.id = bmu.booster_box_id
-            WHERE bmu.metric_date >= CAST(:start AS date)
-              AND bmu.metric_date <= CAST(:end AS date)
-              AND bb.product_name NOT LIKE '%%(Test)%%'
-              AND bb.product_name NOT LIKE '%%Test Box%%'
-              AND bb.product_name != 'One Piece - OP-01 Romance Dawn Booster Box'
-        """), {"start": start_str, "end": target_date}).fetchone()
-    if row and row[0] is not None:
-        return round(float(row[0]), 2)
-    return None
-
-
-def compute_fear_greed(boxes: List[Dict[str, Any]]) -> int:
+
+def box_matrix(rows: List[Any]) -> Dict[str, Any]:
     """
-    4-factor Fear & Greed score (0-100).
-    Ported from MarketOverviewBar.tsx computeFearGreedIndex().
+    Column arrays from box_metrics_unified rows ordered by (box, metric_date):
+    row_box (box index), row_day (date ordinal), one float array per _FIELDS
+    column (NULL -> NaN), box_ids and manual liquidity overrides per box.
     """
-    if not boxes:
-        return 50
-
-    # 1. Price Momentum (25%): avg floor_price_1d_change_pct, mapped -5% to +5% -> 0-100
-    price_changes = [b["floor_price_1d_change_pct"] for b in boxes if b.get("floor_price_1d_change_pct") is not None]
-    avg_price_change = sum(price_changes) / len(price_changes) if price_changes else 0
-    price_momentum = _clamp((avg_price_change + 5) / 10, 0, 1) * 100
-
-    # 2. Volume Momentum (25%): daily vol sum vs 7d EMA sum, mapped -50% to +50% -> 0-100
-    daily_vol_sum = sum(b.get("daily_volume_usd", 0) for b in boxes)
-    vol_7d_sum = sum(b.get("unified_volume_7d_ema", 0) for b in boxes)
-    # unified_volume_7d_ema is a daily EMA, use as proxy for avg daily
-    vol_change_pct = ((daily_vol_sum - vol_7d_sum) / vol_7d_sum * 100) if vol_7d_sum > 0 else 0
-    volume_momentum = _clamp((vol_change_pct + 50) / 100, 0, 1) * 100
-
-    # 3. Listing Trend (25%): inverted - more additions = fear
-    added_values = [b.get("boxes_added_today", 0) for b in boxes if b.get("boxes_added_today") is not None]
-    avg_added = sum(added_values) / len(added_values) if added_values else 0
-    listing_trend = _clamp((-avg_added + 5) / 10, 0, 1) * 100
-
-    # 4. Sales Velocity (25%): avg boxes_sold_per_day, mapped 0-3 -> 0-100
-    sales_values = [b.get("boxes_sold_per_day", 0) for b in boxes if b.get("boxes_sold_per_day") is not None]
-    avg_sales = sum(sales_values) / len(sales_values) if sales_values else 0
-    sales_velocity = _clamp(avg_sales / 3, 0, 1) * 100
+    from app.services.box_detail_service import get_manual_liquidity_reprint
 
+    box_ids: List[str] = []
+    manual_liq: List[float] = []
+    row_box = np.empty(len(rows), dtype=np.int64)
+    row_day = np.empty(len(rows), dtype=np.int64)
+    cols = {f: np.empty(len(rows), dtype=np.float64) for f in _FIELDS}
+    for i, r in enumerate(rows):
+        d = r._mapping if hasattr(r, "_mapping") else r
+        bid = str(d["booster_box_id"])
+        if not box_ids or box_ids[-1] != bid:
+            box_ids.append(bid)
+            liq, _ = get_manual_liquidity_reprint(d.get("product_name"))
+            manual_liq.append(_nan(liq))
+        row_box[i] = len(box_ids) - 1
+        md = d["metric_date"]
+        row_day[i] = (md if isinstance(md, date) else date.fromisoformat(str(md)[:10])).toordinal()
+        for f in _FIELDS:
+            cols[f][i] = _nan(d.get(f))
+    return {
+        "box_ids": box_ids,
+        "manual_liquidity": np.array(manual_liq, dtype=np.float64),
+        "row_box": row_box,
+        "row_day": row_day,
+        **cols,
+    }
+
+
+def aggregate_days(data: Dict[str, Any], days: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Per-date aggregates for date ordinals days over the as-of matrix: each box's
+    latest row on or before each date. Index value, floors up/down/flat, biggest
+    gainer/loser, totals, liquidity and the Fear & Greed score, one element per date.
+    """
+    n_boxes = len(data["box_ids"])
+    if n_boxes == 0:
+        return {"boxes": np.zeros(len(days), dtype=np.int64)}
+
+    # (box, day) packed into one sorted key; the latest row <= day for box j is
+    # the last key <= (j, day), provided it still belongs to box j.
+    box_index = np.arange(n_boxes, dtype=np.int64)
+    keys = (data["row_box"] << 32) | data["row_day"]
+    pos = np.searchsorted(keys, (box_index[None, :] << 32) | days[:, None], side="right") - 1
+    safe = pos.clip(min=0)
+    present = (pos >= 0) & (data["row_box"][safe] == box_index[None, :])
+
+    def col(name: str, default: float = np.nan) -> np.ndarray:
+        m = np.where(present, data[name][safe], np.nan)
+        return m if np.isnan(default) else np.where(np.isnan(m), default, m)
+
+    n = present.sum(axis=1)
+    floor = col("floor_price_usd")
+    change = col("floor_price_1d_change_pct")
+    daily_vol = col("daily_volume_usd", 0.0)
+    ema = col("unified_volume_7d_ema", 0.0)
+    sold = col("boxes_sold_per_day", 0.0)
+    added = col("boxes_added_today", 0.0)
+    liquidity = col("liquidity_score", 0.0)
+
+    priced = floor > 0
+    has_change = ~np.isnan(change)
+    up = (change > 0).sum(axis=1)
+    down = (change < 0).sum(axis=1)
+    # First box in booster_box_id order wins ties, as in the per-box loop
+    gainer = np.where(has_change, change, -np.inf).argmax(axis=1)
+    loser = np.where(has_change, change, np.inf).argmin(axis=1)
+    rows = np.arange(len(days))
+
+    # Manual liquidity overrides (0-100 scale) match the leaderboard
+    manual = np.broadcast_to(data["manual_liquidity"], present.shape)
+    liq = np.where(~np.isnan(manual), manual, np.where(liquidity > 0, liquidity, np.nan))
+    liq = np.where(present, liq, np.nan)
+    liq_n = (~np.isnan(liq)).sum(axis=1)
+
+    # 4-factor Fear & Greed score (0-100), one column per factor; ported from
+    # MarketOverviewBar.tsx computeFearGreedIndex()
+    n_safe = np.maximum(n, 1)
+    chg_n = has_change.sum(axis=1)
+    avg_price_change = np.where(chg_n > 0, np.where(has_change, change, 0).sum(axis=1) / np.maximum(chg_n, 1), 0)
+    price_momentum = np.clip((avg_price_change + 5) / 10, 0, 1) * 100
+    daily_vol_sum = daily_vol.sum(axis=1)
+    vol_7d_sum = ema.sum(axis=1)
+    vol_change_pct = np.where(vol_7d_sum > 0, (daily_vol_sum - vol_7d_sum) / np.where(vol_7d_sum > 0, vol_7d_sum, 1) * 100, 0)
+    volume_momentum = np.clip((vol_change_pct + 50) / 100, 0, 1) * 100
+    listing_trend = np.clip((-(added.sum(axis=1) / n_safe) + 5) / 10, 0, 1) * 100
+    sales_velocity = np.clip((sold.sum(axis=1) / n_safe) / 3, 0, 1) * 100
     score = (price_momentum * 0.25) + (volume_momentum * 0.25) + (listing_trend * 0.25) + (sales_velocity * 0.25)
-    return round(_clamp(score, 0, 100))
+
+    return {
+        "boxes": n,
+        "index_value": np.array(_round2(np.where(priced.any(axis=1), np.where(priced, floor, 0).sum(axis=1), np.nan)), dtype=np.float64),
+        "floors_up": up,
+        "floors_down": down,
+        "floors_flat": n - up - down,
+        "has_change": has_change.any(axis=1),
+        "gainer": gainer,
+        "gainer_pct": change[rows, gainer],
+        "loser": loser,
+        "loser_pct": change[rows, loser],
+        "total_daily_volume": np.array(_round2(daily_vol_sum), dtype=np.float64),
+        "total_30d_volume": col("unified_volume_usd", 0.0).sum(axis=1),
+        "total_boxes_sold": sold.sum(axis=1),
+        "total_active_listings": col("active_listings_count", 0.0).sum(axis=1),
+        "total_boxes_added": added.sum(axis=1),
+        "avg_liquidity": np.where(liq_n > 0, np.where(np.isnan(liq), 0, liq).sum(axis=1) / np.maximum(liq_n, 1), np.nan),
+        "fear_greed": np.where(n > 0, np.clip(score, 0, 100), 50),
+    }
+
+
+def assemble_rows(
+    days: np.ndarray,
+    agg: Dict[str, np.ndarray],
+    box_ids: List[str],
+    past_index: Dict[int, np.ndarray],
+    previous_volume: np.ndarray,
+    previous_listings: np.ndarray,
+    volume_7d: np.ndarray,
+    volume_prev_7d: np.ndarray,
+) -> List[Dict[str, Any]]:
+    """
+    market_index_daily rows (upsert_market_index() keyword names) from
+    aggregate_days() output and each date's history, all aligned with days:
+    past_index {1/7/30: stored index_value that many days back}, the previous
+    day's total_daily_volume_usd / total_active_listings, and daily_volume_usd
+    summed over [d-6, d] and [d-13, d-7]. NaN = no stored value. Dates without
+    boxes are skipped ("no_data").
+    """
+    if "index_value" not in agg:
+        return []
+    index_value = agg["index_value"]
+    total_daily = agg["total_daily_volume"]
+    total_listings = agg["total_active_listings"]
+
+    def pct_change(now: np.ndarray, past: np.ndarray, ok: np.ndarray) -> np.ndarray:
+        return np.where(ok, (now - past) / np.where(ok, past, 1) * 100, np.nan)
+
+    index_change = {
+        k: _round2(pct_change(index_value, past, ~np.isnan(index_value) & (past > 0)))
+        for k, past in past_index.items()
+    }
+    actual_7d = np.array(_round2(volume_7d), dtype=np.float64)
+    past_7d = np.array(_round2(volume_prev_7d), dtype=np.float64)
+    vol_ok = (past_7d > 0) & (actual_7d != 0)
+    volume_7d_change = pct_change(actual_7d, past_7d, vol_ok)
+    v7d = _round2(volume_7d_change)
+    v1d = _round2(pct_change(total_daily, previous_volume, previous_volume > 0))
+
+    rows: List[Dict[str, Any]] = []
+    for k in np.flatnonzero(agg["boxes"] > 0):
+        # BULLISH if index_7d > +2% AND volume_7d > 0%, BEARISH if < -2% AND < 0%
+        sentiment_volume = volume_7d_change[k] if vol_ok[k] else 0
+        i7d = index_change[7][k]
+        sentiment = "NEUTRAL"
+        if i7d is not None:
+            if i7d > 2 and sentiment_volume > 0:
+                sentiment = "BULLISH"
+            elif i7d < -2 and sentiment_volume < 0:
+                sentiment = "BEARISH"
+        has_change = bool(agg["has_change"][k])
+        # boxes_added_today is already net change (boxes listed - boxes gone, from
+        # the listing snapshot diff or the count delta), so it already accounts
+        # for sales. Don't subtract sales again.
+        added = int(agg["total_boxes_added"][k])
+        rows.append({
+            "metric_date": date.fromordinal(int(days[k])).isoformat(),
+            "index_value": None if np.isnan(index_value[k]) else float(index_value[k]),
+            "index_1d_change_pct": index_change[1][k],
+            "index_7d_change_pct": i7d,
+            "index_30d_change_pct": index_change[30][k],
+            "sentiment": sentiment,
+            "fear_greed_score": round(float(agg["fear_greed"][k])),
+            "floors_up_count": int(agg["floors_up"][k]),
+            "floors_down_count": int(agg["floors_down"][k]),
+            "floors_flat_count": int(agg["floors_flat"][k]),
+            "biggest_gainer_box_id": box_ids[agg["gainer"][k]] if has_change else None,
+            "biggest_gainer_pct": float(agg["gainer_pct"][k]) if has_change else None,
+            "biggest_loser_box_id": box_ids[agg["loser"][k]] if has_change else None,
+            "biggest_loser_pct": float(agg["loser_pct"][k]) if has_change else None,
+            "total_daily_volume_usd": float(total_daily[k]),
+            "total_7d_volume_usd": float(actual_7d[k]),
+            "total_30d_volume_usd": round(float(agg["total_30d_volume"][k]), 2),
+            "volume_1d_change_pct": v1d[k],
+            "volume_7d_change_pct": v7d[k],
+            "avg_liquidity_score": _round2(agg["avg_liquidity"][k:k + 1])[0],
+            "total_boxes_sold_today": round(float(agg["total_boxes_sold"][k]), 2),
+            "total_active_listings": int(total_listings[k]),
+            "total_boxes_added_today": added,
+            "net_supply_change": added,
+            "listings_1d_change": None if np.isnan(previous_listings[k]) else int(total_listings[k] - previous_listings[k]),
+        })
+    return rows
+
+
+def build_market_index_row(target_date: str) -> Optional[Dict[str, Any]]:
+    """market_index_daily row for target_date from one query; None when no box has data."""
+    from sqlalchemy import text
+    engine = _get_sync_engine()
+    with engine.connect() as conn:
+        rows = [dict(r._mapping) for r in conn.execute(text(_SNAPSHOT_SQL), {"td": target_date}).fetchall()]
+    if not rows:
+        return None
+
+    ctx = rows[0]
+    days = np.array([date.fromisoformat(target_date).toordinal()], dtype=np.int64)
+    data = box_matrix(rows)
+    out = assemble_rows(
+        days,
+        aggregate_days(data, days),
+        data["box_ids"],
+        past_index={k: np.array([_nan(ctx[f"index_{k}d_ago"])]) for k in (1, 7, 30)},
+        previous_volume=np.array([_nan(ctx["previous_daily_volume"])]),
+        previous_listings=np.array([_nan(ctx["previous_active_listings"])]),
+        volume_7d=np.array([_nan(ctx["volume_7d"])]),
+        volume_prev_7d=np.array([_nan(ctx["volume_prev_7d"])]),
+    )
+    row = out[0]
+    row["boxes_counted"] = len(data["box_ids"])
+    return row
 
 
 def compute_market_index(target_date: str | None = None) -> dict:
@@ -196,178 +353,84 @@ def compute_market_index(target_date: str | None = None) -> dict:
 
     logger.info(f"Phase 3b: Computing market index for {target_date}")
 
-    boxes = _get_boxes_for_date(target_date)
-    if not boxes:
+    row = build_market_index_row(target_date)
+    if row is None:
         logger.warning("No box data found for market index computation")
         return {"target_date": target_date, "status": "no_data"}
 
-    logger.info(f"Found {len(boxes)} boxes for market index")
-
-    # ── Index value: sum of all floor prices ──────────
-    floor_prices = [b["floor_price_usd"] for b in boxes if b.get("floor_price_usd") is not None and b["floor_price_usd"] > 0]
-    index_value = round(sum(floor_prices), 2) if floor_prices else None
-
-    # ── Change percentages: compare to stored historical values ───
-    dt = datetime.strptime(target_date, "%Y-%m-%d")
-    index_1d_change_pct = None
-    index_7d_change_pct = None
-    index_30d_change_pct = None
-
-    if index_value is not None:
-        for days_back, attr_name in [(1, "index_1d_change_pct"), (7, "index_7d_change_pct"), (30, "index_30d_change_pct")]:
-            past_str = (dt - timedelta(days=days_back)).strftime("%Y-%m-%d")
-            past_val = _get_historical_index(past_str)
-            if past_val and past_val > 0:
-                pct = round(((index_value - past_val) / past_val) * 100, 2)
-                if attr_name == "index_1d_change_pct":
-                    index_1d_change_pct = pct
-                elif attr_name == "index_7d_change_pct":
-                    index_7d_change_pct = pct
-                else:
-                    index_30d_change_pct = pct
-
-    # ── Sentiment ─────────────────────────────────────────────────
-    # BULLISH if index_7d > +2% AND volume_7d > 0%
-    # BEARISH if index_7d < -2% AND volume_7d < 0%
-    # else NEUTRAL
-    prev_totals = _get_previous_day_totals(target_date)
-    total_daily_vol = sum(b.get("daily_volume_usd", 0) for b in boxes)
-
-    # Get actual 7d volume from DB (sum of daily_volume_usd over last 7 days)
-    actual_7d_vol = _get_actual_7d_volume(target_date)
-
-    # Get previous week's 7d volume for comparison
-    past_7d_str = (dt - timedelta(days=7)).strftime("%Y-%m-%d")
-    past_7d_vol = _get_actual_7d_volume(past_7d_str)
-
-    # Volume 7d change: compare this week's actual 7d total to previous week's
-    volume_7d_change_for_sentiment = 0
-    if past_7d_vol and past_7d_vol > 0 and actual_7d_vol:
-        volume_7d_change_for_sentiment = ((actual_7d_vol - past_7d_vol) / past_7d_vol) * 100
-
-    sentiment = "NEUTRAL"
-    if index_7d_change_pct is not None:
-        if index_7d_change_pct > 2 and volume_7d_change_for_sentiment > 0:
-            sentiment = "BULLISH"
-        elif index_7d_change_pct < -2 and volume_7d_change_for_sentiment < 0:
-            sentiment = "BEARISH"
-
-    # ── Fear & Greed ──────────────────────────────────────────────
-    fear_greed_score = compute_fear_greed(boxes)
-
-    # ── Price movers ──────────────────────────────────────────────
-    floors_up = 0
-    floors_down = 0
-    floors_flat = 0
-    biggest_gainer_id = None
-    biggest_gainer_pct = None
-    biggest_loser_id = None
-    biggest_loser_pct = None
-
-    for b in boxes:
-        change = b.get("floor_price_1d_change_pct")
-        if change is None:
-            floors_flat += 1
-            continue
-        if change > 0:
-            floors_up += 1
-        elif change < 0:
-            floors_down += 1
-        else:
-            floors_flat += 1
-
-        if biggest_gainer_pct is None or (change is not None and change > biggest_gainer_pct):
-            biggest_gainer_pct = change
-            biggest_gainer_id = b["booster_box_id"]
-        if biggest_loser_pct is None or (change is not None and change < biggest_loser_pct):
-            biggest_loser_pct = change
-            biggest_loser_id = b["booster_box_id"]
-
-    # ── Volume totals ─────────────────────────────────────────────
-    total_daily_volume_usd = round(total_daily_vol, 2)
-    total_30d_volume_usd = round(sum(b.get("unified_volume_usd", 0) for b in boxes), 2)
-
-    # Actual 7d volume from DB (already computed above for sentiment)
-    total_7d_volume_usd = actual_7d_vol
-
-    # Volume change percentages
-    volume_1d_change_pct = None
-    volume_7d_change_pct_val = None
-    if prev_totals and prev_totals.get("total_daily_volume_usd") and prev_totals["total_daily_volume_usd"] > 0:
-        volume_1d_change_pct = round(
-            ((total_daily_volume_usd - prev_totals["total_daily_volume_usd"]) / prev_totals["total_daily_volume_usd"]) * 100, 2
-        )
-    if past_7d_vol and past_7d_vol > 0 and total_7d_volume_usd:
-        volume_7d_change_pct_val = round(((total_7d_volume_usd - past_7d_vol) / past_7d_vol) * 100, 2)
-
-    # ── Liquidity & Sales ─────────────────────────────────────────
-    # Apply manual liquidity overrides (0-100 scale) to match leaderboard
-    from app.services.box_detail_service import get_manual_liquidity_reprint
-    liq_scores = []
-    for b in boxes:
-        manual_liq, _ = get_manual_liquidity_reprint(b.get("product_name"))
-        if manual_liq is not None:
-            liq_scores.append(manual_liq)
-        elif b.get("liquidity_score") is not None and b["liquidity_score"] > 0:
-            liq_scores.append(b["liquidity_score"])
-    avg_liquidity = round(sum(liq_scores) / len(liq_scores), 2) if liq_scores else None
-
-    total_boxes_sold = round(sum(b.get("boxes_sold_per_day", 0) for b in boxes), 2)
-
-    # ── Supply ────────────────────────────────────────────────────
-    total_active_listings = sum(b.get("active_listings_count", 0) for b in boxes)
-    total_boxes_added = sum(b.get("boxes_added_today", 0) for b in boxes)
-    # boxes_added_today is already net change (today's listings - yesterday's listings),
-    # so it already accounts for sales. Don't subtract sales again.
-    net_supply = total_boxes_added
-
-    listings_1d_change_val = None
-    if prev_totals and prev_totals.get("total_active_listings") is not None:
-        listings_1d_change_val = total_active_listings - prev_totals["total_active_listings"]
+    boxes_counted = row.pop("boxes_counted")
+    logger.info(f"Found {boxes_counted} boxes for market index")
 
     # ── Write to DB ───────────────────────────────────────────────
     from app.services.market_index_writer import upsert_market_index
 
-    ok = upsert_market_index(
-        metric_date=target_date,
-        index_value=index_value,
-        index_1d_change_pct=index_1d_change_pct,
-        index_7d_change_pct=index_7d_change_pct,
-        index_30d_change_pct=index_30d_change_pct,
-        sentiment=sentiment,
-        fear_greed_score=fear_greed_score,
-        floors_up_count=floors_up,
-        floors_down_count=floors_down,
-        floors_flat_count=floors_flat,
-        biggest_gainer_box_id=biggest_gainer_id,
-        biggest_gainer_pct=biggest_gainer_pct,
-        biggest_loser_box_id=biggest_loser_id,
-        biggest_loser_pct=biggest_loser_pct,
-        total_daily_volume_usd=total_daily_volume_usd,
-        total_7d_volume_usd=total_7d_volume_usd,
-        total_30d_volume_usd=total_30d_volume_usd,
-        volume_1d_change_pct=volume_1d_change_pct,
-        volume_7d_change_pct=volume_7d_change_pct_val,
-        avg_liquidity_score=avg_liquidity,
-        total_boxes_sold_today=total_boxes_sold,
-        total_active_listings=total_active_listings,
-        total_boxes_added_today=total_boxes_added,
-        net_supply_change=net_supply,
-        listings_1d_change=listings_1d_change_val,
-    )
+    ok = upsert_market_index(**row)
 
     summary = {
         "target_date": target_date,
-        "index_value": index_value,
-        "sentiment": sentiment,
-        "fear_greed_score": fear_greed_score,
-        "boxes_counted": len(boxes),
+        "index_value": row["index_value"],
+        "sentiment": row["sentiment"],
+        "fear_greed_score": row["fear_greed_score"],
+        "boxes_counted": boxes_counted,
         "db_upserted": ok,
     }
-    logger.info(f"Phase 3b complete: index={index_value}, sentiment={sentiment}, F&G={fear_greed_score}")
+    logger.info(f"Phase 3b complete: index={row['index_value']}, sentiment={row['sentiment']}, F&G={row['fear_greed_score']}")
     return summary
 
 
+# market_index_daily column scales (app/models/market_index.py)
+_VERIFY_SCALE = {
+    "index_value": 2, "index_1d_change_pct": 2, "index_7d_change_pct": 2, "index_30d_change_pct": 2,
+    "biggest_gainer_pct": 2, "biggest_loser_pct": 2,
+    "total_daily_volume_usd": 2, "total_7d_volume_usd": 2, "total_30d_volume_usd": 2,
+    "volume_1d_change_pct": 2, "volume_7d_change_pct": 2,
+    "avg_liquidity_score": 2, "total_boxes_sold_today": 2,
+}
+
+
+def verify_market_index(start: str | None = None, end: str | None = None) -> dict:
+    """
+    Recompute every stored market_index_daily date (read-only) and compare each
+    column with the stored row. Returns {dates, no_data, mismatched_dates, mismatches}.
+    """
+    from sqlalchemy import text
+    from app.services.market_index_writer import _PARAMS
+
+    columns = [c for c in _PARAMS if c != "metric_date"]
+    engine = _get_sync_engine()
+    with engine.connect() as conn:
+        stored = [dict(r._mapping) for r in conn.execute(text(f"""
+            SELECT metric_date, {", ".join(columns)}
+            FROM market_index_daily
+            WHERE (CAST(:start AS date) IS NULL OR metric_date >= CAST(:start AS date))
+              AND (CAST(:end AS date) IS NULL OR metric_date <= CAST(:end AS date))
+            ORDER BY metric_date
+        """), {"start": start, "end": end}).fetchall()]
+
+    def norm(col: str, v: Any) -> Any:
+        if v is None:
+            return None
+        if col in _VERIFY_SCALE:
+            return round(float(v), _VERIFY_SCALE[col])
+        return str(v) if col.endswith("_box_id") else v
+
+    mismatches: List[Dict[str, Any]] = []
+    bad_dates = set()
+    no_data = 0
+    for s in stored:
+        md = str(s["metric_date"])
+        row = build_market_index_row(md)
+        if row is None:
+            no_data += 1
+            continue
+        for col in columns:
+            want, got = norm(col, s[col]), norm(col, row.get(col))
+            if want != got:
+                bad_dates.add(md)
+                mismatches.append({"date": md, "column": col, "stored": want, "computed": got})
+    return {"dates": len(stored), "no_data": no_data, "mismatched_dates": len(bad_dates), "mismatches": mismatches[:50]}
+
+
 if __name__ == "__main__":
     import argparse
 
@@ -384,7 +447,13 @@ if __name__ == "__main__":
         default=None,
         help="Target date (YYYY-MM-DD). Defaults to today.",
     )
+    parser.add_argument("--verify", action="store_true", help="Compare stored market_index_daily rows with a recompute (read-only)")
+    parser.add_argument("--start", type=str, default=None, help="--verify: first date")
+    parser.add_argument("--end", type=str, default=None, help="--verify: last date")
     args = parser.parse_args()
 
-    result = compute_market_index(target_date=args.date)
-    print(json.dumps(result, indent=2))
+    if args.verify:
+        result = verify_market_index(args.start, args.end)
+    else:
+        result = compute_market_index(target_date=args.date)
+    print(json.dumps(result, indent=2, default=str))
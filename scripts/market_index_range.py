@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Market Index — Range Mode
+-------------------------
+Computes market_index_daily rows for many dates at once, for backfills.
+
+compute_market_index() (scripts/market_index.py) runs one query per date, and
+each date re-reads the stored index of the dates before it. Range mode instead:
+
+  1. reads the box/date rows of box_metrics_unified once (metric_date <= last
+     date, same box filters) and market_index_daily once
+  2. runs aggregate_days() over the as-of matrix [date x box] for every date
+     (scripts/market_index.py, the same code as a single date)
+  3. takes 1/7/30-day index history, the previous-day totals and 7d volume
+     from calendar arrays: stored market_index_daily values overlaid with the
+     values computed in this run, which is what the per-date path sees when
+     it walks the dates oldest first
+  4. writes every row with one bulk upsert (upsert_market_index_many)
+
+Step 2 can be split across a process pool (--workers) for very long ranges.
+
+Run standalone:  python scripts/market_index_range.py --start 2026-01-01 [--end 2026-02-10] [--workers 4]
+Used by scripts/backfill_market_index.py.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Dict, List
+
+import numpy as np
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from scripts.market_index import (
+    _BOX_FILTER,
+    _FIELDS,
+    _get_sync_engine,
+    aggregate_days,
+    assemble_rows,
+    box_matrix,
+)
+
+logger = logging.getLogger(__name__)
+
+# Below this many dates the pool costs more than it saves
+POOL_MIN_DATES = 365
+
+
+def load_box_matrix(end_date: str) -> Dict[str, Any]:
+    """
+    All box_metrics_unified rows on or before end_date for the boxes the index
+    counts, as box_matrix() column arrays.
+    """
+    from sqlalchemy import text
+
+    engine = _get_sync_engine()
+    with engine.connect() as conn:
+        rows = conn.execute(text(f"""
+            SELECT
+                bmu.booster_box_id,
+                bmu.metric_date,
+                {", ".join("bmu." + f for f in _FIELDS)},
+                bb.product_name
+            FROM box_metrics_unified bmu
+            JOIN booster_boxes bb ON bb.id = bmu.booster_box_id
+            WHERE bmu.metric_date <= CAST(:td AS date)
+              AND {_BOX_FILTER}
+            ORDER BY bmu.booster_box_id, bmu.metric_date
+        """), {"td": end_date}).fetchall()
+    return box_matrix(rows)
+
+
+def _load_stored_index() -> Dict[int, tuple]:
+    """market_index_daily: {date ordinal: (index_value, total_daily_volume_usd, total_active_listings)}."""
+    from sqlalchemy import text
+    engine = _get_sync_engine()
+    with engine.connect() as conn:
+        rows = conn.execute(text("""
+            SELECT metric_date, index_value, total_daily_volume_usd, total_active_listings
+            FROM market_index_daily
+        """)).fetchall()
+    out = {}
+    for r in rows:
+        md = r[0] if isinstance(r[0], date) else date.fromisoformat(str(r[0])[:10])
+        out[md.toordinal()] = tuple(float(v) if v is not None else np.nan for v in r[1:])
+    return out
+
+
+def _aggregate(data: Dict[str, Any], days: np.ndarray, workers: int) -> Dict[str, np.ndarray]:
+    if workers <= 1 or len(days) < POOL_MIN_DATES:
+        return aggregate_days(data, days)
+    chunks = np.array_split(days, workers)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        parts = list(pool.map(aggregate_days, [data] * len(chunks), chunks))
+    return {k: np.concatenate([p[k] for p in parts]) for k in parts[0]}
+
+
+def build_market_index_rows(dates: List[str], workers: int = 1) -> List[Dict[str, Any]]:
+    """
+    market_index_daily rows (upsert_market_index() keyword names) for dates,
+    matching compute_market_index() run for each date oldest first. Dates
+    without any box data are left out, like its "no_data" result.
+    """
+    if not dates:
+        return []
+    days = np.array(sorted({date.fromisoformat(d).toordinal() for d in dates}), dtype=np.int64)
+    data = load_box_matrix(date.fromordinal(int(days[-1])).isoformat())
+    stored = _load_stored_index()
+    agg = _aggregate(data, days, workers)
+    if "index_value" not in agg:
+        return []
+
+    # Calendar arrays from 30 days before the first date
+    lo = int(days[0]) - 30
+    span = int(days[-1]) - lo + 1
+    cal_index = np.full(span, np.nan)
+    cal_volume = np.full(span, np.nan)
+    cal_listings = np.full(span, np.nan)
+    for day, (iv, tdv, tal) in stored.items():
+        if lo <= day <= days[-1]:
+            cal_index[day - lo], cal_volume[day - lo], cal_listings[day - lo] = iv, tdv, tal
+    ci = days - lo
+    keep = agg["boxes"] > 0
+    # The per-date upsert COALESCEs, so a NULL computed value keeps the stored one
+    index_value = agg["index_value"]
+    cal_index[ci[keep]] = np.where(np.isnan(index_value[keep]), cal_index[ci[keep]], index_value[keep])
+    cal_volume[ci[keep]] = agg["total_daily_volume"][keep]
+    cal_listings[ci[keep]] = agg["total_active_listings"][keep]
+
+    # daily_volume_usd summed over all rows per calendar day, then over [d-6, d]
+    in_window = (data["row_day"] >= lo - 6) & (data["row_day"] <= days[-1])
+    per_day = np.bincount(
+        data["row_day"][in_window] - (lo - 6),
+        weights=np.nan_to_num(data["daily_volume_usd"][in_window]),
+        minlength=span + 6,
+    )
+    vol_7d = np.lib.stride_tricks.sliding_window_view(per_day, 7).sum(axis=1)
+
+    return assemble_rows(
+        days,
+        agg,
+        data["box_ids"],
+        past_index={k: cal_index[ci - k] for k in (1, 7, 30)},
+        previous_volume=cal_volume[ci - 1],
+        previous_listings=cal_listings[ci - 1],
+        volume_7d=vol_7d[ci],
+        volume_prev_7d=vol_7d[ci - 7],
+    )
+
+
+def compute_market_index_range(dates: List[str], workers: int = 1) -> dict:
+    """Compute and bulk-upsert market_index_daily for dates. Returns a summary dict."""
+    from app.services.market_index_writer import upsert_market_index_many
+
+    started = datetime.now()
+    logger.info(f"Market index range: {len(dates)} dates, workers={workers}")
+    rows = build_market_index_rows(dates, workers=workers)
+    written = upsert_market_index_many(rows)
+    summary = {
+        "dates": len(dates),
+        "computed": len(rows),
+        "no_data": len(set(dates)) - len(rows),
+        "db_upserted": written,
+        "elapsed_s": round((datetime.now() - started).total_seconds(), 2),
+    }
+    logger.info(f"Market index range complete: {summary}")
+    return summary
+
+
+if __name__ == "__main__":
+    import argparse
+    from datetime import timedelta
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(levelname)s - %(message)s",
+        handlers=[logging.StreamHandler()],
+    )
+
+    parser = argparse.ArgumentParser(description="Market index for a date range (bulk)")
+    parser.add_argument("--start", type=str, required=True, help="First date (YYYY-MM-DD)")
+    parser.add_argument("--end", type=str, default=None, help="Last date (YYYY-MM-DD). Defaults to today.")
+    parser.add_argument("--workers", type=int, default=1, help="Process pool size for long ranges")
+    args = parser.parse_args()
+
+    first = date.fromisoformat(args.start)
+    last = date.fromisoformat(args.end) if args.end else date.today()
+    all_dates = [(first + timedelta(days=i)).isoformat() for i in range((last - first).days + 1)]
+    print(json.dumps(compute_market_index_range(all_dates, workers=args.workers), indent=2))
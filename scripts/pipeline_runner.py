@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+"""
+Pipeline Runner
+---------------
+Small dependency-graph executor for the daily refresh. Each phase is a node
+with explicit upstream dependencies; nodes whose dependencies are satisfied
+start immediately, so independent API-bound phases (Apify, SerpApi, listings
+scraper) overlap and wall time approaches the slowest chain instead of the sum.
+
+Per node:
+  deps        names of nodes whose output this node needs
+  timeout     seconds before the node is marked timed_out. Python threads cannot be
+              killed, so the abandoned thread keeps its parallel slot and resources,
+              and dependents (of a non-fatal node) start only once it has exited;
+              its late result is discarded
+  grace       seconds after the timeout to wait for that thread (DEFAULT_GRACE). A
+              thread still alive then is abandoned: it releases its slot and
+              resources and dependents start, so a hung call cannot block the run
+  fatal       failure stops every node that has not started yet
+  resources   named slots limited by resource_limits (e.g. one "browser" at a time)
+
+Nodes run in daemon threads, so blocking code (sync SQLAlchemy, httpx, asyncio.run
+for Playwright) works unchanged. run() returns a summary with a per-node timeline;
+on_node_done(row, started_at) is called from the scheduling thread with a node's
+timeline row as soon as it reaches a final status, so callers can persist
+per-phase results before the whole run ends (or crashes).
+
+Used by scripts/daily_refresh.py.
+"""
+from __future__ import annotations
+
+import logging
+import threading
+import time
+import traceback
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+TIMED_OUT = "timed_out"
+SKIPPED = "skipped"
+CANCELLED = "cancelled"  # not started because a fatal node failed
+
+_DONE = (SUCCEEDED, FAILED, TIMED_OUT, SKIPPED, CANCELLED)
+
+DEFAULT_GRACE = 300.0
+
+
+class PipelineNode:
+    """One phase in the pipeline. func receives {dep_name: dep_result} and returns its result."""
+
+    def __init__(
+        self,
+        name: str,
+        func: Callable[[Dict[str, Any]], Any],
+        deps: Iterable[str] = (),
+        timeout: Optional[float] = None,
+        fatal: bool = True,
+        resources: Iterable[str] = (),
+        skip: bool = False,
+        grace: float = DEFAULT_GRACE,
+    ):
+        self.name = name
+        self.func = func
+        self.deps: Tuple[str, ...] = tuple(deps)
+        self.timeout = timeout
+        self.fatal = fatal
+        self.resources: Tuple[str, ...] = tuple(resources)
+        self.skip = skip
+        self.grace = grace
+        # Runtime state
+        self.status = PENDING
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.started_at: Optional[float] = None
+        self.ended_at: Optional[float] = None
+        self.alive = False  # thread still executing func (also after a timeout)
+        self.abandoned = False  # timed out and still alive after grace
+
+    @property
+    def holding(self) -> bool:
+        """Occupies a parallel slot and its resources: running, or timed out with its thread alive within grace."""
+        return self.status == RUNNING or (self.alive and not self.abandoned)
+
+
+class PipelineRunner:
+    """Executes PipelineNodes respecting dependencies, timeouts and concurrency limits."""
+
+    def __init__(
+        self,
+        nodes: List[PipelineNode],
+        max_parallel: int = 3,
+        resource_limits: Optional[Dict[str, int]] = None,
+        poll_interval: float = 0.5,
+        on_node_done: Optional[Callable[[Dict[str, Any], datetime], None]] = None,
+    ):
+        self.nodes: Dict[str, PipelineNode] = {}
+        for n in nodes:
+            if n.name in self.nodes:
+                raise ValueError(f"Duplicate pipeline node: {n.name}")
+            self.nodes[n.name] = n
+        for n in nodes:
+            for d in n.deps:
+                if d not in self.nodes:
+                    raise ValueError(f"Node {n.name} depends on unknown node {d}")
+        self._check_acyclic()
+        self.max_parallel = max(1, max_parallel)
+        self.resource_limits = resource_limits or {}
+        self.poll_interval = poll_interval
+        self.on_node_done = on_node_done
+        self._reported: set = set()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._t0: Optional[float] = None
+
+    def _check_acyclic(self) -> None:
+        visiting, done = set(), set()
+
+        def visit(name: str, path: Tuple[str, ...]) -> None:
+            if name in done:
+                return
+            if name in visiting:
+                raise ValueError(f"Pipeline cycle: {' -> '.join(path + (name,))}")
+            visiting.add(name)
+            for d in self.nodes[name].deps:
+                visit(d, path + (name,))
+            visiting.discard(name)
+            done.add(name)
+
+        for name in self.nodes:
+            visit(name, ())
+
+    # ── scheduling ──────────────────────────────────────────────────────────
+
+    def _resources_in_use(self) -> Dict[str, int]:
+        used: Dict[str, int] = {}
+        for n in self.nodes.values():
+            if n.holding:
+                for r in n.resources:
+                    used[r] = used.get(r, 0) + 1
+        return used
+
+    def _ready(self, node: PipelineNode) -> Optional[str]:
+        """None if node can start now; otherwise 'wait' or the terminal status to assign."""
+        for d in node.deps:
+            dep = self.nodes[d]
+            if dep.status not in _DONE:
+                return "wait"
+            # A timed-out non-fatal dep may still be writing what this node reads
+            if dep.holding and dep.status == TIMED_OUT and not dep.fatal:
+                return "wait"
+            # A failed fatal dependency cancels dependents; a failed non-fatal one does not
+            if dep.status in (FAILED, TIMED_OUT, CANCELLED) and dep.fatal:
+                return CANCELLED
+            if dep.status == CANCELLED:
+                return CANCELLED
+        return None
+
+    def _run_node(self, node: PipelineNode, inputs: Dict[str, Any]) -> None:
+        try:
+            result = node.func(inputs)
+            with self._lock:
+                if node.status == RUNNING:
+                    node.result = result
+                    node.status = SUCCEEDED
+                    node.ended_at = time.monotonic()
+        except Exception as e:
+            with self._lock:
+                if node.status == RUNNING:
+                    node.error = str(e)
+                    node.status = FAILED
+                    node.ended_at = time.monotonic()
+            logger.error(f"Pipeline node {node.name} failed: {e}")
+            logger.error(traceback.format_exc())
+        finally:
+            with self._lock:
+                node.alive = False
+                if node.ended_at is None:
+                    node.ended_at = time.monotonic()
+                elif node.status == TIMED_OUT:
+                    logger.warning(
+                        f"Pipeline node {node.name} thread exited "
+                        f"{time.monotonic() - node.ended_at:.1f}s after its timeout"
+                    )
+            self._wake.set()
+
+    def _fatal_failure(self) -> Optional[PipelineNode]:
+        for n in self.nodes.values():
+            if n.fatal and n.status in (FAILED, TIMED_OUT):
+                return n
+        return None
+
+    def run(self) -> Dict[str, Any]:
+        self._t0 = time.monotonic()
+        started_wall = datetime.now()
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                # Timeouts
+                for n in self.nodes.values():
+                    if n.status == RUNNING and n.timeout and now - n.started_at > n.timeout:
+                        n.status = TIMED_OUT
+                        n.error = f"timed out after {n.timeout:g}s"
+                        n.ended_at = now
+                        logger.error(f"Pipeline node {n.name} {n.error}")
+                    elif n.status == TIMED_OUT and n.holding and now - n.ended_at > n.grace:
+                        n.abandoned = True
+                        n.error = f"{n.error}; thread abandoned after {n.grace:g}s grace"
+                        logger.error(f"Pipeline node {n.name} thread still running {n.grace:g}s after its timeout; abandoned")
+                fatal = self._fatal_failure()
+                # Timed-out threads still hold their slot until they exit (or grace ends)
+                running = [n for n in self.nodes.values() if n.holding]
+                to_start: List[PipelineNode] = []
+                used = self._resources_in_use()
+                for n in self.nodes.values():
+                    if n.status != PENDING:
+                        continue
+                    if fatal is not None:
+                        n.status = CANCELLED
+                        n.error = f"not started: {fatal.name} failed"
+                        continue
+                    if n.skip:
+                        n.status = SKIPPED
+                        n.started_at = n.ended_at = now
+                        continue
+                    verdict = self._ready(n)
+                    if verdict == "wait":
+                        continue
+                    if verdict is not None:
+                        n.status = verdict
+                        n.error = "upstream failed"
+                        continue
+                    if len(running) + len(to_start) >= self.max_parallel:
+                        continue
+                    if any(used.get(r, 0) >= self.resource_limits.get(r, 1 << 30) for r in n.resources):
+                        continue
+                    for r in n.resources:
+                        used[r] = used.get(r, 0) + 1
+                    n.status = RUNNING
+                    n.alive = True
+                    n.started_at = now
+                    to_start.append(n)
+                pending = any(n.status in (PENDING, RUNNING) for n in self.nodes.values())
+                finished = [n for n in self.nodes.values() if n.status in _DONE and n.name not in self._reported]
+                self._reported.update(n.name for n in finished)
+                finished_rows = [self._timeline_row(n) for n in finished]
+            self._notify_done(finished_rows, started_wall)
+            for n in to_start:
+                inputs = {d: self.nodes[d].result for d in n.deps}
+                logger.info(f"▶ Pipeline node {n.name} started (+{n.started_at - self._t0:.1f}s)")
+                threading.Thread(target=self._run_node, args=(n, inputs), name=f"pipeline-{n.name}", daemon=True).start()
+            if not pending:
+                break
+            if not to_start:
+                self._wake.wait(self.poll_interval)
+                self._wake.clear()
+        return self.summary(started_wall)
+
+    # ── reporting ───────────────────────────────────────────────────────────
+
+    def _notify_done(self, rows: List[Dict[str, Any]], started_wall: datetime) -> None:
+        if self.on_node_done is None:
+            return
+        for row in rows:
+            try:
+                self.on_node_done(row, started_wall)
+            except Exception as e:
+                logger.warning(f"on_node_done failed for {row['node']}: {e}")
+
+    def _timeline_row(self, n: PipelineNode) -> Dict[str, Any]:
+        t0 = self._t0 or 0.0
+        start = round(n.started_at - t0, 2) if n.started_at is not None else None
+        end = round(n.ended_at - t0, 2) if n.ended_at is not None else None
+        return {
+            "node": n.name,
+            "status": n.status,
+            "deps": list(n.deps),
+            "start_offset_s": start,
+            "end_offset_s": end,
+            "duration_s": round(end - start, 2) if start is not None and end is not None else None,
+            "error": n.error,
+        }
+
+    def timeline(self) -> List[Dict[str, Any]]:
+        rows = [self._timeline_row(n) for n in self.nodes.values()]
+        rows.sort(key=lambda r: (r["start_offset_s"] is None, r["start_offset_s"] or 0))
+        return rows
+
+    def summary(self, started_wall: Optional[datetime] = None) -> Dict[str, Any]:
+        tl = self.timeline()
+        wall = max((r["end_offset_s"] or 0) for r in tl) if tl else 0.0
+        busy = sum((r["duration_s"] or 0) for r in tl)
+        return {
+            "success": all(n.status in (SUCCEEDED, SKIPPED) or not n.fatal for n in self.nodes.values()),
+            "started_at": started_wall.isoformat() if started_wall else None,
+            "wall_seconds": round(wall, 2),
+            "sum_of_phases_seconds": round(busy, 2),
+            "timeline": tl,
+        }
+
+    def results(self) -> Dict[str, Any]:
+        return {name: n.result for name, n in self.nodes.items()}
+
+    def log_timeline(self) -> None:
+        """ASCII Gantt of the run (60 columns wide) for the cron log."""
+        tl = self.timeline()
+        wall = max((r["end_offset_s"] or 0) for r in tl) if tl else 0.0
+        width = 60
+        logger.info("Pipeline timeline:")
+        for r in tl:
+            if r["start_offset_s"] is None or wall <= 0:
+                bar = " " * width
+            else:
+                a = int(r["start_offset_s"] / wall * width)
+                b = max(a + 1, int((r["end_offset_s"] or wall) / wall * width))
+                bar = " " * a + "█" * (b - a) + " " * (width - b)
+            dur = f"{r['duration_s']:.1f}s" if r["duration_s"] is not None else "-"
+            logger.info(f"  {r['node']:<16} |{bar}| {r['status']:<9} {dur}")
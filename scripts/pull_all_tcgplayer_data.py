@@ -1,9 +1,8 @@
 #!/usr/bin/env python3
 """
 Pull sales data from TCGplayer via Apify for all 18 booster boxes.
-Updates historical_entries.json with fresh data.
+Updates the local historical entries store (app/services/history_store.py) with fresh data.
 """
-import json
 import os
 import sys
 from datetime import datetime
@@ -15,41 +14,27 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 from dotenv import load_dotenv
 load_dotenv()
 
+from app.services.history_store import history_store
 from app.services.tcgplayer_apify import TCGplayerApifyService, TCGPLAYER_URLS
 
 # Paths
-DATA_DIR = Path(__file__).parent.parent / "data"
-HISTORICAL_FILE = DATA_DIR / "historical_entries.json"
+HISTORICAL_FILE = history_store.path
 
 
 def load_historical_entries():
-    """Load existing historical entries."""
-    if HISTORICAL_FILE.exists():
-        with open(HISTORICAL_FILE, "r") as f:
-            return json.load(f)
-    return []
+    """Open the historical entries store."""
+    return history_store
 
 
 def save_historical_entries(entries):
-    """Save historical entries."""
-    with open(HISTORICAL_FILE, "w") as f:
-        json.dump(entries, f, indent=2)
-    print(f"💾 Saved {len(entries)} entries to {HISTORICAL_FILE}")
+    """Write back the entries found or created this run."""
+    written = entries.flush()
+    print(f"💾 Saved {written} entries to {HISTORICAL_FILE}")
 
 
 def find_or_create_entry(entries, box_id, date_str):
-    """Find existing entry for box+date or create new one."""
-    for entry in entries:
-        if entry.get("box_id") == box_id and entry.get("date") == date_str:
-            return entry, False  # Found existing
-    
-    # Create new entry
-    new_entry = {
-        "box_id": box_id,
-        "date": date_str,
-    }
-    entries.append(new_entry)
-    return new_entry, True  # Created new
+    """Find existing entry for box+date (indexed lookup) or create new one."""
+    return entries.checkout(box_id, date_str)
 
 
 def pull_all_boxes():
@@ -69,7 +54,7 @@ def pull_all_boxes():
     
     # Load existing data
     entries = load_historical_entries()
-    print(f"📂 Loaded {len(entries)} existing historical entries\n")
+    print(f"📂 {entries.count()} existing historical entries\n")
     
     # Track results
     results = []
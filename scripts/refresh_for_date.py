@@ -1,12 +1,14 @@
 #!/usr/bin/env python3
 """
 Run full daily refresh for a specific target date.
-Usage: python scripts/refresh_for_date.py 2026-02-02
+Usage: python scripts/refresh_for_date.py 2026-02-02 [--fresh]
+
+Apify responses already fetched today are replayed from the response cache
+(app/services/response_cache.py); --fresh forces new actor runs.
 """
 
 import sys
 import os
-import json
 import asyncio
 from pathlib import Path
 from datetime import datetime
@@ -30,6 +32,7 @@ def run_apify_refresh(target_date: str):
     from apify_client import ApifyClient
     from app.services.tcgplayer_apify import (
         TCGPLAYER_URLS,
+        fetch_sales_history_items,
         compute_daily_sales_from_buckets,
         compute_this_week_daily_rate,
         get_current_incomplete_bucket,
@@ -46,14 +49,8 @@ def run_apify_refresh(target_date: str):
 
     client = ApifyClient(api_token)
 
-    # Load existing historical data
-    data_dir = project_root / "data"
-    historical_file = data_dir / "historical_entries.json"
-
-    historical = {}
-    if historical_file.exists():
-        with open(historical_file) as f:
-            historical = json.load(f)
+    # Existing historical data (local store, app/services/history_store.py)
+    from app.services.history_store import history_store
 
     success_count = 0
     error_count = 0
@@ -68,8 +65,7 @@ def run_apify_refresh(target_date: str):
         logger.info(f"Fetching {name}...")
 
         try:
-            run = client.actor("scraped/tcgplayer-sales-history").call(run_input={"url": url})
-            items = list(client.dataset(run["defaultDatasetId"]).iterate_items())
+            items = fetch_sales_history_items(client, url)
 
             if not items:
                 logger.warning(f"  No data for {name}")
@@ -96,7 +92,7 @@ def run_apify_refresh(target_date: str):
             current_bucket_qty = _safe_int(incomplete.get("quantitySold")) if incomplete else None
 
             # Delta tracking
-            prev_entry = get_previous_entry(historical, box_id, target_date)
+            prev_entry = get_previous_entry({box_id: history_store.entries(box_id)}, box_id, target_date)
             boxes_sold_today = weekly_rate
             delta_source = "weekly_rate"
 
@@ -111,18 +107,10 @@ def run_apify_refresh(target_date: str):
                         boxes_sold_today = delta
                         delta_source = source
 
-            # Find/update entry for target_date
-            if box_id not in historical:
-                historical[box_id] = []
-
-            # Find existing entry for target_date
-            existing_entry = None
-            for entry in historical[box_id]:
-                if entry.get("date") == target_date:
-                    existing_entry = entry
-                    break
+            # Find existing entry for target_date, or a new one (written by flush() below)
+            existing_entry, created = history_store.checkout(box_id, target_date)
 
-            if existing_entry:
+            if not created:
                 # Update existing entry
                 existing_entry["boxes_sold_today"] = boxes_sold_today
                 existing_entry["boxes_sold_today"] = boxes_sold_today
@@ -134,8 +122,8 @@ def run_apify_refresh(target_date: str):
                 existing_entry["daily_volume_usd"] = round(boxes_sold_today * market_price, 2)
                 existing_entry["apify_refresh_timestamp"] = datetime.now().isoformat()
             else:
-                # Create new entry
-                new_entry = {
+                # Fill the new entry
+                existing_entry.update({
                     "date": target_date,
                     "source": "apify_tcgplayer",
                     "boxes_sold_today": boxes_sold_today,
@@ -147,8 +135,7 @@ def run_apify_refresh(target_date: str):
                     "delta_source": delta_source,
                     "daily_volume_usd": round(boxes_sold_today * market_price, 2),
                     "timestamp": datetime.now().isoformat(),
-                }
-                historical[box_id].append(new_entry)
+                })
 
             logger.info(f"  ✅ {name}: {boxes_sold_today} sold today @ ${market_price:.2f}")
             success_count += 1
@@ -158,8 +145,7 @@ def run_apify_refresh(target_date: str):
             error_count += 1
 
     # Save
-    with open(historical_file, "w") as f:
-        json.dump(historical, f, indent=2)
+    history_store.flush()
 
     logger.info(f"\nPhase 1 complete: {success_count} success, {error_count} errors")
     return success_count, error_count
@@ -225,6 +211,9 @@ def main():
         sys.exit(1)
 
     target_date = sys.argv[1]
+    if "--fresh" in sys.argv:
+        from app.services.response_cache import response_cache
+        response_cache.mode_override = "refresh"
 
     # Validate date format
     try:
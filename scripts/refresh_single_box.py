@@ -1,12 +1,14 @@
 #!/usr/bin/env python3
 """
 Refresh Apify sales data for a single box.
-Usage: python scripts/refresh_single_box.py op-13
+Usage: python scripts/refresh_single_box.py op-13 [--fresh]
+
+Replays today's cached Apify response if there is one (app/services/response_cache.py);
+--fresh forces a new actor run.
 """
 
 import sys
 import os
-import json
 from pathlib import Path
 from datetime import datetime
 
@@ -17,6 +19,7 @@ sys.path.insert(0, str(project_root))
 from app.services.tcgplayer_apify import (
     TCGplayerApifyService,
     TCGPLAYER_URLS,
+    fetch_sales_history_items,
     compute_daily_sales_from_buckets,
     compute_this_week_daily_rate,
     get_current_incomplete_bucket,
@@ -58,6 +61,9 @@ def main():
         sys.exit(1)
 
     box_name = sys.argv[1].lower()
+    if "--fresh" in sys.argv:
+        from app.services.response_cache import response_cache
+        response_cache.mode_override = "refresh"
 
     if box_name not in BOX_SHORT_NAMES:
         print(f"Unknown box: {box_name}")
@@ -73,14 +79,9 @@ def main():
     print(f"URL: {config['url']}")
     print(f"=" * 60)
 
-    # Load existing historical data
-    data_dir = project_root / "data"
-    historical_file = data_dir / "historical_entries.json"
-
-    historical = {}
-    if historical_file.exists():
-        with open(historical_file) as f:
-            historical = json.load(f)
+    # Existing historical data (local store, app/services/history_store.py)
+    from app.services.history_store import history_store
+    historical = {box_id: history_store.entries(box_id)}
 
     today = datetime.now().strftime("%Y-%m-%d")
 
@@ -98,8 +99,7 @@ def main():
     print(f"\nFetching from Apify...")
 
     try:
-        run = client.actor("scraped/tcgplayer-sales-history").call(run_input={"url": config["url"]})
-        items = list(client.dataset(run["defaultDatasetId"]).iterate_items())
+        items = fetch_sales_history_items(client, config["url"])
 
         if not items:
             print("ERROR: No data returned from Apify")
@@ -143,7 +143,7 @@ def main():
         # Get previous entry for delta computation
         prev_entry = get_previous_entry(historical, box_id, today)
         if prev_entry:
-            print(f"\n📂 PREVIOUS ENTRY (from historical_entries.json):")
+            print(f"\n📂 PREVIOUS ENTRY (from {history_store.path.name}):")
             print(f"  Date: {prev_entry.get('date')}")
             print(f"  current_bucket_start: {prev_entry.get('current_bucket_start')}")
             print(f"  current_bucket_qty: {prev_entry.get('current_bucket_qty')}")
@@ -180,7 +180,7 @@ def main():
 
         # Ask to update
         print(f"\n" + "=" * 60)
-        response = input("Update historical_entries.json with this data? [y/N]: ")
+        response = input(f"Update {history_store.path.name} with this data? [y/N]: ")
 
         if response.lower() == 'y':
             # Build new entry
@@ -198,16 +198,10 @@ def main():
                 "timestamp": datetime.now().isoformat(),
             }
 
-            # Update historical
-            if box_id not in historical:
-                historical[box_id] = []
-            historical[box_id] = [e for e in historical[box_id] if e.get("date") != today]
-            historical[box_id].append(new_entry)
-
-            with open(historical_file, "w") as f:
-                json.dump(historical, f, indent=2)
+            # Replace today's entries for the box
+            history_store.replace_date(box_id, today, new_entry)
 
-            print(f"✅ Updated historical_entries.json")
+            print(f"✅ Updated {history_store.path}")
         else:
             print("Skipped update.")
 